@@ -1,95 +1,134 @@
-##  test_json_processor
-#       2021-10-09
-#   Perception scrubbing and gif Operational 
-#
-#       2021-10-10
-#   Defining action class. Dig deep on how the json is structured
-#       2021-10-11
-#   Refactor perception class to work from both a Game class or a list of updates directly
-#       2021-10-13
-#   Import all json from folder
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   IMPORTS
-#--------------------------------------------------------------------------------------------------------------------------------
-
-import logging
-import os
-
-#Replay class takes care of loading and conversions from a replay.json created by lux-ai to Perception and Action classes
-from big_no_brainer.perception import Perception
-from big_no_brainer.action import Action
-from big_no_brainer.replay import Replay
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   CONFIGURATION
-#--------------------------------------------------------------------------------------------------------------------------------
-
-REPLAY_FOLDER = "replays"
-REPLAY_FILE = "27879876.json"
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   Helper functions
-#--------------------------------------------------------------------------------------------------------------------------------
-
-def get_replays( is_folder : str ) -> list:
-    """ Search in a folder for replays and return a list of all replay files with .json extension
-    Args:
-        is_folder (str): folder with replays
-    Returns:
-        list: list of replay.json files
-    """
-    #folder with replays
-    s_filepath = os.path.join( os.getcwd(), REPLAY_FOLDER )
-    ls_files = os.listdir( s_filepath )
-    #search for all filenames in the list for files with a .json extension
-    ls_replays = [ s_file for s_file in ls_files if s_file.find(".json") > -1 ]
-    logging.debug(f"Replays found: {len(ls_replays)} | {ls_replays}")
-
-    return ls_replays
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   BNB Big No Brainer imitation net
-#--------------------------------------------------------------------------------------------------------------------------------
-#   Replay.json are concatenated and fed to the training of the BNB net
-
-def mockup_train_net( lc_features : list, lc_labels : list ) -> bool:
-    """???
-    Args:
-        lc_features (list): list of Perception, one for each step (turn). Perception.mats shape: feature*size*size
-        lc_labels (list): list of Action, one for each step (turn). Action.mats shape: actions*size*size
-    Returns:
-            bool: False=OK | True=FAIL
-    """
-    logging.debug(f"Features: {len(lc_features)} | Shape: {lc_features[0].status.shape} | Feature Name: {[e_enum.name for e_enum in Perception.E_INPUT_STATUS_VECTOR]}")
-    logging.debug(f"Features: {len(lc_features)} | Shape: {lc_features[0].mats.shape} | Feature Name: {[e_enum.name for e_enum in Perception.E_INPUT_SPACIAL_MATRICIES]}")
-    logging.debug(f"Labels: {len(lc_labels)} | Shape: {lc_labels[0].mats.shape} | Label Name: {[e_enum.name for e_enum in Action.E_OUTPUT_SPACIAL_MATRICIES]}")
-    return False
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   MAIN
-#--------------------------------------------------------------------------------------------------------------------------------
-
-#   if interpreter has the intent of executing this file
-if __name__ == "__main__":
-    logging.basicConfig( level=logging.DEBUG, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
-    #get a list of replay.json in the folder
-    ls_replays_filename = get_replays( REPLAY_FOLDER )
-    #allocate training set
-    lc_train_perception = list()
-    lc_train_action = list()
-    #scan all replays
-    for s_replay_filename in ls_replays_filename:
-        #Construct Replay
-        c_json_replay = Replay()
-        #load the json file containing the replay
-        c_json_replay.json_load( REPLAY_FOLDER, REPLAY_FILE )
-        #From a replay.json extract a list of Perception and one list of Action per player. lists have one entry per step (turn) in the game
-        lc_perceptions, lc_action_p0, lc_action_p1 =  c_json_replay.json_to_perception_action()        
-        #DUMB!!! COncantenate all Perception/Action from P0
-        lc_train_perception += lc_perceptions
-        lc_train_action += lc_action_p0
-
-    mockup_train_net( lc_train_perception, lc_train_action )
-
+##  test_json_processor
+#       2021-10-09
+#   Perception scrubbing and gif Operational 
+#
+#       2021-10-10
+#   Defining action class. Dig deep on how the json is structured
+#       2021-10-11
+#   Refactor perception class to work from both a Game class or a list of updates directly
+#       2021-10-13
+#   Import all json from folder
+#   Replays of the folder converted in parallel into dense arrays
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import os
+
+import numpy as np
+
+#replay_pool converts the replay.json created by lux-ai into the arrays of Perception and Action, in parallel
+from big_no_brainer.perception import Perception
+from big_no_brainer.action import Action
+from big_no_brainer.replay_pool import convert_replays
+from big_no_brainer.dtype_policy import DTYPE_POLICIES
+from big_no_brainer.augmentation import DIHEDRAL_VARIANTS, augment_batch
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+#player whose Perception and Action are the training set
+REPLAY_PLAYER = 0
+#processes converting the replays, None: one per core. replays sent to a process at once
+CONVERSION_WORKERS = None
+CONVERSION_CHUNK_SIZE = 1
+#dtypes of the training set. see big_no_brainer.dtype_policy: full, compact, half, binary
+DTYPE_POLICY = "half"
+#each sample of a batch is served with one of the 8 flips/rotations, drawn at random. see big_no_brainer.augmentation
+AUGMENT_DIHEDRAL = True
+#samples of a training batch. every turn is served once per epoch
+TRAIN_BATCH_SIZE = 64
+TRAIN_EPOCHS = 1
+TRAIN_SEED = 0
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Helper functions
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def get_replays( is_folder : str ) -> list:
+    """ Search in a folder for replays and return a list of all replay files with .json extension
+    Args:
+        is_folder (str): folder with replays
+    Returns:
+        list: list of replay.json files
+    """
+    #folder with replays
+    s_filepath = os.path.join( os.getcwd(), REPLAY_FOLDER )
+    ls_files = os.listdir( s_filepath )
+    #search for all filenames in the list for files with a .json extension
+    ls_replays = [ s_file for s_file in ls_files if s_file.find(".json") > -1 ]
+    logging.debug(f"Replays found: {len(ls_replays)} | {ls_replays}")
+
+    return ls_replays
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BNB Big No Brainer imitation net
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Replay.json are concatenated and fed to the training of the BNB net
+
+def mockup_train_net( ian_features : np.ndarray, ian_status : np.ndarray, ian_labels : np.ndarray ) -> bool:
+    """???
+    Args:
+        ian_features (np.ndarray): Perception.mats of every step (turn). shape: turns*feature*size*size
+        ian_status (np.ndarray): Perception.status of every step (turn). shape: turns*status
+        ian_labels (np.ndarray): Action.mats of every step (turn). shape: turns*actions*size*size
+    Returns:
+            bool: False=OK | True=FAIL
+    """
+    logging.debug(f"Features: {len(ian_status)} | Shape: {ian_status.shape[1:]} | Feature Name: {[e_enum.name for e_enum in Perception.E_INPUT_STATUS_VECTOR]}")
+    logging.debug(f"Features: {len(ian_features)} | Shape: {ian_features.shape[1:]} | Feature Name: {[e_enum.name for e_enum in Perception.E_INPUT_SPACIAL_MATRICIES]}")
+    logging.debug(f"Labels: {len(ian_labels)} | Shape: {ian_labels.shape[1:]} | Label Name: {[e_enum.name for e_enum in Action.E_OUTPUT_SPACIAL_MATRICIES]}")
+    logging.debug(f"Dtype policy: {DTYPE_POLICY} | Features: {ian_features.dtype} | Status: {ian_status.dtype} | Labels: {ian_labels.dtype}")
+    n_variants = DIHEDRAL_VARIANTS if AUGMENT_DIHEDRAL else 1
+    c_rng = np.random.default_rng( TRAIN_SEED )
+    #batch buffers reused by every batch
+    an_batch_features = np.empty( (TRAIN_BATCH_SIZE,) +ian_features.shape[1:], dtype=ian_features.dtype )
+    an_batch_labels = np.empty( (TRAIN_BATCH_SIZE,) +ian_labels.shape[1:], dtype=ian_labels.dtype )
+    n_batches = 0
+    for n_epoch in range( TRAIN_EPOCHS ):
+        an_order = c_rng.permutation( len(ian_features) )
+        for n_start in range( 0, len(an_order), TRAIN_BATCH_SIZE ):
+            an_samples = an_order[n_start:n_start +TRAIN_BATCH_SIZE]
+            #variant 0 is the identity
+            an_variants = c_rng.integers( n_variants, size=len(an_samples) )
+            an_features, an_labels = augment_batch( ian_features, ian_labels, an_samples, an_variants, an_batch_features[:len(an_samples)], an_batch_labels[:len(an_samples)] )
+            if an_features is None:
+                return True
+            #the status vector has no orientation
+            an_status = ian_status[an_samples]
+            #a training step of the net on an_features, an_status, an_labels goes here
+            n_batches += 1
+    logging.debug(f"Augmentation: {n_variants} variants | Epochs: {TRAIN_EPOCHS} | Batches: {n_batches} of {TRAIN_BATCH_SIZE}")
+    return False
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.DEBUG, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    #get a list of replay.json in the folder
+    ls_replays_filename = get_replays( REPLAY_FOLDER )
+    #allocate training set
+    lan_train_features = list()
+    lan_train_status = list()
+    lan_train_labels = list()
+    #convert all replays in parallel. arrays of each replay come back in the order of the files, failed replays are skipped
+    for c_game in convert_replays( REPLAY_FOLDER, ls_replays_filename, DTYPE_POLICIES[DTYPE_POLICY], REPLAY_PLAYER, CONVERSION_WORKERS, CONVERSION_CHUNK_SIZE ):
+        if c_game.error is not None:
+            continue
+        lan_train_features.append( c_game.mats )
+        lan_train_status.append( c_game.status )
+        lan_train_labels.append( c_game.actions )
+
+    if len(lan_train_features) == 0:
+        logging.critical(f"No replay could be converted in: {REPLAY_FOLDER}")
+    else:
+        mockup_train_net( np.concatenate( lan_train_features ), np.concatenate( lan_train_status ), np.concatenate( lan_train_labels ) )
+
     
\ No newline at end of file
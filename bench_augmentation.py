@@ -0,0 +1,91 @@
+##  @package bench_augmentation
+#   Memory and throughput benchmark of the dihedral augmentation of Perception and Action
+#   A replay is converted into one Perception and one Action per turn. The 8 flips/rotations of every pair are served as views by
+#   big_no_brainer.augmentation, and compared with materializing them as copies. Reports the memory of both and the time to
+#   assemble a training batch of random (turn, variant) pairs
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+from time import perf_counter
+
+import numpy as np
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.dtype_policy import DTYPE_POLICIES
+from big_no_brainer.augmentation import DIHEDRAL_VARIANTS, dihedral_view, dihedral_action_view, augment_batch
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27883823.json"
+DTYPE_POLICY = "half"
+BATCH_SIZE = 256
+BATCH_REPEAT = 20
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def bench_augmentation( is_folder : str, is_filename : str ) -> bool:
+    """Serve the 8 variants of every turn of a replay.json as views and as copies, report footprint and batch assembly time
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay( DTYPE_POLICIES[DTYPE_POLICY] )
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    #the conversion logs the action totals of each player
+    logging.getLogger().setLevel( logging.WARNING )
+    lc_perceptions, lc_actions_p0, _ = c_replay.json_to_perception_action()
+    logging.getLogger().setLevel( logging.INFO )
+    an_features = np.stack( [ c_perception.mats for c_perception in lc_perceptions ] )
+    an_labels = np.stack( [ c_action.mats for c_action in lc_actions_p0 ] )
+    n_turns = len(an_features)
+    logging.info(f"{is_filename} | Turns: {n_turns} | Features: {an_features.dtype} | Labels: {an_labels.dtype}")
+
+    #views: every variant shares the memory of the source arrays
+    n_start = perf_counter()
+    lt_views = [ (dihedral_view( an_features, n_variant ), dihedral_action_view( an_labels, n_variant )) for n_variant in range(DIHEDRAL_VARIANTS) ]
+    n_views = perf_counter() -n_start
+    x_fail = not all( np.shares_memory( an_view, an_features ) and np.shares_memory( t_action[0], an_labels ) for an_view, t_action in lt_views )
+    n_source = an_features.nbytes +an_labels.nbytes
+    logging.info(f"Views | {DIHEDRAL_VARIANTS} variants: {1e3*n_views:.3f}ms | Held: {n_source/2**20:.2f}MB | Shared: {not x_fail}")
+
+    #copies: every variant materialized
+    n_start = perf_counter()
+    lt_copies = [ (np.ascontiguousarray( an_view ), t_action[0][:, t_action[1]]) for an_view, t_action in lt_views ]
+    n_copies = perf_counter() -n_start
+    n_held = sum( an_copy.nbytes +an_action.nbytes for an_copy, an_action in lt_copies )
+    logging.info(f"Copies | {DIHEDRAL_VARIANTS} variants: {1e3*n_copies:.3f}ms | Held: {n_held/2**20:.2f}MB x{n_held/n_source:.1f}")
+
+    #training batches of random (turn, variant) pairs, assembled into preallocated buffers
+    c_rng = np.random.default_rng( 0 )
+    an_out_features = np.empty( (BATCH_SIZE,) +an_features.shape[1:], dtype=an_features.dtype )
+    an_out_labels = np.empty( (BATCH_SIZE,) +an_labels.shape[1:], dtype=an_labels.dtype )
+    n_start = perf_counter()
+    for _ in range(BATCH_REPEAT):
+        an_samples = c_rng.integers( n_turns, size=BATCH_SIZE )
+        an_variants = c_rng.integers( DIHEDRAL_VARIANTS, size=BATCH_SIZE )
+        an_batch_features, _ = augment_batch( an_features, an_labels, an_samples, an_variants, an_out_features, an_out_labels )
+        x_fail |= an_batch_features is None
+    n_seconds = (perf_counter() -n_start) /BATCH_REPEAT
+    logging.info(f"Batch | Size: {BATCH_SIZE} | {1e3*n_seconds:.3f}ms per batch | {1e6*n_seconds/BATCH_SIZE:.1f}us per sample")
+
+    return x_fail
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    bench_augmentation( REPLAY_FOLDER, REPLAY_FILE )
@@ -0,0 +1,126 @@
+##  @package bench_batch_environment
+#   Throughput benchmark of the vectorized BatchEnvironment
+#   N games are seeded with the first turn of the replays and stepped in lockstep with random action scores
+#   Reports steps per second of the whole batch, turns per second of the games still running, and complete games per second: the
+#   turns per second over the MAX_DAYS turns of a game. With and without building the observations of both players
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import os
+from time import perf_counter
+
+import numpy as np
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.batch_environment import BatchEnvironment
+from big_no_brainer.action import Action
+from lux.constants import GAME_CONSTANTS
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+#number of games stepped together
+BATCH_SIZES = [ 1, 64, 512 ]
+#turns stepped for each batch size
+BENCH_TURNS = 40
+#random action tensors, reused in rotation
+ACTION_POOL = 4
+#fraction of the tiles that take an action
+ACTION_DENSITY = 0.3
+#turns of a complete game
+GAME_TURNS = GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"]
+SEED = 0
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _load_initial_snapshots( is_folder : str ) -> list:
+    """First turn of every replay of a folder
+    Returns:
+        list(GameSnapshot): one per replay | None if no replay can be loaded
+    """
+    lc_snapshots = list()
+    for s_file in sorted( os.listdir( is_folder ) ):
+        c_replay = Replay()
+        if not s_file.endswith(".json") or c_replay.json_load( is_folder, s_file ):
+            continue
+        try:
+            lc_observations = c_replay._json_observation( c_replay._replay_json )
+        except KeyError as problem:
+            logging.warning(f"Not a replay: {s_file} | missing: {problem}")
+            continue
+        lc_snapshots.append( c_replay._observations_to_snapshots( lc_observations[:1] )[0] )
+    if len(lc_snapshots) == 0:
+        logging.critical(f"No replay in: {is_folder}")
+        return None
+    return lc_snapshots
+
+def _measure( ilc_snapshots : list, in_games : int, ix_perceive : bool ) -> bool:
+    """Step a batch of games with random actions and report the throughput
+    Args:
+        ilc_snapshots (list(GameSnapshot)): initial states, repeated to fill the batch
+        in_games (int): games in the batch
+        ix_perceive (bool): build the observations of both players after each step
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_generator = np.random.default_rng( SEED )
+    t_shape = ( in_games, 2, len(Action.E_OUTPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX'] )
+    #scores above the threshold on a fraction of the tiles
+    lan_actions = [
+        ( c_generator.random( t_shape, dtype=np.float32 ) -(1.0 -ACTION_DENSITY) ) for _ in range( ACTION_POOL )
+    ]
+
+    c_env = BatchEnvironment()
+    if c_env.reset( [ ilc_snapshots[n_game % len(ilc_snapshots)] for n_game in range( in_games ) ] ):
+        return True
+
+    #turns of the games still running. games that are over are not stepped
+    n_game_turns = 0
+    n_start = perf_counter()
+    for n_turn in range( BENCH_TURNS ):
+        n_game_turns += int( (~c_env.ax_done).sum() )
+        if c_env.step( lan_actions[n_turn % ACTION_POOL] ):
+            return True
+        if ix_perceive:
+            c_env.perceive( 0 )
+            c_env.perceive( 1 )
+    n_seconds = perf_counter() -n_start
+
+    logging.info(f"Games: {in_games} | Perceive: {ix_perceive} | Turns: {BENCH_TURNS} | Units: {len(c_env.an_units)} | Done: {int(c_env.ax_done.sum())}")
+    logging.info(f"{BENCH_TURNS/n_seconds:.1f} steps/s | {n_game_turns/n_seconds:.1f} game turns/s | {n_game_turns/n_seconds/GAME_TURNS:.2f} games/s | {1e3*n_seconds/BENCH_TURNS:.2f}ms per step")
+
+    return False
+
+def bench_batch_environment( is_folder : str ) -> bool:
+    """Throughput of BatchEnvironment for each batch size of BATCH_SIZES
+    Args:
+        is_folder (str): folder with the replays that seed the games
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    lc_snapshots = _load_initial_snapshots( is_folder )
+    if lc_snapshots is None:
+        return True
+
+    x_fail = False
+    for n_games in BATCH_SIZES:
+        x_fail |= _measure( lc_snapshots, n_games, False )
+        x_fail |= _measure( lc_snapshots, n_games, True )
+
+    return x_fail
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    bench_batch_environment( REPLAY_FOLDER )
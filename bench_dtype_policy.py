@@ -0,0 +1,91 @@
+##  @package bench_dtype_policy
+#   Memory benchmark of the dtype policies of Perception and Action
+#   A replay is converted into one Perception and two Action per turn under each policy of big_no_brainer.dtype_policy, and kept in
+#   memory like a training set. Reports the bytes of the arrays, the memory held by the whole conversion and whether the compact
+#   arrays hold the same values as the float64 ones
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import tracemalloc
+
+import numpy as np
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.dtype_policy import DTYPE_POLICIES, DTYPE_POLICY_FULL
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27883823.json"
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _measure( ic_policy, is_folder : str, is_filename : str ) -> tuple:
+    """Convert a replay under a dtype policy and measure the memory held by the result
+    Returns:
+        tuple(list, list, list, int, int): perceptions, actions of player 0, actions of player 1, bytes of the arrays, bytes held | None on failure
+    """
+    c_replay = Replay( ic_policy )
+    if c_replay.json_load( is_folder, is_filename ):
+        return None
+    #the decoded json is not part of the measure
+    tracemalloc.start()
+    n_before, _ = tracemalloc.get_traced_memory()
+    lc_perceptions, lc_actions_p0, lc_actions_p1 = c_replay.json_to_perception_action()
+    n_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n_arrays = sum( c_perception.mats.nbytes +c_perception.status.nbytes for c_perception in lc_perceptions )
+    n_arrays += sum( c_action.mats.nbytes for c_action in lc_actions_p0 +lc_actions_p1 )
+    return lc_perceptions, lc_actions_p0, lc_actions_p1, n_arrays, n_after -n_before
+
+def bench_dtype_policy( is_folder : str, is_filename : str ) -> bool:
+    """Convert a replay.json under every dtype policy, report footprint and check the values against the full policy
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    #the conversion logs the action totals of each player. overflow errors are still reported
+    logging.getLogger().setLevel( logging.WARNING )
+    t_full = _measure( DTYPE_POLICY_FULL, is_folder, is_filename )
+    logging.getLogger().setLevel( logging.INFO )
+    if t_full is None:
+        return True
+    lc_full_perceptions, lc_full_p0, lc_full_p1, n_full_arrays, n_full_held = t_full
+    n_turns = len(lc_full_perceptions)
+    logging.info(f"{is_filename} | Turns: {n_turns}")
+
+    x_fail = False
+    for c_policy in DTYPE_POLICIES.values():
+        logging.getLogger().setLevel( logging.WARNING )
+        t_policy = _measure( c_policy, is_folder, is_filename )
+        logging.getLogger().setLevel( logging.INFO )
+        if t_policy is None:
+            return True
+        lc_perceptions, lc_actions_p0, lc_actions_p1, n_arrays, n_held = t_policy
+        #lossless if every value converts back to the float64 one. bool labels only flag the stacked actions
+        x_features = all( np.array_equal( c_perception.mats.astype( np.float64 ), c_full.mats ) and np.array_equal( c_perception.status.astype( np.float64 ), c_full.status ) for c_perception, c_full in zip( lc_perceptions, lc_full_perceptions ) )
+        x_labels = all( np.array_equal( c_action.mats.astype( np.float64 ), c_full.mats ) for c_action, c_full in zip( lc_actions_p0 +lc_actions_p1, lc_full_p0 +lc_full_p1 ) )
+        x_fail |= not x_features
+        logging.info(f"{c_policy.name} | Features: {lc_perceptions[0].mats.dtype} | Status: {lc_perceptions[0].status.dtype} | Labels: {lc_actions_p0[0].mats.dtype}")
+        logging.info(f"{c_policy.name} | Arrays: {n_arrays/2**20:.2f}MB {n_arrays/n_turns/2**10:.1f}KB per turn x{n_full_arrays/n_arrays:.1f} | Held: {n_held/2**20:.2f}MB x{n_full_held/n_held:.1f} | Lossless features: {x_features} labels: {x_labels}")
+
+    return x_fail
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    bench_dtype_policy( REPLAY_FOLDER, REPLAY_FILE )
@@ -0,0 +1,83 @@
+##  @package bench_game_memory
+#   Memory and throughput benchmark of the Game() object graph
+#   A full replay is converted into one Game() per turn, and into one GameSnapshot per turn like Replay does, and kept in memory
+#   Reports the memory held by the list of game states and the time to build it
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import tracemalloc
+from time import perf_counter
+
+from big_no_brainer.replay import Replay
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27883823.json"
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _measure( is_label : str, ifn_convert, ilc_observations : list ) -> bool:
+    """Time a conversion of observations, then measure the memory held by its result
+    Args:
+        is_label (str): name of the conversion in the report
+        ifn_convert (function): list(observations) -> list(states)
+        ilc_observations (list): observations of every turn
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    #time the conversion without the tracing overhead
+    n_start = perf_counter()
+    lc_states = ifn_convert( ilc_observations )
+    n_seconds = perf_counter() -n_start
+    del lc_states
+
+    #measure the memory held by the converted states
+    tracemalloc.start()
+    n_before, _ = tracemalloc.get_traced_memory()
+    lc_states = ifn_convert( ilc_observations )
+    n_after, n_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n_turns = len( lc_states )
+    n_held = n_after -n_before
+    logging.info(f"{is_label} | Turns: {n_turns}")
+    logging.info(f"Conversion: {n_seconds:.3f}s | {1e3*n_seconds/n_turns:.3f}ms per turn")
+    logging.info(f"Held: {n_held/2**20:.2f}MB | {n_held/n_turns/2**10:.1f}KB per turn | Peak: {(n_peak -n_before)/2**20:.2f}MB")
+
+    return False
+
+def bench_replay_game_states( is_folder : str, is_filename : str ) -> bool:
+    """Convert a replay.json into one Game() and one GameSnapshot per turn, and report footprint and conversion time
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay()
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_observations = c_replay._json_observation( c_replay._replay_json )
+    logging.info(f"{is_filename}")
+
+    x_fail = _measure( "Game", c_replay._observations_to_gamestates, lc_observations )
+    x_fail |= _measure( "GameSnapshot", c_replay._observations_to_snapshots, lc_observations )
+
+    return x_fail
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    bench_replay_game_states( REPLAY_FOLDER, REPLAY_FILE )
@@ -0,0 +1,140 @@
+##  @package bench_move_resolution
+#   Cancelled moves and time of the move resolution of Action.translate
+#   Every turn of a replay is translated from random scores, and the moves are played by lux.game_simulator.GameSimulator. Reports
+#   the moves the engine cancels with the resolution and with the independent argmax of each unit, and the time of the resolution
+#   on crowded maps of 32*32 with up to 900 units
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+from time import perf_counter
+
+import numpy as np
+
+from lux.constants import GAME_CONSTANTS
+from lux.game_map import id_to_number
+from lux.game_simulator import GameSimulator
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.perception import Perception
+from big_no_brainer.action import Action
+from big_no_brainer.legality import perception_legality_mask
+from big_no_brainer.move_resolution import perception_obstacle_grid, resolve_moves, N_OPTION_STAY, TILE_BLOCKED, TILE_CITY
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27879876.json"
+#one turn in TURN_STRIDE is translated
+TURN_STRIDE = 3
+#units on the crowded map, spread at random | packed in a block
+LN_CROWDED_UNITS = [ 50, 150, 300 ]
+LN_PACKED_UNITS = [ 400, 900 ]
+CROWDED_REPEAT = 30
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _cancelled_moves( ic_snapshot, in_player : int, ils_actions : list ) -> tuple:
+    """play the actions of a player on a turn of the replay, the opponent stays
+    Returns:
+        tuple(int, int): moves emitted, moves the engine cancelled
+    """
+    c_simulator = GameSimulator()
+    c_simulator.from_snapshot( ic_snapshot )
+    d_before = { n_id : (l_unit[2], l_unit[3]) for n_id, l_unit in c_simulator.d_units.items() }
+    ln_moving = [ id_to_number( s_action.split(" ")[1] ) for s_action in ils_actions if s_action.startswith( GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"] +" " ) ]
+    lls_actions = [ list(), list() ]
+    lls_actions[in_player] = ils_actions
+    c_simulator.step( lls_actions )
+    n_cancelled = sum( (c_simulator.d_units[n_id][2], c_simulator.d_units[n_id][3]) == d_before[n_id] for n_id in ln_moving if n_id in c_simulator.d_units )
+    return len(ln_moving), n_cancelled
+
+def bench_replay( is_folder : str, is_filename : str ) -> bool:
+    """Translate random scores on the turns of a replay.json with and without move resolution, play them and count cancelled moves
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay()
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_observations = c_replay._json_observation( c_replay._replay_json )
+    lc_snapshots = c_replay._observations_to_snapshots( lc_observations )
+    c_rng = np.random.default_rng( 0 )
+    d_moves = { "resolved" : [0, 0], "argmax" : [0, 0] }
+    ln_seconds = list()
+    for c_observation, c_snapshot in list( zip( lc_observations, lc_snapshots ) )[::TURN_STRIDE]:
+        c_perception = Perception()
+        c_perception.from_updates( c_observation["updates"], c_observation["player"], c_observation["width"], c_observation["height"], c_observation["step"] )
+        an_mask = perception_legality_mask( c_perception )
+        an_scores = c_rng.normal( size=(len(Action.E_OUTPUT_SPACIAL_MATRICIES), GAME_CONSTANTS["MAP"]["WIDTH_MAX"], GAME_CONSTANTS["MAP"]["HEIGHT_MAX"]) )
+        for s_mode, an_tiles in ( ("resolved", perception_obstacle_grid( c_perception )), ("argmax", None) ):
+            c_action = Action( c_observation["width"], ian_mats=an_scores.copy() )
+            c_action.set_units( c_perception.d_unit, c_perception.d_position_unit )
+            n_start = perf_counter()
+            if s_mode == "resolved":
+                ls_actions = c_action.translate( an_mask, an_tiles )
+                ln_seconds.append( perf_counter() -n_start )
+            else:
+                #the moves of each unit alone: the best action of the tile, without resolution
+                ls_actions = c_action.translate( an_mask, np.full( (c_action.n_map_size, c_action.n_map_size), TILE_CITY, dtype=np.int8 ) )
+            n_moves, n_cancelled = _cancelled_moves( c_snapshot, c_observation["player"], ls_actions )
+            d_moves[s_mode][0] += n_moves
+            d_moves[s_mode][1] += n_cancelled
+    for s_mode, (n_moves, n_cancelled) in d_moves.items():
+        logging.info(f"{is_filename} | {s_mode:8} | Moves: {n_moves} | Cancelled by the engine: {n_cancelled} {100*n_cancelled/max(n_moves, 1):.1f}%")
+    logging.info(f"Translate | median {1e3*np.median( ln_seconds ):.3f}ms | max {1e3*np.max( ln_seconds ):.3f}ms")
+
+    return d_moves["resolved"][1] > 0
+
+def bench_crowded( in_units : int, ix_packed : bool ) -> bool:
+    """Time of the resolution of random scores on a 32*32 map with 5% obstacles and 3% citytiles
+    Args:
+        in_units (int): units on the map
+        ix_packed (bool): units packed in a block, the worst case | False: spread at random
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_rng = np.random.default_rng( in_units )
+    n_size = GAME_CONSTANTS["MAP"]["WIDTH_MAX"]
+    ln_seconds = list()
+    n_moves = 0
+    for _ in range(CROWDED_REPEAT):
+        if ix_packed:
+            an_cells = np.arange( in_units )
+            an_x, an_y = an_cells //(n_size -2) +1, an_cells %(n_size -2) +1
+        else:
+            an_cells = c_rng.choice( n_size *n_size, in_units, replace=False )
+            an_x, an_y = an_cells //n_size, an_cells %n_size
+        an_random = c_rng.random( (n_size, n_size) )
+        an_tiles = np.where( an_random < 0.05, TILE_BLOCKED, np.where( an_random > 0.97, TILE_CITY, 0 ) ).astype( np.int8 )
+        an_tiles[an_x, an_y] = np.where( an_tiles[an_x, an_y] == TILE_BLOCKED, 0, an_tiles[an_x, an_y] )
+        an_scores = c_rng.normal( size=(in_units, N_OPTION_STAY +1) )
+        n_start = perf_counter()
+        an_option = resolve_moves( an_x, an_y, an_scores, np.zeros( (n_size, n_size), dtype=np.int64 ), an_tiles )
+        ln_seconds.append( perf_counter() -n_start )
+        n_moves += int( (an_option != N_OPTION_STAY).sum() )
+    logging.info(f"Crowded | Units: {in_units} {'packed' if ix_packed else 'spread'} | Moves: {n_moves/CROWDED_REPEAT:.0f} | median {1e3*np.median( ln_seconds ):.3f}ms | max {1e3*np.max( ln_seconds ):.3f}ms")
+
+    return False
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    bench_replay( REPLAY_FOLDER, REPLAY_FILE )
+    for n_units in LN_CROWDED_UNITS:
+        bench_crowded( n_units, False )
+    for n_units in LN_PACKED_UNITS:
+        bench_crowded( n_units, True )
@@ -0,0 +1,253 @@
+##  @package bench_perception
+#   Latency benchmark of Perception.from_game
+#   Every pickled Game() of the saved game states folder is converted into a Perception many times, by scanning the game objects one
+#   by one and by scattering the record arrays of the game. Reports the latency per call and checks the two paths match bit for bit
+#   A replay is then played turn by turn like agent.py does, with a new Perception each turn
+#   The observations of the replay are also converted straight from their updates, without a Game()
+#   Then only some feature planes of the registry are requested, to check the cost follows the planes asked for
+#   Finally the whole replay is converted like a training set, one Perception() per turn against one batch of contiguous arrays
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import glob
+import logging
+import os
+import pickle
+from time import perf_counter
+
+import numpy as np
+
+from big_no_brainer.perception import Perception
+from big_no_brainer.perception import perceptions_from_snapshots
+from big_no_brainer.feature_planes import FEATURE_PLANES
+from big_no_brainer.replay import Replay
+from lux.game import Game
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+GAME_STATE_FOLDER = "saved_game_states"
+GAME_STATE_PATTERN = "*.bin"
+#calls timed for each game state and path
+BENCH_REPEAT = 50
+#subsets of the feature plane registry timed by bench_feature_planes
+FEATURE_PLANE_SETS = (
+    ["ROAD"],
+    ["WORKER_RESOURCE", "CART_RESOURCE", "RAW_WOOD", "RAW_COAL"],
+    ["WORKER_RESOURCE", "CART_RESOURCE", "RAW_WOOD", "RAW_COAL", "RAW_URANIUM", "ROAD", "COOLDOWN"],
+    list( FEATURE_PLANES ),
+)
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27883823.json"
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _measure( ic_game, ix_vectorized : bool ) -> float:
+    """Returns: float: seconds per Perception.from_game call"""
+    n_start = perf_counter()
+    for _ in range( BENCH_REPEAT ):
+        c_perception = Perception()
+        c_perception.from_game( ic_game, ix_vectorized )
+    return (perf_counter() -n_start) /BENCH_REPEAT
+
+def bench_perception( is_folder : str, is_pattern : str ) -> bool:
+    """Time Perception.from_game on every game state of a folder, loop path against vectorized path
+    Args:
+        is_folder (str): folder with the pickled Game()
+        is_pattern (str): file name pattern of the pickles
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    ls_files = sorted( glob.glob( os.path.join( is_folder, is_pattern ) ) )
+    if len(ls_files) == 0:
+        logging.critical(f"No game state in: {os.path.join( is_folder, is_pattern )}")
+        return True
+
+    x_fail = False
+    n_loop_total = 0.0
+    n_vectorized_total = 0.0
+    for s_file in ls_files:
+        try:
+            with open(s_file, "rb") as opened_file:
+                c_game = pickle.load( opened_file )
+        except (OSError, pickle.UnpicklingError) as problem:
+            logging.critical(f"Pickle: {problem}")
+            x_fail = True
+            continue
+        #game states from older pickles have no opponent id
+        c_game._set_player_id( c_game.id )
+
+        c_loop = Perception()
+        c_loop.from_game( c_game, False )
+        c_vectorized = Perception()
+        c_vectorized.from_game( c_game, True )
+        x_match = np.array_equal( c_loop.mats, c_vectorized.mats ) and c_loop.mats.dtype == c_vectorized.mats.dtype and np.array_equal( c_loop.status, c_vectorized.status )
+        x_fail |= not x_match
+
+        n_loop = _measure( c_game, False )
+        n_vectorized = _measure( c_game, True )
+        n_loop_total += n_loop
+        n_vectorized_total += n_vectorized
+        logging.info(f"{os.path.basename( s_file )} | Turn: {c_game.turn} | Map: {c_game.map_width}x{c_game.map_height} | Loop: {1e3*n_loop:.3f}ms | Vectorized: {1e3*n_vectorized:.3f}ms | x{n_loop/n_vectorized:.1f} | Match: {x_match}")
+
+    logging.info(f"Average | Loop: {1e3*n_loop_total/len(ls_files):.3f}ms | Vectorized: {1e3*n_vectorized_total/len(ls_files):.3f}ms | x{n_loop_total/n_vectorized_total:.1f}")
+
+    return x_fail
+
+def bench_perception_replay( is_folder : str, is_filename : str ) -> bool:
+    """Play a replay turn by turn and time the Perception of each turn: loop path against vectorized path
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay()
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_snapshots = c_replay._observations_to_snapshots( c_replay._json_observation( c_replay._replay_json ) )
+
+    c_game = Game()
+    c_game.x_array_map = True
+    n_loop = n_vectorized = 0.0
+    n_mismatch = 0
+    for c_snapshot in lc_snapshots:
+        c_game.restore( c_snapshot )
+        n_start = perf_counter()
+        c_loop = Perception()
+        c_loop.from_game( c_game, False )
+        n_loop += perf_counter() -n_start
+        n_start = perf_counter()
+        c_vectorized = Perception()
+        c_vectorized.from_game( c_game )
+        n_vectorized += perf_counter() -n_start
+        n_mismatch += not np.array_equal( c_loop.mats, c_vectorized.mats )
+
+    n_turns = len(lc_snapshots)
+    logging.info(f"{is_filename} | Turns: {n_turns} | Mismatch: {n_mismatch}")
+    logging.info(f"Per turn | Loop: {1e3*n_loop/n_turns:.3f}ms | Vectorized: {1e3*n_vectorized/n_turns:.3f}ms")
+
+    return n_mismatch > 0
+
+def bench_perception_updates( is_folder : str, is_filename : str ) -> bool:
+    """Time the Perception of each observation of a replay: Game() update then from_game, against from_updates
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay()
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_observations = c_replay._json_observation( c_replay._replay_json )
+
+    n_game = n_updates = 0.0
+    n_mismatch = 0
+    for c_observation in lc_observations:
+        ls_updates = c_observation[INPUT_CONSTANTS.UPDATES]
+        n_start = perf_counter()
+        if c_observation[INPUT_CONSTANTS.STEP] == 0:
+            c_game = Game()
+            c_game._initialize( ls_updates, ix_incremental=True, ix_array_map=True )
+            c_game._update( ls_updates[2:] )
+            c_game._set_player_id( c_observation["player"] )
+        else:
+            c_game._update( ls_updates )
+        c_from_game = Perception()
+        c_from_game.from_game( c_game )
+        n_game += perf_counter() -n_start
+        n_start = perf_counter()
+        c_from_updates = Perception()
+        c_from_updates.from_updates( ls_updates, c_observation["player"], c_observation["width"], c_observation["height"], c_observation[INPUT_CONSTANTS.STEP] )
+        n_updates += perf_counter() -n_start
+        n_mismatch += not ( np.array_equal( c_from_game.mats, c_from_updates.mats ) and np.array_equal( c_from_game.status, c_from_updates.status ) and c_from_game.d_unit == c_from_updates.d_unit )
+
+    n_turns = len(lc_observations)
+    logging.info(f"{is_filename} | Turns: {n_turns} | Mismatch: {n_mismatch}")
+    logging.info(f"Per turn | Game update and from_game: {1e3*n_game/n_turns:.3f}ms | from_updates: {1e3*n_updates/n_turns:.3f}ms")
+
+    return n_mismatch > 0
+
+def bench_feature_planes( is_folder : str, is_filename : str ) -> bool:
+    """Time Perception.from_updates on every observation of a replay for growing sets of feature planes
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay()
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_observations = c_replay._json_observation( c_replay._replay_json )
+
+    x_fail = False
+    for ls_planes in ( None, ) +FEATURE_PLANE_SETS:
+        n_start = perf_counter()
+        for c_observation in lc_observations:
+            c_perception = Perception()
+            x_fail |= c_perception.from_updates( c_observation[INPUT_CONSTANTS.UPDATES], c_observation["player"], c_observation["width"], c_observation["height"], c_observation[INPUT_CONSTANTS.STEP], ls_planes )
+        n_seconds = perf_counter() -n_start
+        s_planes = "E_INPUT_SPACIAL_MATRICIES" if ls_planes is None else f"{len(ls_planes)} planes"
+        logging.info(f"{is_filename} | {s_planes} | Per turn: {1e3*n_seconds/len(lc_observations):.3f}ms")
+
+    return x_fail
+
+def bench_perception_batch( is_folder : str, is_filename : str ) -> bool:
+    """Convert every turn of a replay for player 0, one Perception() per turn against perceptions_from_snapshots
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay()
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_snapshots = c_replay._observations_to_snapshots( c_replay._json_observation( c_replay._replay_json ) )
+
+    n_start = perf_counter()
+    c_game = Game()
+    c_game.x_array_map = True
+    lc_perceptions = list()
+    for c_snapshot in lc_snapshots:
+        c_game.restore( c_snapshot )
+        c_perception = Perception()
+        c_perception.from_game( c_game )
+        lc_perceptions.append( c_perception )
+    an_mats = np.stack( [ c_perception.mats for c_perception in lc_perceptions ] )
+    n_objects = perf_counter() -n_start
+
+    n_start = perf_counter()
+    c_batch = perceptions_from_snapshots( lc_snapshots )
+    n_batch = perf_counter() -n_start
+    if c_batch is None:
+        return True
+    x_match = np.array_equal( an_mats, c_batch.mats ) and np.array_equal( np.stack( [ c_perception.status for c_perception in lc_perceptions ] ), c_batch.status )
+
+    n_turns = len(lc_snapshots)
+    logging.info(f"{is_filename} | Turns: {n_turns} | Units: {len(c_batch.units)} | Match: {x_match}")
+    logging.info(f"Per turn | Perception objects and stack: {1e3*n_objects/n_turns:.3f}ms | Batch: {1e3*n_batch/n_turns:.3f}ms | x{n_objects/n_batch:.1f}")
+
+    return not x_match
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    bench_perception( GAME_STATE_FOLDER, GAME_STATE_PATTERN )
+    bench_perception_replay( REPLAY_FOLDER, REPLAY_FILE )
+    bench_perception_updates( REPLAY_FOLDER, REPLAY_FILE )
+    bench_feature_planes( REPLAY_FOLDER, REPLAY_FILE )
+    bench_perception_batch( REPLAY_FOLDER, REPLAY_FILE )
@@ -0,0 +1,79 @@
+##  @package bench_replay_pool
+#   Throughput benchmark of the parallel conversion of a replay corpus
+#   The replays of the folder are repeated into a corpus and converted, serially in this process by json_to_perception_action, and
+#   into dense arrays by big_no_brainer.replay_pool with a growing number of workers. Reports replays per second and the speedup
+#   over the serial conversion. The speedup is bounded by the cores of the machine
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import os
+from time import perf_counter
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.replay_pool import convert_replays
+from big_no_brainer.dtype_policy import DTYPE_POLICIES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+LS_REPLAY_FILES = [ "27879876.json", "27883823.json" ]
+#each replay is converted this many times
+CORPUS_REPEAT = 8
+DTYPE_POLICY = "half"
+LN_WORKERS = sorted( { 1, 2, 4, os.cpu_count() or 1 } )
+CHUNK_SIZE = 1
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def bench_serial( is_folder : str, ils_files : list ) -> float:
+    """Convert the corpus one replay after the other in this process, into Perception and Action like the training script did
+    Returns:
+        float: seconds
+    """
+    n_start = perf_counter()
+    for s_file in ils_files:
+        c_replay = Replay( DTYPE_POLICIES[DTYPE_POLICY] )
+        if c_replay.json_load( is_folder, s_file ):
+            continue
+        c_replay.json_to_perception_action()
+    return perf_counter() -n_start
+
+def bench_pool( is_folder : str, ils_files : list, in_workers : int ) -> float:
+    """Convert the corpus with a pool of workers
+    Returns:
+        float: seconds | None if a replay failed
+    """
+    n_start = perf_counter()
+    lc_converted = list( convert_replays( is_folder, ils_files, DTYPE_POLICIES[DTYPE_POLICY], 0, in_workers, CHUNK_SIZE ) )
+    n_seconds = perf_counter() -n_start
+    if any( c_converted.error is not None for c_converted in lc_converted ):
+        return None
+    return n_seconds
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    ls_corpus = LS_REPLAY_FILES *CORPUS_REPEAT
+    #the conversions log every replay
+    logging.getLogger().setLevel( logging.WARNING )
+    n_serial = bench_serial( REPLAY_FOLDER, ls_corpus )
+    ld_pool = [ (n_workers, bench_pool( REPLAY_FOLDER, ls_corpus, n_workers )) for n_workers in LN_WORKERS ]
+    logging.getLogger().setLevel( logging.INFO )
+    logging.info(f"Corpus: {len(ls_corpus)} replays | Cores: {os.cpu_count()} | Policy: {DTYPE_POLICY}")
+    logging.info(f"Serial | {n_serial:.2f}s | {len(ls_corpus)/n_serial:.2f} replays/s")
+    for n_workers, n_seconds in ld_pool:
+        if n_seconds is None:
+            logging.error(f"Workers: {n_workers} | a replay failed")
+            continue
+        logging.info(f"Workers: {n_workers} | {n_seconds:.2f}s | {len(ls_corpus)/n_seconds:.2f} replays/s | Speedup: x{n_serial/n_seconds:.2f}")
@@ -0,0 +1,88 @@
+##  @package bench_replay_stream
+#   Memory and latency benchmark of the streaming replay reader
+#   A replay is converted into one Perception and one Action per player per turn, by json_load + json_to_perception_action that
+#   hold the whole game, and by Replay.json_stream that yields one turn at a time. Reports the peak of the memory allocated by
+#   python during the conversion, the time to the first turn and the total time
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import tracemalloc
+from time import perf_counter
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.dtype_policy import DTYPE_POLICIES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+LS_REPLAY_FILES = [ "27879876.json", "27883823.json" ]
+DTYPE_POLICY = "half"
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _consume( ic_turns ) -> tuple:
+    """go through the turns of a conversion, one at a time, like a training loop would
+    Returns:
+        tuple(int, float): turns, seconds to the first turn
+    """
+    n_start = perf_counter()
+    n_first = None
+    n_turns = 0
+    for _ in ic_turns:
+        if n_first is None:
+            n_first = perf_counter() -n_start
+        n_turns += 1
+    return n_turns, n_first
+
+def _batch_turns( is_folder : str, is_filename : str ):
+    """turns of json_load + json_to_perception_action: the whole game is converted before the first one"""
+    c_replay = Replay( DTYPE_POLICIES[DTYPE_POLICY] )
+    if c_replay.json_load( is_folder, is_filename ):
+        return
+    lc_perceptions, lc_actions_p0, lc_actions_p1 = c_replay.json_to_perception_action()
+    yield from zip( lc_perceptions, lc_actions_p0, lc_actions_p1 )
+
+def bench_replay_stream( is_folder : str, is_filename : str ) -> bool:
+    """Convert a replay.json whole and streamed, report peak memory, time to the first turn and total time
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    dn_turns = dict()
+    for s_mode in ( "whole", "stream" ):
+        if s_mode == "whole":
+            c_turns = _batch_turns( is_folder, is_filename )
+        else:
+            c_turns = Replay( DTYPE_POLICIES[DTYPE_POLICY] ).json_stream( is_folder, is_filename )
+        #the conversion logs the action totals of each player
+        logging.getLogger().setLevel( logging.WARNING )
+        tracemalloc.start()
+        n_start = perf_counter()
+        n_turns, n_first = _consume( c_turns )
+        n_seconds = perf_counter() -n_start
+        _, n_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        logging.getLogger().setLevel( logging.INFO )
+        dn_turns[s_mode] = n_turns
+        logging.info(f"{is_filename} | {s_mode:6} | Turns: {n_turns} | Peak: {n_peak/2**20:.2f}MB | First turn: {1e3*(n_first or 0):.1f}ms | Total: {1e3*n_seconds:.1f}ms")
+
+    return dn_turns["whole"] != dn_turns["stream"]
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    for s_replay_file in LS_REPLAY_FILES:
+        bench_replay_stream( REPLAY_FOLDER, s_replay_file )
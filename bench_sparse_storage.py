@@ -0,0 +1,105 @@
+##  @package bench_sparse_storage
+#   Disk footprint and load time of whole-game traces, pickled lists against the sparse storage
+#   A replay is converted into one Perception and two Action per turn under a dtype policy. The lists are saved with
+#   save_perceptions (pickle) and with save_perceptions_sparse / save_actions_sparse, then loaded back. The sparse load densifies
+#   into preallocated buffers, and the loaded arrays are checked against the converted ones
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from big_no_brainer.replay import Replay
+from big_no_brainer.dtype_policy import DTYPE_POLICIES
+from big_no_brainer.perception import save_perceptions, load_perceptions, save_perceptions_sparse, load_perceptions_sparse
+from big_no_brainer.action import save_actions_sparse, load_actions_sparse
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONFIGURATION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27883823.json"
+DTYPE_POLICY_NAMES = [ "full", "half" ]
+LOAD_REPEAT = 5
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BENCHMARK
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _measure( ifn_load, in_repeat : int ) -> tuple:
+    """Returns: tuple(object, float): result of the last load, seconds per load"""
+    n_start = perf_counter()
+    for _ in range(in_repeat):
+        c_result = ifn_load()
+    return c_result, (perf_counter() -n_start) /in_repeat
+
+def bench_sparse_storage( is_folder : str, is_filename : str, is_policy : str ) -> bool:
+    """Save and load the Perception and Action of a replay.json pickled and sparse, report footprint and load time
+    Args:
+        is_folder (str): Source folder
+        is_filename (str): Source name .json
+        is_policy (str): name of the dtype policy of the arrays
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_replay = Replay( DTYPE_POLICIES[is_policy] )
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    #the conversion logs the action totals of each player
+    logging.getLogger().setLevel( logging.WARNING )
+    lc_perceptions, lc_actions_p0, _ = c_replay.json_to_perception_action()
+    logging.getLogger().setLevel( logging.INFO )
+    n_turns = len(lc_perceptions)
+    an_mats = np.stack( [ c_perception.mats for c_perception in lc_perceptions ] )
+    an_status = np.stack( [ c_perception.status for c_perception in lc_perceptions ] )
+    an_labels = np.stack( [ c_action.mats for c_action in lc_actions_p0 ] )
+    logging.info(f"{is_filename} | Policy: {is_policy} | Turns: {n_turns} | Nonzero cells: features {np.count_nonzero( an_mats )/an_mats.size:.1%} labels {np.count_nonzero( an_labels )/an_labels.size:.2%}")
+
+    x_fail = False
+    with tempfile.TemporaryDirectory() as s_folder:
+        s_pickle = os.path.join( s_folder, "perceptions.pkl" )
+        s_perceptions = os.path.join( s_folder, "perceptions.npz" )
+        s_actions = os.path.join( s_folder, "actions.npz" )
+        x_fail |= save_perceptions( lc_perceptions, s_pickle )
+        x_fail |= save_perceptions_sparse( lc_perceptions, s_perceptions )
+        x_fail |= save_actions_sparse( lc_actions_p0, s_actions )
+        if x_fail:
+            return True
+
+        _, n_pickle = _measure( lambda: load_perceptions( s_pickle ), LOAD_REPEAT )
+        n_pickle_bytes = os.path.getsize( s_pickle )
+        logging.info(f"Pickle Perception | Disk: {n_pickle_bytes/2**20:.2f}MB | Load: {1e3*n_pickle:.1f}ms")
+
+        #densify into preallocated buffers, like a training loop reusing them
+        an_out_mats = np.empty_like( an_mats )
+        an_out_status = np.empty_like( an_status )
+        an_out_labels = np.empty_like( an_labels )
+        t_perceptions, n_sparse = _measure( lambda: load_perceptions_sparse( s_perceptions, an_out_mats, an_out_status ), LOAD_REPEAT )
+        n_sparse_bytes = os.path.getsize( s_perceptions )
+        x_same = t_perceptions is not None and np.array_equal( t_perceptions[0], an_mats ) and np.array_equal( t_perceptions[1], an_status )
+        logging.info(f"Sparse Perception | Disk: {n_sparse_bytes/2**20:.2f}MB x{n_pickle_bytes/n_sparse_bytes:.1f} | Load: {1e3*n_sparse:.1f}ms x{n_pickle/n_sparse:.1f} | Identical: {x_same}")
+
+        t_actions, n_actions = _measure( lambda: load_actions_sparse( s_actions, an_out_labels ), LOAD_REPEAT )
+        n_action_bytes = os.path.getsize( s_actions )
+        x_same_labels = t_actions is not None and np.array_equal( t_actions[0], an_labels )
+        logging.info(f"Sparse Action | Disk: {n_action_bytes/2**10:.1f}KB dense {an_labels.nbytes/2**20:.2f}MB | Load: {1e3*n_actions:.1f}ms | Identical: {x_same_labels}")
+        x_fail |= not (x_same and x_same_labels)
+
+    return x_fail
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    for s_policy in DTYPE_POLICY_NAMES:
+        bench_sparse_storage( REPLAY_FOLDER, REPLAY_FILE, s_policy )
@@ -1,510 +1,597 @@
-##  @package action
-#   ARCHITECTURE
-#
-#   INFERENCE
-#   1) Game() -> Perception()
-#   2) Perception() -> model? -> Orders()
-#   3) Orders() -> list()
-#
-#   TRAINING
-#
-#   1) run inference this vs this at given random map size   
-#   2) game result -> Reward() -> float
-#   3) reinforcement learning
-#
-#   Action translates a 
-#
-
-##  History
-#       2021-10-12
-#   Action operational
-
-##  TODO
-#   add shift to output matrix
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   IMPORT
-#--------------------------------------------------------------------------------------------------------------------------------
-
-import itertools
-import json
-#from inspect import CO_VARARGS
-import logging
-#enumeration support
-from enum import Enum, auto
-import pickle
-
-#efficient nested loops
-from itertools import product
-
-import numpy as np
-
-#LUX-AI-2021
-from lux.constants import GAME_CONSTANTS
-from lux.constants import Constants
-RESOURCE_TYPES = Constants.RESOURCE_TYPES
-
-from lux.game import Game
-from lux.game_map import Position
-from lux.game_objects import Unit
-
-from big_no_brainer.perception import Perception
-
-#plot
-import matplotlib.pyplot as plt
-import seaborn as sns
-#convert input matricies into .gif
-import matplotlib.animation as animation
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   Action
-#--------------------------------------------------------------------------------------------------------------------------------
-#   This class translates the 15*32*32 output of the BNB network into actions emitted to the Game
-#   Only one player is controlled, only units/citytiles that can act are emitted for action
-#   Action chooses the maximum Q above a threshold amongst the matricies it has access to
-#   Action back propagate on the BNB output matrix a positive for action choosen, a 0 for action discarded, a -1 for action invalid
-#   This feedback is used for reinforcement learning purposes in learning and is displayed during inference to evaluate misaction rate
-#   emission on empty squares is considered an error
-#   emission of an invalid action is considered an error
-#   accumulate metrics on total actions emitted this turn and total actions emitted
-
-class Action():
-
-    #----------------    Configurations    ----------------
-
-    #(3+7)*32*32 = 10*32*32
-    #enumerate state vector that describe game wide information, will bypass the spatial processing stage. Total 15 actions
-    class E_OUTPUT_SPACIAL_MATRICIES( Enum ):
-        #Citytile Actions. 3*32*32
-        CITYTILE_RESEARCH = 0
-        CITYTILE_BUILD_WORKER = auto()
-        CITYTILE_BUILD_CART = auto()
-        #Unified unit actions. 7*32*32 e.g. cart can't comply with build city action.
-        UNIT_MOVE_NORTH = auto()
-        UNIT_MOVE_EAST = auto()
-        UNIT_MOVE_SOUTH = auto()
-        UNIT_MOVE_WEST = auto()
-        UNIT_TRANSFER_RESOURCE = auto()
-        UNIT_BUILD_CITY = auto()
-        UNIT_PILLAGE_ROAD = auto()        
-
-    #----------------    Constructor    ----------------
-
-    def __init__( self, in_map_size : int ):
-        """Constructor. Initialize mats and vars
-        Args:
-            ic_json (json): opened replay.json
-            ild_units (list): list of dictionaries of units and their position. required to decode actions. one per turn, 360 turn per game.
-                e.g. { u_1 : ( 11, 17 ), u_5 : ( 12, 17 ) }
-            in_player (int): player for which Action is to be extracted. 2 player in a replay.json
-        """
-
-        #initialize class vars
-        if self.__init_vars( in_map_size ):
-            logging.critical( f"Failed to initialize class vars" )
-
-        return
-
-    #----------------    Overloads    ----------------
-
-    def __str__(self) -> str:
-        ln_sum = list()
-        for e_header in Action.E_OUTPUT_SPACIAL_MATRICIES:
-            ln_sum.append( self.mats[e_header.value].sum() ) 
-        return f"Action | {ln_sum}"
-
-    #----------------    Private Members    ----------------
-
-    def __init_vars( self, in_map_size : int ) -> bool:
-        """Initialize class vars
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        #Map size. Needed for shift
-        self._set_map_size( in_map_size )
-        #dictionary of units. needed for direct and reverse unit<->position tranlsation
-        self.d_units = None
-        #initialize output spacial mats
-        self.mats = np.zeros( (len(Action.E_OUTPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX']) )
-
-        
-
-        return False
-
-    def __accumulate_mat( self, n_index : int, in_x : int, in_y : int ) -> bool:
-
-        n_x = int(self._w_shift +in_x)
-        n_y = int(self._h_shift +in_y)
-        if n_x < 0 or n_x > GAME_CONSTANTS['MAP']['WIDTH_MAX']:
-            logging.error(f"Bad X index: {n_x}")
-            return True
-
-        if n_y < 0 or n_y > GAME_CONSTANTS['MAP']['HEIGHT_MAX']:
-            logging.error(f"Bad X index: {n_x}")
-            return True
-        #logging.debug(f"{n_index} {n_x} {n_y}")
-
-        self.mats[n_index, n_x, n_y ] += 1
-
-        return False
-
-    #----------------    Protected Members    ----------------
-
-    def _set_map_size( self, in_map_size : int ) -> bool:
-        #size of the map in cells. THe map is square
-        self.n_map_size = int(in_map_size)
-        #set the offset. all map sizes uses max size and are shifted to be centered. Helps neural network convolution to generalize.
-        self._w_shift = int( (GAME_CONSTANTS['MAP']['WIDTH_MAX'] -in_map_size) // 2 )
-        self._h_shift = int( (GAME_CONSTANTS['MAP']['HEIGHT_MAX'] -in_map_size) // 2 )
-
-        return False
-
-    def _parse_agent_actions( self, id_units : dict, ils_actions : list ) -> bool:
-        """Parse a string of actions into an initialized Action class by filling the mats
-        An action is made by action tokens
-        e.g. ['bw', '15', '1'] -> inn_mat[Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER, 15, 1] = 1
-        e.g. ['m', 'u_2', 's'] -> id_units { u_2 : (11,12) } -> inn_mat[Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH, 11, 12] = 1}
-        Args:
-            ils_actions (list(str)): list of string with a list of actions.
-                e.g. ["r 14 8", "m u_1 w"]
-            id_units (dict): dictionary of units.
-                "unit name" : (owner_id, unit_type, pos.x, pos.y)
-                { u_1 : (0, 1, 11, 2) }
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-
-        #scan all actions
-        for s_action in ils_actions:
-            #decompose the action into tokens
-            ls_action_token = s_action.split(' ')
-            #logging.debug(f"Step: {n_step} | Player {n_id} | Action Tokens: {ls_action_token}")
-            #NOP
-            s_header = ls_action_token[0]
-            if s_header == "":
-                logging.debug("NOP")
-                pass
-            
-            #Citytile Research "r x y"
-            elif s_header == GAME_CONSTANTS["ACTION"]["CITYTILE"]["RESEARCH"]:
-                if (len(ls_action_token) != 3):
-                    logging.error(f'Expected 3 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-                #Fetch action arguments
-                n_x = int(ls_action_token[1])
-                n_y = int(ls_action_token[2])
-                #logging.debug(f"RESEARCH {n_x} {n_y}")
-                self.__accumulate_mat( Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value, n_x, n_y ) 
-
-            #Citytile Build Worker "bw x y"
-            elif s_header == GAME_CONSTANTS["ACTION"]["CITYTILE"]["BUILD_WORKER"]:
-                if (len(ls_action_token) != 3):
-                    logging.error(f'Expected 3 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-                #Fetch action arguments
-                n_x = int(ls_action_token[1])
-                n_y = int(ls_action_token[2])
-                #logging.debug(f"BUILD_WORKER {n_x} {n_y}")
-                self.__accumulate_mat( Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value, n_x, n_y ) 
-            
-            #Citytile Build Worker "bc x y"
-            elif s_header == GAME_CONSTANTS["ACTION"]["CITYTILE"]["BUILD_CART"]:
-                if (len(ls_action_token) != 3):
-                    logging.error(f'Expected 3 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-                #Fetch action arguments
-                n_x = int(ls_action_token[1])
-                n_y = int(ls_action_token[2])
-                #logging.debug(f"BUILD_CART {n_x} {n_y}")
-                self.__accumulate_mat( Action.E_OUTPUT_SPACIAL_MATRICIES.BUILD_CART.value, n_x, n_y ) 
-                
-            #Unit Move
-            elif s_header == GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"]:
-                if (len(ls_action_token) != 3):
-                    logging.error(f'Expected 3 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-                #Fetch action arguments
-                s_unit_id = ls_action_token[1]
-                s_move_direction = ls_action_token[2]
-                #launch a search inside the dictionary of units
-                if s_unit_id in id_units:
-                    #get a tuple with the position of unit
-                    t_pos = id_units[s_unit_id]
-                else:
-                    logging.error(f'Unit { s_unit_id } not found in unit dictionary: {id_units}')
-                    return True
-                #n_mat_index = -1
-                #the direction encodes the destination matrix
-                if s_move_direction == GAME_CONSTANTS["DIRECTIONS"]["NORTH"]:
-                    n_mat_index = Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value
-                elif s_move_direction == GAME_CONSTANTS["DIRECTIONS"]["EAST"]:
-                    n_mat_index = Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value
-                elif s_move_direction == GAME_CONSTANTS["DIRECTIONS"]["SOUTH"]:
-                    n_mat_index = Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value
-                elif s_move_direction == GAME_CONSTANTS["DIRECTIONS"]["WEST"]:
-                    n_mat_index = Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value
-                elif s_move_direction == GAME_CONSTANTS["DIRECTIONS"]["CENTER"]:
-                    #center move does not need to update a move matrix
-                    continue
-                else:
-                    logging.error(f"Move Direction is unknown { s_move_direction }")
-                    return True
-                #logging.debug(f"Worker {s_unit_id} | Position {t_pos} | Move {s_move_direction}")
-                #update the mat
-                self.__accumulate_mat( n_mat_index, t_pos[0], t_pos[1] ) 
-
-            #Unit Transfer Resource
-            elif s_header == GAME_CONSTANTS["ACTION"]["UNIT"]["TRANSFER_RESOURCE"]:
-                if (len(ls_action_token) != 4):
-                    logging.error(f'Expected 4 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-
-                #Fetch action arguments
-                s_source_unit_id = ls_action_token[1]
-                s_dest_unit_id = ls_action_token[2]
-                s_resource_type = ls_action_token[3]
-                n_resource_amount = ls_action_token[4]
-
-                logging.error(f"Transfer Action not implemented... {s_source_unit_id} {s_dest_unit_id} {s_resource_type} {n_resource_amount}")
-                return True
-
-            #Unit Build City
-            elif s_header == GAME_CONSTANTS["ACTION"]["UNIT"]["BUILD_CITY"]:
-                if (len(ls_action_token) != 2):
-                    logging.error(f'Expected 2 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-                #Fetch action arguments
-                s_unit_id = ls_action_token[1]
-                #launch a search inside the dictionary of units
-                if s_unit_id not in id_units:
-                    logging.error(f'Unit { s_unit_id } not found in unit dictionary: {id_units}')
-                    return True
-                else:
-                    #get a tuple with the position of unit
-                    t_pos = id_units[s_unit_id]
-                #logging.debug(f"Worker {s_unit_id} | Position {t_pos} | Build City")
-                #update the mat
-                self.__accumulate_mat( Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value, t_pos[0], t_pos[1] ) 
-
-            #Unit Pillage
-            elif s_header == GAME_CONSTANTS["ACTION"]["UNIT"]["PILLAGE_ROAD"]:
-                if (len(ls_action_token) != 2):
-                    logging.error(f'Expected 2 tokens on action: { s_header } but got {len(ls_action_token)} instead.')
-                    return True
-                #Fetch action arguments
-                s_unit_id = ls_action_token[1]
-                #launch a search inside the dictionary of units
-                if s_unit_id not in id_units:
-                    logging.error(f'Unit { s_unit_id } not found in unit dictionary: {id_units}')
-                    return True
-                else:
-                    #get a tuple with the position of unit
-                    t_pos = id_units[s_unit_id]
-                #logging.debug(f"Worker {s_unit_id} | Position {t_pos} | Pillage Road")
-                #update the mat
-                self.__accumulate_mat( Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_PILLAGE_ROAD.value, t_pos[0], t_pos[1] ) 
-
-            else:
-                logging.debug(f"Unknown header: {s_header}")
-                return True
-                
-        return False
-
-    def _translate_citytile_actions( self ) -> list:
-        """Translates citytile actions into a list of string actions to be fed to the game engine
-        Requires output spacial matricies
-        @TODO add a dictionary of citytiles to check if a city exist
-        @TODO check action against cooldown perception matrix to see if an action is valid
-            list: list of citytile string actions to be fed to the game engine
-                e.g. ["r 14 8", "bw 11 0", "bc 1 1"]
-        """
-        #allocate list of stringactions for this step(turn) for citytiles
-        ls_actions_citytile = list()
-        #allocate list of citytile action index matricies
-        ln_citytile_action_index = [
-            Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value,
-            Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value,
-            Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_CART.value 
-            ]
-
-        #scan each cell of the map
-        for n_x, n_y in product( range(self.n_map_size), range(self.n_map_size) ):
-            #apply shift
-            n_x_shift = n_x +self._w_shift
-            n_y_shift = n_y +self._h_shift
-
-            n_max_q_score = GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MIN_SCORE"]
-            n_max_q_index = -1
-            #search the highest rated action in the three citytile output spacial matricies
-            for n_index in ln_citytile_action_index:
-                #detect the best score, if any
-                n_score = self.mats[ n_index, n_x_shift, n_y_shift ]
-                if n_score > n_max_q_score:
-                    n_max_q_score = n_score
-                    n_max_q_index = n_index
-            #search failed
-            if n_max_q_index < 0:
-                #do nothing
-                pass
-
-            else:
-                #emit CITYTILE_RESEARCH
-                if n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["CITYTILE"]["RESEARCH"]} {n_x} {n_y}'
-                elif n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["CITYTILE"]["BUILD_WORKER"]} {n_x} {n_y}'
-                elif n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_CART.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["CITYTILE"]["BUILD_CART"]} {n_x} {n_y}'
-                else:
-                    logging.error(f"Invalid Citytile action: {n_max_q_index}")
-                    return list()
-                #add action string to list of actionstrings for this turn
-                ls_actions_citytile.append(s_action)
-
-            #Reverse Translation. Signal which action has been translated
-            for n_index_reverse in ln_citytile_action_index:
-                if (n_index_reverse != n_max_q_index):
-                    self.mats[ n_index_reverse, n_x_shift, n_y_shift ] = 0
-                else:
-                    self.mats[ n_index_reverse, n_x_shift, n_y_shift ] = 1
-
-        return ls_actions_citytile
-
-    def _reverse_dictionary_search( self, in_x : int, in_y : int ) -> str:
-        """performs a reverse dictionary search. put in the value, returns the key if any
-        e.g. { u_1 : (1, 5) | u_40 : (11, 11) } _reverse_dictionary_search( 11, 11) -> u_40
-        @TODO: need to handle units stacked in cities
-        Args:
-            in_x (int): coordinate of the unit
-            in_y (int): coordinate of the unit
-        Returns:
-            str: unique id of the unit e.g. u_1 u_43
-        """
-        
-        #scan units in dictionary
-        for s_unit, tn_position in self.d_units.items():
-            #if find a unit with right coordinates, return it
-            if tn_position[0] == in_x and tn_position[1] == in_y:
-                return s_unit
- 
-        return None
-
-    def _translate_unit_actions( self  ) -> list:
-        """Translates citytile actions into a list of string actions to be fed to the game engine
-        Requires output spacial matricies. Requires dictionary of unit->position, reverse translation
-            list: list of citytile string actions to be fed to the game engine
-                e.g. ["m u_1 n", "bcity u_4"]
-        """
-        #allocate list of stringactions for this step(turn) for citytiles
-        ls_actions_unit = list()
-        #allocate list of citytile action index matricies
-        ln_unit_action_index = [
-            Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value,
-            Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value,
-            Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value,
-            Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value, 
-            Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value,
-            ]
-
-        #scan each cell of the map
-        for n_x, n_y in product( range(self.n_map_size), range(self.n_map_size) ):
-            #apply shift
-            n_x_shift = n_x +self._w_shift
-            n_y_shift = n_y +self._h_shift
-
-            n_max_q_score = GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MIN_SCORE"]
-            n_max_q_index = -1
-            #search the highest rated action in the three citytile output spacial matricies
-            for n_index in ln_unit_action_index:
-                #detect the best score, if any
-                n_score = self.mats[ n_index, n_x_shift, n_y_shift ]
-                if n_score > n_max_q_score:
-                    n_max_q_score = n_score
-                    n_max_q_index = n_index
-            #search failed
-            if n_max_q_index < 0:
-                #do nothing
-                pass
-
-            else:
-                #unit dictionary reverse search
-                s_unit = self._reverse_dictionary_search( n_x, n_y )
-                if s_unit is None:
-                    #search failed, mean a translation error. signal reverse translate error inside output spaical matricies
-                    x_error = True
-                else:
-                    x_error = False
-
-                #emit CITYTILE_RESEARCH
-                if n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"]} {s_unit} {GAME_CONSTANTS["DIRECTIONS"]["NORTH"]}'
-                elif n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"]} {s_unit} {GAME_CONSTANTS["DIRECTIONS"]["EAST"]}'
-                elif n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"]} {s_unit} {GAME_CONSTANTS["DIRECTIONS"]["SOUTH"]}'
-                elif n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"]} {s_unit} {GAME_CONSTANTS["DIRECTIONS"]["WEST"]}'
-                elif n_max_q_index == Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value:
-                    s_action = f'{GAME_CONSTANTS["ACTION"]["UNIT"]["BUILD_CITY"]} {s_unit}'
-                else:
-                    logging.error(f"Invalid Citytile action: {n_max_q_index}")
-                    return list()
-                #add action string to list of actionstrings for this turn
-                ls_actions_unit.append(s_action)
-
-            #Reverse Translation. Signal which action has been translated
-            for n_index_reverse in ln_unit_action_index:
-                #if action wasn't taken
-                if n_index_reverse != n_max_q_index:
-                    self.mats[ n_index_reverse, n_x_shift, n_y_shift ] = 0
-                #taken action was a success
-                elif x_error == False:
-                    self.mats[ n_index_reverse, n_x_shift, n_y_shift ] = 1
-                #taken action failed
-                else:
-                    self.mats[ n_index_reverse, n_x_shift, n_y_shift ] = -1
-
-        return ls_actions_unit
-
-    #----------------    Public Members    ----------------
-
-    def fill_mats( self, id_units : dict, ils_actions : list ):
-
-        #finally call the parser that decodes a list of string actions filling the output mat
-        if self._parse_agent_actions( id_units, ils_actions ) == True:
-            logging.error(f"failed to parse string actions: {ils_actions}")
-            return True
-        #attach the dictionary to the Action
-        self.d_units = id_units
-
-        return False
-
-    def translate( self ) -> list:
-        """Translates actions into a list of string actions to be fed to the game engine
-        Requires output spacial matricies and dictionary of units to perform the translation
-        Returns:
-            list: list actions to be fed to the game engine
-                e.g. ["r 14 8", "m u_1 w"]
-        """
-
-        #allocate list of string actions to empty
-        ls_actions = list()
-
-        #translate citytile actions
-        ls_actions_citytiles = self._translate_citytile_actions()
-        if ls_actions_citytiles is None:
-            logging.error(f"failed to parse citytile actions")
-            return list()
-        #concatenate
-        ls_actions += ls_actions_citytiles
-
-        # translate unit actions
-        ls_actions_units = self._translate_unit_actions()
-        if ls_actions_units is None:
-            logging.error(f"failed to parse unit actions")
-            return list()
-        #concatenate
-        ls_actions += ls_actions_units
-
-        #logging.debug(f"{ls_actions_citytiles}")
-        return ls_actions
+##  @package action
+#   ARCHITECTURE
+#
+#   INFERENCE
+#   1) Game() -> Perception()
+#   2) Perception() -> model? -> Orders()
+#   3) Orders() -> list()
+#
+#   TRAINING
+#
+#   1) run inference this vs this at given random map size   
+#   2) game result -> Reward() -> float
+#   3) reinforcement learning
+#
+#   Action translates a 
+#
+
+##  History
+#       2021-10-12
+#   Action operational
+
+##  TODO
+#   add shift to output matrix
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import itertools
+import json
+#from inspect import CO_VARARGS
+import logging
+#enumeration support
+from enum import Enum, auto
+import pickle
+
+#efficient nested loops
+from itertools import product
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+#LUX-AI-2021
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+
+from lux.game import Game
+from lux.game_map import Position
+from lux.game_objects import Unit
+
+from big_no_brainer.perception import Perception
+from big_no_brainer.dtype_policy import DtypePolicy, DTYPE_POLICY_FULL, convert_array
+from big_no_brainer.sparse_storage import sparse_encode, sparse_densify, save_sparse, load_sparse
+from big_no_brainer.move_resolution import resolve_moves, N_OPTION_STAY
+
+#plot
+import matplotlib.pyplot as plt
+import seaborn as sns
+#convert input matricies into .gif
+import matplotlib.animation as animation
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   TRANSLATION TABLES
+#--------------------------------------------------------------------------------------------------------------------------------
+
+@lru_cache( maxsize=None )
+def _citytile_action_table( in_map_size : int ) -> np.ndarray:
+    """string action of each citytile action on each cell of a map
+    Returns:
+        np.ndarray: (3, map size, map size) object array, read only. e.g. [0, 14, 8] = "r 14 8"
+    """
+    ls_tokens = [ GAME_CONSTANTS["ACTION"]["CITYTILE"][s_action] for s_action in ("RESEARCH", "BUILD_WORKER", "BUILD_CART") ]
+    an_table = np.array( [ [ [ f"{s_token} {n_x} {n_y}" for n_y in range(in_map_size) ] for n_x in range(in_map_size) ] for s_token in ls_tokens ], dtype=object )
+    an_table.flags.writeable = False
+    return an_table
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Action
+#--------------------------------------------------------------------------------------------------------------------------------
+#   This class translates the 15*32*32 output of the BNB network into actions emitted to the Game
+#   Only one player is controlled, only units/citytiles that can act are emitted for action
+#   Action chooses the maximum Q above a threshold amongst the matricies it has access to
+#   Action back propagate on the BNB output matrix a positive for action choosen, a 0 for action discarded, a -1 for action invalid
+#   This feedback is used for reinforcement learning purposes in learning and is displayed during inference to evaluate misaction rate
+#   emission on empty squares is considered an error
+#   emission of an invalid action is considered an error
+#   accumulate metrics on total actions emitted this turn and total actions emitted
+
+class Action():
+
+    #----------------    Configurations    ----------------
+
+    #(3+7)*32*32 = 10*32*32
+    #enumerate state vector that describe game wide information, will bypass the spatial processing stage. Total 15 actions
+    class E_OUTPUT_SPACIAL_MATRICIES( Enum ):
+        #Citytile Actions. 3*32*32
+        CITYTILE_RESEARCH = 0
+        CITYTILE_BUILD_WORKER = auto()
+        CITYTILE_BUILD_CART = auto()
+        #Unified unit actions. 7*32*32 e.g. cart can't comply with build city action.
+        UNIT_MOVE_NORTH = auto()
+        UNIT_MOVE_EAST = auto()
+        UNIT_MOVE_SOUTH = auto()
+        UNIT_MOVE_WEST = auto()
+        UNIT_TRANSFER_RESOURCE = auto()
+        UNIT_BUILD_CITY = auto()
+        UNIT_PILLAGE_ROAD = auto()        
+
+    #candidate channels of the translation of citytiles and units, in the order ties are broken
+    LN_CITYTILE_ACTIONS = [
+        E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value,
+        E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value,
+        E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_CART.value,
+    ]
+    LN_UNIT_ACTIONS = [
+        E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value,
+        E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value,
+        E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value,
+        E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value,
+        E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value,
+    ]
+    #string action of each candidate unit channel: prefix +unit id +suffix
+    AN_UNIT_PREFIXES = np.array( [ f'{GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"]} ' ] *4 +[ f'{GAME_CONSTANTS["ACTION"]["UNIT"]["BUILD_CITY"]} ' ], dtype=object )
+    AN_UNIT_SUFFIXES = np.array( [ f' {GAME_CONSTANTS["DIRECTIONS"][s_direction]}' for s_direction in ("NORTH", "EAST", "SOUTH", "WEST") ] +[ "" ], dtype=object )
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self, in_map_size : int, ic_dtype_policy : DtypePolicy = DTYPE_POLICY_FULL, ian_mats : np.ndarray = None ):
+        """Constructor. Initialize mats and vars
+        Args:
+            in_map_size (int): size of the map in cells
+            ic_dtype_policy (DtypePolicy): dtype of mats once filled from string actions. Stored with the Action
+            ian_mats (np.ndarray): (10, WIDTH_MAX, HEIGHT_MAX) mats already filled, kept without copy. e.g. a turn of ActionBatch.mats | None: zero
+            ic_json (json): opened replay.json
+            ild_units (list): list of dictionaries of units and their position. required to decode actions. one per turn, 360 turn per game.
+                e.g. { u_1 : ( 11, 17 ), u_5 : ( 12, 17 ) }
+            in_player (int): player for which Action is to be extracted. 2 player in a replay.json
+        """
+
+        #initialize class vars
+        if self.__init_vars( in_map_size, ic_dtype_policy, ian_mats ):
+            logging.critical( f"Failed to initialize class vars" )
+
+        return
+
+    #----------------    Overloads    ----------------
+
+    def __str__(self) -> str:
+        ln_sum = list()
+        for e_header in Action.E_OUTPUT_SPACIAL_MATRICIES:
+            ln_sum.append( self.mats[e_header.value].sum() ) 
+        return f"Action | {ln_sum}"
+
+    #----------------    Private Members    ----------------
+
+    def __init_vars( self, in_map_size : int, ic_dtype_policy : DtypePolicy, ian_mats : np.ndarray ) -> bool:
+        """Initialize class vars
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        #dtype of the label mats. the parser accumulates in float64, the policy is applied by fill_mats
+        self.c_dtype_policy = ic_dtype_policy
+        #Map size. Needed for shift
+        self._set_map_size( in_map_size )
+        #dictionary of units. needed for direct and reverse unit<->position tranlsation
+        self.d_units = None
+        #reverse dictionary of units. position -> list of units on that position
+        self.d_position_units = None
+        #initialize output spacial mats
+        if ian_mats is None:
+            self.mats = np.zeros( (len(Action.E_OUTPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX']) )
+        else:
+            self.mats = ian_mats
+
+        
+
+        return False
+
+    #----------------    Protected Members    ----------------
+
+    def _set_map_size( self, in_map_size : int ) -> bool:
+        #size of the map in cells. THe map is square
+        self.n_map_size = int(in_map_size)
+        #set the offset. all map sizes uses max size and are shifted to be centered. Helps neural network convolution to generalize.
+        self._w_shift = int( (GAME_CONSTANTS['MAP']['WIDTH_MAX'] -in_map_size) // 2 )
+        self._h_shift = int( (GAME_CONSTANTS['MAP']['HEIGHT_MAX'] -in_map_size) // 2 )
+
+        return False
+
+    def _parse_agent_actions( self, id_units : dict, ils_actions : list ) -> bool:
+        """Parse a string of actions into an initialized Action class by filling the mats
+        An action is made by action tokens, decoded by the dispatch table of _decode_action_strings
+        e.g. ['bw', '15', '1'] -> inn_mat[Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER, 15, 1] = 1
+        e.g. ['m', 'u_2', 's'] -> id_units { u_2 : (11,12) } -> inn_mat[Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH, 11, 12] = 1}
+        Args:
+            ils_actions (list(str)): list of string with a list of actions.
+                e.g. ["r 14 8", "m u_1 w"]
+            id_units (dict): dictionary of units. unit id -> position
+                { u_1 : (11, 2) }
+        Returns:
+            bool: False=OK | True=FAIL. the valid actions are accumulated also after a failure
+        """
+        _, ln_channel, ln_x, ln_y, x_fail = _decode_action_strings( [ils_actions], [id_units], self.n_map_size )
+        for n_channel, n_x, n_y in zip( ln_channel, ln_x, ln_y ):
+            self.mats[n_channel, self._w_shift +n_x, self._h_shift +n_y] += 1
+        return x_fail
+
+    def _masked_argmax( self, iln_channels : list, ian_mask : np.ndarray = None ) -> tuple:
+        """highest scoring channel of each map cell amongst candidate channels, for the cells where it is above MIN_SCORE
+        Args:
+            iln_channels (list): candidate E_OUTPUT_SPACIAL_MATRICIES, ties go to the first one
+            ian_mask (np.ndarray): (10, WIDTH_MAX, HEIGHT_MAX) legal actions. illegal ones are never picked | None: all legal
+        Returns:
+            tuple(np.ndarray, np.ndarray, np.ndarray): map x, map y, position in iln_channels of the action of the cells that act. x major order
+        """
+        an_block = self._masked_scores( iln_channels, ian_mask )
+        an_best = np.argmax( an_block, axis=0 )
+        ax_acts = np.take_along_axis( an_block, an_best[None], axis=0 )[0] > GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MIN_SCORE"]
+        an_x, an_y = np.nonzero( ax_acts )
+        return an_x, an_y, an_best[an_x, an_y]
+
+    def _masked_scores( self, iln_channels : list, ian_mask : np.ndarray = None ) -> np.ndarray:
+        """scores of the candidate channels on the map, the illegal ones replaced by the lowest score
+        Args:
+            iln_channels (list): candidate E_OUTPUT_SPACIAL_MATRICIES
+            ian_mask (np.ndarray): (10, WIDTH_MAX, HEIGHT_MAX) legal actions | None: all legal
+        Returns:
+            np.ndarray: (len(iln_channels), map size, map size) copy of the scores
+        """
+        an_block = self.mats[ iln_channels, self._w_shift:self._w_shift +self.n_map_size, self._h_shift:self._h_shift +self.n_map_size ]
+        if ian_mask is not None:
+            #the fancy index made a copy, illegal scores are replaced before the argmax
+            an_legal = ian_mask[ iln_channels, self._w_shift:self._w_shift +self.n_map_size, self._h_shift:self._h_shift +self.n_map_size ]
+            np.copyto( an_block, -np.inf if an_block.dtype.kind == "f" else np.iinfo( an_block.dtype ).min, where=~an_legal )
+        return an_block
+
+    def _reverse_write( self, iln_channels : list, ian_x : np.ndarray, ian_y : np.ndarray, ian_channels : np.ndarray, ian_values ) -> bool:
+        """Reverse Translation. Signal which action has been translated: candidate channels of the map are zeroed, the translated
+        action of each acting cell is written
+        Args:
+            iln_channels (list): candidate E_OUTPUT_SPACIAL_MATRICIES
+            ian_x, ian_y, ian_channels (np.ndarray): acting cells in map coordinates, and their action
+            ian_values (np.ndarray | int): 1=translated | -1=translation failed
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        an_map = self.mats[ :, self._w_shift:self._w_shift +self.n_map_size, self._h_shift:self._h_shift +self.n_map_size ]
+        an_map[iln_channels] = 0
+        an_map[ian_channels, ian_x, ian_y] = ian_values
+        return False
+
+    def _translate_citytile_actions( self, ian_mask : np.ndarray = None ) -> list:
+        """Translates citytile actions into a list of string actions to be fed to the game engine
+        Requires output spacial matricies
+        @TODO add a dictionary of citytiles to check if a city exist
+        @TODO check action against cooldown perception matrix to see if an action is valid
+            list: list of citytile string actions to be fed to the game engine
+                e.g. ["r 14 8", "bw 11 0", "bc 1 1"]
+        """
+        an_x, an_y, an_best = self._masked_argmax( Action.LN_CITYTILE_ACTIONS, ian_mask )
+        ls_actions_citytile = _citytile_action_table( self.n_map_size )[an_best, an_x, an_y].tolist()
+        self._reverse_write( Action.LN_CITYTILE_ACTIONS, an_x, an_y, np.asarray( Action.LN_CITYTILE_ACTIONS )[an_best], 1 )
+
+        return ls_actions_citytile
+
+    def _reverse_dictionary_search( self, in_x : int, in_y : int ) -> str:
+        """performs a reverse dictionary search. put in the value, returns the key if any
+        O(1) lookup in the reverse dictionary of units
+        e.g. { (1, 5) : [u_1] | (11, 11) : [u_40, u_41] } _reverse_dictionary_search( 11, 11) -> u_40
+        Units stacked in a city share a position, the first one is returned
+        Args:
+            in_x (int): coordinate of the unit
+            in_y (int): coordinate of the unit
+        Returns:
+            str: unique id of the unit e.g. u_1 u_43
+        """
+        ls_units = self.d_position_units.get( (in_x, in_y) )
+        if not ls_units:
+            return None
+        return ls_units[0]
+
+    def _unit_index( self ) -> tuple:
+        """index of the unit acting on each map cell, the first of the reverse dictionary like _reverse_dictionary_search
+        Returns:
+            tuple(np.ndarray, np.ndarray, np.ndarray): (map size, map size) position in the unit ids, -1 on empty cells | object array
+                of unit ids, the last one is "None" and is read by the empty cells | (map size, map size) units on each cell
+        """
+        an_cell_unit = np.full( (self.n_map_size, self.n_map_size), -1, dtype=np.int32 )
+        an_cell_count = np.zeros( (self.n_map_size, self.n_map_size), dtype=np.int32 )
+        ls_units = list()
+        if self.d_position_units is not None:
+            for (n_x, n_y), ls_stacked in self.d_position_units.items():
+                if ls_stacked and 0 <= n_x < self.n_map_size and 0 <= n_y < self.n_map_size:
+                    an_cell_unit[n_x, n_y] = len(ls_units)
+                    an_cell_count[n_x, n_y] = len(ls_stacked)
+                    ls_units.append( ls_stacked[0] )
+        ls_units.append( str(None) )
+        return an_cell_unit, np.array( ls_units, dtype=object ), an_cell_count
+
+    def _translate_unit_actions( self, ian_mask : np.ndarray = None, ian_tiles : np.ndarray = None ) -> list:
+        """Translates citytile actions into a list of string actions to be fed to the game engine
+        Requires output spacial matricies. Requires dictionary of unit->position, reverse translation
+        The moves are resolved together by big_no_brainer.move_resolution, a move the engine would cancel falls back to the next best
+        action of the unit
+            list: list of citytile string actions to be fed to the game engine
+                e.g. ["m u_1 n", "bcity u_4"]
+        """
+        f_min_score = GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MIN_SCORE"]
+        an_block = self._masked_scores( Action.LN_UNIT_ACTIONS, ian_mask )
+        an_best = np.argmax( an_block, axis=0 )
+        an_x, an_y = np.nonzero( np.take_along_axis( an_block, an_best[None], axis=0 )[0] > f_min_score )
+        an_best = an_best[an_x, an_y]
+        #unit of each acting cell. a cell without unit is a translation error
+        an_cell_unit, an_unit_ids, an_cell_count = self._unit_index()
+        an_unit = an_cell_unit[an_x, an_y]
+
+        #the last unit action, UNIT_BUILD_CITY, is the stay option of the resolver
+        ax_resolve = (an_unit >= 0) & (an_best != N_OPTION_STAY)
+        if ax_resolve.any():
+            an_rx = an_x[ax_resolve]
+            an_ry = an_y[ax_resolve]
+            #options of the moving units: the moves above MIN_SCORE, and staying with a build city or idle
+            an_scores = an_block[:, an_rx, an_ry].T.astype( np.float64 )
+            an_scores[:, :N_OPTION_STAY][ an_scores[:, :N_OPTION_STAY] <= f_min_score ] = -np.inf
+            an_scores[:, N_OPTION_STAY] = np.maximum( an_scores[:, N_OPTION_STAY], f_min_score )
+            #the other units of the team stay
+            an_occupied = an_cell_count.copy()
+            an_occupied[an_rx, an_ry] -= 1
+            an_best[ax_resolve] = resolve_moves( an_rx, an_ry, an_scores, an_occupied, ian_tiles )
+            #units that stay idle emit nothing
+            ax_keep = ~ax_resolve
+            ax_keep[ax_resolve] = (an_best[ax_resolve] != N_OPTION_STAY) | (an_block[N_OPTION_STAY, an_rx, an_ry] > f_min_score)
+            an_x, an_y, an_best, an_unit = an_x[ax_keep], an_y[ax_keep], an_best[ax_keep], an_unit[ax_keep]
+        ls_actions_unit = (Action.AN_UNIT_PREFIXES[an_best] +an_unit_ids[an_unit] +Action.AN_UNIT_SUFFIXES[an_best]).tolist()
+        #signal reverse translate error inside output spacial matricies
+        self._reverse_write( Action.LN_UNIT_ACTIONS, an_x, an_y, np.asarray( Action.LN_UNIT_ACTIONS )[an_best], np.where( an_unit >= 0, 1, -1 ) )
+
+        return ls_actions_unit
+
+    #----------------    Public Members    ----------------
+
+    def set_units( self, id_units : dict, id_position_units : dict = None ) -> bool:
+        """attach the dictionaries of units needed to translate unit ids <-> positions
+        Args:
+            id_units (dict): unit id -> position. Perception.d_unit e.g. { u_1 : (11, 17) }
+            id_position_units (dict): position -> list of unit ids. Perception.d_position_unit e.g. { (11, 17) : [u_1] }
+                built from id_units if not provided
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if id_position_units is None:
+            id_position_units = dict()
+            for s_unit, t_pos in id_units.items():
+                id_position_units.setdefault( (t_pos[0], t_pos[1]), [] ).append( s_unit )
+        self.d_units = id_units
+        self.d_position_units = id_position_units
+
+        return False
+
+    def fill_mats( self, id_units : dict, ils_actions : list, id_position_units : dict = None ):
+
+        #the parser accumulates in float64
+        if self.mats.dtype != np.float64:
+            self.mats = self.mats.astype( np.float64 )
+        #finally call the parser that decodes a list of string actions filling the output mat
+        x_fail = self._parse_agent_actions( id_units, ils_actions )
+        if x_fail == True:
+            logging.error(f"failed to parse string actions: {ils_actions}")
+        else:
+            #attach the dictionaries to the Action
+            self.set_units( id_units, id_position_units )
+        #labels to the dtype of the policy, also after a failure so that all the Action of a replay share it
+        #saturated counts, e.g. more stacked actions on a tile than int8 holds, are reported by convert_array and don't fail the parse
+        self.mats, _ = convert_array( self.mats, self.c_dtype_policy.labels, "Action.mats", [ e_matrix.name for e_matrix in Action.E_OUTPUT_SPACIAL_MATRICIES ] )
+
+        return x_fail
+
+    def translate( self, ian_mask : np.ndarray = None, ian_tiles : np.ndarray = None ) -> list:
+        """Translates actions into a list of string actions to be fed to the game engine
+        Requires output spacial matricies and dictionary of units to perform the translation
+        Args:
+            ian_mask (np.ndarray): (10, WIDTH_MAX, HEIGHT_MAX) bool legal actions, applied before the argmax. see big_no_brainer.legality
+                | None: every action is a candidate
+            ian_tiles (np.ndarray): (map size, map size) obstacle grid of the moves. see big_no_brainer.move_resolution
+                | None: only the units of the team are known, no tile allows stacking
+        Returns:
+            list: list actions to be fed to the game engine
+                e.g. ["r 14 8", "m u_1 w"]
+        """
+
+        #allocate list of string actions to empty
+        ls_actions = list()
+
+        #translate citytile actions
+        ls_actions_citytiles = self._translate_citytile_actions( ian_mask )
+        if ls_actions_citytiles is None:
+            logging.error(f"failed to parse citytile actions")
+            return list()
+        #concatenate
+        ls_actions += ls_actions_citytiles
+
+        # translate unit actions
+        ls_actions_units = self._translate_unit_actions( ian_mask, ian_tiles )
+        if ls_actions_units is None:
+            logging.error(f"failed to parse unit actions")
+            return list()
+        #concatenate
+        ls_actions += ls_actions_units
+
+        #logging.debug(f"{ls_actions_citytiles}")
+        return ls_actions
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BATCH
+#--------------------------------------------------------------------------------------------------------------------------------
+#   String actions of every turn of a game decoded at once. Each action string is split once and dispatched by its header through
+#   a table compiled from GAME_CONSTANTS, the (turn, channel, x, y) of every action are collected and written in one pass
+
+#citytile header -> channel. tokens: header x y
+_DN_CITYTILE_DISPATCH = {
+    GAME_CONSTANTS["ACTION"]["CITYTILE"]["RESEARCH"] : Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value,
+    GAME_CONSTANTS["ACTION"]["CITYTILE"]["BUILD_WORKER"] : Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value,
+    GAME_CONSTANTS["ACTION"]["CITYTILE"]["BUILD_CART"] : Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_CART.value,
+}
+#unit header -> (tokens, channel). tokens: header unit [...]. the action is written on the tile of the unit
+#a move has no channel, its direction token picks it. a transfer is written on the tile of the source unit
+_DT_UNIT_DISPATCH = {
+    GAME_CONSTANTS["ACTION"]["UNIT"]["MOVE"] : (3, None),
+    GAME_CONSTANTS["ACTION"]["UNIT"]["TRANSFER_RESOURCE"] : (5, Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_TRANSFER_RESOURCE.value),
+    GAME_CONSTANTS["ACTION"]["UNIT"]["BUILD_CITY"] : (2, Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value),
+    GAME_CONSTANTS["ACTION"]["UNIT"]["PILLAGE_ROAD"] : (2, Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_PILLAGE_ROAD.value),
+}
+#direction token of a move -> channel. center does not move and is not written
+_DN_MOVE_DISPATCH = {
+    GAME_CONSTANTS["DIRECTIONS"]["NORTH"] : Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value,
+    GAME_CONSTANTS["DIRECTIONS"]["EAST"] : Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value,
+    GAME_CONSTANTS["DIRECTIONS"]["SOUTH"] : Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value,
+    GAME_CONSTANTS["DIRECTIONS"]["WEST"] : Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value,
+    GAME_CONSTANTS["DIRECTIONS"]["CENTER"] : None,
+}
+
+class ActionBatch(NamedTuple):
+    """Action of every turn of a game for one player in a contiguous array. Returned by actions_from_strings"""
+    mats: np.ndarray
+    """(T, 10, WIDTH_MAX, HEIGHT_MAX) Action.E_OUTPUT_SPACIAL_MATRICIES, count of each action on each tile"""
+    counts: np.ndarray
+    """(10) int64 actions of each E_OUTPUT_SPACIAL_MATRICIES in the game, before saturation to the dtype of mats"""
+    invalid: bool
+    """True if an action could not be decoded"""
+    saturated: bool
+    """True if a count overflowed the dtype of mats and was saturated. A bool mats only flags stacked actions, it never saturates"""
+
+def _decode_action_strings( ills_actions : list, ild_units : list, in_map_size : int ) -> tuple:
+    """Decode the string actions of several turns. Actions that can't be decoded, or fall outside of the map, are reported and skipped
+    Args:
+        ills_actions (list(list(str))): string actions of each turn. e.g. [["r 14 8", "m u_1 w"], [], ["bcity u_1"]]
+        ild_units (list(dict)): unit id -> map position of each turn. Perception.d_unit e.g. { u_1 : (11, 17) }
+        in_map_size (int): size of the map in cells
+    Returns:
+        tuple(list, list, list, list, bool): turn, channel, map x, map y of each action, True if an action failed
+    """
+    ln_turn = list()
+    ln_channel = list()
+    ln_x = list()
+    ln_y = list()
+    x_fail = False
+    for n_turn, (ls_actions, d_units) in enumerate( zip( ills_actions, ild_units ) ):
+        for s_action in ls_actions:
+            ls_token = s_action.split( " " )
+            s_header = ls_token[0]
+            n_channel = _DN_CITYTILE_DISPATCH.get( s_header )
+            if n_channel is not None:
+                if len(ls_token) != 3:
+                    logging.error(f"Expected 3 tokens on action: {s_action}")
+                    x_fail = True
+                    continue
+                try:
+                    n_x = int( ls_token[1] )
+                    n_y = int( ls_token[2] )
+                except ValueError:
+                    logging.error(f"Bad position on action: {s_action}")
+                    x_fail = True
+                    continue
+            elif s_header in _DT_UNIT_DISPATCH:
+                n_tokens, n_channel = _DT_UNIT_DISPATCH[s_header]
+                if len(ls_token) != n_tokens:
+                    logging.error(f"Expected {n_tokens} tokens on action: {s_action}")
+                    x_fail = True
+                    continue
+                if n_channel is None:
+                    if ls_token[2] not in _DN_MOVE_DISPATCH:
+                        logging.error(f"Move Direction is unknown: {s_action}")
+                        x_fail = True
+                        continue
+                    n_channel = _DN_MOVE_DISPATCH[ls_token[2]]
+                    if n_channel is None:
+                        continue
+                t_pos = d_units.get( ls_token[1] )
+                if t_pos is None:
+                    logging.error(f"Unit {ls_token[1]} not found in unit dictionary of turn {n_turn}: {s_action}")
+                    x_fail = True
+                    continue
+                n_x, n_y = t_pos
+            elif s_header == "":
+                #NOP
+                continue
+            else:
+                logging.error(f"Unknown header: {s_action}")
+                x_fail = True
+                continue
+            if n_x < 0 or n_x >= in_map_size or n_y < 0 or n_y >= in_map_size:
+                logging.error(f"Action outside of the map of size {in_map_size} on turn {n_turn}: {s_action}")
+                x_fail = True
+                continue
+            ln_turn.append( n_turn )
+            ln_channel.append( n_channel )
+            ln_x.append( n_x )
+            ln_y.append( n_y )
+
+    return ln_turn, ln_channel, ln_x, ln_y, x_fail
+
+def actions_from_strings( ills_actions : list, ild_units : list, in_map_size : int, ic_dtype : np.dtype = np.int8, ian_mats : np.ndarray = None ) -> ActionBatch:
+    """Action of every turn of a game decoded at once from the string actions of one player
+    Args:
+        ills_actions (list(list(str))): string actions of each turn. e.g. Replay._generate_list_action
+        ild_units (list(dict)): unit id -> map position of each turn. Perception.d_unit
+        in_map_size (int): size of the map in cells
+        ic_dtype (np.dtype): dtype of the label tensor. e.g. DtypePolicy.labels. counts above it are reported and saturated, bool flags the tiles with an action
+        ian_mats (np.ndarray): preallocated C contiguous (T, 10, WIDTH_MAX, HEIGHT_MAX) of ic_dtype. It is zeroed | None: allocated
+    Returns:
+        ActionBatch: labels and action counts of the game | None on a mismatch of the arguments
+    """
+    n_turns = len(ills_actions)
+    if len(ild_units) != n_turns:
+        logging.error(f"One unit dictionary per turn is required | Turns: {n_turns} | Unit dictionaries: {len(ild_units)}")
+        return None
+    t_shape = (n_turns, len(Action.E_OUTPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX'])
+    if ian_mats is None:
+        ian_mats = np.zeros( t_shape, dtype=ic_dtype )
+    elif ian_mats.shape != t_shape or ian_mats.dtype != ic_dtype or not ian_mats.flags.c_contiguous:
+        logging.error(f"Destination does not match | Expected: {t_shape} {np.dtype(ic_dtype)} | Destination: {ian_mats.shape} {ian_mats.dtype}")
+        return None
+    else:
+        ian_mats.fill( 0 )
+
+    ln_turn, ln_channel, ln_x, ln_y, x_invalid = _decode_action_strings( ills_actions, ild_units, int(in_map_size) )
+    an_channel = np.array( ln_channel, dtype=np.int64 )
+    n_w_shift = (GAME_CONSTANTS['MAP']['WIDTH_MAX'] -int(in_map_size)) // 2
+    n_h_shift = (GAME_CONSTANTS['MAP']['HEIGHT_MAX'] -int(in_map_size)) // 2
+    an_flat = np.ravel_multi_index( (np.array( ln_turn, dtype=np.int64 ), an_channel, np.array( ln_x, dtype=np.int64 ) +n_w_shift, np.array( ln_y, dtype=np.int64 ) +n_h_shift), t_shape )
+    #stacked actions on a tile are counted once, then cast to the label dtype
+    an_cells, an_count = np.unique( an_flat, return_counts=True )
+    an_count, x_overflow = convert_array( an_count, ian_mats.dtype, "ActionBatch.mats" )
+    ian_mats.reshape( -1 )[an_cells] = an_count
+
+    an_counts = np.bincount( an_channel, minlength=len(Action.E_OUTPUT_SPACIAL_MATRICIES) )
+    return ActionBatch( ian_mats, an_counts, x_invalid, x_overflow )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Save/Load Sparse
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def save_actions_sparse( ilc_actions : list, is_file_name : str ) -> bool:
+    """save the mats of actions to file in sparse form. see big_no_brainer.sparse_storage
+    The dictionaries of units are not saved
+    Args:
+        ilc_actions (list(Action)): actions of one player of a game, sharing a dtype policy
+        is_file_name (str): destination file name. .npz is added if missing
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    if len(ilc_actions) == 0:
+        logging.error(f"No actions to save")
+        return True
+    c_mats = sparse_encode( np.stack( [ c_action.mats for c_action in ilc_actions ] ) )
+    if c_mats is None:
+        return True
+    an_map_size = np.array( [ c_action.n_map_size for c_action in ilc_actions ], dtype=np.int64 )
+    return save_sparse( is_file_name, { "mats" : c_mats, "map_size" : an_map_size } )
+
+def load_actions_sparse( is_file_name : str, ian_mats : np.ndarray = None ) -> tuple:
+    """load actions saved by save_actions_sparse into a dense array
+    Args:
+        is_file_name (str): source file name
+        ian_mats (np.ndarray): preallocated (T, 10, WIDTH_MAX, HEIGHT_MAX) in the dtype of the saved mats | None: allocated
+    Returns:
+        tuple(np.ndarray, np.ndarray): mats, map size of each action | None on failure
+    """
+    d_arrays = load_sparse( is_file_name )
+    if d_arrays is None:
+        return None
+    an_mats = sparse_densify( d_arrays["mats"], ian_mats )
+    if an_mats is None:
+        return None
+    return an_mats, d_arrays["map_size"]
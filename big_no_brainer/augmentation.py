@@ -0,0 +1,137 @@
+##  @package augmentation
+#   Dihedral symmetry augmentation of the Perception and Action matricies
+#   Every map size is centered in the WIDTH_MAX *HEIGHT_MAX frame with an even margin, so flipping or transposing the frame keeps
+#   the map centered. The 8 transforms of the square (identity, 3 rotations, 4 mirrors) are served as strided views of the last two
+#   axes (x, y), nothing is copied. Perception channels are scalar and keep their meaning
+#   Action move channels are directions and are remapped: a flip along y swaps NORTH/SOUTH, a flip along x swaps EAST/WEST, a
+#   transpose swaps NORTH/WEST and SOUTH/EAST. A permutation of channels can't be a view, so the Action view comes with the index of
+#   the channel each output channel reads. The gather happens once, when a training batch is assembled by augment_batch
+#
+#   variant bits: 1=transpose x<->y, 2=flip x, 4=flip y. Applied in that order
+#   e.g. variant 6 = flip x and flip y = rotation by 180 degrees. NORTH<->SOUTH, EAST<->WEST
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+from big_no_brainer.action import Action
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   TRANSFORMS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#number of transforms of the square
+DIHEDRAL_VARIANTS = 8
+
+DIHEDRAL_TRANSPOSE = 1
+DIHEDRAL_FLIP_X = 2
+DIHEDRAL_FLIP_Y = 4
+
+#(dx, dy) of each move channel. NORTH is y-1
+_DT_MOVE_VECTORS = {
+    Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value : (0, -1),
+    Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value : (1, 0),
+    Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value : (0, 1),
+    Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value : (-1, 0),
+}
+
+def dihedral_vector( in_variant : int, in_dx : int, in_dy : int ) -> tuple:
+    """direction of a move after a transform
+    Returns:
+        tuple(int, int): (dx, dy) in the transformed frame
+    """
+    if in_variant & DIHEDRAL_TRANSPOSE:
+        in_dx, in_dy = in_dy, in_dx
+    if in_variant & DIHEDRAL_FLIP_X:
+        in_dx = -in_dx
+    if in_variant & DIHEDRAL_FLIP_Y:
+        in_dy = -in_dy
+    return in_dx, in_dy
+
+def dihedral_view( ian_array : np.ndarray, in_variant : int ) -> np.ndarray:
+    """view of an array under a transform of its last two axes (x, y). works on (C, X, Y) mats and (T, C, X, Y) batches
+    Args:
+        ian_array (np.ndarray): Perception.mats, Action.mats, PerceptionBatch.mats...
+        in_variant (int): transform, 0 to DIHEDRAL_VARIANTS-1
+    Returns:
+        np.ndarray: strided view, shares memory with ian_array | None if the variant is out of range
+    """
+    if in_variant < 0 or in_variant >= DIHEDRAL_VARIANTS:
+        logging.error(f"Dihedral variant is out of range: {in_variant}")
+        return None
+    if in_variant & DIHEDRAL_TRANSPOSE:
+        ian_array = ian_array.swapaxes( -1, -2 )
+    if in_variant & DIHEDRAL_FLIP_X:
+        ian_array = ian_array[..., ::-1, :]
+    if in_variant & DIHEDRAL_FLIP_Y:
+        ian_array = ian_array[..., :, ::-1]
+    return ian_array
+
+@lru_cache( maxsize=None )
+def dihedral_action_channels( in_variant : int ) -> np.ndarray:
+    """channel of the Action each channel of the transformed Action reads. only the move channels move
+    Args:
+        in_variant (int): transform, 0 to DIHEDRAL_VARIANTS-1
+    Returns:
+        np.ndarray: read only, one index per E_OUTPUT_SPACIAL_MATRICIES
+    """
+    an_channels = np.arange( len(Action.E_OUTPUT_SPACIAL_MATRICIES) )
+    d_channel_of_vector = { t_vector : n_channel for n_channel, t_vector in _DT_MOVE_VECTORS.items() }
+    for n_channel, t_vector in _DT_MOVE_VECTORS.items():
+        an_channels[ d_channel_of_vector[ dihedral_vector( in_variant, *t_vector ) ] ] = n_channel
+    an_channels.flags.writeable = False
+    return an_channels
+
+def dihedral_action_view( ian_mats : np.ndarray, in_variant : int ) -> tuple:
+    """Action mats under a transform
+    Args:
+        ian_mats (np.ndarray): (10, X, Y) Action.mats or (T, 10, X, Y) batch of them
+        in_variant (int): transform, 0 to DIHEDRAL_VARIANTS-1
+    Returns:
+        tuple(np.ndarray, np.ndarray): strided view of the spatial axes, channel of the view each output channel reads.
+            view[..., an_channels, :, :] is the transformed Action | None, None if the variant is out of range
+    """
+    an_view = dihedral_view( ian_mats, in_variant )
+    if an_view is None:
+        return None, None
+    return an_view, dihedral_action_channels( in_variant )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BATCH
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def augment_batch( ian_features : np.ndarray, ian_labels : np.ndarray, ian_samples : np.ndarray, ian_variants : np.ndarray, ian_out_features : np.ndarray = None, ian_out_labels : np.ndarray = None ) -> tuple:
+    """Assemble a training batch of transformed (Perception, Action) pairs. Each pair is copied once, straight from its view
+    e.g. ian_samples = rng.integers( T, size=64 ), ian_variants = rng.integers( DIHEDRAL_VARIANTS, size=64 )
+    Args:
+        ian_features (np.ndarray): (T, C, X, Y) Perception mats of every turn. e.g. PerceptionBatch.mats
+        ian_labels (np.ndarray): (T, 10, X, Y) Action mats of every turn
+        ian_samples (np.ndarray): turn of each entry of the batch
+        ian_variants (np.ndarray): transform of each entry of the batch
+        ian_out_features (np.ndarray): preallocated (B, C, X, Y) | None: allocated with the dtype of ian_features
+        ian_out_labels (np.ndarray): preallocated (B, 10, X, Y) | None: allocated with the dtype of ian_labels
+    Returns:
+        tuple(np.ndarray, np.ndarray): features, labels of the batch | None, None on failure
+    """
+    if len(ian_samples) != len(ian_variants):
+        logging.error(f"One variant per sample is required | samples: {len(ian_samples)} | variants: {len(ian_variants)}")
+        return None, None
+    if np.any( (ian_variants < 0) | (ian_variants >= DIHEDRAL_VARIANTS) ):
+        logging.error(f"Dihedral variant is out of range: {np.unique( ian_variants )}")
+        return None, None
+    if ian_out_features is None:
+        ian_out_features = np.empty( (len(ian_samples),) +ian_features.shape[1:], dtype=ian_features.dtype )
+    if ian_out_labels is None:
+        ian_out_labels = np.empty( (len(ian_samples),) +ian_labels.shape[1:], dtype=ian_labels.dtype )
+
+    for n_index, (n_sample, n_variant) in enumerate( zip( ian_samples.tolist(), ian_variants.tolist() ) ):
+        ian_out_features[n_index] = dihedral_view( ian_features[n_sample], n_variant )
+        an_view, an_channels = dihedral_action_view( ian_labels[n_sample], n_variant )
+        np.take( an_view, an_channels, axis=0, out=ian_out_labels[n_index] )
+
+    return ian_out_features, ian_out_labels
@@ -0,0 +1,776 @@
+##  @package batch_environment
+#   Vectorized training environment. N games are held as stacked numpy arrays and advanced in lockstep, one vectorized step for all
+#   Maps live in the frame of Perception: [game, x, y] with WIDTH_MAX*HEIGHT_MAX tiles, smaller maps are centered by the same
+#   _w_shift/_h_shift as Perception and the tiles outside of the map are masked out
+#   Actions of both players are taken in the Action.mats layout, observations are emitted in the Perception.mats/status layout
+#   Rules are the ones of lux.game_simulator.GameSimulator
+#
+#   ACTIONS
+#   Like Action.translate, each tile takes its highest scoring action above ACTION.TRANSLATE.MIN_SCORE. Citytile actions go to the
+#   citytile, unit actions go to the unit with the lowest id on the tile. Transfers have no destination in the layout and are ignored
+#
+#   e.g.
+#   c_env = BatchEnvironment()
+#   c_env.reset( lc_snapshots )                 #N initial states. e.g. the first turn of N replays
+#   an_mats, an_status = c_env.perceive( 0 )    #(N, 8, 32, 32) (N, 9) seen by player 0
+#   c_env.step( an_actions )                    #(N, 2, 10, 32, 32) scores of player 0 and player 1
+#   c_env.ax_done                               #(N) games that are over. they don't change anymore
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+
+import numpy as np
+
+#LUX-AI-2021
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+UNIT_TYPES = Constants.UNIT_TYPES
+
+from lux.game import GameSnapshot
+from lux.game_map import RESOURCE_TYPE_CODES
+from lux.game_updates import RECORD_DTYPES
+
+from big_no_brainer.perception import Perception
+from big_no_brainer.action import Action
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   PARAMETERS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+PARAMETERS = GAME_CONSTANTS["PARAMETERS"]
+_N_WIDTH = GAME_CONSTANTS['MAP']['WIDTH_MAX']
+_N_HEIGHT = GAME_CONSTANTS['MAP']['HEIGHT_MAX']
+_N_TILES = _N_WIDTH *_N_HEIGHT
+_N_CYCLE = PARAMETERS["DAY_LENGTH"] +PARAMETERS["NIGHT_LENGTH"]
+
+#resource codes of lux.game_map.RESOURCE_TYPE_CODES in mining order
+_N_WOOD = RESOURCE_TYPE_CODES[Constants.RESOURCE_TYPES.WOOD]
+_N_COAL = RESOURCE_TYPE_CODES[Constants.RESOURCE_TYPES.COAL]
+_N_URANIUM = RESOURCE_TYPE_CODES[Constants.RESOURCE_TYPES.URANIUM]
+_LN_MINING_ORDER = (_N_URANIUM, _N_COAL, _N_WOOD)
+#cargo fields of a unit by resource code, and their fuel value
+_DS_CARGO_FIELD = { _N_WOOD : "wood", _N_COAL : "coal", _N_URANIUM : "uranium" }
+_LS_CARGO_FIELDS = ( "wood", "coal", "uranium" )
+_TN_FUEL_RATE = tuple( PARAMETERS["RESOURCE_TO_FUEL_RATE"][s_field.upper()] for s_field in _LS_CARGO_FIELDS )
+
+#per unit type. UNIT_TYPES.WORKER=0 | UNIT_TYPES.CART=1
+_AN_UNIT_CAPACITY = np.array( [ PARAMETERS["RESOURCE_CAPACITY"]["WORKER"], PARAMETERS["RESOURCE_CAPACITY"]["CART"] ], dtype=np.int32 )
+_AN_UNIT_COOLDOWN = np.array( [ PARAMETERS["UNIT_ACTION_COOLDOWN"]["WORKER"], PARAMETERS["UNIT_ACTION_COOLDOWN"]["CART"] ], dtype=np.float32 )
+_AN_UNIT_UPKEEP = np.array( [ PARAMETERS["LIGHT_UPKEEP"]["WORKER"], PARAMETERS["LIGHT_UPKEEP"]["CART"] ], dtype=np.int32 )
+
+#output channels read by the environment
+_E_ACTION = Action.E_OUTPUT_SPACIAL_MATRICIES
+_LN_CITYTILE_ACTIONS = [ _E_ACTION.CITYTILE_RESEARCH.value, _E_ACTION.CITYTILE_BUILD_WORKER.value, _E_ACTION.CITYTILE_BUILD_CART.value ]
+_LN_UNIT_ACTIONS = [
+    _E_ACTION.UNIT_MOVE_NORTH.value,
+    _E_ACTION.UNIT_MOVE_EAST.value,
+    _E_ACTION.UNIT_MOVE_SOUTH.value,
+    _E_ACTION.UNIT_MOVE_WEST.value,
+    _E_ACTION.UNIT_BUILD_CITY.value,
+    _E_ACTION.UNIT_PILLAGE_ROAD.value,
+]
+#index in _LN_UNIT_ACTIONS of the moves, and their (dx, dy)
+_AT_MOVE_OFFSET = np.array( [ (0, -1), (1, 0), (0, 1), (-1, 0) ], dtype=np.int16 )
+_N_UNIT_BUILD_CITY = 4
+_N_UNIT_PILLAGE = 5
+#tile of a worker and its adjacent tiles, collection order
+_AT_COLLECT_OFFSET = np.array( [ (0, 0), (0, -1), (1, 0), (0, 1), (-1, 0) ], dtype=np.int16 )
+
+_E_MAT = Perception.E_INPUT_SPACIAL_MATRICIES
+_E_STATUS = Perception.E_INPUT_STATUS_VECTOR
+
+#units of all games in one table
+UNIT_DTYPE = np.dtype([
+    ("game", np.int32), ("type", np.int8), ("team", np.int8), ("id", np.int32), ("x", np.int16), ("y", np.int16),
+    ("cooldown", np.float32), ("wood", np.int32), ("coal", np.int32), ("uranium", np.int32)
+])
+"""game type team id x y cooldown wood coal uranium. x and y in the centered frame"""
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   HELPERS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _first_per_key( ian_keys : np.ndarray, ian_order : np.ndarray ) -> np.ndarray:
+    """index of the first element of each key, the first being the lowest ian_order
+    Returns:
+        np.ndarray: indexes of one element per distinct key
+    """
+    an_sort = np.lexsort( (ian_order, ian_keys) )
+    ax_first = np.ones( len(an_sort), dtype=bool )
+    ax_first[1:] = ian_keys[an_sort[1:]] != ian_keys[an_sort[:-1]]
+    return an_sort[ax_first]
+
+def _rank_per_key( ian_keys : np.ndarray ) -> np.ndarray:
+    """rank of each element among the elements with the same key, in order of appearance
+    Returns:
+        np.ndarray: 0 for the first element of a key, 1 for the second...
+    """
+    an_sort = np.argsort( ian_keys, kind="stable" )
+    an_sorted = ian_keys[an_sort]
+    an_start = np.zeros( len(an_sort), dtype=np.int64 )
+    if len(an_sort) > 0:
+        ax_new = np.ones( len(an_sort), dtype=bool )
+        ax_new[1:] = an_sorted[1:] != an_sorted[:-1]
+        an_start = np.maximum.accumulate( np.where( ax_new, np.arange( len(an_sort) ), 0 ) )
+    an_rank = np.empty( len(an_sort), dtype=np.int64 )
+    an_rank[an_sort] = np.arange( len(an_sort) ) -an_start
+    return an_rank
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   ENVIRONMENT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class BatchEnvironment():
+    """N games of Lux AI 2021 stepped together
+    Tiles are grids [game, x, y] in the centered frame of Perception. Citytiles hold the id of their city, cities hold their fuel in
+    an_fuel[game, city id]. Units of every game share one record array of UNIT_DTYPE
+    """
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self ):
+        """Empty environment. Fill it with reset"""
+        self.n_games = 0
+
+        return
+
+    #----------------    Private Members    ----------------
+
+    def __init_vars( self, in_games : int, in_cities : int ) -> bool:
+        """Allocate empty games
+        Args:
+            in_games (int): number of games
+            in_cities (int): city ids that fit in an_fuel before it grows
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.n_games = int(in_games)
+        t_grid = (self.n_games, _N_WIDTH, _N_HEIGHT)
+        #per game
+        self.an_id = np.zeros( self.n_games, dtype=np.int8 )
+        self.an_width = np.zeros( self.n_games, dtype=np.int16 )
+        self.an_height = np.zeros( self.n_games, dtype=np.int16 )
+        self.an_w_shift = np.zeros( self.n_games, dtype=np.int16 )
+        self.an_h_shift = np.zeros( self.n_games, dtype=np.int16 )
+        self.an_turn = np.zeros( self.n_games, dtype=np.int32 )
+        self.ax_done = np.zeros( self.n_games, dtype=bool )
+        self.an_research = np.zeros( (self.n_games, 2), dtype=np.int32 )
+        #last ids given by the engine, from the snapshots. new units and cities take the next one
+        self.an_unit_counter = np.zeros( self.n_games, dtype=np.int32 )
+        self.an_city_counter = np.zeros( self.n_games, dtype=np.int32 )
+        #tiles
+        self.ax_valid = np.zeros( t_grid, dtype=bool )
+        self.an_resource_type = np.zeros( t_grid, dtype=np.int8 )
+        self.an_resource_amount = np.zeros( t_grid, dtype=np.int32 )
+        self.an_road = np.zeros( t_grid, dtype=np.float32 )
+        #citytiles. team -1 and city 0 where there is none
+        self.an_city = np.zeros( t_grid, dtype=np.int32 )
+        self.an_city_team = np.full( t_grid, -1, dtype=np.int8 )
+        self.an_city_cooldown = np.zeros( t_grid, dtype=np.float32 )
+        #fuel of the cities [game, city id]
+        self.an_fuel = np.zeros( (self.n_games, max( int(in_cities), 1 )), dtype=np.float64 )
+        #units of all games
+        self.an_units = np.zeros( 0, dtype=UNIT_DTYPE )
+
+        return False
+
+    def __grow_cities( self, in_city : int ) -> bool:
+        """make room in an_fuel for city ids up to in_city"""
+        n_size = self.an_fuel.shape[1]
+        if in_city < n_size:
+            return False
+        while n_size <= in_city:
+            n_size *= 2
+        an_fuel = np.zeros( (self.n_games, n_size), dtype=np.float64 )
+        an_fuel[:, :self.an_fuel.shape[1]] = self.an_fuel
+        self.an_fuel = an_fuel
+        return False
+
+    def __is_night( self ) -> np.ndarray:
+        """Returns: np.ndarray: (N) True for the games whose current turn is at night"""
+        return self.an_turn % _N_CYCLE >= PARAMETERS["DAY_LENGTH"]
+
+    def __flat( self, ian_game : np.ndarray, ian_x : np.ndarray, ian_y : np.ndarray ) -> np.ndarray:
+        """index of tiles in the flattened grids"""
+        return (ian_game.astype( np.int64 ) *_N_WIDTH +ian_x) *_N_HEIGHT +ian_y
+
+    def __team_keys_citytiles( self ) -> np.ndarray:
+        """Returns: np.ndarray: game*2 +team of every citytile"""
+        an_game, an_x, an_y = np.nonzero( self.an_city_team >= 0 )
+        return an_game.astype( np.int64 ) *2 +self.an_city_team[an_game, an_x, an_y]
+
+    #----------------    Protected Members    ----------------
+
+    def _citytile_actions( self, ian_scores : np.ndarray, ax_active : np.ndarray ) -> bool:
+        """Research, build workers and build carts. Units are capped by the number of citytiles of the team
+        Args:
+            ian_scores (np.ndarray): (N, 2, 10, W, H) scores of both players
+            ax_active (np.ndarray): (N) games that are still running
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        an_game, an_x, an_y = np.nonzero( (self.an_city_team >= 0) & (self.an_city_cooldown < 1) & ax_active[:, None, None] )
+        an_team = self.an_city_team[an_game, an_x, an_y]
+        #best citytile action of the owner of each citytile
+        an_scores = ian_scores[an_game, an_team, :, an_x, an_y][:, _LN_CITYTILE_ACTIONS]
+        an_best = np.argmax( an_scores, axis=1 )
+        ax_acts = an_scores[np.arange( len(an_best) ), an_best] > GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MIN_SCORE"]
+
+        #research
+        ax_research = ax_acts & (an_best == 0)
+        np.add.at( self.an_research, (an_game[ax_research], an_team[ax_research]), 1 )
+
+        #build. spawns of a game are numbered team 0 first, then in tile order
+        ax_build = ax_acts & (an_best > 0)
+        an_key = an_game.astype( np.int64 ) *2 +an_team
+        an_citytiles = np.bincount( self.__team_keys_citytiles(), minlength=2*self.n_games )
+        an_units = np.bincount( self.an_units["game"].astype( np.int64 ) *2 +self.an_units["team"], minlength=2*self.n_games )
+        an_order = np.lexsort( (an_y, an_x, an_team, an_game) )
+        an_order = an_order[ ax_build[an_order] ]
+        ax_spawn = _rank_per_key( an_key[an_order] ) < (an_citytiles -an_units)[an_key[an_order]]
+        an_order = an_order[ax_spawn]
+        an_spawn_game = an_game[an_order]
+        an_new = np.zeros( len(an_order), dtype=UNIT_DTYPE )
+        an_new["game"] = an_spawn_game
+        an_new["type"] = np.where( an_best[an_order] == 1, UNIT_TYPES.WORKER, UNIT_TYPES.CART )
+        an_new["team"] = an_team[an_order]
+        an_new["id"] = self.an_unit_counter[an_spawn_game] +1 +_rank_per_key( an_spawn_game )
+        an_new["x"] = an_x[an_order]
+        an_new["y"] = an_y[an_order]
+        np.add.at( self.an_unit_counter, an_spawn_game, 1 )
+        self.an_units = np.concatenate( (self.an_units, an_new) )
+
+        #cooldown of the citytiles that acted
+        ax_cooldown = ax_research.copy()
+        ax_cooldown[an_order] = True
+        self.an_city_cooldown[an_game[ax_cooldown], an_x[ax_cooldown], an_y[ax_cooldown]] += PARAMETERS["CITY_ACTION_COOLDOWN"]
+
+        return False
+
+    def _build_cities( self, ian_units : np.ndarray ) -> bool:
+        """Turn the tiles of the units into citytiles. A citytile joins the adjacent cities of its team, which merge into the one
+        with the lowest id. Like the engine, only a citytile with no citytile of its team around takes a new city id, the builds are
+        taken in order and the later ones join the earlier ones
+        Args:
+            ian_units (np.ndarray): indexes in an_units of the workers building
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if len(ian_units) == 0:
+            return False
+        an_game = self.an_units["game"][ian_units]
+        an_x = self.an_units["x"][ian_units]
+        an_y = self.an_units["y"][ian_units]
+        an_team = self.an_units["team"][ian_units]
+        #citytiles next to one of their team, built before or earlier in the turn, join its city
+        an_key = self.__flat( an_game, an_x, an_y )
+        an_sort = np.argsort( an_key )
+        an_index = np.arange( len(ian_units) )
+        ax_joins = np.zeros( len(ian_units), dtype=bool )
+        for n_dx, n_dy in ( (0, -1), (1, 0), (0, 1), (-1, 0) ):
+            an_nx = np.clip( an_x +n_dx, 0, _N_WIDTH -1 )
+            an_ny = np.clip( an_y +n_dy, 0, _N_HEIGHT -1 )
+            ax_inside = (an_x +n_dx == an_nx) & (an_y +n_dy == an_ny)
+            ax_joins |= ax_inside & (self.an_city_team[an_game, an_nx, an_ny] == an_team)
+            an_neighbour_key = self.__flat( an_game, an_nx, an_ny )
+            an_other = an_sort[ np.minimum( np.searchsorted( an_key[an_sort], an_neighbour_key ), len(an_sort) -1 ) ]
+            ax_joins |= ax_inside & (an_key[an_other] == an_neighbour_key) & (an_other < an_index) & (an_team[an_other] == an_team)
+        #the others start their own city. the ones that join take an id from their neighbours below
+        an_new_game = an_game[~ax_joins]
+        an_city = np.zeros( len(ian_units), dtype=np.int32 )
+        an_city[~ax_joins] = self.an_city_counter[an_new_game] +1 +_rank_per_key( an_new_game )
+        np.add.at( self.an_city_counter, an_new_game, 1 )
+        self.__grow_cities( int(an_city.max()) )
+        self.an_city[an_game, an_x, an_y] = an_city
+        self.an_city_team[an_game, an_x, an_y] = an_team
+        self.an_city_cooldown[an_game, an_x, an_y] = 0
+        self.an_road[an_game, an_x, an_y] = PARAMETERS["MAX_ROAD"]
+
+        #connected citytiles of a team take the lowest city id among them. only the games that built are scanned
+        an_games = np.unique( an_game )
+        an_labels = self.an_city[an_games]
+        an_teams = self.an_city_team[an_games]
+        an_previous = an_labels.copy()
+        n_none = np.iinfo( np.int32 ).max
+        an_labels[an_labels == 0] = n_none
+        while True:
+            an_next = an_labels.copy()
+            for n_axis, n_shift in ( (1, 1), (1, -1), (2, 1), (2, -1) ):
+                an_neighbour = np.roll( an_labels, n_shift, axis=n_axis )
+                ax_same = (np.roll( an_teams, n_shift, axis=n_axis ) == an_teams) & (an_teams >= 0)
+                #np.roll wraps around, the tiles on the border never hold citytiles of a smaller map but 32x32 maps need the mask
+                if n_axis == 1:
+                    ax_same[:, 0 if n_shift == 1 else -1, :] = False
+                else:
+                    ax_same[:, :, 0 if n_shift == 1 else -1] = False
+                np.minimum( an_next, np.where( ax_same, an_neighbour, n_none ), out=an_next )
+            if np.array_equal( an_next, an_labels ):
+                break
+            an_labels = an_next
+        an_labels[an_labels == n_none] = 0
+
+        #fuel of the merged cities goes to the city that keeps its id
+        ax_merged = an_labels != an_previous
+        if ax_merged.any():
+            an_local, an_mx, an_my = np.nonzero( ax_merged )
+            an_merge_game = an_games[an_local]
+            an_pairs = np.unique( np.stack( (an_merge_game, an_previous[an_local, an_mx, an_my], an_labels[an_local, an_mx, an_my]), axis=1 ), axis=0 )
+            np.add.at( self.an_fuel, (an_pairs[:, 0], an_pairs[:, 2]), self.an_fuel[an_pairs[:, 0], an_pairs[:, 1]] )
+            self.an_fuel[an_pairs[:, 0], an_pairs[:, 1]] = 0
+            self.an_city[an_games] = an_labels
+
+        return False
+
+    def _unit_actions( self, ian_scores : np.ndarray, ax_active : np.ndarray, ian_city_team : np.ndarray ) -> bool:
+        """Build city, pillage and move. One unit acts per tile, the one with the lowest id
+        Args:
+            ian_scores (np.ndarray): (N, 2, 10, W, H) scores of both players
+            ax_active (np.ndarray): (N) games that are still running
+            ian_city_team (np.ndarray): (N, W, H) owners of the citytiles at the start of the turn
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        c_units = self.an_units
+        an_game = c_units["game"]
+        an_x = c_units["x"]
+        an_y = c_units["y"]
+        an_team = c_units["team"]
+        an_actor = _first_per_key( self.__flat( an_game, an_x, an_y ), c_units["id"] )
+        an_actor = an_actor[ ax_active[an_game[an_actor]] & (c_units["cooldown"][an_actor] < 1) ]
+        an_scores = ian_scores[an_game[an_actor], an_team[an_actor], :, an_x[an_actor], an_y[an_actor]][:, _LN_UNIT_ACTIONS]
+        an_best = np.argmax( an_scores, axis=1 )
+        ax_acts = an_scores[np.arange( len(an_best) ), an_best] > GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MIN_SCORE"]
+        an_actor = an_actor[ax_acts]
+        an_best = an_best[ax_acts]
+        an_cooldown = _AN_UNIT_COOLDOWN[c_units["type"]] *np.where( self.__is_night(), 2, 1 )[an_game]
+        ax_worker = c_units["type"] == UNIT_TYPES.WORKER
+        an_cargo = c_units["wood"] +c_units["coal"] +c_units["uranium"]
+
+        #build city
+        an_build = an_actor[an_best == _N_UNIT_BUILD_CITY]
+        an_build = an_build[
+            ax_worker[an_build] & (an_cargo[an_build] >= PARAMETERS["CITY_BUILD_COST"]) &
+            (ian_city_team[an_game[an_build], an_x[an_build], an_y[an_build]] < 0) &
+            (self.an_resource_type[an_game[an_build], an_x[an_build], an_y[an_build]] == 0)
+        ]
+        self._build_cities( an_build )
+        for s_field in _LS_CARGO_FIELDS:
+            c_units[s_field][an_build] = 0
+        c_units["cooldown"][an_build] += an_cooldown[an_build]
+
+        #pillage
+        an_pillage = an_actor[an_best == _N_UNIT_PILLAGE]
+        an_pillage = an_pillage[ ax_worker[an_pillage] & (ian_city_team[an_game[an_pillage], an_x[an_pillage], an_y[an_pillage]] < 0) ]
+        t_tiles = ( an_game[an_pillage], an_x[an_pillage], an_y[an_pillage] )
+        self.an_road[t_tiles] = np.maximum( self.an_road[t_tiles] -PARAMETERS["PILLAGE_RATE"], PARAMETERS["MIN_ROAD"] )
+        c_units["cooldown"][an_pillage] += an_cooldown[an_pillage]
+
+        #moves inside the map and not on a citytile of the enemy
+        ax_move = an_best < len(_AT_MOVE_OFFSET)
+        an_move = an_actor[ax_move]
+        an_dx = an_x[an_move] +_AT_MOVE_OFFSET[an_best[ax_move], 0]
+        an_dy = an_y[an_move] +_AT_MOVE_OFFSET[an_best[ax_move], 1]
+        ax_inside = (an_dx >= 0) & (an_dx < _N_WIDTH) & (an_dy >= 0) & (an_dy < _N_HEIGHT)
+        an_move, an_dx, an_dy = an_move[ax_inside], an_dx[ax_inside], an_dy[ax_inside]
+        an_move_game = an_game[an_move]
+        an_destination_team = ian_city_team[an_move_game, an_dx, an_dy]
+        ax_valid = self.ax_valid[an_move_game, an_dx, an_dy] & ( (an_destination_team < 0) | (an_destination_team == an_team[an_move]) )
+        an_move, an_dx, an_dy, an_move_game = an_move[ax_valid], an_dx[ax_valid], an_dy[ax_valid], an_move_game[ax_valid]
+        self._move_units( an_move, an_move_game, an_dx, an_dy, ian_city_team, an_cooldown[an_move] )
+
+        return False
+
+    def _move_units( self, ian_move : np.ndarray, ian_game : np.ndarray, ian_dx : np.ndarray, ian_dy : np.ndarray, ian_city_team : np.ndarray, ian_cooldown : np.ndarray ) -> bool:
+        """Resolve the moves of all games at once
+        Units can stack on a citytile that existed at the start of the turn. Anywhere else two units moving on the same tile both stay,
+        and a unit moving on a tile occupied by a unit that stays also stays, until nothing changes
+        Args:
+            ian_move (np.ndarray): indexes in an_units of the units moving
+            ian_game (np.ndarray): game of each move
+            ian_dx (np.ndarray): destination of each move
+            ian_dy (np.ndarray): destination of each move
+            ian_city_team (np.ndarray): (N, W, H) owners of the citytiles at the start of the turn
+            ian_cooldown (np.ndarray): cooldown added to each unit that moves
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if len(ian_move) == 0:
+            return False
+        c_units = self.an_units
+        an_destination = self.__flat( ian_game, ian_dx, ian_dy )
+        ax_city = ian_city_team.reshape(-1)[an_destination] >= 0
+        ax_moving = ax_city | (np.bincount( an_destination, minlength=self.n_games *_N_TILES )[an_destination] == 1)
+        an_position = self.__flat( c_units["game"], c_units["x"], c_units["y"] )
+        while True:
+            ax_stays = np.ones( len(c_units), dtype=bool )
+            ax_stays[ ian_move[ax_moving] ] = False
+            an_occupied = np.bincount( an_position[ax_stays], minlength=self.n_games *_N_TILES )
+            ax_blocked = ax_moving & ~ax_city & (an_occupied[an_destination] > 0)
+            if not ax_blocked.any():
+                break
+            ax_moving &= ~ax_blocked
+
+        an_move = ian_move[ax_moving]
+        c_units["x"][an_move] = ian_dx[ax_moving]
+        c_units["y"][an_move] = ian_dy[ax_moving]
+        c_units["cooldown"][an_move] += ian_cooldown[ax_moving]
+
+        return False
+
+    def _collect_resources( self, ax_active : np.ndarray ) -> bool:
+        """Workers collect from the resource tiles they stand on or are adjacent to, one resource type at a time
+        A worker asks each of its tiles for an even part of its cargo space, up to the collection rate. A tile that can't feed all
+        the requests splits its amount evenly, smallest requests first, and is emptied: shares are floored and the remainder is lost.
+        Workers stacked on a citytile with the same request collect once
+        Args:
+            ax_active (np.ndarray): (N) games that are still running
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        c_units = self.an_units
+        an_game = c_units["game"]
+        an_resource_type = self.an_resource_type.reshape(-1)
+        an_resource_amount = self.an_resource_amount.reshape(-1)
+        for n_code in _LN_MINING_ORDER:
+            s_type = _DS_CARGO_FIELD[n_code].upper()
+            n_rate = PARAMETERS["WORKER_COLLECTION_RATE"][s_type]
+            ax_researched = self.an_research >= PARAMETERS["RESEARCH_REQUIREMENTS"][s_type]
+            an_space = _AN_UNIT_CAPACITY[c_units["type"]] -c_units["wood"] -c_units["coal"] -c_units["uranium"]
+            an_worker = np.nonzero( (c_units["type"] == UNIT_TYPES.WORKER) & ax_researched[an_game, c_units["team"]] & ax_active[an_game] )[0]
+
+            #tiles of each worker with this resource
+            an_tx = c_units["x"][an_worker, None] +_AT_COLLECT_OFFSET[None, :, 0]
+            an_ty = c_units["y"][an_worker, None] +_AT_COLLECT_OFFSET[None, :, 1]
+            ax_inside = (an_tx >= 0) & (an_tx < _N_WIDTH) & (an_ty >= 0) & (an_ty < _N_HEIGHT)
+            an_tile = self.__flat( an_game[an_worker, None], np.clip( an_tx, 0, _N_WIDTH -1 ), np.clip( an_ty, 0, _N_HEIGHT -1 ) )
+            ax_tile = ax_inside & (an_resource_type[an_tile] == n_code) & (an_resource_amount[an_tile] > 0)
+            an_tiles = ax_tile.sum( axis=1 )
+            an_request = np.minimum( n_rate, -(-an_space[an_worker] // np.maximum( an_tiles, 1 )) )
+            ax_asks = (an_tiles > 0) & (an_request > 0)
+            an_worker, an_tile, ax_tile, an_request = an_worker[ax_asks], an_tile[ax_asks], ax_tile[ax_asks], an_request[ax_asks]
+            #stacked workers asking the same amount collect once
+            an_key = self.__flat( an_game[an_worker], c_units["x"][an_worker], c_units["y"][an_worker] ).astype( np.int64 ) *(n_rate +1) +an_request
+            ax_first = np.zeros( len(an_worker), dtype=bool )
+            ax_first[ _first_per_key( an_key, c_units["id"][an_worker] ) ] = True
+            an_worker, an_tile, ax_tile, an_request = an_worker[ax_first], an_tile[ax_first], ax_tile[ax_first], an_request[ax_first]
+            if len(an_worker) == 0:
+                continue
+
+            #one request per (worker, tile)
+            an_row, an_column = np.nonzero( ax_tile )
+            an_asker = an_worker[an_row]
+            an_asked = an_tile[an_row, an_column]
+            an_asks = an_request[an_row]
+            an_total = np.bincount( an_asked, weights=an_asks, minlength=self.n_games *_N_TILES )
+            an_grant = an_asks.copy()
+            #tiles that can't feed their requests split evenly, smallest requests first
+            ax_short = an_total[an_asked] > an_resource_amount[an_asked]
+            if ax_short.any():
+                an_short = np.nonzero( ax_short )[0]
+                an_short = an_short[ np.lexsort( (an_asks[an_short], an_asked[an_short]) ) ]
+                an_keys = an_asked[an_short]
+                an_rank = _rank_per_key( an_keys )
+                an_count = np.bincount( an_keys, minlength=self.n_games *_N_TILES )[an_keys]
+                af_left = an_resource_amount.astype( np.float64 )
+                for n_rank in range( int(an_rank.max()) +1 ):
+                    ax_rank = an_rank == n_rank
+                    an_index = an_short[ax_rank]
+                    an_here = an_keys[ax_rank]
+                    af_share = np.minimum( an_asks[an_index], af_left[an_here] /(an_count[ax_rank] -n_rank) )
+                    an_grant[an_index] = np.floor( af_share )
+                    af_left[an_here] -= af_share
+            an_resource_amount -= np.bincount( an_asked[~ax_short], weights=an_grant[~ax_short], minlength=self.n_games *_N_TILES ).astype( np.int32 )
+            an_resource_amount[ an_asked[ax_short] ] = 0
+            an_gained = np.bincount( an_asker, weights=an_grant, minlength=len(c_units) ).astype( np.int32 )
+            c_units[_DS_CARGO_FIELD[n_code]] += np.minimum( an_gained, an_space )
+
+        return False
+
+    def _deposit_resources( self ) -> bool:
+        """Units on a citytile of their team turn all their cargo into fuel for the city"""
+        c_units = self.an_units
+        t_tiles = ( c_units["game"], c_units["x"], c_units["y"] )
+        ax_home = self.an_city_team[t_tiles] == c_units["team"]
+        an_fuel = sum( c_units[s_field].astype( np.float64 ) *n_rate for s_field, n_rate in zip( _LS_CARGO_FIELDS, _TN_FUEL_RATE ) )
+        np.add.at( self.an_fuel, (c_units["game"][ax_home], self.an_city[t_tiles][ax_home]), an_fuel[ax_home] )
+        for s_field in _LS_CARGO_FIELDS:
+            c_units[s_field][ax_home] = 0
+        return False
+
+    def _night( self, ax_night : np.ndarray ) -> bool:
+        """Cities burn their light upkeep or are destroyed. Units outside of cities burn cargo, wood first, or are destroyed
+        Args:
+            ax_night (np.ndarray): (N) running games whose turn is at night
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if not ax_night.any():
+            return False
+        #upkeep of each citytile minus the bonus of its neighbours of the same team
+        an_team = self.an_city_team
+        an_neighbours = np.zeros( an_team.shape, dtype=np.int32 )
+        an_neighbours[:, 1:, :] += (an_team[:, 1:, :] == an_team[:, :-1, :])
+        an_neighbours[:, :-1, :] += (an_team[:, :-1, :] == an_team[:, 1:, :])
+        an_neighbours[:, :, 1:] += (an_team[:, :, 1:] == an_team[:, :, :-1])
+        an_neighbours[:, :, :-1] += (an_team[:, :, :-1] == an_team[:, :, 1:])
+        ax_citytile = (an_team >= 0) & ax_night[:, None, None]
+        an_game, an_x, an_y = np.nonzero( ax_citytile )
+        an_city = self.an_city[an_game, an_x, an_y]
+        an_tile_upkeep = PARAMETERS["LIGHT_UPKEEP"]["CITY"] -PARAMETERS["CITY_ADJACENCY_BONUS"] *an_neighbours[an_game, an_x, an_y]
+        an_upkeep = np.zeros( self.an_fuel.shape, dtype=np.float64 )
+        np.add.at( an_upkeep, (an_game, an_city), an_tile_upkeep )
+        ax_city = an_upkeep > 0
+        ax_dark = ax_city & (self.an_fuel < an_upkeep)
+        self.an_fuel = np.where( ax_city & ~ax_dark, self.an_fuel -an_upkeep, self.an_fuel )
+        self.an_fuel[ax_dark] = 0
+        ax_destroyed = ax_dark[an_game, an_city]
+        t_tiles = ( an_game[ax_destroyed], an_x[ax_destroyed], an_y[ax_destroyed] )
+        self.an_city[t_tiles] = 0
+        self.an_city_team[t_tiles] = -1
+        self.an_city_cooldown[t_tiles] = 0
+        self.an_road[t_tiles] = PARAMETERS["MIN_ROAD"]
+
+        #units outside of cities
+        c_units = self.an_units
+        ax_outside = ax_night[c_units["game"]] & (self.an_city_team[c_units["game"], c_units["x"], c_units["y"]] < 0)
+        an_need = np.where( ax_outside, _AN_UNIT_UPKEEP[c_units["type"]], 0 )
+        for s_field, n_rate in zip( _LS_CARGO_FIELDS, _TN_FUEL_RATE ):
+            an_used = np.minimum( c_units[s_field], -(-an_need // n_rate) )
+            an_need -= an_used *n_rate
+            c_units[s_field] -= an_used
+        self.an_units = c_units[an_need <= 0]
+
+        return False
+
+    def _end_turn( self, ax_active : np.ndarray ) -> bool:
+        """Remove depleted resources, regrow wood, develop roads and reduce cooldowns of the running games"""
+        ax_grid = ax_active[:, None, None]
+        ax_depleted = ax_grid & (self.an_resource_type != 0) & (self.an_resource_amount <= 0)
+        self.an_resource_type[ax_depleted] = 0
+        self.an_resource_amount[ax_depleted] = 0
+        ax_wood = ax_grid & (self.an_resource_type == _N_WOOD) & (self.an_resource_amount < PARAMETERS["MAX_WOOD_AMOUNT"])
+        self.an_resource_amount[ax_wood] = np.ceil( np.minimum( self.an_resource_amount[ax_wood] *PARAMETERS["WOOD_GROWTH_RATE"], PARAMETERS["MAX_WOOD_AMOUNT"] ) )
+
+        c_units = self.an_units
+        ax_running = ax_active[c_units["game"]]
+        t_tiles = ( c_units["game"], c_units["x"], c_units["y"] )
+        ax_cart = ax_running & (c_units["type"] == UNIT_TYPES.CART) & (self.an_city_team[t_tiles] < 0)
+        t_carts = ( c_units["game"][ax_cart], c_units["x"][ax_cart], c_units["y"][ax_cart] )
+        self.an_road[t_carts] = np.minimum( self.an_road[t_carts] +PARAMETERS["CART_ROAD_DEVELOPMENT_RATE"], PARAMETERS["MAX_ROAD"] )
+        #units cooldown is further reduced by the road they stand on. citytiles only by one
+        c_units["cooldown"] = np.where( ax_running, np.maximum( c_units["cooldown"] -1 -self.an_road[t_tiles], 0 ), c_units["cooldown"] )
+        self.an_city_cooldown = np.where( ax_grid, np.maximum( self.an_city_cooldown -1, 0 ), self.an_city_cooldown )
+
+        self.an_turn[ax_active] += 1
+        return False
+
+    def _update_done( self ) -> bool:
+        """a game is over at the last turn, or when a player has neither units nor citytiles"""
+        an_alive = np.bincount( self.an_units["game"].astype( np.int64 ) *2 +self.an_units["team"], minlength=2*self.n_games )
+        an_alive += np.bincount( self.__team_keys_citytiles(), minlength=2*self.n_games )
+        self.ax_done |= (self.an_turn >= PARAMETERS["MAX_DAYS"] -1) | (an_alive.reshape( self.n_games, 2 ) == 0).any( axis=1 )
+        return False
+
+    #----------------    Public Members    ----------------
+
+    def reset( self, ilc_snapshots : list ) -> bool:
+        """Fill the environment with one game per snapshot
+        Args:
+            ilc_snapshots (list(GameSnapshot)): initial states. e.g. the first turn of replays, or Game.snapshot()
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if len(ilc_snapshots) == 0:
+            logging.error(f"No game to reset the environment with")
+            return True
+        n_cities = max( [ max( c_snapshot.city_id_count, int(c_snapshot.records[INPUT_CONSTANTS.CITY]["id"].max( initial=0 )) ) for c_snapshot in ilc_snapshots ] )
+        self.__init_vars( len(ilc_snapshots), 2 *(n_cities +1) )
+
+        ll_units = list()
+        for n_game, c_snapshot in enumerate( ilc_snapshots ):
+            if c_snapshot.map_width > _N_WIDTH or c_snapshot.map_height > _N_HEIGHT:
+                logging.critical(f"Map is too big: {c_snapshot.map_width}x{c_snapshot.map_height} | limit: {_N_WIDTH}x{_N_HEIGHT}")
+                return True
+            n_w_shift = (_N_WIDTH -c_snapshot.map_width) // 2
+            n_h_shift = (_N_HEIGHT -c_snapshot.map_height) // 2
+            self.an_id[n_game] = c_snapshot.id
+            self.an_width[n_game] = c_snapshot.map_width
+            self.an_height[n_game] = c_snapshot.map_height
+            self.an_w_shift[n_game] = n_w_shift
+            self.an_h_shift[n_game] = n_h_shift
+            self.an_turn[n_game] = c_snapshot.turn
+            self.ax_valid[n_game, n_w_shift:n_w_shift +c_snapshot.map_width, n_h_shift:n_h_shift +c_snapshot.map_height] = True
+            d_records = c_snapshot.records
+
+            an_research = d_records[INPUT_CONSTANTS.RESEARCH_POINTS]
+            self.an_research[n_game, an_research["team"]] = an_research["points"]
+            an_resources = d_records[INPUT_CONSTANTS.RESOURCES]
+            t_tiles = ( n_game, an_resources["x"] +n_w_shift, an_resources["y"] +n_h_shift )
+            self.an_resource_type[t_tiles] = an_resources["type"]
+            self.an_resource_amount[t_tiles] = an_resources["amount"]
+            an_roads = d_records[INPUT_CONSTANTS.ROADS]
+            self.an_road[n_game, an_roads["x"] +n_w_shift, an_roads["y"] +n_h_shift] = an_roads["road"]
+            an_citytiles = d_records[INPUT_CONSTANTS.CITY_TILES]
+            t_tiles = ( n_game, an_citytiles["x"] +n_w_shift, an_citytiles["y"] +n_h_shift )
+            self.an_city[t_tiles] = an_citytiles["city_id"]
+            self.an_city_team[t_tiles] = an_citytiles["team"]
+            self.an_city_cooldown[t_tiles] = an_citytiles["cooldown"]
+            an_cities = d_records[INPUT_CONSTANTS.CITY]
+            self.an_fuel[n_game, an_cities["id"]] = an_cities["fuel"]
+            #unknown counters (0) restart from the highest id alive, like GameSimulator
+            self.an_city_counter[n_game] = max( c_snapshot.city_id_count, an_cities["id"].max( initial=0 ) )
+
+            an_records = d_records[INPUT_CONSTANTS.UNITS]
+            an_units = np.zeros( len(an_records), dtype=UNIT_DTYPE )
+            for s_field in RECORD_DTYPES[INPUT_CONSTANTS.UNITS].names:
+                an_units[s_field] = an_records[s_field]
+            an_units["game"] = n_game
+            an_units["x"] += n_w_shift
+            an_units["y"] += n_h_shift
+            ll_units.append( an_units )
+            self.an_unit_counter[n_game] = max( c_snapshot.unit_id_count, an_records["id"].max( initial=0 ) )
+
+        self.an_units = np.concatenate( ll_units )
+        self._update_done()
+
+        return False
+
+    def step( self, ian_actions : np.ndarray ) -> bool:
+        """Apply one turn of actions to every running game
+        Args:
+            ian_actions (np.ndarray): (N, 2, 10, W, H) scores of player 0 and player 1 in the Action.mats layout
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        t_shape = ( self.n_games, 2, len(Action.E_OUTPUT_SPACIAL_MATRICIES), _N_WIDTH, _N_HEIGHT )
+        if ian_actions.shape != t_shape:
+            logging.error(f"Actions have shape {ian_actions.shape} | expected: {t_shape}")
+            return True
+
+        ax_active = ~self.ax_done
+        #moves and stacking are validated against the citytiles at the start of the turn
+        an_city_team = self.an_city_team.copy()
+
+        self._citytile_actions( ian_actions, ax_active )
+        self._unit_actions( ian_actions, ax_active, an_city_team )
+        self._collect_resources( ax_active )
+        self._deposit_resources()
+        self._night( ax_active & self.__is_night() )
+        self._end_turn( ax_active )
+        self._update_done()
+
+        return False
+
+    def perceive( self, in_player : int ) -> tuple:
+        """Observation of every game seen by a player, in the Perception layout
+        Own entities are positive, enemy entities negative, with the offsets of GAME_CONSTANTS["PERCEPTION"]
+        Args:
+            in_player (int): player seeing the games. 0 or 1
+        Returns:
+            tuple(np.ndarray, np.ndarray): mats (N, 8, W, H) like Perception.mats | status (N, 9) like Perception.status
+        """
+        an_mats = np.zeros( (self.n_games, len(Perception.E_INPUT_SPACIAL_MATRICIES), _N_WIDTH, _N_HEIGHT), dtype=np.float32 )
+        an_status = np.zeros( (self.n_games, len(Perception.E_INPUT_STATUS_VECTOR)), dtype=np.float32 )
+        d_offset = GAME_CONSTANTS["PERCEPTION"]
+
+        #citytiles
+        an_game, an_x, an_y = np.nonzero( self.an_city_team >= 0 )
+        an_sign = np.where( self.an_city_team[an_game, an_x, an_y] == in_player, 1, -1 )
+        an_mats[an_game, _E_MAT.CITYTILE_FUEL.value, an_x, an_y] = an_sign *( d_offset["INPUT_CITYTILE_FUEL_OFFSET"] +self.an_fuel[an_game, self.an_city[an_game, an_x, an_y]] )
+        an_mats[an_game, _E_MAT.COOLDOWN.value, an_x, an_y] = an_sign *( d_offset["INPUT_COOLDOWN_OFFSET"] +self.an_city_cooldown[an_game, an_x, an_y] )
+
+        #units accumulate on their tile
+        c_units = self.an_units
+        an_sign = np.where( c_units["team"] == in_player, 1, -1 )
+        an_tile = self.__flat( c_units["game"], c_units["x"], c_units["y"] )
+        an_resources = an_sign *( d_offset["INPUT_UNIT_RESOURCE_OFFSET"] +c_units["wood"] +c_units["coal"] +c_units["uranium"] )
+        for e_mat, n_type in ( (_E_MAT.WORKER_RESOURCE, UNIT_TYPES.WORKER), (_E_MAT.CART_RESOURCE, UNIT_TYPES.CART) ):
+            ax_type = c_units["type"] == n_type
+            an_mats[:, e_mat.value] = np.bincount( an_tile[ax_type], weights=an_resources[ax_type], minlength=self.n_games *_N_TILES ).reshape( self.n_games, _N_WIDTH, _N_HEIGHT )
+        an_mats[:, _E_MAT.COOLDOWN.value] += np.bincount( an_tile, weights=an_sign *( d_offset["INPUT_COOLDOWN_OFFSET"] +c_units["cooldown"] ), minlength=self.n_games *_N_TILES ).reshape( self.n_games, _N_WIDTH, _N_HEIGHT )
+
+        #resources and roads
+        for e_mat, n_code in ( (_E_MAT.RAW_WOOD, _N_WOOD), (_E_MAT.RAW_COAL, _N_COAL), (_E_MAT.RAW_URANIUM, _N_URANIUM) ):
+            an_mats[:, e_mat.value] = np.where( self.an_resource_type == n_code, self.an_resource_amount, 0 )
+        an_mats[:, _E_MAT.ROAD.value] = self.an_road
+
+        #status
+        an_own = self.an_research[:, in_player]
+        an_enemy = self.an_research[:, 1 -in_player]
+        an_status[:, _E_STATUS.MAP_SIZE.value] = self.an_width
+        an_status[:, _E_STATUS.MAP_TURN.value] = self.an_turn
+        an_status[:, _E_STATUS.MAP_IS_NIGHT.value] = self.__is_night()
+        an_status[:, _E_STATUS.OWN_RESEARCH.value] = an_own
+        an_status[:, _E_STATUS.OWN_RESEARCHED_COAL.value] = an_own >= PARAMETERS["RESEARCH_REQUIREMENTS"]["COAL"]
+        an_status[:, _E_STATUS.OWN_RESEARCHED_URANIUM.value] = an_own >= PARAMETERS["RESEARCH_REQUIREMENTS"]["URANIUM"]
+        an_status[:, _E_STATUS.ENEMY_RESEARCH.value] = an_enemy
+        an_status[:, _E_STATUS.ENEMY_RESEARCHED_COAL.value] = an_enemy >= PARAMETERS["RESEARCH_REQUIREMENTS"]["COAL"]
+        an_status[:, _E_STATUS.ENEMY_RESEARCHED_URANIUM.value] = an_enemy >= PARAMETERS["RESEARCH_REQUIREMENTS"]["URANIUM"]
+
+        return an_mats, an_status
+
+    def snapshot( self, in_game : int ) -> GameSnapshot:
+        """State of one game in map coordinates, to be restored in a Game or compared with GameSimulator
+        Args:
+            in_game (int): index of the game
+        Returns:
+            GameSnapshot: current state of the game
+        """
+        n_w_shift = int(self.an_w_shift[in_game])
+        n_h_shift = int(self.an_h_shift[in_game])
+        d_records = dict()
+        d_records[INPUT_CONSTANTS.RESEARCH_POINTS] = np.array( list( enumerate( self.an_research[in_game].tolist() ) ), dtype=RECORD_DTYPES[INPUT_CONSTANTS.RESEARCH_POINTS] )
+        #resources x then y
+        an_x, an_y = np.nonzero( self.an_resource_type[in_game] )
+        an_resources = np.zeros( len(an_x), dtype=RECORD_DTYPES[INPUT_CONSTANTS.RESOURCES] )
+        an_resources["type"] = self.an_resource_type[in_game, an_x, an_y]
+        an_resources["x"] = an_x -n_w_shift
+        an_resources["y"] = an_y -n_h_shift
+        an_resources["amount"] = self.an_resource_amount[in_game, an_x, an_y]
+        d_records[INPUT_CONSTANTS.RESOURCES] = an_resources
+        #units by team then id
+        an_game_units = self.an_units[ self.an_units["game"] == in_game ]
+        an_units = np.zeros( len(an_game_units), dtype=RECORD_DTYPES[INPUT_CONSTANTS.UNITS] )
+        for s_field in an_units.dtype.names:
+            an_units[s_field] = an_game_units[s_field]
+        an_units["x"] -= n_w_shift
+        an_units["y"] -= n_h_shift
+        d_records[INPUT_CONSTANTS.UNITS] = np.sort( an_units, order=("team", "id") )
+        #cities by id, their citytiles x then y
+        an_x, an_y = np.nonzero( self.an_city_team[in_game] >= 0 )
+        an_city = self.an_city[in_game, an_x, an_y]
+        an_order = np.lexsort( (an_y, an_x, an_city) )
+        an_citytiles = np.zeros( len(an_x), dtype=RECORD_DTYPES[INPUT_CONSTANTS.CITY_TILES] )
+        an_citytiles["team"] = self.an_city_team[in_game, an_x, an_y][an_order]
+        an_citytiles["city_id"] = an_city[an_order]
+        an_citytiles["x"] = an_x[an_order] -n_w_shift
+        an_citytiles["y"] = an_y[an_order] -n_h_shift
+        an_citytiles["cooldown"] = self.an_city_cooldown[in_game, an_x, an_y][an_order]
+        d_records[INPUT_CONSTANTS.CITY_TILES] = an_citytiles
+        an_ids, an_first = np.unique( an_citytiles["city_id"], return_index=True )
+        an_cities = np.zeros( len(an_ids), dtype=RECORD_DTYPES[INPUT_CONSTANTS.CITY] )
+        an_cities["team"] = an_citytiles["team"][an_first]
+        an_cities["id"] = an_ids
+        an_cities["fuel"] = self.an_fuel[in_game, an_ids]
+        an_upkeep = np.full( len(an_citytiles), PARAMETERS["LIGHT_UPKEEP"]["CITY"], dtype=np.float64 )
+        for n_dx, n_dy in ( (0, -1), (1, 0), (0, 1), (-1, 0) ):
+            an_nx = np.clip( an_x[an_order] +n_dx, 0, _N_WIDTH -1 )
+            an_ny = np.clip( an_y[an_order] +n_dy, 0, _N_HEIGHT -1 )
+            ax_inside = (an_x[an_order] +n_dx == an_nx) & (an_y[an_order] +n_dy == an_ny)
+            an_upkeep -= PARAMETERS["CITY_ADJACENCY_BONUS"] *( ax_inside & (self.an_city_team[in_game, an_nx, an_ny] == an_citytiles["team"]) )
+        an_cities["light_upkeep"] = np.bincount( np.searchsorted( an_ids, an_citytiles["city_id"] ), weights=an_upkeep, minlength=len(an_ids) )
+        d_records[INPUT_CONSTANTS.CITY] = an_cities
+        #roads y then x
+        an_y, an_x = np.nonzero( self.an_road[in_game].T )
+        an_roads = np.zeros( len(an_x), dtype=RECORD_DTYPES[INPUT_CONSTANTS.ROADS] )
+        an_roads["x"] = an_x -n_w_shift
+        an_roads["y"] = an_y -n_h_shift
+        an_roads["road"] = self.an_road[in_game, an_x, an_y]
+        d_records[INPUT_CONSTANTS.ROADS] = an_roads
+
+        n_id = int(self.an_id[in_game])
+        return GameSnapshot( n_id, 1 -n_id, int(self.an_turn[in_game]), int(self.an_width[in_game]), int(self.an_height[in_game]), d_records, int(self.an_unit_counter[in_game]), int(self.an_city_counter[in_game]) )
@@ -0,0 +1,148 @@
+##  @package dtype_policy
+#   dtypes of the arrays kept by Perception and Action
+#   Generators always work in float64, the policy is applied once a Perception or an Action is complete and is stored in it
+#   Values that do not fit the smaller dtype are detected, reported and saturated to the limits of the dtype
+#   Integer values a float dtype can't hold exactly, e.g. city fuel above 2048 in float16, are reported once per array and dtype.
+#   They are rounded to the nearest value of the dtype, not saturated
+#
+#   Bytes per turn of one player
+#   full        Perception 8*32*32*8 = 64KB    Action 10*32*32*8 = 80KB
+#   compact     Perception 8*32*32*4 = 32KB    Action 10*32*32*1 = 10KB
+#   half        Perception 8*32*32*2 = 16KB    Action 10*32*32*1 = 10KB
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   POLICIES
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class DtypePolicy(NamedTuple):
+    """dtypes of the arrays of Perception and Action"""
+    name: str
+    features: np.dtype
+    """Perception.mats"""
+    status: np.dtype
+    """Perception.status"""
+    labels: np.dtype
+    """Action.mats filled from string actions. int8 keeps the count of stacked actions, bool only flags them"""
+
+#float64 everywhere, the original layout
+DTYPE_POLICY_FULL = DtypePolicy( "full", np.dtype(np.float64), np.dtype(np.float64), np.dtype(np.float64) )
+DTYPE_POLICY_COMPACT = DtypePolicy( "compact", np.dtype(np.float32), np.dtype(np.float32), np.dtype(np.int8) )
+#float16 holds every integer up to 2048 and the quarter steps of cooldowns and roads. city fuel goes above it late in a game
+DTYPE_POLICY_HALF = DtypePolicy( "half", np.dtype(np.float16), np.dtype(np.float32), np.dtype(np.int8) )
+DTYPE_POLICY_BINARY = DtypePolicy( "binary", np.dtype(np.float16), np.dtype(np.float32), np.dtype(np.bool_) )
+
+#policy by name
+DTYPE_POLICIES = { c_policy.name : c_policy for c_policy in ( DTYPE_POLICY_FULL, DTYPE_POLICY_COMPACT, DTYPE_POLICY_HALF, DTYPE_POLICY_BINARY ) }
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONVERSION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _dtype_limits( ic_dtype : np.dtype ) -> tuple:
+    """Returns: tuple(number, number): lowest and highest value a dtype holds"""
+    if ic_dtype == np.bool_:
+        return 0, 1
+    if ic_dtype.kind == "f":
+        c_info = np.finfo( ic_dtype )
+    else:
+        c_info = np.iinfo( ic_dtype )
+    return c_info.min, c_info.max
+
+#(array name, dtype) already reported for integer values that lose precision
+_ST_PRECISION_REPORTED = set()
+
+def _exact_integer_limit( ic_dtype : np.dtype ) -> float:
+    """Returns: float: highest integer magnitude up to which a float dtype holds every integer | None for other dtypes"""
+    if ic_dtype.kind != "f":
+        return None
+    return float( 2 **(np.finfo( ic_dtype ).nmant +1) )
+
+def _overflow_channels( ax_overflow : np.ndarray, ils_channels : list, in_channel_axis : int ) -> str:
+    """Returns: str: names of the channels holding flagged values, for a report | empty without channel names"""
+    if ils_channels is None or ax_overflow.ndim <= in_channel_axis:
+        return ""
+    ax_channel = np.moveaxis( ax_overflow, in_channel_axis, 0 ).reshape( ax_overflow.shape[in_channel_axis], -1 ).any( axis=1 )
+    return f" | channels: {[ ils_channels[n_channel] for n_channel in np.nonzero( ax_channel )[0] ]}"
+
+def _check_overflow( ian_array : np.ndarray, ic_dtype : np.dtype, is_name : str, ils_channels : list = None, in_channel_axis : int = 0 ) -> bool:
+    """log the values of an array that do not fit a dtype
+    Integer values beyond the exact integer range of a float dtype are logged as a precision loss, they don't overflow
+    Args:
+        ian_array (np.ndarray): array built in float64
+        ic_dtype (np.dtype): destination dtype
+        is_name (str): name of the array in the report. e.g. "Perception.mats"
+        ils_channels (list(str)): name of each channel along in_channel_axis, to report the channels that overflow
+        in_channel_axis (int): axis of the channels. e.g. 1 for a batch of turns
+    Returns:
+        bool: False=OK | True=values overflow the dtype
+    """
+    n_min, n_max = _dtype_limits( ic_dtype )
+    ax_overflow = (ian_array < n_min) | (ian_array > n_max)
+
+    #integer valued entries, e.g. fuel and resource amounts, rounded by a float dtype too narrow for them
+    n_exact = _exact_integer_limit( ic_dtype )
+    if n_exact is not None and (is_name, ic_dtype.name) not in _ST_PRECISION_REPORTED:
+        ax_rounded = np.abs( ian_array ) > n_exact
+        if ax_rounded.any():
+            ax_rounded &= ~ax_overflow & (ian_array == np.floor( ian_array ))
+        if ax_rounded.any():
+            _ST_PRECISION_REPORTED.add( (is_name, ic_dtype.name) )
+            logging.warning(f"{is_name} holds integers beyond the exact range of {ic_dtype.name}, they are rounded | values: {int(ax_rounded.sum())} | range: {ian_array.min()} {ian_array.max()} | exact up to: {n_exact:.0f}{_overflow_channels( ax_rounded, ils_channels, in_channel_axis )} | reported once")
+
+    if not ax_overflow.any():
+        return False
+    logging.error(f"{is_name} overflows {ic_dtype.name} | values: {int(ax_overflow.sum())} | range: {ian_array.min()} {ian_array.max()} | limits: {n_min} {n_max}{_overflow_channels( ax_overflow, ils_channels, in_channel_axis )}")
+    return True
+
+def convert_array( ian_array : np.ndarray, ic_dtype : np.dtype, is_name : str, ils_channels : list = None ) -> tuple:
+    """cast an array to a dtype of the policy, detecting the values that overflow it
+    A bool dtype flags the positive values on purpose, counts above 1 are not an overflow
+    Args:
+        ian_array (np.ndarray): array built in float64
+        ic_dtype (np.dtype): destination dtype
+        is_name (str): name of the array in the report. e.g. "Perception.mats"
+        ils_channels (list(str)): name of each channel along the first axis, to report the channels that overflow
+    Returns:
+        tuple(np.ndarray, bool): converted array, the input itself if the dtype is the same | False=OK True=values overflowed and were saturated
+    """
+    c_dtype = np.dtype( ic_dtype )
+    if ian_array.dtype == c_dtype:
+        return ian_array, False
+    if c_dtype == np.bool_:
+        return ian_array > 0, False
+    if _check_overflow( ian_array, c_dtype, is_name, ils_channels ) == False:
+        return ian_array.astype( c_dtype ), False
+    n_min, n_max = _dtype_limits( c_dtype )
+    return np.clip( ian_array, n_min, n_max ).astype( c_dtype ), True
+
+def convert_into( ian_array : np.ndarray, ian_destination : np.ndarray, is_name : str, ils_channels : list = None, in_channel_axis : int = 0 ) -> bool:
+    """cast an array into a preallocated array, detecting the values that overflow its dtype. e.g. a range of turns of a batch
+    A bool destination flags the positive values on purpose, counts above 1 are not an overflow
+    Args:
+        ian_array (np.ndarray): array built in float64
+        ian_destination (np.ndarray): array of the same shape with the dtype of the policy. e.g. a slice of a memory map
+        is_name (str): name of the array in the report
+        ils_channels (list(str)): name of each channel along in_channel_axis, to report the channels that overflow
+        in_channel_axis (int): axis of the channels
+    Returns:
+        bool: False=OK | True=values overflowed and were saturated
+    """
+    c_dtype = ian_destination.dtype
+    if c_dtype == np.bool_ and ian_array.dtype != c_dtype:
+        np.greater( ian_array, 0, out=ian_destination )
+        return False
+    if c_dtype != ian_array.dtype and _check_overflow( ian_array, c_dtype, is_name, ils_channels, in_channel_axis ) == True:
+        n_min, n_max = _dtype_limits( c_dtype )
+        np.copyto( ian_destination, np.clip( ian_array, n_min, n_max ), casting="unsafe" )
+        return True
+    np.copyto( ian_destination, ian_array, casting="unsafe" )
+    return False
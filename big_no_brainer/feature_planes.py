@@ -0,0 +1,302 @@
+##  @package feature_planes
+#   Registry of the feature planes a Perception can be built from
+#   Each plane is a function of the record arrays of a turn (lux.game_updates) registered under a name, with the planes it reads
+#   declared as dependencies. FeatureContext computes a plane only when it is requested, after its dependencies, and caches it for
+#   the rest of the turn. A pipeline pays for the planes it asks for, registering a new plane does not slow down the others
+#
+#   e.g. RAW_FUEL reads RAW_WOOD, RAW_COAL and RAW_URANIUM. Asking for RAW_FUEL and RAW_WOOD scatters each resource plane once
+#   c_context = FeatureContext( d_records, 0, an_tile_index )
+#   an_planes = c_context.planes( ["RAW_FUEL", "RAW_WOOD"] )     -> (2, WIDTH_MAX, HEIGHT_MAX)
+#
+#   The planes named after Perception.E_INPUT_SPACIAL_MATRICIES are the matricies of Perception.from_game, from_updates and
+#   perceptions_from_snapshots: they are built from this registry only
+#   A context can hold the records of several turns at once, with the turn of each record. Its planes then hold one plane per
+#   turn, one after the other. e.g. perceptions_from_snapshots scatters a chunk of turns in one go
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+#LUX-AI-2021
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+UNIT_TYPES = Constants.UNIT_TYPES
+
+from lux.game_map import RESOURCE_TYPE_CODES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   REGISTRY
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class FeaturePlane(NamedTuple):
+    """A registered feature plane"""
+    name: str
+    function: object
+    """FeatureContext -> np.ndarray. new float64 plane of n_turns *WIDTH_MAX *HEIGHT_MAX values, flat"""
+    dependencies: tuple
+    """names of the planes the function reads with FeatureContext.plane"""
+
+#name -> FeaturePlane
+FEATURE_PLANES = dict()
+
+def register_feature_plane( is_name : str, ifn_plane, its_dependencies : tuple = () ) -> bool:
+    """Register a feature plane. Dependencies must be registered first, so that the planes can't depend on each other in a loop
+    Args:
+        is_name (str): name of the plane. e.g. "RAW_FUEL"
+        ifn_plane (function): FeatureContext -> np.ndarray flat float64 plane
+        its_dependencies (tuple(str)): names of the planes ifn_plane reads
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    if is_name in FEATURE_PLANES:
+        logging.error(f"Feature plane is already registered: {is_name}")
+        return True
+    ls_unknown = [ s_dependency for s_dependency in its_dependencies if s_dependency not in FEATURE_PLANES ]
+    if len(ls_unknown) > 0:
+        logging.error(f"Feature plane {is_name} depends on planes not registered: {ls_unknown}")
+        return True
+    FEATURE_PLANES[is_name] = FeaturePlane( is_name, ifn_plane, tuple(its_dependencies) )
+    return False
+
+def feature_plane_dependencies( ils_names : list ) -> list:
+    """Every plane needed to compute some planes, dependencies first
+    Args:
+        ils_names (list(str)): requested planes
+    Returns:
+        list(str): requested planes and their dependencies, in computation order | None if a plane is not registered
+    """
+    ls_order = list()
+    def visit( s_name : str ) -> bool:
+        if s_name in ls_order:
+            return False
+        if s_name not in FEATURE_PLANES:
+            logging.error(f"Feature plane is not registered: {s_name} | registered: {list(FEATURE_PLANES)}")
+            return True
+        for s_dependency in FEATURE_PLANES[s_name].dependencies:
+            if visit( s_dependency ):
+                return True
+        ls_order.append( s_name )
+        return False
+
+    for s_name in ils_names:
+        if visit( s_name ):
+            return None
+    return ls_order
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONTEXT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#city ids of the turns of a context are told apart by turn *_N_CITY_KEY +id
+_N_CITY_KEY = 1 << 32
+
+class FeatureContext():
+    """Record arrays of one or more turns and the planes already computed from them"""
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self, id_records : dict, in_own_team : int, ian_tile_index : np.ndarray, id_record_turns : dict = None, in_turns : int = 1 ):
+        """Construct the context of a turn, or of several turns
+        Args:
+            id_records (dict): identifier -> record array of lux.game_updates
+            in_own_team (int): team of the player the planes are built for
+            ian_tile_index (np.ndarray): (width, height) flat index of each tile in a plane. see perception._get_tile_index_table
+            id_record_turns (dict): identifier -> turn of each record, 0 .. in_turns-1 | None: every record is on turn 0
+            in_turns (int): turns of the records. planes hold in_turns planes one after the other
+        """
+        self.d_records = id_records
+        self.n_own_team = in_own_team
+        self.n_turns = in_turns
+        self._an_tile_index = ian_tile_index
+        self._d_record_turns = id_record_turns
+        #True once a record could not be placed on the map or has an unknown type
+        self.invalid = False
+        #name -> flat plane of this turn
+        self._d_planes = dict()
+        #identifier -> flat tile index of each record
+        self._d_tile_index = dict()
+
+        return
+
+    #----------------    Public    ---------------
+
+    def record_turns( self, is_identifier : str ) -> np.ndarray:
+        """turn of each record of an identifier
+        Returns:
+            np.ndarray: one turn per record, 0 .. n_turns-1
+        """
+        if self._d_record_turns is None:
+            return np.zeros( len(self.d_records[is_identifier]), dtype=np.int64 )
+        return self._d_record_turns[is_identifier]
+
+    def tile_index( self, is_identifier : str ) -> np.ndarray:
+        """flat index in a plane of each record of an identifier, on the plane of the turn of the record, cached
+        Returns:
+            np.ndarray: one index per record | None if a record is outside of the map
+        """
+        if is_identifier not in self._d_tile_index:
+            an_records = self.d_records[is_identifier]
+            #unsigned view, negative coordinates become out of range instead of wrapping around
+            try:
+                an_index = self._an_tile_index[ an_records["x"].view( np.uint16 ), an_records["y"].view( np.uint16 ) ]
+            except IndexError:
+                logging.critical(f"Position is out of the map | {is_identifier} | x: {an_records['x'].min()} {an_records['x'].max()} | y: {an_records['y'].min()} {an_records['y'].max()} | map: {self._an_tile_index.shape}")
+                self.invalid = True
+                an_index = None
+            if an_index is not None and self._d_record_turns is not None:
+                an_index = an_index +self._d_record_turns[is_identifier] *(GAME_CONSTANTS['MAP']['WIDTH_MAX'] *GAME_CONSTANTS['MAP']['HEIGHT_MAX'])
+            self._d_tile_index[is_identifier] = an_index
+        return self._d_tile_index[is_identifier]
+
+    def plane( self, is_name : str ) -> np.ndarray:
+        """one plane of this turn, computed on the first request. Do not modify, it is shared with later requests
+        Returns:
+            np.ndarray: flat float64 plane | None if the plane is not registered
+        """
+        an_plane = self._d_planes.get( is_name )
+        if an_plane is None:
+            c_plane = FEATURE_PLANES.get( is_name )
+            if c_plane is None:
+                logging.error(f"Feature plane is not registered: {is_name} | registered: {list(FEATURE_PLANES)}")
+                return None
+            an_plane = self._d_planes[is_name] = c_plane.function( self )
+        return an_plane
+
+    def planes( self, ils_names : list, ian_out : np.ndarray = None ) -> np.ndarray:
+        """stack some planes of the turns of the context
+        Args:
+            ils_names (list(str)): requested planes, in the order of the output
+            ian_out (np.ndarray): preallocated contiguous array of n_turns *len(ils_names) planes, e.g. Perception.mats | None: allocated float64
+        Returns:
+            np.ndarray: ian_out | (len(ils_names), WIDTH_MAX, HEIGHT_MAX) for one turn, (n_turns, len(ils_names), WIDTH_MAX, HEIGHT_MAX)
+            for several | None if a plane is not registered
+        """
+        ls_order = feature_plane_dependencies( ils_names )
+        if ls_order is None:
+            return None
+        for s_name in ls_order:
+            self.plane( s_name )
+        if ian_out is None:
+            t_shape = (len(ils_names), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX'])
+            ian_out = np.empty( t_shape if self.n_turns == 1 else (self.n_turns,) +t_shape )
+        #view, the planes are written in place
+        an_out = ian_out.reshape( self.n_turns, len(ils_names), -1 )
+        for n_index, s_name in enumerate( ils_names ):
+            an_out[:, n_index] = self._d_planes[s_name].reshape( self.n_turns, -1 )
+        return ian_out
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   PLANES
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _empty_plane( ic_context : FeatureContext ) -> np.ndarray:
+    return np.zeros( ic_context.n_turns *GAME_CONSTANTS['MAP']['WIDTH_MAX'] *GAME_CONSTANTS['MAP']['HEIGHT_MAX'] )
+
+def _signed( ic_context : FeatureContext, ian_records : np.ndarray, ian_values : np.ndarray ) -> np.ndarray:
+    """positive values for the own team, negative for the enemy"""
+    return np.where( ian_records["team"] == ic_context.n_own_team, ian_values, -ian_values )
+
+def _plane_citytile_fuel( ic_context : FeatureContext ) -> np.ndarray:
+    """+offset +fuel of the city of the same turn on own citytiles, -offset -fuel on enemy ones. see Perception._generate_citytile_fuel_matrix"""
+    an_plane = _empty_plane( ic_context )
+    an_citytiles = ic_context.d_records[INPUT_CONSTANTS.CITY_TILES]
+    an_index = ic_context.tile_index( INPUT_CONSTANTS.CITY_TILES )
+    if an_index is None or len(an_citytiles) == 0:
+        return an_plane
+    an_cities = ic_context.d_records[INPUT_CONSTANTS.CITY]
+    an_city_keys = ic_context.record_turns( INPUT_CONSTANTS.CITY ) *_N_CITY_KEY +an_cities["id"]
+    an_order = np.argsort( an_city_keys )
+    an_fuel = an_cities["fuel"][an_order][ np.searchsorted( an_city_keys, ic_context.record_turns( INPUT_CONSTANTS.CITY_TILES ) *_N_CITY_KEY +an_citytiles["city_id"], sorter=an_order ) ]
+    an_plane[an_index] = _signed( ic_context, an_citytiles, GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] +an_fuel )
+    return an_plane
+
+def _plane_unit_resource( ic_context : FeatureContext, in_unit_type : int ) -> np.ndarray:
+    """+offset +cargo of own units of a type, -offset -cargo of enemy ones. stacked units accumulate"""
+    an_plane = _empty_plane( ic_context )
+    an_units = ic_context.d_records[INPUT_CONSTANTS.UNITS]
+    an_index = ic_context.tile_index( INPUT_CONSTANTS.UNITS )
+    if an_index is None:
+        return an_plane
+    if np.any( (an_units["type"] != UNIT_TYPES.WORKER) & (an_units["type"] != UNIT_TYPES.CART) ):
+        logging.critical(f"Unit type is unknown: {np.unique( an_units['type'] )}")
+        ic_context.invalid = True
+    ax_type = an_units["type"] == in_unit_type
+    an_units = an_units[ax_type]
+    an_fill = GAME_CONSTANTS["PERCEPTION"]["INPUT_UNIT_RESOURCE_OFFSET"] +(an_units["wood"] +an_units["coal"] +an_units["uranium"]).astype( np.float64 )
+    np.add.at( an_plane, an_index[ax_type], _signed( ic_context, an_units, an_fill ) )
+    return an_plane
+
+def _plane_raw_resource( ic_context : FeatureContext, is_resource_type : str ) -> np.ndarray:
+    """amount of a resource on each tile"""
+    an_plane = _empty_plane( ic_context )
+    an_resources = ic_context.d_records[INPUT_CONSTANTS.RESOURCES]
+    an_index = ic_context.tile_index( INPUT_CONSTANTS.RESOURCES )
+    if an_index is None:
+        return an_plane
+    ax_type = an_resources["type"] == RESOURCE_TYPE_CODES[is_resource_type]
+    an_plane[an_index[ax_type]] = an_resources["amount"][ax_type]
+    return an_plane
+
+def _plane_road( ic_context : FeatureContext ) -> np.ndarray:
+    """road level of each tile"""
+    an_plane = _empty_plane( ic_context )
+    an_index = ic_context.tile_index( INPUT_CONSTANTS.ROADS )
+    if an_index is None:
+        return an_plane
+    an_plane[an_index] = ic_context.d_records[INPUT_CONSTANTS.ROADS]["road"]
+    return an_plane
+
+def _plane_cooldown( ic_context : FeatureContext ) -> np.ndarray:
+    """+offset +cooldown of own units and citytiles, -offset -cooldown of enemy ones. units, then citytiles, accumulate"""
+    an_plane = _empty_plane( ic_context )
+    for s_identifier in ( INPUT_CONSTANTS.UNITS, INPUT_CONSTANTS.CITY_TILES ):
+        an_records = ic_context.d_records[s_identifier]
+        an_index = ic_context.tile_index( s_identifier )
+        if an_index is None or len(an_records) == 0:
+            continue
+        an_cooldown = an_records["cooldown"]
+        #invalid cooldowns are left out like Perception._generate_cooldown does
+        ax_valid = (an_cooldown >= 0) & (an_cooldown <= GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"])
+        if not ax_valid.all():
+            logging.critical(f"Cooldown is invalid {an_cooldown[~ax_valid]}")
+        an_fill = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +an_cooldown[ax_valid]
+        np.add.at( an_plane, an_index[ax_valid], _signed( ic_context, an_records[ax_valid], an_fill ) )
+    return an_plane
+
+def _plane_raw_fuel( ic_context : FeatureContext ) -> np.ndarray:
+    """fuel a tile of raw resource is worth once collected and burnt"""
+    return (
+        GAME_CONSTANTS["PARAMETERS"]["RESOURCE_TO_FUEL_RATE"]["WOOD"] *ic_context.plane( "RAW_WOOD" ) +
+        GAME_CONSTANTS["PARAMETERS"]["RESOURCE_TO_FUEL_RATE"]["COAL"] *ic_context.plane( "RAW_COAL" ) +
+        GAME_CONSTANTS["PARAMETERS"]["RESOURCE_TO_FUEL_RATE"]["URANIUM"] *ic_context.plane( "RAW_URANIUM" )
+    )
+
+def _plane_unit_count( ic_context : FeatureContext ) -> np.ndarray:
+    """+1 per own unit, -1 per enemy unit on each tile, any type"""
+    an_plane = _empty_plane( ic_context )
+    an_units = ic_context.d_records[INPUT_CONSTANTS.UNITS]
+    an_index = ic_context.tile_index( INPUT_CONSTANTS.UNITS )
+    if an_index is None:
+        return an_plane
+    np.add.at( an_plane, an_index, _signed( ic_context, an_units, np.ones( len(an_units) ) ) )
+    return an_plane
+
+#planes of Perception.E_INPUT_SPACIAL_MATRICIES, in the same order
+register_feature_plane( "CITYTILE_FUEL", _plane_citytile_fuel )
+register_feature_plane( "WORKER_RESOURCE", lambda ic_context : _plane_unit_resource( ic_context, UNIT_TYPES.WORKER ) )
+register_feature_plane( "CART_RESOURCE", lambda ic_context : _plane_unit_resource( ic_context, UNIT_TYPES.CART ) )
+register_feature_plane( "RAW_WOOD", lambda ic_context : _plane_raw_resource( ic_context, RESOURCE_TYPES.WOOD ) )
+register_feature_plane( "RAW_COAL", lambda ic_context : _plane_raw_resource( ic_context, RESOURCE_TYPES.COAL ) )
+register_feature_plane( "RAW_URANIUM", lambda ic_context : _plane_raw_resource( ic_context, RESOURCE_TYPES.URANIUM ) )
+register_feature_plane( "ROAD", _plane_road )
+register_feature_plane( "COOLDOWN", _plane_cooldown )
+#derived planes
+register_feature_plane( "RAW_FUEL", _plane_raw_fuel, ("RAW_WOOD", "RAW_COAL", "RAW_URANIUM") )
+register_feature_plane( "UNIT_COUNT", _plane_unit_count )
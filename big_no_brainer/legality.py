@@ -0,0 +1,170 @@
+##  @package legality
+#   Legality masks of the Action channels
+#   A (10, WIDTH_MAX, HEIGHT_MAX) boolean mask per turn, True where the action of the channel can be emitted on the tile, in the
+#   layout of Action.mats. It is derived from the records a Perception is built from: the cooldown, unit and citytile channels of
+#   Perception.mats sum stacked units and citytiles on a tile, the records keep them apart
+#   Applied before the argmax of Action.translate, impossible actions are never picked. Applied to logits, training ignores them
+#
+#   Rules of the own team, a tile is legal if one of its units/citytiles can act (cooldown < 1)
+#   CITYTILE_RESEARCH           own citytile
+#   CITYTILE_BUILD_WORKER/CART  own citytile, and the team has fewer units than citytiles
+#   UNIT_MOVE_*                 own unit, destination inside the map and not an enemy citytile. collisions are left to the engine
+#   UNIT_TRANSFER_RESOURCE      own unit with cargo, next to another own unit
+#   UNIT_BUILD_CITY             own worker with CITY_BUILD_COST cargo, on a tile without citytile nor resource
+#   UNIT_PILLAGE_ROAD           own worker, on a road that is not a citytile
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+
+import numpy as np
+
+#LUX-AI-2021
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+UNIT_TYPES = Constants.UNIT_TYPES
+
+from big_no_brainer.action import Action
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MASKS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+_E_CHANNEL = Action.E_OUTPUT_SPACIAL_MATRICIES
+#(channel, dx, dy) of the moves. NORTH is y-1
+_LT_MOVES = [
+    (_E_CHANNEL.UNIT_MOVE_NORTH.value, 0, -1),
+    (_E_CHANNEL.UNIT_MOVE_EAST.value, 1, 0),
+    (_E_CHANNEL.UNIT_MOVE_SOUTH.value, 0, 1),
+    (_E_CHANNEL.UNIT_MOVE_WEST.value, -1, 0),
+]
+
+def legality_mask( id_records : dict, in_own_team : int, in_map_size : int, ian_out : np.ndarray = None ) -> np.ndarray:
+    """legal actions of a turn
+    Args:
+        id_records (dict): identifier -> record array of lux.game_updates of the turn. e.g. Perception._d_records, GameSnapshot.records
+        in_own_team (int): team whose actions are masked
+        in_map_size (int): size of the map in cells
+        ian_out (np.ndarray): preallocated (10, WIDTH_MAX, HEIGHT_MAX) bool | None: allocated
+    Returns:
+        np.ndarray: (10, WIDTH_MAX, HEIGHT_MAX) bool, True=legal | None if a record is outside of the map
+    """
+    if ian_out is None:
+        ian_out = np.zeros( (len(_E_CHANNEL), GAME_CONSTANTS["MAP"]["WIDTH_MAX"], GAME_CONSTANTS["MAP"]["HEIGHT_MAX"]), dtype=np.bool_ )
+    else:
+        ian_out.fill( False )
+    n_size = int(in_map_size)
+    an_map = ian_out[ :, (ian_out.shape[1] -n_size) //2 : (ian_out.shape[1] -n_size) //2 +n_size, (ian_out.shape[2] -n_size) //2 : (ian_out.shape[2] -n_size) //2 +n_size ]
+
+    an_units = id_records[INPUT_CONSTANTS.UNITS]
+    an_citytiles = id_records[INPUT_CONSTANTS.CITY_TILES]
+    for s_identifier in ( INPUT_CONSTANTS.UNITS, INPUT_CONSTANTS.CITY_TILES, INPUT_CONSTANTS.RESOURCES, INPUT_CONSTANTS.ROADS ):
+        an_records = id_records[s_identifier]
+        if np.any( (an_records["x"] < 0) | (an_records["x"] >= n_size) | (an_records["y"] < 0) | (an_records["y"] >= n_size) ):
+            logging.error(f"Records {s_identifier} are outside of the map of size {n_size}")
+            return None
+
+    #tiles of the map
+    an_city_team = np.full( (n_size, n_size), -1, dtype=np.int64 )
+    an_city_team[an_citytiles["x"], an_citytiles["y"]] = an_citytiles["team"]
+    ax_resource = np.zeros( (n_size, n_size), dtype=np.bool_ )
+    an_resources = id_records[INPUT_CONSTANTS.RESOURCES]
+    ax_resource[ an_resources["x"][an_resources["amount"] > 0], an_resources["y"][an_resources["amount"] > 0] ] = True
+    an_road = np.zeros( (n_size, n_size), dtype=np.float64 )
+    an_roads = id_records[INPUT_CONSTANTS.ROADS]
+    an_road[an_roads["x"], an_roads["y"]] = an_roads["road"]
+    #own units on each tile, acting or not
+    ax_own = an_units["team"] == in_own_team
+    an_own_count = np.zeros( (n_size +2, n_size +2), dtype=np.int64 )
+    np.add.at( an_own_count, (an_units["x"][ax_own] +1, an_units["y"][ax_own] +1), 1 )
+
+    #citytiles
+    ax_citytile = (an_citytiles["team"] == in_own_team) & (an_citytiles["cooldown"] < 1)
+    an_x = an_citytiles["x"][ax_citytile]
+    an_y = an_citytiles["y"][ax_citytile]
+    an_map[_E_CHANNEL.CITYTILE_RESEARCH.value, an_x, an_y] = True
+    if ax_own.sum() < (an_citytiles["team"] == in_own_team).sum():
+        an_map[_E_CHANNEL.CITYTILE_BUILD_WORKER.value, an_x, an_y] = True
+        an_map[_E_CHANNEL.CITYTILE_BUILD_CART.value, an_x, an_y] = True
+
+    #units that can act
+    an_actors = an_units[ ax_own & (an_units["cooldown"] < 1) ]
+    an_x = an_actors["x"].astype( np.int64 )
+    an_y = an_actors["y"].astype( np.int64 )
+    for n_channel, n_dx, n_dy in _LT_MOVES:
+        an_dx = an_x +n_dx
+        an_dy = an_y +n_dy
+        ax_inside = (an_dx >= 0) & (an_dx < n_size) & (an_dy >= 0) & (an_dy < n_size)
+        ax_move = ax_inside.copy()
+        ax_move[ax_inside] = an_city_team[ an_dx[ax_inside], an_dy[ax_inside] ] != 1 -in_own_team
+        an_map[n_channel, an_x[ax_move], an_y[ax_move]] = True
+
+    an_cargo = an_actors["wood"].astype( np.int64 ) +an_actors["coal"] +an_actors["uranium"]
+    #own units on the 4 neighbouring tiles, read from the padded count grid
+    an_neighbours = an_own_count[an_x, an_y +1] +an_own_count[an_x +2, an_y +1] +an_own_count[an_x +1, an_y] +an_own_count[an_x +1, an_y +2]
+    ax_transfer = (an_cargo > 0) & (an_neighbours > 0)
+    an_map[_E_CHANNEL.UNIT_TRANSFER_RESOURCE.value, an_x[ax_transfer], an_y[ax_transfer]] = True
+
+    ax_worker = an_actors["type"] == UNIT_TYPES.WORKER
+    ax_free = an_city_team[an_x, an_y] < 0
+    ax_build = ax_worker & ax_free & (an_cargo >= GAME_CONSTANTS["PARAMETERS"]["CITY_BUILD_COST"]) & ~ax_resource[an_x, an_y]
+    an_map[_E_CHANNEL.UNIT_BUILD_CITY.value, an_x[ax_build], an_y[ax_build]] = True
+    ax_pillage = ax_worker & ax_free & (an_road[an_x, an_y] > 0)
+    an_map[_E_CHANNEL.UNIT_PILLAGE_ROAD.value, an_x[ax_pillage], an_y[ax_pillage]] = True
+
+    return ian_out
+
+def perception_legality_mask( ic_perception, ian_out : np.ndarray = None ) -> np.ndarray:
+    """legal actions of the team a Perception is built for, from the records it was built from
+    Args:
+        ic_perception (Perception): built by from_game (vectorized) or from_updates
+        ian_out (np.ndarray): preallocated (10, WIDTH_MAX, HEIGHT_MAX) bool | None: allocated
+    Returns:
+        np.ndarray: (10, WIDTH_MAX, HEIGHT_MAX) bool, True=legal | None if the Perception kept no records
+    """
+    d_records = getattr( ic_perception, "_d_records", None )
+    if d_records is None:
+        logging.error(f"Perception has no records, build it vectorized")
+        return None
+    n_map_size = GAME_CONSTANTS["MAP"]["WIDTH_MAX"] -2 *ic_perception._w_shift
+    return legality_mask( d_records, ic_perception._n_own_team, n_map_size, ian_out )
+
+def legality_masks_from_snapshots( ilc_snapshots : list, in_player : int = None, ian_out : np.ndarray = None ) -> np.ndarray:
+    """legal actions of every turn of a game. turn t matches PerceptionBatch.mats[t] and ActionBatch.mats[t]
+    Args:
+        ilc_snapshots (list(GameSnapshot)): one per turn. e.g. Replay._observations_to_snapshots
+        in_player (int): team whose actions are masked | None: the id of the snapshots
+        ian_out (np.ndarray): preallocated (T, 10, WIDTH_MAX, HEIGHT_MAX) bool | None: allocated
+    Returns:
+        np.ndarray: (T, 10, WIDTH_MAX, HEIGHT_MAX) bool, True=legal | None on failure
+    """
+    t_shape = (len(ilc_snapshots), len(_E_CHANNEL), GAME_CONSTANTS["MAP"]["WIDTH_MAX"], GAME_CONSTANTS["MAP"]["HEIGHT_MAX"])
+    if ian_out is None:
+        ian_out = np.zeros( t_shape, dtype=np.bool_ )
+    elif ian_out.shape != t_shape or ian_out.dtype != np.bool_:
+        logging.error(f"Destination does not match | Expected: {t_shape} bool | Destination: {ian_out.shape} {ian_out.dtype}")
+        return None
+    for n_turn, c_snapshot in enumerate( ilc_snapshots ):
+        n_own_team = c_snapshot.id if in_player is None else in_player
+        if legality_mask( c_snapshot.records, n_own_team, c_snapshot.map_width, ian_out[n_turn] ) is None:
+            return None
+    return ian_out
+
+def apply_legality_mask( ian_scores : np.ndarray, ian_mask : np.ndarray, in_fill = None, ix_inplace : bool = False ) -> np.ndarray:
+    """replace the scores of illegal actions so that they are never picked. e.g. logits of the network before a softmax/argmax
+    Args:
+        ian_scores (np.ndarray): (..., 10, WIDTH_MAX, HEIGHT_MAX) scores in the layout of Action.mats
+        ian_mask (np.ndarray): legality mask, broadcast to the scores
+        in_fill (number): score of illegal actions | None: -inf for floats, the lowest value for integers
+        ix_inplace (bool): write into ian_scores | False: into a copy
+    Returns:
+        np.ndarray: masked scores
+    """
+    if in_fill is None:
+        in_fill = -np.inf if ian_scores.dtype.kind == "f" else np.iinfo( ian_scores.dtype ).min
+    an_scores = ian_scores if ix_inplace else ian_scores.copy()
+    np.copyto( an_scores, in_fill, where=~ian_mask )
+    return an_scores
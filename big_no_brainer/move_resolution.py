@@ -0,0 +1,161 @@
+##  @package move_resolution
+#   Conflict free moves of all the units of a team, resolved together
+#   The engine cancels a move when two units move on the same tile, or when the destination holds a unit that stays. Units can
+#   stack on a citytile of their team. A cancelled move wastes the turn of the unit, and its unit may block the moves of others
+#   The resolver takes the table of scores of every unit: move NORTH, EAST, SOUTH, WEST and stay, in the order of
+#   Action.LN_UNIT_ACTIONS. Each unit proposes its best option still available. On an occupancy grid of the map, every round:
+#   1) a move on a tile held by a unit that stays, an obstacle or outside of the map is dropped
+#   2) of the moves on the same tile the highest score keeps it, the others are dropped
+#   the units that dropped an option propose the next one, until nothing changes. Moves into a tile left by a moving unit are kept
+#   like the engine does, chains, swaps and cycles of units included. Every round drops at least one option, the resolution ends
+#   in at most 4 rounds per unit
+#   The resolution is bounded by a time budget, past it every move still in conflict is cancelled and its unit stays
+#
+#   e.g.
+#   an_tiles = perception_obstacle_grid( c_perception )
+#   an_option = resolve_moves( an_x, an_y, an_scores, an_occupied, an_tiles )    #(U) 0..3 move, 4 stay
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+#time budget of the resolution
+from time import perf_counter
+
+import numpy as np
+
+#LUX-AI-2021
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   OCCUPANCY
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#tiles of the obstacle grid
+TILE_FREE = 0
+#no unit of the team can move there. e.g. enemy unit, enemy citytile
+TILE_BLOCKED = 1
+#citytile of the team. units stack, a move on it is never cancelled
+TILE_CITY = 2
+
+#options of a unit, same order as Action.LN_UNIT_ACTIONS. (dx, dy) of the moves, NORTH is y-1
+N_OPTION_STAY = 4
+_AN_MOVE_OFFSET = np.array( [ (0, -1), (1, 0), (0, 1), (-1, 0), (0, 0) ], dtype=np.int64 )
+
+def obstacle_grid( id_records : dict, in_own_team : int, in_map_size : int ) -> np.ndarray:
+    """tiles of the map seen by the moves of a team
+    Enemy units are taken as staying, a move on them is dropped
+    Args:
+        id_records (dict): identifier -> record array of lux.game_updates of the turn. e.g. Perception._d_records, GameSnapshot.records
+        in_own_team (int): team that moves
+        in_map_size (int): size of the map in cells
+    Returns:
+        np.ndarray: (map size, map size) int8 of TILE_FREE, TILE_BLOCKED, TILE_CITY | None if a record is outside of the map
+    """
+    n_size = int(in_map_size)
+    an_units = id_records[INPUT_CONSTANTS.UNITS]
+    an_citytiles = id_records[INPUT_CONSTANTS.CITY_TILES]
+    for an_records in ( an_units, an_citytiles ):
+        if np.any( (an_records["x"] < 0) | (an_records["x"] >= n_size) | (an_records["y"] < 0) | (an_records["y"] >= n_size) ):
+            logging.error(f"Records are outside of the map of size {n_size}")
+            return None
+    an_tiles = np.full( (n_size, n_size), TILE_FREE, dtype=np.int8 )
+    ax_enemy = an_units["team"] != in_own_team
+    an_tiles[ an_units["x"][ax_enemy], an_units["y"][ax_enemy] ] = TILE_BLOCKED
+    an_tiles[ an_citytiles["x"], an_citytiles["y"] ] = np.where( an_citytiles["team"] == in_own_team, TILE_CITY, TILE_BLOCKED )
+    return an_tiles
+
+def perception_obstacle_grid( ic_perception ) -> np.ndarray:
+    """tiles of the map seen by the moves of the team a Perception is built for, from the records it was built from
+    Args:
+        ic_perception (Perception): built by from_game (vectorized) or from_updates
+    Returns:
+        np.ndarray: (map size, map size) int8 of TILE_FREE, TILE_BLOCKED, TILE_CITY | None if the Perception kept no records
+    """
+    d_records = getattr( ic_perception, "_d_records", None )
+    if d_records is None:
+        logging.error(f"Perception has no records, build it vectorized")
+        return None
+    n_map_size = GAME_CONSTANTS["MAP"]["WIDTH_MAX"] -2 *ic_perception._w_shift
+    return obstacle_grid( d_records, ic_perception._n_own_team, n_map_size )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   RESOLUTION
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def resolve_moves( ian_x : np.ndarray, ian_y : np.ndarray, ian_scores : np.ndarray, ian_occupied : np.ndarray, ian_tiles : np.ndarray = None, if_budget : float = None ) -> np.ndarray:
+    """option of each unit, so that the engine cancels none of the moves
+    Args:
+        ian_x, ian_y (np.ndarray): (U) map position of the units that are resolved. one unit per tile
+        ian_scores (np.ndarray): (U, 5) scores of move NORTH, EAST, SOUTH, WEST and stay. -inf: never taken. stay must be finite
+        ian_occupied (np.ndarray): (map size, map size) units of the team that stay whatever happens. e.g. on cooldown, stacked
+        ian_tiles (np.ndarray): (map size, map size) obstacle grid | None: every tile is TILE_FREE
+        if_budget (float): seconds the resolution can take | None: ACTION.TRANSLATE.MOVE_BUDGET
+    Returns:
+        np.ndarray: (U) option of each unit. 0..3 move, N_OPTION_STAY
+    """
+    f_start = perf_counter()
+    if if_budget is None:
+        if_budget = GAME_CONSTANTS["ACTION"]["TRANSLATE"]["MOVE_BUDGET"]
+    n_units = len(ian_x)
+    n_size = ian_occupied.shape[0]
+    if n_units == 0:
+        return np.zeros( 0, dtype=np.int64 )
+
+    #options of each unit from the best, ties go to the first one. the stay option ends the list of the ones that can be taken
+    an_order = np.argsort( -ian_scores, axis=1, kind="stable" )
+    an_rank = np.zeros( n_units, dtype=np.int64 )
+    an_unit = np.arange( n_units )
+    an_x = np.asarray( ian_x, dtype=np.int64 )
+    an_y = np.asarray( ian_y, dtype=np.int64 )
+
+    #flat tiles padded by one tile of obstacles, moves outside of the map land on them
+    n_side = n_size +2
+    an_blocked = np.ones( (n_side, n_side), dtype=np.bool_ )
+    an_blocked[1:-1, 1:-1] = ian_occupied > 0
+    ax_city = np.zeros( (n_side, n_side), dtype=np.bool_ )
+    if ian_tiles is not None:
+        an_blocked[1:-1, 1:-1] |= ian_tiles == TILE_BLOCKED
+        ax_city[1:-1, 1:-1] = ian_tiles == TILE_CITY
+    an_blocked = an_blocked.reshape(-1)
+    ax_city = ax_city.reshape(-1)
+    an_source = (an_x +1) *n_side +an_y +1
+    an_staying = np.zeros( n_side *n_side, dtype=np.int64 )
+
+    while True:
+        an_option = an_order[an_unit, an_rank]
+        an_destination = (an_x +1 +_AN_MOVE_OFFSET[an_option, 0]) *n_side +an_y +1 +_AN_MOVE_OFFSET[an_option, 1]
+        ax_move = an_option != N_OPTION_STAY
+        #1) tiles held by a unit that stays
+        an_staying.fill( 0 )
+        np.add.at( an_staying, an_source[~ax_move], 1 )
+        ax_drop = ax_move & ~ax_city[an_destination] & ( an_blocked[an_destination] | (an_staying[an_destination] > 0) )
+        #2) one move per tile outside of the citytiles, the highest score
+        an_contest = np.nonzero( ax_move & ~ax_drop & ~ax_city[an_destination] )[0]
+        if len(an_contest) > 1:
+            an_sort = an_contest[ np.lexsort( (-ian_scores[an_contest, an_option[an_contest]], an_destination[an_contest]) ) ]
+            ax_lost = np.zeros( len(an_sort), dtype=np.bool_ )
+            ax_lost[1:] = an_destination[an_sort[1:]] == an_destination[an_sort[:-1]]
+            ax_drop[ an_sort[ax_lost] ] = True
+        if not ax_drop.any():
+            return an_option
+        an_rank[ax_drop] += 1
+        if perf_counter() -f_start > if_budget:
+            break
+
+    #over budget. staying never blocks a unit that doesn't stay already, moves are cancelled until none is in conflict
+    logging.warning(f"Move resolution of {n_units} units over budget of {if_budget}s, moves in conflict are cancelled")
+    an_option = an_order[an_unit, an_rank]
+    while True:
+        an_destination = (an_x +1 +_AN_MOVE_OFFSET[an_option, 0]) *n_side +an_y +1 +_AN_MOVE_OFFSET[an_option, 1]
+        ax_move = an_option != N_OPTION_STAY
+        an_staying.fill( 0 )
+        np.add.at( an_staying, an_source[~ax_move], 1 )
+        an_count = np.bincount( an_destination[ax_move], minlength=n_side *n_side )
+        ax_cancel = ax_move & ~ax_city[an_destination] & ( an_blocked[an_destination] | (an_staying[an_destination] > 0) | (an_count[an_destination] > 1) )
+        if not ax_cancel.any():
+            return an_option
+        an_option[ax_cancel] = N_OPTION_STAY
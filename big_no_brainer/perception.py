@@ -1,478 +1,886 @@
-##  @package big_no_brainer
-#   ARCHITECTURE
-#
-#   INFERENCE
-#   1) Game() -> Perception()
-#   2) Perception() -> model? -> Orders()
-#   3) Orders() -> list()
-#
-#   TRAINING
-#
-#   1) run inference this vs this at given random map size   
-#   2) game result -> Reward() -> float
-#   3) reinforcement learning
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   IMPORT
-#--------------------------------------------------------------------------------------------------------------------------------
-
-#from inspect import CO_VARARGS
-import logging
-#enumeration support
-from enum import Enum, auto
-import pickle
-
-#efficient nested loops
-from itertools import product
-
-import numpy as np
-
-#LUX-AI-2021
-from lux.constants import GAME_CONSTANTS
-from lux.constants import Constants
-RESOURCE_TYPES = Constants.RESOURCE_TYPES
-
-from lux.game import Game
-from lux.game_map import Position
-from lux.game_objects import Unit
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   Perception
-#--------------------------------------------------------------------------------------------------------------------------------
-
-class Perception():
-    """There are 8 matrices:
-
-    (V) Cities matrix: every tile has a value of +fuel+1 for bot's cities and -fuel-1 for opponent's cities
-    (V) Workers matrix: every tile has a value of +resources+1 for boot's workers and -resources-1 for opponent's ones
-    (V) Cart matrix: as workers matrix
-    (V) Wood matrix: amount of wood per tile
-    (V) Coal matrix: as wood
-    (V) Uranium matrix: as wood
-    (V) Road matrix: road value per tile
-    (V) Cooldown matrix: Bot's cooldown with negative sign, opponent's cooldown positive
-    """
-    #----------------    Configurations    ----------------
-
-    #Turn number
-    #turn inside the day cylce
-    #day/night information?
-    #research level for own and enemy
-    #total number of city own/enemy
-    #total number of citytiles own/enemy
-    #total number of units own enemy
-    #total number of workers own enemy
-    #total number of carts own enemy
-    #total number of fuel own enemy
-    #total number of resources own enemy
-    #total number of resources left on map own enemy
-    
-    #enumerate state vector that describe game wide information, will bypass the spatial processing stage
-    class E_INPUT_STATUS_VECTOR( Enum ):
-        MAP_SIZE = 0
-        MAP_TURN = auto()
-        MAP_IS_NIGHT = auto()
-        OWN_RESEARCH = auto()
-        OWN_RESEARCHED_COAL = auto()
-        OWN_RESEARCHED_URANIUM = auto()
-        ENEMY_RESEARCH = auto()
-        ENEMY_RESEARCHED_COAL = auto()
-        ENEMY_RESEARCHED_URANIUM = auto()
-
-	#NOTE: the enum were tuple because i put a coma like a c++ enum.
-    #enumerate possible types of cell {5+6+12+8=31} * {Width} * {Height}
-    class E_INPUT_SPACIAL_MATRICIES( Enum ):
-        #combined Citytile Fuel matrix
-        CITYTILE_FUEL = 0
-        #Combined Worker Resource matrix
-        WORKER_RESOURCE = auto()
-        #Combined Cart Resource matrix
-        CART_RESOURCE = auto()
-        #Individual Resource Cell matricies
-        RAW_WOOD = auto()
-        RAW_COAL = auto()
-        RAW_URANIUM = auto()
-        #Roads Matrix
-        ROAD = auto()
-        #Combined cooldown matrix for units/cities own/enemy
-        COOLDOWN = auto()
-
-    #----------------    Constructor    ----------------
-
-    def __init__( self ):
-        """Construct perception class based on a game state
-        """
-
-        #initialize class vars
-        self.__init_vars()
-
-        return
-
-    #----------------    Private Members    ---------------
-
-    def __init_vars( self ) -> bool:
-        """Initialize class vars
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-
-        #initialize to invalid
-        self.invalid = True
-        #allocate the status vector
-        self.status = np.zeros( len(Perception.E_INPUT_STATUS_VECTOR) )
-        #initialize perception matricies
-        self.mats = np.zeros( (len(Perception.E_INPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX']) )
-
-        return False
-
-    #----------------    Overloads    ---------------
-
-    ## Stringfy class for print method
-    def __str__(self) -> str:
-        return f"Perception | Raw Wood: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value].sum()} | "
-
-    #----------------    Protected    ---------------
-
-    def _check_bounds( self, in_x : int, in_y : int ) -> bool:
-        """pedantic check if the position is within map boundaries
-        Args:
-            in_x (int): x/width position
-            in_y (int): y/height position
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        if (self._w_shift +in_x) < 0 or (self._w_shift +in_x) >= GAME_CONSTANTS['MAP']['WIDTH_MAX']:
-            logging.critical(f"XW dimension is out of bound | offset: {self._w_shift} | index: {in_x} | limit: {GAME_CONSTANTS['MAP']['WIDTH_MAX']}")
-            return True
-        if (self._h_shift +in_y) < 0 or (self._h_shift +in_y) >= GAME_CONSTANTS['MAP']['HEIGHT_MAX']:
-            logging.critical(f"HY dimension is out of bound | offset: {self._h_shift} | index: {in_y} | limit: {GAME_CONSTANTS['MAP']['HEIGHT_MAX']}")
-            return True
-        return False
-
-    def _check_bounds_pos( self, in_pos : Position ) -> bool:
-        return self._check_bounds( in_pos.x, in_pos.y )
-
-    def _generate_citytile_fuel_matrix( self ) -> bool:
-        """Combined CItytile/Fuel matrix for both own and enemy
-        Matrix size: MAP_WIDTH_MAX *MAP_HEIGHT_MAX
-        Smaller maps are centered, with outer zeros
-        Offset+City.Fuel        -> The cell is a Own Citytile, with an amount of fuel equal to City.Fuel=Value-Offset (+10=+11-1)
-        Offset                  -> The cell is a Own Citytile with 0 Fuel
-        0                       -> The cell is not a Citytile
-        -Offset                 -> The cell is an Enemy Citytile with 0 Fuel
-        -Offset-City.Fuel       -> The cell is an Enemy Citytile, with an amount of fuel equal to City.Fuel=-Value-Offset (+10=-(-11)-1)
-        All citytiles belonging to a city share the same fuel reserve 
-        Game constant GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] specify what the offset is
-
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        #scan all Own Cities in the dictionary of cities
-        for s_city_name, c_city in self._c_own.cities.items():
-            #scan all Citytiles in a City
-            for c_citytile in c_city.citytiles:
-                #get citytile position
-                c_pos = c_citytile.pos
-                if self._check_bounds( c_pos.x, c_pos.y ) == True:
-                    return True
-                #write city fuel information inside the Own Citytile Fuel mat
-                #logging.debug(Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value)
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] + c_city.fuel
- 
-            pass
-
-        #scan all Enemy Cities in the dictionary of cities
-        for s_city_name, c_city in self._c_enemy.cities.items():
-            #scan all Citytiles in a City
-            for c_citytile in c_city.citytiles:
-                #get citytile position
-                c_pos = c_citytile.pos
-                if self._check_bounds( c_pos.x, c_pos.y ) == True:
-                    return True
-                #write city fuel information inside the Own Citytile Fuel mat
-                #logging.debug(Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value)
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = -GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] -c_city.fuel
-        return False
-
-    def _generate_unit_resource_matrix(self):
-        """Combined Worker/Resource map for both own and enemy
-        Combined Cart/Resource map for both own and enemy
-        Matrix size: MAP_WIDTH_MAX *MAP_HEIGHT_MAX
-        Smaller maps are centered, with outer values set to zero
-        Offset+Unit.Resource    -> The cell is a Own Worker/Cart, with an amount of resources equal to Unit.Resource=Value-Offset
-        Offset                  -> The cell is a Own Worker/Cart with 0 Resources
-        0                       -> The cell is not a Worker/Cart
-        -Offset                 -> The cell is an Enemy Worker/Cart with 0 Fuel
-        -Offset-Unit.Resource   -> The cell is an Enemy Worker/Cart, with an amount of fuel equal to Unit.Resource=-Value-Offset
-        All citytiles belonging to a city share the same fuel reserve 
-        Game constant GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] specify what the offset is
-
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-
-        def push_unit( ic_unit : Unit, ix_is_enemy : bool ) -> bool:
-            """helper function that push an unit in the appropriate matrix
-            Args:
-                ic_unit (Unit): [description]
-            Returns:
-                bool: False=OK | True=FAIL
-            """
-            #resources carried by the unit
-            n_resources = c_unit.cargo.wood +c_unit.cargo.coal +c_unit.cargo.uranium
-            #Own units have an offset and positive resources
-            if ix_is_enemy == False:
-                n_fill_value = GAME_CONSTANTS["PERCEPTION"]["INPUT_UNIT_RESOURCE_OFFSET"] +n_resources
-            #Enemy units have negative offset and resources
-            else:
-                n_fill_value = -GAME_CONSTANTS["PERCEPTION"]["INPUT_UNIT_RESOURCE_OFFSET"] -n_resources
-            #fetch unit position
-            c_pos = c_unit.pos
-            if self._check_bounds_pos( c_pos ) == True:
-                return True            
-            #Workers fit the combined Worker/Resource matrix
-            if c_unit.is_worker():
-                #accumulate this worker resource in the combined Worker/Resource matrix
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.WORKER_RESOURCE.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] += n_fill_value
-            #Carts fit the combined Worker/Resource matrix
-            elif c_unit.is_cart():
-                #accumulate this worker resource in the combined Worker/Resource matrix
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.CART_RESOURCE.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] += n_fill_value
-            #Default Case:
-            else:
-                #ERROR!!! Unknown unit
-                logging.critical(f"Unit type is unknown: {c_unit}")
-                return True
-            return False
-
-        #Scan all Own Unit
-        for c_unit in self._c_own.units:
-            #fit the unit in the appropriate matrix with +sign for resource
-            push_unit(c_unit, False)
-            
-        #Scan all Enemy Unit
-        for c_unit in self._c_enemy.units:
-            #fit the unit in the appropriate matrix with +sign for resource
-            push_unit(c_unit, True)
-
-        return False
-
-    def _generate_raw_resource_road_matrix( self ) -> bool:
-        """Generate input spacial matrix, all map sizes are centered
-        All roads are friendly and reduce CD. Roads below a city are 6 and disappear when the city does.
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        #scan every 2D coordinate on the map
-        for w, h in product( range( self._c_map.width ), range( self._c_map.height ) ):
-            #Fetch the cell
-            c_cell = self._c_map.get_cell( w, h )
-            #Fetch position
-            c_pos = c_cell.pos
-            if self._check_bounds_pos( c_pos ) == True:
-                return True
-            #if the cell is not a Raw resource
-            if c_cell.has_resource() == False:
-                pass
-            #cell is a Raw Resource
-            elif (c_cell.resource.type == RESOURCE_TYPES.WOOD ):
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.resource.amount
-            elif (c_cell.resource.type == RESOURCE_TYPES.COAL ):
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.resource.amount
-            elif (c_cell.resource.type == RESOURCE_TYPES.URANIUM ):
-                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.resource.amount
-            #cell is not a Raw Resource
-            else:
-                logging.critical(f"Cell is not a Resource but it should be. {c_cell}")
-                pass
-
-            #save the road level as well since I'm scanning the cells
-            self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.road
-
-        #logging.info(f"Resource: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value].sum()} {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value].sum()} {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value].sum()}")
-        #logging.info(f"Road: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value].sum()}")
-        return False
-
-    def _generate_cooldown( self ) -> bool:
-        """Generate input spacial matrix, all map sizes are centered
-        own have positive CD, enemy have negative CD
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        def push_cooldown( c_pos : Position, in_cooldown : int, ix_is_enemy : bool ) -> bool:
-
-            if in_cooldown < 0 or in_cooldown > GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"]:
-                logging.critical(f"Cooldown is invalid {in_cooldown}")
-                return True
-            #Own units have an offset and positive resources
-            if ix_is_enemy == False:
-                n_fill_value = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +in_cooldown
-            #Enemy units have negative offset and resources
-            else:
-                n_fill_value = -GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] -in_cooldown
-            #fetch unit position
-            c_pos = c_unit.pos
-            if self._check_bounds_pos( c_pos ) == True:
-                logging.critical(f"Position is invalid {c_pos}")
-                return True            
-            #accumulate cooldown in the cooldown matrix
-            self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] += n_fill_value
-            #logging.debug(f"Pos {self._w_shift +c_pos.x} {self._h_shift +c_pos.y} | {ix_is_enemy} | {n_fill_value}")
-
-            return False
-
-        #Scan all Own Unit
-        for c_unit in self._c_own.units:
-            #fit cooldown with +sign for resource
-            push_cooldown( c_unit.pos, c_unit.cooldown, False )
-            
-        #Scan all Enemy Unit
-        for c_unit in self._c_enemy.units:
-            #fit cooldown with +sign for resource
-            push_cooldown( c_unit.pos, c_unit.cooldown, True )
-
-        #scan all Own Cities in the dictionary of cities
-        for s_city_name, c_city in self._c_own.cities.items():
-            #scan all Citytiles in a City
-            for c_citytile in c_city.citytiles:
-                #get citytile position
-                c_pos = c_citytile.pos
-                if self._check_bounds_pos( c_pos ) == True:
-                    return True
-                #write city cooldown information 
-                push_cooldown( c_citytile.pos, c_citytile.cooldown, False )
-
-        #scan all Enemy Cities in the dictionary of cities
-        for s_city_name, c_city in self._c_enemy.cities.items():
-            #scan all Citytiles in a City
-            for c_citytile in c_city.citytiles:
-                #get citytile position
-                c_pos = c_citytile.pos
-                if self._check_bounds_pos( c_pos ) == True:
-                    return True
-                #write city cooldown information 
-                push_cooldown( c_citytile.pos, c_citytile.cooldown, True )
-
-        #logging.debug(f"CD: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value].sum()}") 
-        return False
-
-    def _generate_status_vector( self ):
-        """Generate the status vector to be fed in input of the ML
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-
-        #
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value ] = self._c_map.width
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_TURN.value ] = self.n_turn
-
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCH.value ] = self._c_own.research_points
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCHED_COAL.value ] = self._c_own.researched_coal()
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCHED_URANIUM.value ] = self._c_own.researched_uranium()
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCH.value ] = self._c_enemy.research_points
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCHED_COAL.value ] = self._c_enemy.researched_coal()
-        self.status[ Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCHED_URANIUM.value ] = self._c_enemy.researched_uranium()
-
-        return False
-    
-    def _generate_dictionary_unit( self ) -> bool:
-        """Generates a dictionary of units in the form:
-        {
-            u_1 : ( 11, 17 ),
-            u_5 : ( 12, 17 ),
-        }
-        Action needs to translate ID of unit into its position.
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-
-        d_unit = dict()
-
-        #Scan all Own Unit
-        for c_unit in self._c_own.units:
-            d_unit[c_unit.id] = ( c_unit.pos.x, c_unit.pos.y )
-            
-        #Scan all Enemy Unit
-        for c_unit in self._c_enemy.units:
-            d_unit[c_unit.id] = ( c_unit.pos.x, c_unit.pos.y )
-        
-        self.d_unit = d_unit
-        #logging.debug(f"Unit Dictionary: {d_unit}")
-        return False
-
-    #----------------    Public    ---------------
-
-    def from_game( self, ic_game_state : Game ) -> bool:
-        """fill the Perception class from a Game() class
-        Args:
-            ic_game_state (Game): Current game state
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        
-        #turn index
-        self.n_turn = ic_game_state.turn
-
-        #store locally the game state. Not visible from outside
-        self._c_map = ic_game_state.map
-        self._c_own = ic_game_state.players[ ic_game_state.id ]
-        self._c_enemy = ic_game_state.players[ ic_game_state.opponent_id ]
-        #tiles are shifted so that all map sizes are centered
-        self._w_shift = (GAME_CONSTANTS['MAP']['WIDTH_MAX'] -ic_game_state.map_width) // 2
-        self._h_shift = (GAME_CONSTANTS['MAP']['HEIGHT_MAX'] -ic_game_state.map_height) // 2
-
-        #reset to valid
-        self.invalid = False
-        #fill the ML input status vector
-        self.invalid |= self._generate_status_vector()
-        #fill the ML input spacial matricies
-        self.invalid |= self._generate_unit_resource_matrix()
-        self.invalid |= self._generate_raw_resource_road_matrix()
-        self.invalid |= self._generate_cooldown()
-        self.invalid |= self._generate_dictionary_unit()
-
-        return False
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   Save/Load Pickle
-#--------------------------------------------------------------------------------------------------------------------------------
-
-def save_perceptions( ilc_perceptions : list, is_file_name : str ) -> bool:
-    """save a game state to file
-    Args:
-        ilc_perceptions (list(Game)): perceptions to be saved
-        is_file_name (str): destination file name 
-    Returns:
-        bool: false: success | true: fail
-    """
-    
-    try:
-        with open(is_file_name, "wb") as opened_file:
-            pickle.dump( ilc_perceptions, opened_file )
-
-    except OSError as problem:
-        logging.critical(f"Pickle: {problem}")
-        return True
-
-    return False
-
-##  load a game state to file
-#   uses pickle
-def load_perceptions( is_file_name : str ):
-    """load a game state to file
-    Args:
-        is_file_name (str): source file name 
-    Returns:
-        Game: loaded game state
-    """
-    
-    try:
-        with open(is_file_name, "rb") as opened_file:
-            logging.debug(f"opened: {opened_file}")
-            lc_perceptions = pickle.load( opened_file )
-
-    except OSError as problem:
-        logging.critical(f"Pickle: {problem}")
-        return None
-
-    return lc_perceptions
+##  @package big_no_brainer
+#   ARCHITECTURE
+#
+#   INFERENCE
+#   1) Game() -> Perception()
+#   2) Perception() -> model? -> Orders()
+#   3) Orders() -> list()
+#
+#   TRAINING
+#
+#   1) run inference this vs this at given random map size   
+#   2) game result -> Reward() -> float
+#   3) reinforcement learning
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#from inspect import CO_VARARGS
+import logging
+#enumeration support
+from enum import Enum, auto
+import pickle
+
+#efficient nested loops
+from itertools import product
+#index tables cached per map size
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+#LUX-AI-2021
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+from lux.game import Game
+from lux.game_map import Position
+from lux.game_objects import Unit
+from lux.game_updates import parse_updates
+
+from big_no_brainer.dtype_policy import DtypePolicy, DTYPE_POLICY_FULL, convert_array, convert_into
+from big_no_brainer.feature_planes import FeatureContext
+from big_no_brainer.sparse_storage import sparse_encode, sparse_densify, save_sparse, load_sparse
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   INDEX TABLES
+#--------------------------------------------------------------------------------------------------------------------------------
+
+@lru_cache( maxsize=None )
+def _get_tile_index_table( in_width : int, in_height : int ) -> np.ndarray:
+    """flat index of every tile of a map inside one WIDTH_MAX *HEIGHT_MAX perception matrix
+    Smaller maps are centered with the same shift as Perception._w_shift and Perception._h_shift
+    Args:
+        in_width (int): map width
+        in_height (int): map height
+    Returns:
+        np.ndarray: read only (in_width, in_height) table. [x, y] -> (w_shift +x) *HEIGHT_MAX +(h_shift +y)
+    """
+    n_w_shift = (GAME_CONSTANTS['MAP']['WIDTH_MAX'] -in_width) // 2
+    n_h_shift = (GAME_CONSTANTS['MAP']['HEIGHT_MAX'] -in_height) // 2
+    an_table = (n_w_shift +np.arange( in_width ))[:, None] *GAME_CONSTANTS['MAP']['HEIGHT_MAX'] +(n_h_shift +np.arange( in_height ))[None, :]
+    an_table.flags.writeable = False
+    return an_table
+
+def _is_night( ian_turn ) -> np.ndarray:
+    """True for the turns at night: the last NIGHT_LENGTH turns of each day and night cycle, like the engine
+    Args:
+        ian_turn (int | np.ndarray): turn indexes
+    Returns:
+        np.ndarray: bool of the shape of ian_turn
+    """
+    return np.asarray( ian_turn ) % (GAME_CONSTANTS["PARAMETERS"]["DAY_LENGTH"] +GAME_CONSTANTS["PARAMETERS"]["NIGHT_LENGTH"]) >= GAME_CONSTANTS["PARAMETERS"]["DAY_LENGTH"]
+
+def _fill_research_status( ian_status : np.ndarray, ian_research : np.ndarray, ian_turn : np.ndarray, in_own_team : int ) -> bool:
+    """research entries of status vectors from research point records, same values as Perception._generate_status_vector
+    Args:
+        ian_status (np.ndarray): (turns, 9) status vectors
+        ian_research (np.ndarray): research point records of lux.game_updates
+        ian_turn (np.ndarray): row of ian_status of each record
+        in_own_team (int): team of the player the Perception is built for
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    an_points = np.zeros( (len(ian_status), 2) )
+    an_points[ ian_turn, ian_research["team"] ] = ian_research["points"]
+    for n_team, e_research, e_coal, e_uranium in (
+        (in_own_team, Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCH, Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCHED_COAL, Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCHED_URANIUM),
+        (1 -in_own_team, Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCH, Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCHED_COAL, Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCHED_URANIUM),
+    ):
+        ian_status[:, e_research.value] = an_points[:, n_team]
+        ian_status[:, e_coal.value] = an_points[:, n_team] >= GAME_CONSTANTS["PARAMETERS"]["RESEARCH_REQUIREMENTS"]["COAL"]
+        ian_status[:, e_uranium.value] = an_points[:, n_team] >= GAME_CONSTANTS["PARAMETERS"]["RESEARCH_REQUIREMENTS"]["URANIUM"]
+    return False
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Perception
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class Perception():
+    """There are 8 matrices:
+
+    (V) Cities matrix: every tile has a value of +fuel+1 for bot's cities and -fuel-1 for opponent's cities
+    (V) Workers matrix: every tile has a value of +resources+1 for boot's workers and -resources-1 for opponent's ones
+    (V) Cart matrix: as workers matrix
+    (V) Wood matrix: amount of wood per tile
+    (V) Coal matrix: as wood
+    (V) Uranium matrix: as wood
+    (V) Road matrix: road value per tile
+    (V) Cooldown matrix: Bot's cooldown with negative sign, opponent's cooldown positive
+    """
+    #----------------    Configurations    ----------------
+
+    #version of the features in mats and status. Arrays and nets of another version read the same game differently
+    #   1: from_game leaves CITYTILE_FUEL and MAP_IS_NIGHT at 0
+    #   2: every build fills CITYTILE_FUEL and MAP_IS_NIGHT, like BatchEnvironment.perceive
+    FEATURES_VERSION = 2
+
+    #Turn number
+    #turn inside the day cylce
+    #day/night information?
+    #research level for own and enemy
+    #total number of city own/enemy
+    #total number of citytiles own/enemy
+    #total number of units own enemy
+    #total number of workers own enemy
+    #total number of carts own enemy
+    #total number of fuel own enemy
+    #total number of resources own enemy
+    #total number of resources left on map own enemy
+    
+    #enumerate state vector that describe game wide information, will bypass the spatial processing stage
+    class E_INPUT_STATUS_VECTOR( Enum ):
+        MAP_SIZE = 0
+        MAP_TURN = auto()
+        MAP_IS_NIGHT = auto()
+        OWN_RESEARCH = auto()
+        OWN_RESEARCHED_COAL = auto()
+        OWN_RESEARCHED_URANIUM = auto()
+        ENEMY_RESEARCH = auto()
+        ENEMY_RESEARCHED_COAL = auto()
+        ENEMY_RESEARCHED_URANIUM = auto()
+
+	#NOTE: the enum were tuple because i put a coma like a c++ enum.
+    #enumerate possible types of cell {5+6+12+8=31} * {Width} * {Height}
+    class E_INPUT_SPACIAL_MATRICIES( Enum ):
+        #combined Citytile Fuel matrix
+        CITYTILE_FUEL = 0
+        #Combined Worker Resource matrix
+        WORKER_RESOURCE = auto()
+        #Combined Cart Resource matrix
+        CART_RESOURCE = auto()
+        #Individual Resource Cell matricies
+        RAW_WOOD = auto()
+        RAW_COAL = auto()
+        RAW_URANIUM = auto()
+        #Roads Matrix
+        ROAD = auto()
+        #Combined cooldown matrix for units/cities own/enemy
+        COOLDOWN = auto()
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self, ic_dtype_policy : DtypePolicy = DTYPE_POLICY_FULL ):
+        """Construct perception class based on a game state
+        Args:
+            ic_dtype_policy (DtypePolicy): dtypes of mats and status once generated. Stored with the Perception
+        """
+
+        #initialize class vars
+        self.__init_vars( ic_dtype_policy )
+
+        return
+
+    #----------------    Private Members    ---------------
+
+    def __init_vars( self, ic_dtype_policy : DtypePolicy ) -> bool:
+        """Initialize class vars
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+
+        #initialize to invalid
+        self.invalid = True
+        #dtypes of mats and status. the generators work in float64, the policy is applied when the Perception is complete
+        self.c_dtype_policy = ic_dtype_policy
+        #None: mats follow E_INPUT_SPACIAL_MATRICIES | names of the feature planes of mats, see big_no_brainer.feature_planes
+        self.ls_planes = None
+        #allocate the status vector
+        self.status = np.zeros( len(Perception.E_INPUT_STATUS_VECTOR) )
+        #initialize perception matricies
+        self.mats = np.zeros( (len(Perception.E_INPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX']) )
+
+        return False
+
+    def __bind_game( self, ic_game_state : Game ) -> bool:
+        """store locally the parts of the game state the generators read
+        Args:
+            ic_game_state (Game): Current game state
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        #store locally the game state. Not visible from outside
+        self._c_map = ic_game_state.map
+        self._c_own = ic_game_state.players[ ic_game_state.id ]
+        self._c_enemy = ic_game_state.players[ ic_game_state.opponent_id ]
+
+        return self.__bind_map( ic_game_state.id, ic_game_state.map_width, ic_game_state.map_height, ic_game_state.turn )
+
+    def __bind_map( self, in_own_team : int, in_width : int, in_height : int, in_turn : int ) -> bool:
+        """store locally the player, map size and turn the matricies are built for
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        #turn index
+        self.n_turn = in_turn
+        self._n_own_team = in_own_team
+        #tiles are shifted so that all map sizes are centered
+        self._w_shift = (GAME_CONSTANTS['MAP']['WIDTH_MAX'] -in_width) // 2
+        self._h_shift = (GAME_CONSTANTS['MAP']['HEIGHT_MAX'] -in_height) // 2
+        self._an_tile_index = _get_tile_index_table( in_width, in_height )
+
+        return False
+
+    def __work_buffers( self ) -> bool:
+        """zeroed float64 mats and status for the generators. New arrays, the ones of the previous build may still be held by the caller
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.mats = np.zeros( (len(Perception.E_INPUT_SPACIAL_MATRICIES), GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX']) )
+        self.ls_planes = None
+        self.status = np.zeros( len(Perception.E_INPUT_STATUS_VECTOR) )
+        return False
+
+    def __apply_dtype_policy( self ) -> bool:
+        """convert mats and status to the dtypes of the policy
+        Returns:
+            bool: False=OK | True=FAIL values overflowed the dtype of the policy and were saturated
+        """
+        ls_channels = self.ls_planes if self.ls_planes is not None else [ e_matrix.name for e_matrix in Perception.E_INPUT_SPACIAL_MATRICIES ]
+        self.mats, x_fail = convert_array( self.mats, self.c_dtype_policy.features, "Perception.mats", ls_channels )
+        self.status, x_status = convert_array( self.status, self.c_dtype_policy.status, "Perception.status", [ e_status.name for e_status in Perception.E_INPUT_STATUS_VECTOR ] )
+        return x_fail or x_status
+
+    def __fill_planes( self, id_records : dict, ils_planes : list = None ) -> bool:
+        """fill mats with feature planes of the turn, computed lazily from the records
+        Args:
+            id_records (dict): identifier -> record array of lux.game_updates
+            ils_planes (list(str)): names of the planes that replace mats | None: the E_INPUT_SPACIAL_MATRICIES planes, written in mats
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self._c_features = FeatureContext( id_records, self._n_own_team, self._an_tile_index )
+        if ils_planes is None:
+            return self._c_features.planes( _LS_MATRIX_PLANES, self.mats ) is None or self._c_features.invalid
+        an_mats = self._c_features.planes( ils_planes )
+        if an_mats is None:
+            return True
+        self.mats = an_mats
+        self.ls_planes = list( ils_planes )
+        return self._c_features.invalid
+
+    def __build( self, ic_game_state : Game, ix_vectorized : bool, ils_planes : list = None ) -> bool:
+        """fill the float64 matricies and status vector from a Game() class. see from_game
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.__bind_game( ic_game_state )
+
+        #reset to valid
+        self.invalid = False
+        #fill the ML input status vector
+        self.invalid |= self._generate_status_vector()
+        #records the matricies were built from. feature_planes computes more planes from them
+        self._d_records = None
+        self._c_features = None
+        #fill the ML input spacial matricies
+        if ils_planes is not None or ix_vectorized == True:
+            d_records = ic_game_state._to_records()
+            self._d_records = d_records
+            self.invalid |= self.__fill_planes( d_records, ils_planes )
+        else:
+            self.invalid |= self._generate_citytile_fuel_matrix()
+            self.invalid |= self._generate_unit_resource_matrix()
+            self.invalid |= self._generate_raw_resource_road_matrix()
+            self.invalid |= self._generate_cooldown()
+        self.invalid |= self._generate_dictionary_unit( ic_game_state )
+
+        return False
+
+    #----------------    Overloads    ---------------
+
+    ## Stringfy class for print method
+    def __str__(self) -> str:
+        return f"Perception | Raw Wood: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value].sum()} | "
+
+    #----------------    Protected    ---------------
+
+    def _check_bounds( self, in_x : int, in_y : int ) -> bool:
+        """pedantic check if the position is within map boundaries
+        Args:
+            in_x (int): x/width position
+            in_y (int): y/height position
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if (self._w_shift +in_x) < 0 or (self._w_shift +in_x) >= GAME_CONSTANTS['MAP']['WIDTH_MAX']:
+            logging.critical(f"XW dimension is out of bound | offset: {self._w_shift} | index: {in_x} | limit: {GAME_CONSTANTS['MAP']['WIDTH_MAX']}")
+            return True
+        if (self._h_shift +in_y) < 0 or (self._h_shift +in_y) >= GAME_CONSTANTS['MAP']['HEIGHT_MAX']:
+            logging.critical(f"HY dimension is out of bound | offset: {self._h_shift} | index: {in_y} | limit: {GAME_CONSTANTS['MAP']['HEIGHT_MAX']}")
+            return True
+        return False
+
+    def _check_bounds_pos( self, in_pos : Position ) -> bool:
+        return self._check_bounds( in_pos.x, in_pos.y )
+
+    def _generate_citytile_fuel_matrix( self ) -> bool:
+        """Combined CItytile/Fuel matrix for both own and enemy
+        Matrix size: MAP_WIDTH_MAX *MAP_HEIGHT_MAX
+        Smaller maps are centered, with outer zeros
+        Offset+City.Fuel        -> The cell is a Own Citytile, with an amount of fuel equal to City.Fuel=Value-Offset (+10=+11-1)
+        Offset                  -> The cell is a Own Citytile with 0 Fuel
+        0                       -> The cell is not a Citytile
+        -Offset                 -> The cell is an Enemy Citytile with 0 Fuel
+        -Offset-City.Fuel       -> The cell is an Enemy Citytile, with an amount of fuel equal to City.Fuel=-Value-Offset (+10=-(-11)-1)
+        All citytiles belonging to a city share the same fuel reserve 
+        Game constant GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] specify what the offset is
+
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        #scan all Own Cities in the dictionary of cities
+        for s_city_name, c_city in self._c_own.cities.items():
+            #scan all Citytiles in a City
+            for c_citytile in c_city.citytiles:
+                #get citytile position
+                c_pos = c_citytile.pos
+                if self._check_bounds( c_pos.x, c_pos.y ) == True:
+                    return True
+                #write city fuel information inside the Own Citytile Fuel mat
+                #logging.debug(Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value)
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] + c_city.fuel
+ 
+            pass
+
+        #scan all Enemy Cities in the dictionary of cities
+        for s_city_name, c_city in self._c_enemy.cities.items():
+            #scan all Citytiles in a City
+            for c_citytile in c_city.citytiles:
+                #get citytile position
+                c_pos = c_citytile.pos
+                if self._check_bounds( c_pos.x, c_pos.y ) == True:
+                    return True
+                #write city fuel information inside the Own Citytile Fuel mat
+                #logging.debug(Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value)
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = -GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] -c_city.fuel
+        return False
+
+    def _generate_unit_resource_matrix(self):
+        """Combined Worker/Resource map for both own and enemy
+        Combined Cart/Resource map for both own and enemy
+        Matrix size: MAP_WIDTH_MAX *MAP_HEIGHT_MAX
+        Smaller maps are centered, with outer values set to zero
+        Offset+Unit.Resource    -> The cell is a Own Worker/Cart, with an amount of resources equal to Unit.Resource=Value-Offset
+        Offset                  -> The cell is a Own Worker/Cart with 0 Resources
+        0                       -> The cell is not a Worker/Cart
+        -Offset                 -> The cell is an Enemy Worker/Cart with 0 Fuel
+        -Offset-Unit.Resource   -> The cell is an Enemy Worker/Cart, with an amount of fuel equal to Unit.Resource=-Value-Offset
+        All citytiles belonging to a city share the same fuel reserve 
+        Game constant GAME_CONSTANTS["PERCEPTION"]["INPUT_CITYTILE_FUEL_OFFSET"] specify what the offset is
+
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+
+        def push_unit( ic_unit : Unit, ix_is_enemy : bool ) -> bool:
+            """helper function that push an unit in the appropriate matrix
+            Args:
+                ic_unit (Unit): [description]
+            Returns:
+                bool: False=OK | True=FAIL
+            """
+            #resources carried by the unit
+            n_resources = c_unit.cargo.wood +c_unit.cargo.coal +c_unit.cargo.uranium
+            #Own units have an offset and positive resources
+            if ix_is_enemy == False:
+                n_fill_value = GAME_CONSTANTS["PERCEPTION"]["INPUT_UNIT_RESOURCE_OFFSET"] +n_resources
+            #Enemy units have negative offset and resources
+            else:
+                n_fill_value = -GAME_CONSTANTS["PERCEPTION"]["INPUT_UNIT_RESOURCE_OFFSET"] -n_resources
+            #fetch unit position
+            c_pos = c_unit.pos
+            if self._check_bounds_pos( c_pos ) == True:
+                return True            
+            #Workers fit the combined Worker/Resource matrix
+            if c_unit.is_worker():
+                #accumulate this worker resource in the combined Worker/Resource matrix
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.WORKER_RESOURCE.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] += n_fill_value
+            #Carts fit the combined Worker/Resource matrix
+            elif c_unit.is_cart():
+                #accumulate this worker resource in the combined Worker/Resource matrix
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.CART_RESOURCE.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] += n_fill_value
+            #Default Case:
+            else:
+                #ERROR!!! Unknown unit
+                logging.critical(f"Unit type is unknown: {c_unit}")
+                return True
+            return False
+
+        #Scan all Own Unit
+        for c_unit in self._c_own.units:
+            #fit the unit in the appropriate matrix with +sign for resource
+            push_unit(c_unit, False)
+            
+        #Scan all Enemy Unit
+        for c_unit in self._c_enemy.units:
+            #fit the unit in the appropriate matrix with +sign for resource
+            push_unit(c_unit, True)
+
+        return False
+
+    def _generate_raw_resource_road_matrix( self ) -> bool:
+        """Generate input spacial matrix, all map sizes are centered
+        All roads are friendly and reduce CD. Roads below a city are 6 and disappear when the city does.
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        #scan every 2D coordinate on the map
+        for w, h in product( range( self._c_map.width ), range( self._c_map.height ) ):
+            #Fetch the cell
+            c_cell = self._c_map.get_cell( w, h )
+            #Fetch position
+            c_pos = c_cell.pos
+            if self._check_bounds_pos( c_pos ) == True:
+                return True
+            #if the cell is not a Raw resource
+            if c_cell.has_resource() == False:
+                pass
+            #cell is a Raw Resource
+            elif (c_cell.resource.type == RESOURCE_TYPES.WOOD ):
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.resource.amount
+            elif (c_cell.resource.type == RESOURCE_TYPES.COAL ):
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.resource.amount
+            elif (c_cell.resource.type == RESOURCE_TYPES.URANIUM ):
+                self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.resource.amount
+            #cell is not a Raw Resource
+            else:
+                logging.critical(f"Cell is not a Resource but it should be. {c_cell}")
+                pass
+
+            #save the road level as well since I'm scanning the cells
+            self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] = c_cell.road
+
+        #logging.info(f"Resource: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value].sum()} {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value].sum()} {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value].sum()}")
+        #logging.info(f"Road: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value].sum()}")
+        return False
+
+    def _generate_cooldown( self ) -> bool:
+        """Generate input spacial matrix, all map sizes are centered
+        own have positive CD, enemy have negative CD
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        def push_cooldown( c_pos : Position, in_cooldown : int, ix_is_enemy : bool ) -> bool:
+
+            if in_cooldown < 0 or in_cooldown > GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"]:
+                logging.critical(f"Cooldown is invalid {in_cooldown}")
+                return True
+            #Own units have an offset and positive resources
+            if ix_is_enemy == False:
+                n_fill_value = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +in_cooldown
+            #Enemy units have negative offset and resources
+            else:
+                n_fill_value = -GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] -in_cooldown
+            if self._check_bounds_pos( c_pos ) == True:
+                logging.critical(f"Position is invalid {c_pos}")
+                return True            
+            #accumulate cooldown in the cooldown matrix
+            self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value, self._w_shift +c_pos.x, self._h_shift +c_pos.y] += n_fill_value
+            #logging.debug(f"Pos {self._w_shift +c_pos.x} {self._h_shift +c_pos.y} | {ix_is_enemy} | {n_fill_value}")
+
+            return False
+
+        #Scan all Own Unit
+        for c_unit in self._c_own.units:
+            #fit cooldown with +sign for resource
+            push_cooldown( c_unit.pos, c_unit.cooldown, False )
+            
+        #Scan all Enemy Unit
+        for c_unit in self._c_enemy.units:
+            #fit cooldown with +sign for resource
+            push_cooldown( c_unit.pos, c_unit.cooldown, True )
+
+        #scan all Own Cities in the dictionary of cities
+        for s_city_name, c_city in self._c_own.cities.items():
+            #scan all Citytiles in a City
+            for c_citytile in c_city.citytiles:
+                #get citytile position
+                c_pos = c_citytile.pos
+                if self._check_bounds_pos( c_pos ) == True:
+                    return True
+                #write city cooldown information 
+                push_cooldown( c_citytile.pos, c_citytile.cooldown, False )
+
+        #scan all Enemy Cities in the dictionary of cities
+        for s_city_name, c_city in self._c_enemy.cities.items():
+            #scan all Citytiles in a City
+            for c_citytile in c_city.citytiles:
+                #get citytile position
+                c_pos = c_citytile.pos
+                if self._check_bounds_pos( c_pos ) == True:
+                    return True
+                #write city cooldown information 
+                push_cooldown( c_citytile.pos, c_citytile.cooldown, True )
+
+        #logging.debug(f"CD: {self.mats[Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value].sum()}") 
+        return False
+
+    def _generate_status_vector( self ):
+        """Generate the status vector to be fed in input of the ML
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+
+        #
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value ] = self._c_map.width
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_TURN.value ] = self.n_turn
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_IS_NIGHT.value ] = _is_night( self.n_turn )
+
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCH.value ] = self._c_own.research_points
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCHED_COAL.value ] = self._c_own.researched_coal()
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.OWN_RESEARCHED_URANIUM.value ] = self._c_own.researched_uranium()
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCH.value ] = self._c_enemy.research_points
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCHED_COAL.value ] = self._c_enemy.researched_coal()
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.ENEMY_RESEARCHED_URANIUM.value ] = self._c_enemy.researched_uranium()
+
+        return False
+    
+    def _generate_dictionary_unit( self, ic_game_state : Game ) -> bool:
+        """Generates a dictionary of units and its reverse from the spatial index of the Game in the form:
+        {
+            u_1 : ( 11, 17 ),
+            u_5 : ( 12, 17 ),
+        }
+        {
+            ( 11, 17 ) : [ u_1 ],
+            ( 12, 17 ) : [ u_5 ],
+        }
+        Action needs to translate ID of unit into its position, and position into ID of unit. Stacked units share a position.
+        Args:
+            ic_game_state (Game): Current game state
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+
+        d_unit = dict()
+        d_position_unit = dict()
+
+        #Scan all occupied tiles
+        for t_pos, lc_units in ic_game_state.get_units_by_position().items():
+            ls_units = d_position_unit[t_pos] = [ c_unit.id for c_unit in lc_units ]
+            for s_unit in ls_units:
+                d_unit[s_unit] = t_pos
+
+        self.d_unit = d_unit
+        self.d_position_unit = d_position_unit
+        #logging.debug(f"Unit Dictionary: {d_unit}")
+        return False
+
+    def _generate_dictionary_unit_records( self, ian_units : np.ndarray ) -> bool:
+        """_generate_dictionary_unit from the unit records of lux.game_updates, in the order of the records
+        Args:
+            ian_units (np.ndarray): unit records of the turn
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        d_unit = dict()
+        d_position_unit = dict()
+        for n_id, n_x, n_y in zip( ian_units["id"].tolist(), ian_units["x"].tolist(), ian_units["y"].tolist() ):
+            s_unit = f"u_{n_id}"
+            d_unit[s_unit] = (n_x, n_y)
+            d_position_unit.setdefault( (n_x, n_y), [] ).append( s_unit )
+
+        self.d_unit = d_unit
+        self.d_position_unit = d_position_unit
+        return False
+
+    def _generate_status_vector_records( self, id_records : dict, in_width : int ) -> bool:
+        """_generate_status_vector from the research point records of lux.game_updates
+        Args:
+            id_records (dict): identifier -> record array of lux.game_updates
+            in_width (int): map width
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value ] = in_width
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_TURN.value ] = self.n_turn
+        self.status[ Perception.E_INPUT_STATUS_VECTOR.MAP_IS_NIGHT.value ] = _is_night( self.n_turn )
+        an_research = id_records[INPUT_CONSTANTS.RESEARCH_POINTS]
+        return _fill_research_status( self.status[None, :], an_research, np.zeros( len(an_research), dtype=np.int64 ), self._n_own_team )
+
+    #----------------    Public    ---------------
+
+    def from_game( self, ic_game_state : Game, ix_vectorized : bool = True, ils_planes : list = None ) -> bool:
+        """fill the Perception class from a Game() class
+        Args:
+            ic_game_state (Game): Current game state
+            ix_vectorized (bool): True: scatter the record arrays of the game in the matricies | False: scan the game objects one by one
+            ils_planes (list(str)): None: mats follow E_INPUT_SPACIAL_MATRICIES | names of the feature planes of mats, in order.
+                only those planes and their dependencies are computed from the record arrays. e.g. ["WORKER_RESOURCE", "RAW_FUEL"]
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+
+        self.__work_buffers()
+        self.__build( ic_game_state, ix_vectorized, ils_planes )
+        #values that overflow the dtype of the policy invalidate the Perception
+        self.invalid |= self.__apply_dtype_policy()
+
+        return False
+
+    def from_updates( self, ils_updates : list, in_player : int, in_width : int, in_height : int, in_turn : int = None, ils_planes : list = None ) -> bool:
+        """fill the Perception class straight from the observation updates of a turn, without a Game() class
+        The updates are decoded into record arrays by lux.game_updates.parse_updates and scattered like from_game does.
+        No Game, Unit, City or Cell is created. Same matricies, status vector and dictionaries of units as from_game
+        Args:
+            ils_updates (list(str)): observation["updates"] of a turn. the player id and map size lines of the first turn are ignored
+            in_player (int): team the Perception is built for. observation["player"]
+            in_width (int): map width. observation["width"]
+            in_height (int): map height. observation["height"]
+            in_turn (int): turn of the updates. observation["step"] | None: the turn after the previous call, 0 on the first call
+            ils_planes (list(str)): None: mats follow E_INPUT_SPACIAL_MATRICIES | names of the feature planes of mats, see from_game
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if in_turn is None:
+            in_turn = getattr( self, "n_turn", -1 ) +1
+        d_records = parse_updates( ils_updates )
+
+        self.__work_buffers()
+        self._c_map = self._c_own = self._c_enemy = None
+        self.__bind_map( in_player, in_width, in_height, in_turn )
+        self.invalid = False
+        self.invalid |= self._generate_status_vector_records( d_records, in_width )
+        self._d_records = d_records
+        self.invalid |= self.__fill_planes( d_records, ils_planes )
+        self.invalid |= self._generate_dictionary_unit_records( d_records[INPUT_CONSTANTS.UNITS] )
+        self.invalid |= self.__apply_dtype_policy()
+
+        return False
+
+    def feature_planes( self, ils_planes : list ) -> np.ndarray:
+        """feature planes of the turn of the Perception, on top of mats. Planes already computed this turn are reused
+        Args:
+            ils_planes (list(str)): names of registered feature planes. e.g. ["UNIT_COUNT", "RAW_FUEL"]
+        Returns:
+            np.ndarray: (len(ils_planes), WIDTH_MAX, HEIGHT_MAX) float64 | None if the Perception has no record arrays or a plane is not registered
+        """
+        if getattr( self, "_c_features", None ) is None:
+            if getattr( self, "_d_records", None ) is None:
+                logging.error(f"Perception was not built from record arrays, feature planes are not available")
+                return None
+            self._c_features = FeatureContext( self._d_records, self._n_own_team, self._an_tile_index )
+        return self._c_features.planes( ils_planes )
+
+#feature planes of mats, see big_no_brainer.feature_planes
+_LS_MATRIX_PLANES = [ e_matrix.name for e_matrix in Perception.E_INPUT_SPACIAL_MATRICIES ]
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   BATCH
+#--------------------------------------------------------------------------------------------------------------------------------
+#   The Perception of every turn of a game written at once into contiguous arrays, without a Game() or a Perception() per turn
+#   Turns are processed in chunks: the record arrays of the snapshots of a chunk are concatenated with the turn of each record, and
+#   scattered in one float64 work buffer that is then cast into the output arrays
+
+class PerceptionBatch(NamedTuple):
+    """Perception of every turn of a game in contiguous arrays. Returned by perceptions_from_snapshots
+    Turn t holds the values of Perception.mats and Perception.status built by from_game on the Game of snapshot t
+    """
+    mats: np.ndarray
+    """(T, 8, WIDTH_MAX, HEIGHT_MAX) Perception.E_INPUT_SPACIAL_MATRICIES, features dtype of the policy"""
+    status: np.ndarray
+    """(T, 9) Perception.E_INPUT_STATUS_VECTOR, status dtype of the policy"""
+    units: np.ndarray
+    """unit records of lux.game_updates of every turn, one turn after the other. Map coordinates, ids without the u_ prefix.
+    Replaces Perception.d_unit and Perception.d_position_unit"""
+    unit_offsets: np.ndarray
+    """(T+1) the units of turn t are units[unit_offsets[t]:unit_offsets[t+1]]"""
+    dtype_policy: DtypePolicy
+    invalid: bool
+    """True if a turn would have given an invalid Perception, or values overflowed the policy"""
+
+def _concatenate_records( ilc_snapshots : list, is_identifier : str ) -> tuple:
+    """records of one identifier of several snapshots, one after the other
+    Returns:
+        tuple(np.ndarray, np.ndarray): records, index of the snapshot of each record
+    """
+    lan_records = [ c_snapshot.records[is_identifier] for c_snapshot in ilc_snapshots ]
+    an_turn = np.repeat( np.arange( len(lan_records) ), [ len(an_records) for an_records in lan_records ] )
+    return np.concatenate( lan_records ), an_turn
+
+def _scatter_batch_chunk( ilc_snapshots : list, in_own_team : int, ian_table : np.ndarray, ian_work : np.ndarray, ian_status : np.ndarray ) -> bool:
+    """scatter the records of a chunk of snapshots in the float64 work buffers, same values as Perception.from_game
+    Args:
+        ilc_snapshots (list(GameSnapshot)): snapshots of the chunk
+        in_own_team (int): team of the player the Perception is built for
+        ian_table (np.ndarray): tile index table of the map. see _get_tile_index_table
+        ian_work (np.ndarray): contiguous (chunk, 8, WIDTH_MAX *HEIGHT_MAX) float64
+        ian_status (np.ndarray): zeroed (chunk, 9) float64
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    #records of every turn of the chunk, each on the planes of its turn
+    d_records = dict()
+    d_record_turns = dict()
+    for s_identifier in ( INPUT_CONSTANTS.UNITS, INPUT_CONSTANTS.CITY, INPUT_CONSTANTS.CITY_TILES, INPUT_CONSTANTS.RESOURCES, INPUT_CONSTANTS.ROADS ):
+        d_records[s_identifier], d_record_turns[s_identifier] = _concatenate_records( ilc_snapshots, s_identifier )
+    c_features = FeatureContext( d_records, in_own_team, ian_table, d_record_turns, len(ilc_snapshots) )
+    if c_features.planes( _LS_MATRIX_PLANES, ian_work ) is None:
+        return True
+    x_fail = c_features.invalid
+
+    #status vector
+    ian_status[:, Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value] = ilc_snapshots[0].map_width
+    an_turns = np.array( [ c_snapshot.turn for c_snapshot in ilc_snapshots ] )
+    ian_status[:, Perception.E_INPUT_STATUS_VECTOR.MAP_TURN.value] = an_turns
+    ian_status[:, Perception.E_INPUT_STATUS_VECTOR.MAP_IS_NIGHT.value] = _is_night( an_turns )
+    an_research, an_turn = _concatenate_records( ilc_snapshots, INPUT_CONSTANTS.RESEARCH_POINTS )
+    x_fail |= _fill_research_status( ian_status, an_research, an_turn, in_own_team )
+
+    return x_fail
+
+def perceptions_from_snapshots( ilc_snapshots : list, in_player : int = None, ic_dtype_policy : DtypePolicy = DTYPE_POLICY_FULL, ian_mats : np.ndarray = None, ian_status : np.ndarray = None, in_chunk_turns : int = GAME_CONSTANTS["PERCEPTION"]["BATCH_CHUNK_TURNS"] ) -> PerceptionBatch:
+    """Build the Perception of every turn of a game into contiguous arrays
+    e.g. the snapshots of Replay._observations_to_snapshots. The arrays can be handed to training or written to disk as they are
+    Args:
+        ilc_snapshots (list(GameSnapshot)): one snapshot per turn, all on the same map
+        in_player (int): team the Perception is built for | None: the id of the snapshots
+        ic_dtype_policy (DtypePolicy): dtypes of mats and status
+        ian_mats (np.ndarray): preallocated (T, 8, WIDTH_MAX, HEIGHT_MAX) array with the features dtype of the policy, e.g. a slice of
+            a corpus wide array | None: allocated
+        ian_status (np.ndarray): preallocated (T, 9) array with the status dtype of the policy | None: allocated
+        in_chunk_turns (int): turns scattered together. bounds the float64 work buffer
+    Returns:
+        PerceptionBatch: Perception of every turn | None on failure
+    """
+    n_turns = len(ilc_snapshots)
+    if n_turns == 0:
+        logging.error(f"No snapshot to build a batch of Perception from")
+        return None
+    c_first = ilc_snapshots[0]
+    if any( c_snapshot.map_width != c_first.map_width or c_snapshot.map_height != c_first.map_height for c_snapshot in ilc_snapshots ):
+        logging.critical(f"Snapshots of a batch must share the map size: {c_first.map_width}x{c_first.map_height}")
+        return None
+    n_own_team = c_first.id if in_player is None else in_player
+
+    n_channels = len(Perception.E_INPUT_SPACIAL_MATRICIES)
+    n_status = len(Perception.E_INPUT_STATUS_VECTOR)
+    t_mats_shape = (n_turns, n_channels, GAME_CONSTANTS['MAP']['WIDTH_MAX'], GAME_CONSTANTS['MAP']['HEIGHT_MAX'])
+    if ian_mats is None:
+        ian_mats = np.empty( t_mats_shape, dtype=ic_dtype_policy.features )
+    elif ian_mats.shape != t_mats_shape or ian_mats.dtype != ic_dtype_policy.features:
+        logging.critical(f"Preallocated mats do not match | shape: {ian_mats.shape} expected {t_mats_shape} | dtype: {ian_mats.dtype} expected {ic_dtype_policy.features}")
+        return None
+    if ian_status is None:
+        ian_status = np.empty( (n_turns, n_status), dtype=ic_dtype_policy.status )
+    elif ian_status.shape != (n_turns, n_status) or ian_status.dtype != ic_dtype_policy.status:
+        logging.critical(f"Preallocated status does not match | shape: {ian_status.shape} expected {(n_turns, n_status)} | dtype: {ian_status.dtype} expected {ic_dtype_policy.status}")
+        return None
+
+    an_table = _get_tile_index_table( c_first.map_width, c_first.map_height )
+    ls_channels = [ e_matrix.name for e_matrix in Perception.E_INPUT_SPACIAL_MATRICIES ]
+    ls_status = [ e_status.name for e_status in Perception.E_INPUT_STATUS_VECTOR ]
+    #float64 work buffers reused by every chunk
+    an_work = np.zeros( (min( in_chunk_turns, n_turns ), n_channels, GAME_CONSTANTS['MAP']['WIDTH_MAX'] *GAME_CONSTANTS['MAP']['HEIGHT_MAX']) )
+    an_work_status = np.zeros( (len(an_work), n_status) )
+    x_invalid = False
+    for n_start in range( 0, n_turns, len(an_work) ):
+        lc_chunk = ilc_snapshots[n_start:n_start +len(an_work)]
+        n_chunk = len(lc_chunk)
+        an_work[:n_chunk].fill( 0 )
+        an_work_status[:n_chunk].fill( 0 )
+        x_invalid |= _scatter_batch_chunk( lc_chunk, n_own_team, an_table, an_work[:n_chunk], an_work_status[:n_chunk] )
+        x_invalid |= convert_into( an_work[:n_chunk].reshape( (n_chunk,) +t_mats_shape[1:] ), ian_mats[n_start:n_start +n_chunk], "PerceptionBatch.mats", ls_channels, 1 )
+        x_invalid |= convert_into( an_work_status[:n_chunk], ian_status[n_start:n_start +n_chunk], "PerceptionBatch.status", ls_status, 1 )
+
+    #unit table, replaces the dictionaries of units of each Perception
+    an_units, an_turn = _concatenate_records( ilc_snapshots, INPUT_CONSTANTS.UNITS )
+    an_offsets = np.zeros( n_turns +1, dtype=np.int64 )
+    np.cumsum( np.bincount( an_turn, minlength=n_turns ), out=an_offsets[1:] )
+
+    return PerceptionBatch( ian_mats, ian_status, an_units, an_offsets, ic_dtype_policy, x_invalid )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Save/Load Pickle
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def save_perceptions( ilc_perceptions : list, is_file_name : str ) -> bool:
+    """save a game state to file
+    Args:
+        ilc_perceptions (list(Game)): perceptions to be saved
+        is_file_name (str): destination file name 
+    Returns:
+        bool: false: success | true: fail
+    """
+    
+    try:
+        with open(is_file_name, "wb") as opened_file:
+            pickle.dump( ilc_perceptions, opened_file )
+
+    except OSError as problem:
+        logging.critical(f"Pickle: {problem}")
+        return True
+
+    return False
+
+##  load a game state to file
+#   uses pickle
+def load_perceptions( is_file_name : str ):
+    """load a game state to file
+    Args:
+        is_file_name (str): source file name 
+    Returns:
+        Game: loaded game state
+    """
+    
+    try:
+        with open(is_file_name, "rb") as opened_file:
+            logging.debug(f"opened: {opened_file}")
+            lc_perceptions = pickle.load( opened_file )
+
+    except OSError as problem:
+        logging.critical(f"Pickle: {problem}")
+        return None
+
+    return lc_perceptions
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Save/Load Sparse
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def save_perceptions_sparse( ilc_perceptions : list, is_file_name : str ) -> bool:
+    """save the mats and status of perceptions to file, mats in sparse form. see big_no_brainer.sparse_storage
+    The dictionaries of units are not saved
+    Args:
+        ilc_perceptions (list(Perception)): perceptions of a game, sharing a dtype policy
+        is_file_name (str): destination file name. .npz is added if missing
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    if len(ilc_perceptions) == 0:
+        logging.error(f"No perceptions to save")
+        return True
+    c_mats = sparse_encode( np.stack( [ c_perception.mats for c_perception in ilc_perceptions ] ) )
+    if c_mats is None:
+        return True
+    an_status = np.stack( [ c_perception.status for c_perception in ilc_perceptions ] )
+    an_turn = np.array( [ c_perception.n_turn for c_perception in ilc_perceptions ], dtype=np.int64 )
+    return save_sparse( is_file_name, { "mats" : c_mats, "status" : an_status, "turn" : an_turn } )
+
+def load_perceptions_sparse( is_file_name : str, ian_mats : np.ndarray = None, ian_status : np.ndarray = None ) -> tuple:
+    """load perceptions saved by save_perceptions_sparse into dense arrays
+    Args:
+        is_file_name (str): source file name
+        ian_mats (np.ndarray): preallocated (T, 8, WIDTH_MAX, HEIGHT_MAX) in the dtype of the saved mats | None: allocated
+        ian_status (np.ndarray): preallocated (T, 9) in the dtype of the saved status | None: the loaded array is returned
+    Returns:
+        tuple(np.ndarray, np.ndarray, np.ndarray): mats, status, turn of each perception | None on failure
+    """
+    d_arrays = load_sparse( is_file_name )
+    if d_arrays is None:
+        return None
+    an_mats = sparse_densify( d_arrays["mats"], ian_mats )
+    if an_mats is None:
+        return None
+    an_status = d_arrays["status"]
+    if ian_status is not None:
+        if ian_status.shape != an_status.shape or ian_status.dtype != an_status.dtype:
+            logging.error(f"Destination does not match | Expected: {an_status.shape} {an_status.dtype} | Destination: {ian_status.shape} {ian_status.dtype}")
+            return None
+        np.copyto( ian_status, an_status )
+        an_status = ian_status
+    return an_mats, an_status, d_arrays["turn"]
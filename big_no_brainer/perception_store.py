@@ -0,0 +1,314 @@
+##  @package perception_store
+#   Chunked on-disk store of the Perception and Action arrays of many games
+#   Replaces the pickled lists of save_perceptions/load_perceptions, which have to be loaded whole to touch any frame
+#   Each array is a raw binary file of turns, one game after the other. Each game is a contiguous block of turns, located by an
+#   index file. Opening memory-maps the files: a (game, turn) access is O(1) and only reads the pages it touches, reopening a
+#   corpus of any size reads just the index
+#
+#   Folder
+#   store.json      dtype policy of the arrays, Perception.FEATURES_VERSION of the mats and status
+#   index.npy       one record per game: name, player, map size, first turn, number of turns
+#   mats.bin        (N, 8, WIDTH_MAX, HEIGHT_MAX) Perception.mats, features dtype of the policy
+#   status.bin      (N, 9) Perception.status, status dtype of the policy
+#   actions.bin     (N, 10, WIDTH_MAX, HEIGHT_MAX) Action.mats of the player, labels dtype of the policy. zero if not given
+#
+#   Data is appended before the index is rewritten. Turns past the end of the index, left by an interrupted append, are dropped by
+#   the next append
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import json
+import logging
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from lux.constants import GAME_CONSTANTS
+
+from big_no_brainer.perception import Perception
+from big_no_brainer.action import Action
+from big_no_brainer.dtype_policy import DtypePolicy, DTYPE_POLICIES, DTYPE_POLICY_FULL, convert_array
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   LAYOUT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+STORE_META_FILE = "store.json"
+STORE_INDEX_FILE = "index.npy"
+
+#index record of a game
+STORE_INDEX_DTYPE = np.dtype([
+    ("game", "U64"),
+    ("player", np.int8),
+    ("map_size", np.int16),
+    ("offset", np.int64),
+    ("turns", np.int64),
+])
+
+#shape of one turn of each array
+_DT_TURN_SHAPES = {
+    "mats" : ( len(Perception.E_INPUT_SPACIAL_MATRICIES), GAME_CONSTANTS["MAP"]["WIDTH_MAX"], GAME_CONSTANTS["MAP"]["HEIGHT_MAX"] ),
+    "status" : ( len(Perception.E_INPUT_STATUS_VECTOR), ),
+    "actions" : ( len(Action.E_OUTPUT_SPACIAL_MATRICIES), GAME_CONSTANTS["MAP"]["WIDTH_MAX"], GAME_CONSTANTS["MAP"]["HEIGHT_MAX"] ),
+}
+
+class StoredGame(NamedTuple):
+    """arrays of one game of a PerceptionStore. Memory-mapped views, read only"""
+    game: str
+    player: int
+    map_size: int
+    mats: np.ndarray
+    """(T, 8, WIDTH_MAX, HEIGHT_MAX) Perception.E_INPUT_SPACIAL_MATRICIES"""
+    status: np.ndarray
+    """(T, 9) Perception.E_INPUT_STATUS_VECTOR"""
+    actions: np.ndarray
+    """(T, 10, WIDTH_MAX, HEIGHT_MAX) Action.E_OUTPUT_SPACIAL_MATRICIES"""
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   STORE
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class PerceptionStore():
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self, is_folder : str, ic_dtype_policy : DtypePolicy = None ):
+        """Constructor. Open the store in a folder, create it if missing
+        Args:
+            is_folder (str): folder of the store
+            ic_dtype_policy (DtypePolicy): dtypes of a new store | None: the policy of the store, full for a new one
+                An existing store keeps its policy, a different one is refused
+                A store built with other Perception features is refused, it has to be rebuilt
+        """
+        if self.__init_vars( is_folder, ic_dtype_policy ):
+            logging.critical( f"Failed to open the perception store: {is_folder}" )
+
+        return
+
+    #----------------    Overloads    ----------------
+
+    def __len__( self ) -> int:
+        return len(self.an_index)
+
+    def __str__( self ) -> str:
+        return f"PerceptionStore | {self.s_folder} | Policy: {self.c_dtype_policy.name} | Games: {len(self.an_index)} | Turns: {self.n_turns}"
+
+    #----------------    Private Members    ----------------
+
+    def __init_vars( self, is_folder : str, ic_dtype_policy : DtypePolicy ) -> bool:
+        """Initialize class vars, read the store or create it
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.s_folder = is_folder
+        #records of the games, in the order of the files
+        self.an_index = np.zeros( 0, dtype=STORE_INDEX_DTYPE )
+        #turns in the files covered by the index
+        self.n_turns = 0
+        #game name -> position in the index
+        self._d_games = dict()
+        #array name -> memory-mapped (N, ...) file. None while the store is empty
+        self._d_maps = dict()
+        self.c_dtype_policy = DTYPE_POLICY_FULL if ic_dtype_policy is None else ic_dtype_policy
+
+        s_meta = os.path.join( is_folder, STORE_META_FILE )
+        try:
+            if not os.path.isfile( s_meta ):
+                os.makedirs( is_folder, exist_ok=True )
+                with open( s_meta, "w" ) as opened_file:
+                    json.dump( { "policy" : self.c_dtype_policy.name, "features" : Perception.FEATURES_VERSION }, opened_file )
+                return False
+            with open( s_meta, "r" ) as opened_file:
+                d_meta = json.load( opened_file )
+            s_policy = d_meta["policy"]
+            #stores written before the version was recorded hold the first features
+            n_features = d_meta.get( "features", 1 )
+        except (OSError, ValueError, KeyError) as problem:
+            logging.critical(f"Store: {problem}")
+            return True
+
+        if n_features != Perception.FEATURES_VERSION:
+            logging.critical(f"Store holds Perception features version {n_features}, not {Perception.FEATURES_VERSION}. Rebuild it from the replays")
+            return True
+        if s_policy not in DTYPE_POLICIES:
+            logging.critical(f"Unknown dtype policy of the store: {s_policy}")
+            return True
+        if ic_dtype_policy is not None and ic_dtype_policy != DTYPE_POLICIES[s_policy]:
+            logging.critical(f"Store has dtype policy {s_policy}, not {ic_dtype_policy.name}")
+            return True
+        self.c_dtype_policy = DTYPE_POLICIES[s_policy]
+
+        return self.__open()
+
+    def __dtype( self, is_array : str ) -> np.dtype:
+        """Returns: np.dtype: dtype of an array of the store"""
+        if is_array == "mats":
+            return self.c_dtype_policy.features
+        if is_array == "status":
+            return self.c_dtype_policy.status
+        return self.c_dtype_policy.labels
+
+    def __position( self, in_game ) -> int:
+        """Returns: int: position in the index of a game given by position or name | None if missing"""
+        n_game = self._d_games.get( in_game ) if isinstance( in_game, str ) else in_game
+        if n_game is None or n_game < 0 or n_game >= len(self.an_index):
+            logging.error(f"Game is not in the store: {in_game}")
+            return None
+        return n_game
+
+    def __file( self, is_array : str ) -> str:
+        return os.path.join( self.s_folder, f"{is_array}.bin" )
+
+    def __open( self ) -> bool:
+        """read the index and memory-map the turns it covers
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        s_index = os.path.join( self.s_folder, STORE_INDEX_FILE )
+        if os.path.isfile( s_index ):
+            try:
+                self.an_index = np.load( s_index, allow_pickle=False )
+            except (OSError, ValueError) as problem:
+                logging.critical(f"Store: {problem}")
+                return True
+        self.n_turns = int( self.an_index["turns"].sum() )
+        self._d_games = { s_game : n_game for n_game, s_game in enumerate( self.an_index["game"].tolist() ) }
+
+        self._d_maps = dict()
+        if self.n_turns == 0:
+            return False
+        for s_array, t_shape in _DT_TURN_SHAPES.items():
+            try:
+                self._d_maps[s_array] = np.memmap( self.__file( s_array ), dtype=self.__dtype( s_array ), mode="r", shape=(self.n_turns,) +t_shape )
+            except (OSError, ValueError) as problem:
+                logging.critical(f"Store: {s_array} | {problem}")
+                self._d_maps = dict()
+                return True
+
+        return False
+
+    #----------------    Public Members    ----------------
+
+    def append_game( self, is_game : str, ian_mats : np.ndarray, ian_status : np.ndarray, ian_actions : np.ndarray = None, in_player : int = 0 ) -> bool:
+        """Append the turns of a game at the end of the store
+        Args:
+            is_game (str): unique name of the game. e.g. the replay file name
+            ian_mats (np.ndarray): (T, 8, WIDTH_MAX, HEIGHT_MAX) e.g. PerceptionBatch.mats
+            ian_status (np.ndarray): (T, 9)
+            ian_actions (np.ndarray): (T, 10, WIDTH_MAX, HEIGHT_MAX) Action.mats of in_player | None: zero
+            in_player (int): player the Perception and Action are built for
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if is_game in self._d_games:
+            logging.error(f"Game is already in the store: {is_game}")
+            return True
+        if len(is_game) > STORE_INDEX_DTYPE["game"].itemsize //4:
+            logging.error(f"Game name is too long for the index: {is_game}")
+            return True
+        n_turns = len(ian_mats)
+        if n_turns == 0:
+            logging.error(f"Game has no turns: {is_game}")
+            return True
+        if ian_actions is None:
+            ian_actions = np.zeros( (n_turns,) +_DT_TURN_SHAPES["actions"], dtype=self.c_dtype_policy.labels )
+        d_arrays = { "mats" : ian_mats, "status" : ian_status, "actions" : ian_actions }
+        for s_array, an_array in d_arrays.items():
+            if an_array.shape != (n_turns,) +_DT_TURN_SHAPES[s_array]:
+                logging.error(f"Wrong shape of {s_array}: {an_array.shape} | Expected: {(n_turns,) +_DT_TURN_SHAPES[s_array]}")
+                return True
+
+        #arrays of another policy are converted, overflows are reported and saturated
+        x_overflow = False
+        for s_array in d_arrays:
+            d_arrays[s_array], x_fail = convert_array( d_arrays[s_array], self.__dtype( s_array ), f"PerceptionStore.{s_array}" )
+            x_overflow |= x_fail
+
+        #release the maps before the files grow
+        self._d_maps = dict()
+        try:
+            for s_array, an_array in d_arrays.items():
+                n_turn_bytes = int( np.prod( _DT_TURN_SHAPES[s_array] ) ) *self.__dtype( s_array ).itemsize
+                with open( self.__file( s_array ), "ab" ) as opened_file:
+                    #drop the turns of an interrupted append
+                    opened_file.truncate( self.n_turns *n_turn_bytes )
+                    opened_file.write( np.ascontiguousarray( an_array ).tobytes() )
+            c_record = np.array( [( is_game, in_player, int( ian_status[0][Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value] ), self.n_turns, n_turns )], dtype=STORE_INDEX_DTYPE )
+            an_index = np.concatenate( [ self.an_index, c_record ] )
+            s_index = os.path.join( self.s_folder, STORE_INDEX_FILE )
+            with open( f"{s_index}.tmp", "wb" ) as opened_file:
+                np.save( opened_file, an_index, allow_pickle=False )
+            os.replace( f"{s_index}.tmp", s_index )
+        except OSError as problem:
+            logging.critical(f"Store: {problem}")
+            self.__open()
+            return True
+
+        return self.__open() or x_overflow
+
+    def append_perceptions( self, is_game : str, ilc_perceptions : list, ilc_actions : list = None, in_player : int = 0 ) -> bool:
+        """Append a game from the lists of Replay.json_to_perception_action
+        Args:
+            is_game (str): unique name of the game
+            ilc_perceptions (list(Perception)): one per turn
+            ilc_actions (list(Action)): one per turn, of in_player | None: zero
+            in_player (int): player the Perception and Action are built for
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if len(ilc_perceptions) == 0:
+            logging.error(f"No perceptions to append: {is_game}")
+            return True
+        an_mats = np.stack( [ c_perception.mats for c_perception in ilc_perceptions ] )
+        an_status = np.stack( [ c_perception.status for c_perception in ilc_perceptions ] )
+        an_actions = None if ilc_actions is None else np.stack( [ c_action.mats for c_action in ilc_actions ] )
+        return self.append_game( is_game, an_mats, an_status, an_actions, in_player )
+
+    def game_index( self, is_game : str ) -> int:
+        """Returns: int: position of a game in the store | None if missing"""
+        return self._d_games.get( is_game )
+
+    def game( self, in_game ) -> StoredGame:
+        """arrays of a game
+        Args:
+            in_game (int | str): position of the game in the store, or its name
+        Returns:
+            StoredGame: memory-mapped views | None if missing
+        """
+        n_game = self.__position( in_game )
+        if n_game is None:
+            return None
+        c_record = self.an_index[n_game]
+        n_start = int( c_record["offset"] )
+        n_stop = n_start +int( c_record["turns"] )
+        return StoredGame( str( c_record["game"] ), int( c_record["player"] ), int( c_record["map_size"] ), self._d_maps["mats"][n_start:n_stop], self._d_maps["status"][n_start:n_stop], self._d_maps["actions"][n_start:n_stop] )
+
+    def turn( self, in_game, in_turn : int ) -> tuple:
+        """arrays of a turn of a game. O(1), reads only the pages of the turn
+        Args:
+            in_game (int | str): position of the game in the store, or its name
+            in_turn (int): turn of the game
+        Returns:
+            tuple(np.ndarray, np.ndarray, np.ndarray): mats, status, actions. Memory-mapped views | None if missing
+        """
+        n_game = self.__position( in_game )
+        if n_game is None:
+            return None
+        c_record = self.an_index[n_game]
+        if in_turn < 0 or in_turn >= c_record["turns"]:
+            logging.error(f"Turn {in_turn} is not in game {c_record['game']} | Turns: {c_record['turns']}")
+            return None
+        n_turn = int( c_record["offset"] ) +in_turn
+        return self._d_maps["mats"][n_turn], self._d_maps["status"][n_turn], self._d_maps["actions"][n_turn]
+
+    def arrays( self ) -> tuple:
+        """arrays of every turn of every game, for sampling across games. the game of a turn is located by an_index["offset"]
+        Returns:
+            tuple(np.ndarray, np.ndarray, np.ndarray): mats, status, actions. Memory-mapped | None if the store is empty
+        """
+        if self.n_turns == 0:
+            return None
+        return self._d_maps["mats"], self._d_maps["status"], self._d_maps["actions"]
@@ -1,459 +1,712 @@
-##  @package replay
-#   Provide functions to convert from a json to Perception and Action
-#   additionaly provides generation of a .gif to animate the content of Perception and action matricies
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   IMPORT
-#--------------------------------------------------------------------------------------------------------------------------------
-
-import logging
-
-import json
-import copy
-import os
-
-import numpy as np
-
-from lux.game import Game
-from lux.constants import GAME_CONSTANTS
-from lux.constants import Constants
-INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
-
-from big_no_brainer.perception import Perception
-from big_no_brainer.action import Action
-
-#plot
-import matplotlib.pyplot as plt
-import seaborn as sns
-#convert input matricies into .gif
-import matplotlib.animation as animation
-
-#--------------------------------------------------------------------------------------------------------------------------------
-#   REPLAY
-#--------------------------------------------------------------------------------------------------------------------------------
-
-class Replay():
-
-    #----------------    Constructor    ----------------
-
-    def __init__( self ):
-        """Construct replay class
-        """
-
-        #initialize class vars
-        #self.__init_vars()
-
-        return
-
-    #----------------    Private    ----------------
-
-    def __init_vars( self ) -> bool:
-        """Initialize class vars
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-
-        self._replay_json = None
-        self.lc_perception = None
-        self.ld_units = None
-        self.lc_actions_player0 = None
-        self.lc_actions_player1 = None
-
-        return False
-
-    #----------------    Protected    ----------------
-
-    def _json_observation( self, ic_json : json ):
-        """From an opened replay.json extract a list of observations
-        observation is a dictionary with the following fields e.g.
-        'globalCityIDCount': 103, 'globalUnitIDCount': 145, 'height': 24, 'player': 0, 'remainingOverageTime': 60, 'reward': 40004, 'step': 275, 'updates':[''],  'width': 24
-        Args:
-            ic_json (json): replay json loaded from file and processed by json module
-        Returns:
-            list(str): list of observation strings. one for each step (turn in the game)
-        """
-        #Fetch the ID of the episode
-        n_episode_id = ic_json["info"]["EpisodeId"]
-        #???
-        index = np.argmax([r or 0 for r in ic_json["rewards"]])
-        logging.debug(f"ID: {n_episode_id} | Index: {index} | Teams: {ic_json['info']['TeamNames']}")
-
-        #initialize list of observations
-        lc_observations = list()
-
-        #Scan every Step of the match (Turn)
-        for n_step in range(len(ic_json["steps"])-1):
-            #logging.debug(f"Step: {n_step} of {len(ic_json['steps'])-1}")
-            #???
-            if ic_json["steps"][n_step][index]["status"] == 'ACTIVE':
-                #Fetch the observations of this turn
-                c_observation = ic_json['steps'][n_step][0]['observation']
-                #logging.debug(f"Step: {n_step} | Observations: {c_observation}")
-
-                #append this step observations in the list of observations
-                lc_observations.append( c_observation )
-
-        logging.debug(f"Observations : {len(lc_observations)}")
-        #return a list of oservations, one per Step (turn)
-        return lc_observations
-
-    def _observations_to_gamestates( self, ilc_observations : list ):
-        """From game observations generate Game 
-        Args:
-            ilc_observations (list(observations)): [description]
-        Returns:
-            list(Game): List of gamestates. One per turn
-        """
-        global c_game_state
-        lc_gamestates = list()
-        #from a list of observations generates a list of Game()
-        for c_observation in ilc_observations:
-
-            if c_observation[INPUT_CONSTANTS.STEP] == 0:
-                c_game_state = Game()
-                c_game_state._initialize(c_observation[INPUT_CONSTANTS.UPDATES])
-                c_game_state._update(c_observation[INPUT_CONSTANTS.UPDATES][2:])
-                c_game_state._set_player_id( c_observation["player"] )
-
-            else:
-                c_game_state._update(c_observation[INPUT_CONSTANTS.UPDATES])
-
-            #logging.debug(f"Step: {c_observation[INPUT_CONSTANTS.STEP]} | Gamestate: {c_game_state} ")
-            lc_gamestates.append( copy.deepcopy( c_game_state ) )
-
-        logging.debug(f"Gamestates : {len(lc_gamestates)}")
-        return lc_gamestates
-    
-    def _generate_list_action( self, ic_json : json, in_player : int ) ->list:
-        """From a JSON create a list of string actions
-        Args:
-            ic_json (json): opened replay.json
-            in_player (int): index of the player for which actions are to be computed. two players in a game
-        Returns:
-            list: list of string action. e.g.
-                [["r 14 8", "m u_1 w"]
-                [""]
-                ["m u_1 w"]]
-        """
-        #allocate player actions
-        lls_player_action = list()
-        logging.debug(f"JSON Steps: {len(ic_json['steps'])}")
-        #Scan every Step of the match (Turn)
-        n_last_step = len(ic_json["steps"])
-        #for n_step in range(1, n_last_step):
-        #scan each step (turn)
-        for c_step in ic_json['steps']:
-            #logging.debug(f"Step: {n_step} of {len(ic_json['steps'])}")
-            #logging.debug(f"Step: {c_step}")
-            #fetch step (turn) only present in player 0 observations
-            n_step = c_step[0]["observation"]["step"]
-            #for all players
-            for c_player in c_step:
-                #logging.debug(f"Player: {c_player}")
-                #fetch index of player
-                n_id = c_player["observation"]["player"]
-                #if player the indexed one, is active or the game is about to be done
-                if n_id == in_player and (c_player["status"] == "ACTIVE" or c_player["status"] == "DONE"):
-                    #fetch the list of actions the player took in the previous turn
-                    #From JSON, From Steps (list of turns), from a given step (turn index), from player 0, is player is active (not dead)
-                    ls_actions = c_player['action']
-                    #logging.debug(f"Step: {n_step} | Action: {ls_actions}")
-                    #append to list of list of string actions
-                    lls_player_action.append( ls_actions )
-
-        if len(lls_player_action) != GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"]+1:
-            logging.error(f"Unexpected length | List of string actions: {len(lls_player_action)}")
-            return True
-
-        #drop first string action. Perception(Step 0) <=> Action(Step = 1)
-        lls_player_action.pop( 0 )
-
-        logging.debug(f"Player {in_player} | Action strings decoded: {len(lls_player_action)}")
-        return lls_player_action
-
-    #----------------    Public    ----------------
-
-    def json_load( self, is_folder : str, is_filename : str ) -> json:
-        """Load a replay.json
-        Args:
-            is_folder (str): Source folder
-            is_filename (str): Source name .json
-        Returns:
-            bool: False=OK | True=FAIL
-        """
-        s_filepath = os.path.join( os.getcwd(), is_folder, is_filename )
-        try:
-            with open(s_filepath) as c_file:
-                self._replay_json = json.load( c_file )
-        except:
-            logging.error(f"Could not open JSON: {s_filepath}")
-            return True
-
-        #logging.debug(f"JSON: {c_opened_json}")
-        return False
-
-    def json_to_perceptions( self ):
-        """From a loaded replay.json extract a list of observations
-        Args:
-            ic_json ([type]): [description]
-        Returns:
-            [type]: [description]
-        """
-
-        if self._replay_json is None:
-            return None, None
-
-        #from json loads a list of observations
-        lc_observations = self._json_observation( self._replay_json )
-        #from list of observations generate list of Game()
-        lc_gamestates = self._observations_to_gamestates( lc_observations )
-        #Allocate
-        lc_perceptions = list()
-        ld_units = list()
-        #from a list of Game() generates a list of Perception()
-        for c_gamestate in lc_gamestates:
-            c_perception = Perception()
-            c_perception.from_game( c_gamestate )
-            logging.debug(f"Game: {c_gamestate}")
-            logging.debug(f"Step: {c_perception.status[Perception.E_INPUT_STATUS_VECTOR.MAP_TURN.value]}  | Perceptions : {c_perception}")
-            #add the percepton to the list of perceptions
-            lc_perceptions.append( c_perception )
-            #add the dictionary of units to a list of dictionaries. (redundant)
-            ld_units.append( c_perception.d_unit )
-
-        logging.debug(f"Perceptions : {len(lc_perceptions)}")
-        logging.debug(f"Dictionary of units : {len(ld_units)}")
-        
-        self.lc_perception = lc_perceptions
-        self.ld_units = ld_units
-
-        return lc_perceptions, ld_units
-
-    def json_to_perception_action( self ):
-        """ Parse a replay.json into a list of observations and two list of actions
-        The lists contain one row per step (turn) of the game
-
-        """
-
-        if self._replay_json is None:
-            return None, None
-
-        #from a json extract a list of perceptions, one per turn
-        lc_perceptions, ld_units = self.json_to_perceptions()
-
-        llc_actions = [None, None]
-        #Scan player indexes
-        for n_player_index in range(2):
-            ls_actions = self._generate_list_action( self._replay_json, n_player_index )
-            #initialize list of Action for Player 0
-            lc_action = list()
-            #scan dictionary of units and list of string actions for each step (turn) of the game
-            for d_units, s_actions in zip( ld_units, ls_actions ):
-                #for this step (turn), decode the Action that the Player took
-                c_action = Action( lc_perceptions[0].status[ Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value ] )
-                c_action.fill_mats( d_units, s_actions )
-                #add this step (turn) Action to the list of Action this player took over the whole game
-                lc_action.append( c_action )
-                #logging.debug(f"Player {n_player_index} | Action: {c_action}")
-            #Sace actions for this player
-            llc_actions[n_player_index] = lc_action
-
-            #allocate sum vector
-            an_sum = np.zeros( len( Action.E_OUTPUT_SPACIAL_MATRICIES ) )
-            #for each action
-            for c_action in lc_action:
-                #scan all output spacial mats
-                for e_mat_index in Action.E_OUTPUT_SPACIAL_MATRICIES:
-                    an_sum[e_mat_index.value] += c_action.mats[e_mat_index.value].sum()
-
-            #scan all actions
-            for e_mat_index in Action.E_OUTPUT_SPACIAL_MATRICIES:
-                #compute the total of such actions taken in the game
-                logging.info(f"Player {n_player_index} | {e_mat_index.name} - Total Actions: {an_sum[ e_mat_index.value ]}")
-
-        self.lc_actions_player0 = llc_actions[0]
-        self.lc_actions_player1 = llc_actions[1]
-
-        return lc_perceptions, llc_actions[0], llc_actions[1]
-
-    #----------------    Public Plot    ----------------
-
-    def perceptions_to_gif( self, is_filename : str, in_framerate : int, in_max_frames = -1 ):
-        """Turn a list of perceptions into a Gif
-        because of compression, there are going to be fewer frames, but the delay in them ensures the movie represent the correct output
-        Args:
-            ilc_list_perception (list): list of Perception classes
-            is_filename (str): name of the output gif. must be a .gif
-            in_framerate (int): Framerate in FPS
-            in_max_frames(int): -1=gify ALL the frames | >0 gify only up to a given number of frames
-        """
-        logging.debug(f"saving heatmaps...")
-        dimension = (32, 32)
-        fig, axes = plt.subplots( nrows=3, ncols=3, figsize=(12, 12) )
-        ((ax1, ax2, ax3), (ax4, ax5, ax6), (ax31, ax32, ax33)) = axes
-        
-        def draw_heatmap( ic_perception: Perception ):
-            #TODO only first time draw the colorbar
-
-            #plt.clf()
-            
-            #CityTile/Fuel Mat
-            data_citytile_fuel = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value ]
-            ax1.title.set_text(f"Citytile/Fuel {data_citytile_fuel.sum()}")
-            #sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax1, cbar=False, cmap="coolwarm" )
-            sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax1, cbar=False )
-
-            data_worker_resource = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.WORKER_RESOURCE.value ]
-            ax2.title.set_text(f"Worker/Resource {data_worker_resource.sum()}")
-            sns.heatmap( data_worker_resource, center=0, vmin=-100, vmax=100, ax=ax2, cbar=False )
-            
-            data_cart_resource = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.CART_RESOURCE.value ]
-            ax3.title.set_text(f"Cart/Resource {data_cart_resource.sum()}")
-            sns.heatmap( data_cart_resource, center=0, vmin=-100, vmax=100, ax=ax3, cbar=False )
-            
-            data_raw_wood = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value ]
-            data_raw_coal = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value ]
-            data_raw_uranium = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value ]
-            ax4.title.set_text(f"Raw Wood {data_raw_wood.sum()}")
-            ax5.title.set_text(f"Raw Coal {data_raw_coal.sum()}")
-            ax6.title.set_text(f"Raw Uranium {data_raw_uranium.sum()}")
-            sns.heatmap( data_raw_wood, center=0, vmin=-100, vmax=100, ax=ax4, cbar=False )
-            sns.heatmap( data_raw_coal, center=0, vmin=-100, vmax=100, ax=ax5, cbar=False )
-            sns.heatmap( data_raw_uranium, center=0, vmin=-100, vmax=100, ax=ax6, cbar=False )
-            
-            #logging.info(f"ROADS: {Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value} | shape: {ic_perception.mats.shape}")
-            data_road = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value ]
-            ax31.title.set_text(f"Roads {data_road.sum()}")
-            sns.heatmap( data_road, center=0, vmin=0, vmax=6, ax=ax31, cbar=False )
-
-            data_cooldown = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value ]
-            ax32.title.set_text(f"Cooldown {data_cooldown.sum()}")
-            n_cooldown_limit = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"]
-            sns.heatmap( data_cooldown, center=0, vmin=-n_cooldown_limit, vmax=n_cooldown_limit, ax=ax32, cbar=False )
-
-            return [ data_citytile_fuel.sum(), data_worker_resource.sum() ]
-
-        draw_heatmap( self.lc_perception[0] )
-
-        def init():
-            
-            draw_heatmap( self.lc_perception[0] )
-
-        def animate(i):
-            fig.suptitle(f"TURN: {i}", fontsize=16)
-            l_sum = draw_heatmap( self.lc_perception[i] )
-            logging.info(f"generating heatmap{i} ... {l_sum}")
-
-        if (in_max_frames < 0):
-            n_frames = len(self.lc_perception)
-        elif in_max_frames >= len(self.lc_perception):
-            n_frames = len(self.lc_perception)
-        else:
-            n_frames = in_max_frames
-
-        anim = animation.FuncAnimation(fig, animate, init_func=init, frames=n_frames, repeat=False, save_count=n_frames)
-        anim.save( is_filename, writer='pillow', fps=in_framerate )
-        logging.debug(f"saving heatmaps as: {is_filename} | total frames: {n_frames}")
-
-        return
-
-    def perceptions_actions_to_gif( self, is_filename : str, in_framerate : int, in_max_frames = -1 ):
-        """Turn a list of perceptions into a Gif
-        because of compression, there are going to be fewer frames, but the delay in them ensures the movie represent the correct output
-        Args:
-            ilc_list_perception (list): list of Perception classes
-            is_filename (str): name of the output gif. must be a .gif
-            in_framerate (int): Framerate in FPS
-            in_max_frames(int): -1=gify ALL the frames | >0 gify only up to a given number of frames
-        """
-        logging.debug(f"saving heatmaps...")
-        dimension = (32, 32)
-        fig, axes = plt.subplots( nrows=3, ncols=4, figsize=(4*4, 3*4) )
-        ((ax11, ax12, ax13, ax14), (ax21, ax22, ax23, ax24), (ax31, ax32, ax33, ax34)) = axes
-        
-        def draw_heatmap( ic_perception: Perception, ic_actions_p0 : Action, ic_actions_p1 : Action ):
-            #TODO only first time draw the colorbar
-
-            #plt.clf()
-            
-            #CityTile/Fuel Mat
-            data_citytile_fuel = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value ]
-            ax11.title.set_text(f"Citytile/Fuel {data_citytile_fuel.sum()}")
-            #sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax11, cbar=False, cmap="coolwarm" )
-            sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax11, cbar=False )
-
-            data_worker_resource = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.WORKER_RESOURCE.value ]
-            ax12.title.set_text(f"Worker/Resource {data_worker_resource.sum()}")
-            sns.heatmap( data_worker_resource, center=0, vmin=-100, vmax=100, ax=ax12, cbar=False )
-            
-            data_cart_resource = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.CART_RESOURCE.value ]
-            ax13.title.set_text(f"Cart/Resource {data_cart_resource.sum()}")
-            sns.heatmap( data_cart_resource, center=0, vmin=-100, vmax=100, ax=ax13, cbar=False )
-            
-            data_raw_wood = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value ]
-            data_raw_coal = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value ]
-            data_raw_uranium = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value ]
-            ax21.title.set_text(f"Raw Wood {data_raw_wood.sum()}")
-            ax22.title.set_text(f"Raw Coal {data_raw_coal.sum()}")
-            ax23.title.set_text(f"Raw Uranium {data_raw_uranium.sum()}")
-            sns.heatmap( data_raw_wood, center=0, vmin=-100, vmax=100, ax=ax21, cbar=False )
-            sns.heatmap( data_raw_coal, center=0, vmin=-100, vmax=100, ax=ax22, cbar=False )
-            sns.heatmap( data_raw_uranium, center=0, vmin=-100, vmax=100, ax=ax23, cbar=False )
-            
-            #logging.info(f"ROADS: {Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value} | shape: {ic_perception.mats.shape}")
-            data_road = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value ]
-            ax14.title.set_text(f"Roads {data_road.sum()}")
-            sns.heatmap( data_road, center=0, vmin=0, vmax=6, ax=ax14, cbar=False )
-
-            data_cooldown = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value ]
-            ax24.title.set_text(f"Cooldown {data_cooldown.sum()}")
-            n_cooldown_limit = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"]
-            sns.heatmap( data_cooldown, center=0, vmin=-n_cooldown_limit, vmax=n_cooldown_limit, ax=ax24, cbar=False )
-
-            
-            #PLAYER0 ACTIONS
-            c_actions = ic_actions_p0
-            data_citytile = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value]  +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value]
-            ax31.title.set_text(f"P0 Citytile Actions {data_citytile.sum()}")
-            sns.heatmap( data_citytile, vmin=0, vmax=7, ax=ax31, cbar=False )
-
-            data_unit = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value] +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value] +8*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value]
-            ax32.title.set_text(f"P0 Unit Actions {data_unit.sum()}")
-            sns.heatmap( data_unit, vmin=0, vmax=15, ax=ax32, cbar=False )
-
-            #PLAYER1 ACTIONS
-            c_actions = ic_actions_p1
-            data_citytile = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value]  +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value]
-            ax33.title.set_text(f"P1 Citytile Actions {data_citytile.sum()}")
-            sns.heatmap( data_citytile, vmin=0, vmax=7, ax=ax33, cbar=False )
-
-            data_unit = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value] +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value] +8*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value]
-            ax34.title.set_text(f"P1 Unit Actions {data_unit.sum()}")
-            sns.heatmap( data_unit, vmin=0, vmax=15, ax=ax34, cbar=False )
-
-
-            return [ data_citytile_fuel.sum(), data_worker_resource.sum() ]
-
-        draw_heatmap( self.lc_perception[0], self.lc_actions_player0[0], self.lc_actions_player1[0] )
-
-        def init():
-            
-            draw_heatmap( self.lc_perception[0], self.lc_actions_player0[0], self.lc_actions_player1[0] )
-
-        def animate(i):
-            fig.suptitle(f"TURN: {i}", fontsize=16)
-            l_sum = draw_heatmap( self.lc_perception[i], self.lc_actions_player0[i], self.lc_actions_player1[i] )
-            logging.info(f"generating heatmap{i} ... {l_sum}")
-
-        if (in_max_frames < 0):
-            n_frames = len(self.lc_perception)
-        elif in_max_frames >= len(self.lc_perception):
-            n_frames = len(self.lc_perception)
-        else:
-            n_frames = in_max_frames
-
-        anim = animation.FuncAnimation(fig, animate, init_func=init, frames=n_frames, repeat=False, save_count=n_frames)
-        anim.save( is_filename, writer='pillow', fps=in_framerate )
-        logging.debug(f"saving heatmaps as: {is_filename} | total frames: {n_frames}")
-
-        return
+##  @package replay
+#   Provide functions to convert from a json to Perception and Action
+#   additionaly provides generation of a .gif to animate the content of Perception and action matricies
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+
+import json
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from lux.game import Game
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+from big_no_brainer.perception import Perception
+from big_no_brainer.perception import PerceptionBatch, perceptions_from_snapshots
+from big_no_brainer.action import Action
+from big_no_brainer.action import ActionBatch, actions_from_strings
+from big_no_brainer.dtype_policy import DtypePolicy, DTYPE_POLICY_FULL
+
+#plot
+import matplotlib.pyplot as plt
+import seaborn as sns
+#convert input matricies into .gif
+import matplotlib.animation as animation
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   STREAMING
+#--------------------------------------------------------------------------------------------------------------------------------
+#   A replay.json is an object whose "steps" array holds one entry per turn. The reader decodes the values of the object one at a
+#   time with json.JSONDecoder.raw_decode, and the steps one at a time, reading the file in chunks. Only the undecoded tail of the
+#   file and the value being decoded are held, whatever the size of the replay
+
+#characters read from the file at once
+STREAM_CHUNK_SIZE = 1 << 16
+
+_C_JSON_DECODER = json.JSONDecoder()
+_S_JSON_BLANKS = " \t\n\r"
+#a json value cut by the end of the buffer fails within this many characters of the end: a literal, a number or a \uXXXX escape
+_N_JSON_CUT_TAIL = 9
+
+class ReplayTurn(NamedTuple):
+    """one step (turn) of a streamed replay. the Action are the labels of the Perception: the actions taken after seeing it"""
+    turn: int
+    perception: Perception
+    action_p0: Action
+    action_p1: Action
+
+class _JsonReader():
+    """Incremental reader of the values of a json text file"""
+
+    def __init__( self, ic_file, in_chunk_size : int = STREAM_CHUNK_SIZE ):
+        """Construct the reader
+        Args:
+            ic_file (file): json text file opened for reading
+            in_chunk_size (int): characters read from the file at once
+        """
+        self.c_file = ic_file
+        self.n_chunk_size = in_chunk_size
+        #undecoded tail of the file, and position of the first character not consumed
+        self.s_buffer = ""
+        self.n_pos = 0
+        self.x_eof = False
+        return
+
+    def _fill( self, in_size : int ) -> bool:
+        """Drop the consumed characters and read more
+        Returns:
+            bool: False=OK | True=end of the file
+        """
+        s_chunk = self.c_file.read( in_size )
+        self.s_buffer = self.s_buffer[self.n_pos:] +s_chunk
+        self.n_pos = 0
+        self.x_eof = len(s_chunk) == 0
+        return self.x_eof
+
+    def peek( self ) -> str:
+        """next character that is not blank, not consumed
+        Returns:
+            str: character | "" at the end of the file
+        """
+        while True:
+            while self.n_pos < len(self.s_buffer) and self.s_buffer[self.n_pos] in _S_JSON_BLANKS:
+                self.n_pos += 1
+            if self.n_pos < len(self.s_buffer):
+                return self.s_buffer[self.n_pos]
+            if self._fill( self.n_chunk_size ):
+                return ""
+
+    def expect( self, is_char : str ):
+        """consume the next character that is not blank
+        Raises:
+            json.JSONDecodeError: it is not is_char, or the file ends
+        """
+        if self.peek() != is_char:
+            raise json.JSONDecodeError( f"Expecting '{is_char}'", self.s_buffer, self.n_pos )
+        self.n_pos += 1
+        return
+
+    def decode( self ):
+        """decode and consume the next json value. the file is read until the value is complete
+        Raises:
+            json.JSONDecodeError: the value is malformed, raised as soon as the error is not at the end of the buffer, or the file ends
+        """
+        self.peek()
+        while True:
+            try:
+                c_value, n_end = _C_JSON_DECODER.raw_decode( self.s_buffer, self.n_pos )
+                #a number touching the end of the buffer may continue in the file
+                if n_end < len(self.s_buffer) or self.x_eof:
+                    self.n_pos = n_end
+                    return c_value
+            except json.JSONDecodeError as e_error:
+                #only a value cut by the end of the buffer can be completed by reading more, anything else is malformed
+                x_cut = e_error.msg.startswith( "Unterminated string" ) or len(self.s_buffer) -e_error.pos <= _N_JSON_CUT_TAIL
+                if self.x_eof or not x_cut:
+                    raise
+            #values longer than a chunk double the read, each retry decodes from the start of the value again
+            self._fill( max( self.n_chunk_size, len(self.s_buffer) -self.n_pos ) )
+
+def stream_replay_steps( ic_file, id_header : dict, in_chunk_size : int = STREAM_CHUNK_SIZE ):
+    """Yield the steps of a replay.json one at a time
+    The members of the replay object that come before "steps" are decoded into id_header before the first step is yielded. e.g.
+    "info", "rewards": the replays of the kaggle API sort their members
+    Args:
+        ic_file (file): replay.json opened for reading as text
+        id_header (dict): filled with the other members of the replay object, the ones after "steps" once the steps are exhausted
+        in_chunk_size (int): characters read from the file at once
+    Yields:
+        list(dict): one step, one entry per player. e.g. [{"action": [...], "observation": {...}, "status": "ACTIVE", ...}, {...}]
+    Raises:
+        json.JSONDecodeError: the file is not a replay.json
+    """
+    c_reader = _JsonReader( ic_file, in_chunk_size )
+    c_reader.expect( "{" )
+    while c_reader.peek() not in ( "}", "" ):
+        s_key = c_reader.decode()
+        c_reader.expect( ":" )
+        if s_key == "steps":
+            c_reader.expect( "[" )
+            while c_reader.peek() not in ( "]", "" ):
+                yield c_reader.decode()
+                if c_reader.peek() == ",":
+                    c_reader.n_pos += 1
+            c_reader.expect( "]" )
+        else:
+            id_header[s_key] = c_reader.decode()
+        if c_reader.peek() == ",":
+            c_reader.n_pos += 1
+    c_reader.expect( "}" )
+    return
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   REPLAY
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class Replay():
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self, ic_dtype_policy : DtypePolicy = DTYPE_POLICY_FULL ):
+        """Construct replay class
+        Args:
+            ic_dtype_policy (DtypePolicy): dtypes of the Perception and Action generated from the replay
+        """
+
+        #dtypes of the generated Perception and Action. e.g. DTYPE_POLICY_HALF for training sets
+        self.c_dtype_policy = ic_dtype_policy
+
+        #initialize class vars
+        #self.__init_vars()
+
+        return
+
+    #----------------    Private    ----------------
+
+    def __init_vars( self ) -> bool:
+        """Initialize class vars
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+
+        self._replay_json = None
+        self.lc_perception = None
+        self.ld_units = None
+        self.lc_actions_player0 = None
+        self.lc_actions_player1 = None
+
+        return False
+
+    #----------------    Protected    ----------------
+
+    def _json_observation( self, ic_json : json ):
+        """From an opened replay.json extract a list of observations
+        observation is a dictionary with the following fields e.g.
+        'globalCityIDCount': 103, 'globalUnitIDCount': 145, 'height': 24, 'player': 0, 'remainingOverageTime': 60, 'reward': 40004, 'step': 275, 'updates':[''],  'width': 24
+        Args:
+            ic_json (json): replay json loaded from file and processed by json module
+        Returns:
+            list(str): list of observation strings. one for each step (turn in the game)
+        """
+        #Fetch the ID of the episode
+        n_episode_id = ic_json["info"]["EpisodeId"]
+        #???
+        index = np.argmax([r or 0 for r in ic_json["rewards"]])
+        logging.debug(f"ID: {n_episode_id} | Index: {index} | Teams: {ic_json['info']['TeamNames']}")
+
+        #initialize list of observations
+        lc_observations = list()
+
+        #Scan every Step of the match (Turn)
+        for n_step in range(len(ic_json["steps"])-1):
+            #logging.debug(f"Step: {n_step} of {len(ic_json['steps'])-1}")
+            #???
+            if ic_json["steps"][n_step][index]["status"] == 'ACTIVE':
+                #Fetch the observations of this turn
+                c_observation = ic_json['steps'][n_step][0]['observation']
+                #logging.debug(f"Step: {n_step} | Observations: {c_observation}")
+
+                #append this step observations in the list of observations
+                lc_observations.append( c_observation )
+
+        logging.debug(f"Observations : {len(lc_observations)}")
+        #return a list of oservations, one per Step (turn)
+        return lc_observations
+
+    def _observations_to_snapshots( self, ilc_observations : list ) -> list:
+        """From game observations generate one GameSnapshot per turn
+        Observations are parsed into record arrays, each snapshot shares the records that did not change with the previous turn
+        Args:
+            ilc_observations (list(observations)): [description]
+        Returns:
+            list(GameSnapshot): List of game state snapshots. One per turn
+        """
+        lc_snapshots = list()
+        #from a list of observations generates a list of GameSnapshot
+        for c_observation in ilc_observations:
+
+            if c_observation[INPUT_CONSTANTS.STEP] == 0:
+                c_game_state = Game()
+                c_game_state._initialize(c_observation[INPUT_CONSTANTS.UPDATES], ix_incremental=True, ix_array_map=True)
+                c_game_state._update(c_observation[INPUT_CONSTANTS.UPDATES][2:])
+                c_game_state._set_player_id( c_observation["player"] )
+
+            else:
+                c_game_state._update(c_observation[INPUT_CONSTANTS.UPDATES])
+            #replays of older engines have no id counters
+            c_game_state._set_id_counts( c_observation.get(INPUT_CONSTANTS.UNIT_ID_COUNT, 0), c_observation.get(INPUT_CONSTANTS.CITY_ID_COUNT, 0) )
+
+            lc_snapshots.append( c_game_state.snapshot() )
+
+        logging.debug(f"Snapshots : {len(lc_snapshots)}")
+        return lc_snapshots
+
+    def _observations_to_gamestates( self, ilc_observations : list ):
+        """From game observations generate Game 
+        Args:
+            ilc_observations (list(observations)): [description]
+        Returns:
+            list(Game): List of gamestates. One per turn
+        """
+        lc_gamestates = list()
+        #each Game is restored from the snapshot of its turn
+        for c_snapshot in self._observations_to_snapshots( ilc_observations ):
+            c_game_state = Game()
+            c_game_state.restore( c_snapshot )
+            lc_gamestates.append( c_game_state )
+
+        logging.debug(f"Gamestates : {len(lc_gamestates)}")
+        return lc_gamestates
+    
+    def _generate_list_action( self, ic_json : json, in_player : int ) ->list:
+        """From a JSON create a list of string actions
+        Args:
+            ic_json (json): opened replay.json
+            in_player (int): index of the player for which actions are to be computed. two players in a game
+        Returns:
+            list: list of string action. e.g.
+                [["r 14 8", "m u_1 w"]
+                [""]
+                ["m u_1 w"]]
+        """
+        #allocate player actions
+        lls_player_action = list()
+        logging.debug(f"JSON Steps: {len(ic_json['steps'])}")
+        #Scan every Step of the match (Turn)
+        n_last_step = len(ic_json["steps"])
+        #for n_step in range(1, n_last_step):
+        #scan each step (turn)
+        for c_step in ic_json['steps']:
+            #logging.debug(f"Step: {n_step} of {len(ic_json['steps'])}")
+            #logging.debug(f"Step: {c_step}")
+            #fetch step (turn) only present in player 0 observations
+            n_step = c_step[0]["observation"]["step"]
+            #for all players
+            for c_player in c_step:
+                #logging.debug(f"Player: {c_player}")
+                #fetch index of player
+                n_id = c_player["observation"]["player"]
+                #if player the indexed one, is active or the game is about to be done
+                if n_id == in_player and (c_player["status"] == "ACTIVE" or c_player["status"] == "DONE"):
+                    #fetch the list of actions the player took in the previous turn
+                    #From JSON, From Steps (list of turns), from a given step (turn index), from player 0, is player is active (not dead)
+                    ls_actions = c_player['action']
+                    #logging.debug(f"Step: {n_step} | Action: {ls_actions}")
+                    #append to list of list of string actions
+                    lls_player_action.append( ls_actions )
+
+        if len(lls_player_action) != GAME_CONSTANTS["PARAMETERS"]["MAX_DAYS"]+1:
+            logging.error(f"Unexpected length | List of string actions: {len(lls_player_action)}")
+            return True
+
+        #drop first string action. Perception(Step 0) <=> Action(Step = 1)
+        lls_player_action.pop( 0 )
+
+        logging.debug(f"Player {in_player} | Action strings decoded: {len(lls_player_action)}")
+        return lls_player_action
+
+    def _snapshots_to_action_batch( self, ilc_snapshots : list, ills_actions : list, ian_mats : np.ndarray = None ) -> ActionBatch:
+        """Decode the string actions of every step (turn) with the units of the snapshot of the turn
+        Args:
+            ilc_snapshots (list(GameSnapshot)): one per turn, at least one per list of string actions
+            ills_actions (list): string actions of one player, one list per turn. e.g. _generate_list_action
+            ian_mats (np.ndarray): preallocated (T, 10, WIDTH_MAX, HEIGHT_MAX) array with the labels dtype of the policy | None: allocated
+        Returns:
+            ActionBatch: labels and action counts of the whole game | None on failure
+        """
+        ld_units = [ { f"u_{n_id}" : (n_x, n_y) for n_id, n_x, n_y in zip( c_snapshot.records[INPUT_CONSTANTS.UNITS]["id"].tolist(), c_snapshot.records[INPUT_CONSTANTS.UNITS]["x"].tolist(), c_snapshot.records[INPUT_CONSTANTS.UNITS]["y"].tolist() ) } for c_snapshot in ilc_snapshots[:len(ills_actions)] ]
+        return actions_from_strings( ills_actions, ld_units, ilc_snapshots[0].map_width, self.c_dtype_policy.labels, ian_mats )
+
+    #----------------    Public    ----------------
+
+    def json_load( self, is_folder : str, is_filename : str ) -> json:
+        """Load a replay.json
+        Args:
+            is_folder (str): Source folder
+            is_filename (str): Source name .json
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        s_filepath = os.path.join( os.getcwd(), is_folder, is_filename )
+        try:
+            with open(s_filepath) as c_file:
+                self._replay_json = json.load( c_file )
+        except:
+            logging.error(f"Could not open JSON: {s_filepath}")
+            return True
+
+        #logging.debug(f"JSON: {c_opened_json}")
+        return False
+
+    def json_to_perceptions( self ):
+        """From a loaded replay.json extract a list of observations
+        Args:
+            ic_json ([type]): [description]
+        Returns:
+            [type]: [description]
+        """
+
+        if self._replay_json is None:
+            return None, None
+
+        #from json loads a list of observations
+        lc_observations = self._json_observation( self._replay_json )
+        #Allocate
+        lc_perceptions = list()
+        ld_units = list()
+        #each observation holds the full state of its turn. Perception() is filled from the updates without a Game()
+        for c_observation in lc_observations:
+            c_perception = Perception( self.c_dtype_policy )
+            c_perception.from_updates( c_observation[INPUT_CONSTANTS.UPDATES], c_observation["player"], c_observation["width"], c_observation["height"], c_observation[INPUT_CONSTANTS.STEP] )
+            logging.debug(f"Step: {c_perception.status[Perception.E_INPUT_STATUS_VECTOR.MAP_TURN.value]}  | Perceptions : {c_perception}")
+            #add the percepton to the list of perceptions
+            lc_perceptions.append( c_perception )
+            #add the dictionary of units to a list of dictionaries. (redundant)
+            ld_units.append( c_perception.d_unit )
+
+        logging.debug(f"Perceptions : {len(lc_perceptions)}")
+        logging.debug(f"Dictionary of units : {len(ld_units)}")
+        
+        self.lc_perception = lc_perceptions
+        self.ld_units = ld_units
+
+        return lc_perceptions, ld_units
+
+    def json_to_perception_action( self ):
+        """ Parse a replay.json into a list of observations and two list of actions
+        The lists contain one row per step (turn) of the game
+
+        """
+
+        if self._replay_json is None:
+            return None, None
+
+        #from a json extract a list of perceptions, one per turn
+        lc_perceptions, ld_units = self.json_to_perceptions()
+
+        n_map_size = int( lc_perceptions[0].status[ Perception.E_INPUT_STATUS_VECTOR.MAP_SIZE.value ] )
+        llc_actions = [None, None]
+        #Scan player indexes
+        for n_player_index in range(2):
+            ls_actions = self._generate_list_action( self._replay_json, n_player_index )
+            if ls_actions is True:
+                return None, None, None
+            #decode the Action of every step (turn) of the game at once into one label tensor
+            c_batch = actions_from_strings( ls_actions, ld_units, n_map_size, self.c_dtype_policy.labels )
+            if c_batch is None:
+                return None, None, None
+            if c_batch.invalid:
+                logging.error(f"Player {n_player_index} | Some string actions could not be decoded")
+            #one Action per step (turn), a view of its turn of the tensor, with the units needed to translate it
+            lc_action = list()
+            for c_perception, an_mats in zip( lc_perceptions, c_batch.mats ):
+                c_action = Action( n_map_size, self.c_dtype_policy, an_mats )
+                c_action.set_units( c_perception.d_unit, c_perception.d_position_unit )
+                lc_action.append( c_action )
+            #Sace actions for this player
+            llc_actions[n_player_index] = lc_action
+
+            #total of such actions taken in the game, counted by the decoder
+            for e_mat_index in Action.E_OUTPUT_SPACIAL_MATRICIES:
+                logging.info(f"Player {n_player_index} | {e_mat_index.name} - Total Actions: {c_batch.counts[ e_mat_index.value ]}")
+
+        self.lc_actions_player0 = llc_actions[0]
+        self.lc_actions_player1 = llc_actions[1]
+
+        return lc_perceptions, llc_actions[0], llc_actions[1]
+
+    def json_to_perception_batch( self, in_player : int = None, ian_mats : np.ndarray = None, ian_status : np.ndarray = None ) -> PerceptionBatch:
+        """From a loaded replay.json build the Perception of every turn into contiguous arrays, without a Perception() per turn
+        Args:
+            in_player (int): team the Perception is built for | None: the player of the observations
+            ian_mats (np.ndarray): preallocated (T, 8, WIDTH_MAX, HEIGHT_MAX) array | None: allocated
+            ian_status (np.ndarray): preallocated (T, 9) array | None: allocated
+        Returns:
+            PerceptionBatch: mats, status and unit table of the whole game, with the dtypes of the replay policy | None on failure
+        """
+
+        if self._replay_json is None:
+            return None
+
+        lc_snapshots = self._observations_to_snapshots( self._json_observation( self._replay_json ) )
+        return perceptions_from_snapshots( lc_snapshots, in_player, self.c_dtype_policy, ian_mats, ian_status )
+
+    def json_to_action_batch( self, in_player : int, ian_mats : np.ndarray = None ) -> ActionBatch:
+        """From a loaded replay.json decode the Action of every step (turn) of a player at once, without Perception() or Action()
+        The units of each turn come from the unit records of its observation
+        Args:
+            in_player (int): player whose string actions are decoded
+            ian_mats (np.ndarray): preallocated (T, 10, WIDTH_MAX, HEIGHT_MAX) array with the labels dtype of the policy | None: allocated
+        Returns:
+            ActionBatch: labels and action counts of the whole game | None on failure
+        """
+
+        if self._replay_json is None:
+            return None
+
+        lc_snapshots = self._observations_to_snapshots( self._json_observation( self._replay_json ) )
+        ls_actions = self._generate_list_action( self._replay_json, in_player )
+        if ls_actions is True:
+            return None
+        return self._snapshots_to_action_batch( lc_snapshots, ls_actions, ian_mats )
+
+    def json_stream( self, is_folder : str, is_filename : str, in_chunk_size : int = STREAM_CHUNK_SIZE ):
+        """Stream a replay.json one step (turn) at a time, without loading it
+        Yields the same Perception and Action as json_load + json_to_perception_action, with the memory of one step: the Action of a
+        turn are the actions of the next step, one step is decoded ahead. Nothing is kept by the Replay
+        Args:
+            is_folder (str): Source folder
+            is_filename (str): Source name .json
+            in_chunk_size (int): characters read from the file at once
+        Yields:
+            ReplayTurn: turn, Perception of the observations, Action of player 0 and player 1. the generator ends early on failure
+        """
+        s_filepath = os.path.join( os.getcwd(), is_folder, is_filename )
+        try:
+            c_file = open( s_filepath )
+        except OSError:
+            logging.error(f"Could not open JSON: {s_filepath}")
+            return
+
+        with c_file:
+            d_header = dict()
+            c_steps = stream_replay_steps( c_file, d_header, in_chunk_size )
+            try:
+                l_step = next( c_steps, None )
+                #the player whose status tells which steps were played. see _json_observation
+                n_index = int( np.argmax( [ n_reward or 0 for n_reward in d_header["rewards"] ] ) )
+                for l_next in c_steps:
+                    c_observation = l_step[0]["observation"]
+                    if l_step[n_index]["status"] == "ACTIVE":
+                        c_perception = Perception( self.c_dtype_policy )
+                        c_perception.from_updates( c_observation[INPUT_CONSTANTS.UPDATES], c_observation["player"], c_observation["width"], c_observation["height"], c_observation[INPUT_CONSTANTS.STEP] )
+                        lc_actions = list()
+                        for c_player in l_next:
+                            if c_player["status"] not in ( "ACTIVE", "DONE" ):
+                                logging.error(f"Step {c_observation[INPUT_CONSTANTS.STEP] +1} | Player {c_player['observation']['player']} has no actions, status: {c_player['status']}")
+                                return
+                            c_action = Action( c_observation["width"], self.c_dtype_policy )
+                            if c_action.fill_mats( c_perception.d_unit, c_player["action"], c_perception.d_position_unit ):
+                                logging.error(f"Step {c_observation[INPUT_CONSTANTS.STEP]} | Player {c_player['observation']['player']} | Some string actions could not be decoded")
+                            lc_actions.append( c_action )
+                        yield ReplayTurn( c_observation[INPUT_CONSTANTS.STEP], c_perception, lc_actions[0], lc_actions[1] )
+                    l_step = l_next
+            except ( json.JSONDecodeError, KeyError, IndexError, TypeError ) as e_error:
+                logging.error(f"Malformed replay: {s_filepath} | {e_error}")
+                return
+
+        return
+
+    #----------------    Public Plot    ----------------
+
+    def perceptions_to_gif( self, is_filename : str, in_framerate : int, in_max_frames = -1 ):
+        """Turn a list of perceptions into a Gif. see mats_to_gif
+        Args:
+            is_filename (str): name of the output gif. must be a .gif
+            in_framerate (int): Framerate in FPS
+            in_max_frames(int): -1=gify ALL the frames | >0 gify only up to a given number of frames
+        """
+        mats_to_gif( [ c_perception.mats for c_perception in self.lc_perception ], is_filename, in_framerate, in_max_frames )
+        return
+
+    def perceptions_actions_to_gif( self, is_filename : str, in_framerate : int, in_max_frames = -1 ):
+        """Turn a list of perceptions into a Gif
+        because of compression, there are going to be fewer frames, but the delay in them ensures the movie represent the correct output
+        Args:
+            ilc_list_perception (list): list of Perception classes
+            is_filename (str): name of the output gif. must be a .gif
+            in_framerate (int): Framerate in FPS
+            in_max_frames(int): -1=gify ALL the frames | >0 gify only up to a given number of frames
+        """
+        logging.debug(f"saving heatmaps...")
+        dimension = (32, 32)
+        fig, axes = plt.subplots( nrows=3, ncols=4, figsize=(4*4, 3*4) )
+        ((ax11, ax12, ax13, ax14), (ax21, ax22, ax23, ax24), (ax31, ax32, ax33, ax34)) = axes
+        
+        def draw_heatmap( ic_perception: Perception, ic_actions_p0 : Action, ic_actions_p1 : Action ):
+            #TODO only first time draw the colorbar
+
+            #plt.clf()
+            
+            #CityTile/Fuel Mat
+            data_citytile_fuel = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value ]
+            ax11.title.set_text(f"Citytile/Fuel {data_citytile_fuel.sum()}")
+            #sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax11, cbar=False, cmap="coolwarm" )
+            sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax11, cbar=False )
+
+            data_worker_resource = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.WORKER_RESOURCE.value ]
+            ax12.title.set_text(f"Worker/Resource {data_worker_resource.sum()}")
+            sns.heatmap( data_worker_resource, center=0, vmin=-100, vmax=100, ax=ax12, cbar=False )
+            
+            data_cart_resource = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.CART_RESOURCE.value ]
+            ax13.title.set_text(f"Cart/Resource {data_cart_resource.sum()}")
+            sns.heatmap( data_cart_resource, center=0, vmin=-100, vmax=100, ax=ax13, cbar=False )
+            
+            data_raw_wood = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value ]
+            data_raw_coal = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value ]
+            data_raw_uranium = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value ]
+            ax21.title.set_text(f"Raw Wood {data_raw_wood.sum()}")
+            ax22.title.set_text(f"Raw Coal {data_raw_coal.sum()}")
+            ax23.title.set_text(f"Raw Uranium {data_raw_uranium.sum()}")
+            sns.heatmap( data_raw_wood, center=0, vmin=-100, vmax=100, ax=ax21, cbar=False )
+            sns.heatmap( data_raw_coal, center=0, vmin=-100, vmax=100, ax=ax22, cbar=False )
+            sns.heatmap( data_raw_uranium, center=0, vmin=-100, vmax=100, ax=ax23, cbar=False )
+            
+            #logging.info(f"ROADS: {Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value} | shape: {ic_perception.mats.shape}")
+            data_road = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value ]
+            ax14.title.set_text(f"Roads {data_road.sum()}")
+            sns.heatmap( data_road, center=0, vmin=0, vmax=6, ax=ax14, cbar=False )
+
+            data_cooldown = ic_perception.mats[ Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value ]
+            ax24.title.set_text(f"Cooldown {data_cooldown.sum()}")
+            n_cooldown_limit = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"]
+            sns.heatmap( data_cooldown, center=0, vmin=-n_cooldown_limit, vmax=n_cooldown_limit, ax=ax24, cbar=False )
+
+            
+            #PLAYER0 ACTIONS
+            c_actions = ic_actions_p0
+            data_citytile = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value]  +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value]
+            ax31.title.set_text(f"P0 Citytile Actions {data_citytile.sum()}")
+            sns.heatmap( data_citytile, vmin=0, vmax=7, ax=ax31, cbar=False )
+
+            data_unit = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value] +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value] +8*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value]
+            ax32.title.set_text(f"P0 Unit Actions {data_unit.sum()}")
+            sns.heatmap( data_unit, vmin=0, vmax=15, ax=ax32, cbar=False )
+
+            #PLAYER1 ACTIONS
+            c_actions = ic_actions_p1
+            data_citytile = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_RESEARCH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.CITYTILE_BUILD_WORKER.value]  +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_BUILD_CITY.value]
+            ax33.title.set_text(f"P1 Citytile Actions {data_citytile.sum()}")
+            sns.heatmap( data_citytile, vmin=0, vmax=7, ax=ax33, cbar=False )
+
+            data_unit = c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_NORTH.value] +2*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_EAST.value] +4*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_SOUTH.value] +8*c_actions.mats[ Action.E_OUTPUT_SPACIAL_MATRICIES.UNIT_MOVE_WEST.value]
+            ax34.title.set_text(f"P1 Unit Actions {data_unit.sum()}")
+            sns.heatmap( data_unit, vmin=0, vmax=15, ax=ax34, cbar=False )
+
+
+            return [ data_citytile_fuel.sum(), data_worker_resource.sum() ]
+
+        draw_heatmap( self.lc_perception[0], self.lc_actions_player0[0], self.lc_actions_player1[0] )
+
+        def init():
+            
+            draw_heatmap( self.lc_perception[0], self.lc_actions_player0[0], self.lc_actions_player1[0] )
+
+        def animate(i):
+            fig.suptitle(f"TURN: {i}", fontsize=16)
+            l_sum = draw_heatmap( self.lc_perception[i], self.lc_actions_player0[i], self.lc_actions_player1[i] )
+            logging.info(f"generating heatmap{i} ... {l_sum}")
+
+        if (in_max_frames < 0):
+            n_frames = len(self.lc_perception)
+        elif in_max_frames >= len(self.lc_perception):
+            n_frames = len(self.lc_perception)
+        else:
+            n_frames = in_max_frames
+
+        anim = animation.FuncAnimation(fig, animate, init_func=init, frames=n_frames, repeat=False, save_count=n_frames)
+        anim.save( is_filename, writer='pillow', fps=in_framerate )
+        logging.debug(f"saving heatmaps as: {is_filename} | total frames: {n_frames}")
+
+        return
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   PLOT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def mats_to_gif( ilan_mats, is_filename : str, in_framerate : int, in_max_frames = -1 ):
+    """Turn the Perception.mats of a sequence of turns into a Gif
+    because of compression, there are going to be fewer frames, but the delay in them ensures the movie represent the correct output
+    Args:
+        ilan_mats (list | np.ndarray): Perception.mats of each turn. e.g. StoredGame.mats, only the frames drawn are read
+        is_filename (str): name of the output gif. must be a .gif
+        in_framerate (int): Framerate in FPS
+        in_max_frames(int): -1=gify ALL the frames | >0 gify only up to a given number of frames
+    """
+    logging.debug(f"saving heatmaps...")
+    dimension = (32, 32)
+    fig, axes = plt.subplots( nrows=3, ncols=3, figsize=(12, 12) )
+    ((ax1, ax2, ax3), (ax4, ax5, ax6), (ax31, ax32, ax33)) = axes
+    
+    def draw_heatmap( ian_frame : np.ndarray ):
+        #TODO only first time draw the colorbar
+
+        #plt.clf()
+        
+        #CityTile/Fuel Mat
+        data_citytile_fuel = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.CITYTILE_FUEL.value ]
+        ax1.title.set_text(f"Citytile/Fuel {data_citytile_fuel.sum()}")
+        #sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax1, cbar=False, cmap="coolwarm" )
+        sns.heatmap( data_citytile_fuel, center=0, vmin=-100, vmax=100, ax=ax1, cbar=False )
+
+        data_worker_resource = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.WORKER_RESOURCE.value ]
+        ax2.title.set_text(f"Worker/Resource {data_worker_resource.sum()}")
+        sns.heatmap( data_worker_resource, center=0, vmin=-100, vmax=100, ax=ax2, cbar=False )
+        
+        data_cart_resource = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.CART_RESOURCE.value ]
+        ax3.title.set_text(f"Cart/Resource {data_cart_resource.sum()}")
+        sns.heatmap( data_cart_resource, center=0, vmin=-100, vmax=100, ax=ax3, cbar=False )
+        
+        data_raw_wood = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_WOOD.value ]
+        data_raw_coal = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_COAL.value ]
+        data_raw_uranium = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.RAW_URANIUM.value ]
+        ax4.title.set_text(f"Raw Wood {data_raw_wood.sum()}")
+        ax5.title.set_text(f"Raw Coal {data_raw_coal.sum()}")
+        ax6.title.set_text(f"Raw Uranium {data_raw_uranium.sum()}")
+        sns.heatmap( data_raw_wood, center=0, vmin=-100, vmax=100, ax=ax4, cbar=False )
+        sns.heatmap( data_raw_coal, center=0, vmin=-100, vmax=100, ax=ax5, cbar=False )
+        sns.heatmap( data_raw_uranium, center=0, vmin=-100, vmax=100, ax=ax6, cbar=False )
+        
+        #logging.info(f"ROADS: {Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value} | shape: {ic_perception.mats.shape}")
+        data_road = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.ROAD.value ]
+        ax31.title.set_text(f"Roads {data_road.sum()}")
+        sns.heatmap( data_road, center=0, vmin=0, vmax=6, ax=ax31, cbar=False )
+
+        data_cooldown = ian_frame[ Perception.E_INPUT_SPACIAL_MATRICIES.COOLDOWN.value ]
+        ax32.title.set_text(f"Cooldown {data_cooldown.sum()}")
+        n_cooldown_limit = GAME_CONSTANTS["PERCEPTION"]["INPUT_COOLDOWN_OFFSET"] +GAME_CONSTANTS["PARAMETERS"]["CITY_ACTION_COOLDOWN"]
+        sns.heatmap( data_cooldown, center=0, vmin=-n_cooldown_limit, vmax=n_cooldown_limit, ax=ax32, cbar=False )
+
+        return [ data_citytile_fuel.sum(), data_worker_resource.sum() ]
+
+    draw_heatmap( ilan_mats[0] )
+
+    def init():
+        
+        draw_heatmap( ilan_mats[0] )
+
+    def animate(i):
+        fig.suptitle(f"TURN: {i}", fontsize=16)
+        l_sum = draw_heatmap( ilan_mats[i] )
+        logging.info(f"generating heatmap{i} ... {l_sum}")
+
+    if (in_max_frames < 0):
+        n_frames = len(ilan_mats)
+    elif in_max_frames >= len(ilan_mats):
+        n_frames = len(ilan_mats)
+    else:
+        n_frames = in_max_frames
+
+    anim = animation.FuncAnimation(fig, animate, init_func=init, frames=n_frames, repeat=False, save_count=n_frames)
+    anim.save( is_filename, writer='pillow', fps=in_framerate )
+    logging.debug(f"saving heatmaps as: {is_filename} | total frames: {n_frames}")
+
+    return
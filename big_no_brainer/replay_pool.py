@@ -0,0 +1,282 @@
+##  @package replay_pool
+#   Parallel conversion of a folder of replay.json into dense arrays
+#   The replays are fanned out in chunks of files over a ProcessPoolExecutor. A worker converts a replay with the batch builders,
+#   Replay._observations_to_snapshots -> perceptions_from_snapshots and actions_from_strings, writing straight into one block of
+#   shared memory per replay. Only the name of the block goes back through the pool: the parent copies the arrays out and frees
+#   the block, nothing of the game is pickled
+#   Results come back in the order of the files, as soon as the ones before them are done. At most two chunks per worker are in
+#   flight, the memory held does not grow with the corpus. A replay that fails, or a worker that dies, only fails its files
+#
+#   e.g.
+#   for c_game in convert_replays( "replays", ls_files, DTYPE_POLICY_HALF, in_workers=8 ):
+#       if c_game.error is None:
+#           c_store.append_game( c_game.file, c_game.mats, c_game.status, c_game.actions, c_game.player )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import os
+from time import perf_counter
+from typing import NamedTuple
+#parallel conversion
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from lux.constants import GAME_CONSTANTS
+
+from big_no_brainer.perception import Perception, perceptions_from_snapshots
+from big_no_brainer.action import Action
+from big_no_brainer.replay import Replay
+from big_no_brainer.dtype_policy import DtypePolicy, DTYPE_POLICY_FULL
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   RESULTS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#chunks of files in flight per worker
+POOL_WINDOW_PER_WORKER = 2
+#alignment of the arrays inside a shared memory block
+_N_SHARED_ALIGN = 64
+
+class ConvertedReplay(NamedTuple):
+    """arrays of one replay converted by convert_replays. Owned by the caller"""
+    file: str
+    player: int
+    map_size: int
+    mats: np.ndarray
+    """(T, 8, WIDTH_MAX, HEIGHT_MAX) Perception.E_INPUT_SPACIAL_MATRICIES | None on failure"""
+    status: np.ndarray
+    """(T, 9) Perception.E_INPUT_STATUS_VECTOR | None on failure"""
+    actions: np.ndarray
+    """(T, 10, WIDTH_MAX, HEIGHT_MAX) Action.E_OUTPUT_SPACIAL_MATRICIES of the player | None on failure"""
+    error: str
+    """None=OK | reason of the failure"""
+
+class _SharedReplay(NamedTuple):
+    """what a worker sends back for a replay: the name of the shared memory block holding its arrays"""
+    file: str
+    shared: str
+    turns: int
+    map_size: int
+    error: str
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   SHARED MEMORY
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _shared_layout( in_turns : int, ic_dtype_policy : DtypePolicy ) -> tuple:
+    """position of the arrays of a replay inside its shared memory block
+    Returns:
+        tuple(list, int): (offset, shape, dtype) of mats, status, actions | bytes of the block
+    """
+    n_width = GAME_CONSTANTS["MAP"]["WIDTH_MAX"]
+    n_height = GAME_CONSTANTS["MAP"]["HEIGHT_MAX"]
+    lt_arrays = [
+        ( (in_turns, len(Perception.E_INPUT_SPACIAL_MATRICIES), n_width, n_height), ic_dtype_policy.features ),
+        ( (in_turns, len(Perception.E_INPUT_STATUS_VECTOR)), ic_dtype_policy.status ),
+        ( (in_turns, len(Action.E_OUTPUT_SPACIAL_MATRICIES), n_width, n_height), ic_dtype_policy.labels ),
+    ]
+    lt_layout = list()
+    n_offset = 0
+    for t_shape, c_dtype in lt_arrays:
+        lt_layout.append( (n_offset, t_shape, np.dtype( c_dtype )) )
+        n_offset += -(-int( np.prod( t_shape ) ) *np.dtype( c_dtype ).itemsize //_N_SHARED_ALIGN) *_N_SHARED_ALIGN
+    return lt_layout, max( n_offset, 1 )
+
+def _shared_views( ic_buffer, ilt_layout : list ) -> list:
+    """arrays of a replay over its shared memory block. they must be released before the block is closed
+    Returns:
+        list(np.ndarray): mats, status, actions
+    """
+    return [ np.ndarray( t_shape, dtype=c_dtype, buffer=ic_buffer, offset=n_offset ) for n_offset, t_shape, c_dtype in ilt_layout ]
+
+def _fill_shared( ic_replay : Replay, ic_shared : shared_memory.SharedMemory, ilt_layout : list, ilc_snapshots : list, ills_actions : list, in_player : int ) -> str:
+    """convert a replay into its shared memory block. the views are released on return
+    Returns:
+        str: None=OK | reason of the failure
+    """
+    an_mats, an_status, an_actions = _shared_views( ic_shared.buf, ilt_layout )
+    if perceptions_from_snapshots( ilc_snapshots[:len(ills_actions)], in_player, ic_replay.c_dtype_policy, an_mats, an_status ) is None:
+        return "Perception could not be built"
+    if ic_replay._snapshots_to_action_batch( ilc_snapshots, ills_actions, an_actions ) is None:
+        return "Action could not be decoded"
+    return None
+
+def _discard( ic_shared : _SharedReplay ) -> bool:
+    """free the shared memory block of a replay that will not be received
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    if ic_shared.shared is None:
+        return False
+    try:
+        c_shared = shared_memory.SharedMemory( name=ic_shared.shared )
+        c_shared.close()
+        c_shared.unlink()
+    except FileNotFoundError:
+        return True
+    return False
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   WORKER
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _convert_replay( is_folder : str, is_filename : str, ic_dtype_policy : DtypePolicy, in_player : int ) -> _SharedReplay:
+    """Convert a replay.json into a new shared memory block. Runs in a worker
+    Returns:
+        _SharedReplay: name of the block, handed over to the parent | the reason of the failure, no block
+    """
+    c_replay = Replay( ic_dtype_policy )
+    if c_replay.json_load( is_folder, is_filename ):
+        return _SharedReplay( is_filename, None, 0, 0, "Could not open JSON" )
+    c_shared = None
+    try:
+        lc_snapshots = c_replay._observations_to_snapshots( c_replay._json_observation( c_replay._replay_json ) )
+        ls_actions = c_replay._generate_list_action( c_replay._replay_json, in_player )
+        #the json is not needed anymore
+        c_replay._replay_json = None
+        if ls_actions is True or len(ls_actions) == 0 or len(lc_snapshots) < len(ls_actions):
+            return _SharedReplay( is_filename, None, 0, 0, "Unexpected number of steps" )
+        n_turns = len(ls_actions)
+        lt_layout, n_bytes = _shared_layout( n_turns, ic_dtype_policy )
+        c_shared = shared_memory.SharedMemory( create=True, size=n_bytes )
+        s_error = _fill_shared( c_replay, c_shared, lt_layout, lc_snapshots, ls_actions, in_player )
+        if s_error is not None:
+            c_shared.close()
+            c_shared.unlink()
+            return _SharedReplay( is_filename, None, 0, 0, s_error )
+        #the parent unlinks the block, the tracker of the worker must not
+        resource_tracker.unregister( c_shared._name, "shared_memory" )
+        c_shared.close()
+        return _SharedReplay( is_filename, c_shared.name, n_turns, lc_snapshots[0].map_width, None )
+    except Exception as e_error:
+        if c_shared is not None:
+            c_shared.unlink()
+        return _SharedReplay( is_filename, None, 0, 0, f"{type(e_error).__name__}: {e_error}" )
+
+def _convert_chunk( is_folder : str, ils_files : list, ic_dtype_policy : DtypePolicy, in_player : int ) -> list:
+    """Convert a chunk of replay.json. Runs in a worker
+    Returns:
+        list(_SharedReplay): one per file, in order
+    """
+    return [ _convert_replay( is_folder, s_file, ic_dtype_policy, in_player ) for s_file in ils_files ]
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   PARENT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _receive( ic_shared : _SharedReplay, ic_dtype_policy : DtypePolicy, in_player : int ) -> ConvertedReplay:
+    """Copy the arrays of a replay out of its shared memory block and free it
+    Returns:
+        ConvertedReplay: arrays of the replay | the reason of the failure
+    """
+    if ic_shared.error is not None:
+        return ConvertedReplay( ic_shared.file, in_player, ic_shared.map_size, None, None, None, ic_shared.error )
+    try:
+        c_shared = shared_memory.SharedMemory( name=ic_shared.shared )
+    except FileNotFoundError:
+        return ConvertedReplay( ic_shared.file, in_player, ic_shared.map_size, None, None, None, "Shared memory of the replay is gone" )
+    try:
+        lt_layout, _ = _shared_layout( ic_shared.turns, ic_dtype_policy )
+        an_mats, an_status, an_actions = [ an_view.copy() for an_view in _shared_views( c_shared.buf, lt_layout ) ]
+    finally:
+        c_shared.close()
+        c_shared.unlink()
+    return ConvertedReplay( ic_shared.file, in_player, ic_shared.map_size, an_mats, an_status, an_actions, None )
+
+def convert_replays( is_folder : str, ils_files : list, ic_dtype_policy : DtypePolicy = DTYPE_POLICY_FULL, in_player : int = 0, in_workers : int = None, in_chunk_size : int = 1 ):
+    """Convert replay.json files in parallel, one ConvertedReplay per file in the order of the files
+    Progress is logged as the replays are done
+    Args:
+        is_folder (str): Source folder
+        ils_files (list(str)): Source names .json. e.g. the files of the folder
+        ic_dtype_policy (DtypePolicy): dtypes of the arrays
+        in_player (int): player the Perception and Action are built for
+        in_workers (int): processes of the pool | None: one per core
+        in_chunk_size (int): files sent to a worker at once. larger chunks for many small replays
+    Yields:
+        ConvertedReplay: arrays of a replay, error is set if the replay failed
+    """
+    n_workers = max( 1, in_workers or os.cpu_count() or 1 )
+    n_chunk_size = max( 1, int(in_chunk_size) )
+    lls_chunks = [ ils_files[n_start:n_start +n_chunk_size] for n_start in range(0, len(ils_files), n_chunk_size) ]
+    n_window = POOL_WINDOW_PER_WORKER *n_workers
+    logging.info(f"Converting {len(ils_files)} replays | Workers: {n_workers} | Chunks: {len(lls_chunks)} of {n_chunk_size}")
+
+    n_start = perf_counter()
+    n_done = 0
+    n_failed = 0
+    #future -> (chunk, executor running it, tries) | chunk -> received replays, waiting for the chunks before it
+    d_futures = dict()
+    d_received = dict()
+    n_next_submit = 0
+    n_next_yield = 0
+    l_executor = [ ProcessPoolExecutor( max_workers=n_workers ) ]
+
+    def submit( in_chunk : int, in_tries : int ):
+        """send a chunk to the pool. a dead worker breaks its pool, the chunks from then on go to a new one"""
+        try:
+            c_future = l_executor[0].submit( _convert_chunk, is_folder, lls_chunks[in_chunk], ic_dtype_policy, in_player )
+        except BrokenProcessPool:
+            restart( l_executor[0] )
+            c_future = l_executor[0].submit( _convert_chunk, is_folder, lls_chunks[in_chunk], ic_dtype_policy, in_player )
+        d_futures[c_future] = (in_chunk, l_executor[0], in_tries)
+
+    def restart( ic_broken : ProcessPoolExecutor ):
+        """replace the pool if it is the broken one"""
+        if ic_broken is l_executor[0]:
+            logging.critical(f"Worker died, restarting the pool of {n_workers} workers")
+            l_executor[0].shutdown( wait=False )
+            l_executor[0] = ProcessPoolExecutor( max_workers=n_workers )
+
+    try:
+        while n_next_yield < len(lls_chunks):
+            while n_next_submit < len(lls_chunks) and n_next_submit < n_next_yield +n_window:
+                submit( n_next_submit, 0 )
+                n_next_submit += 1
+
+            if n_next_yield not in d_received:
+                set_done, _ = wait( d_futures, return_when=FIRST_COMPLETED )
+                for c_future in set_done:
+                    n_chunk, c_future_executor, n_tries = d_futures.pop( c_future )
+                    try:
+                        lc_shared = c_future.result()
+                    except Exception as e_error:
+                        #all the chunks in flight fail with the worker that died, they are tried once more
+                        if isinstance( e_error, BrokenProcessPool ):
+                            restart( c_future_executor )
+                            if n_tries == 0:
+                                submit( n_chunk, 1 )
+                                continue
+                        lc_shared = [ _SharedReplay( s_file, None, 0, 0, f"{type(e_error).__name__}: {e_error}" ) for s_file in lls_chunks[n_chunk] ]
+                    lc_received = list()
+                    for c_shared in lc_shared:
+                        c_converted = _receive( c_shared, ic_dtype_policy, in_player )
+                        lc_received.append( c_converted )
+                        n_done += 1
+                        f_rate = n_done /max( perf_counter() -n_start, 1e-9 )
+                        if c_converted.error is None:
+                            logging.info(f"Replay {n_done}/{len(ils_files)} | {c_converted.file} | Turns: {len(c_converted.mats)} | {f_rate:.2f} replays/s")
+                        else:
+                            n_failed += 1
+                            logging.error(f"Replay {n_done}/{len(ils_files)} | {c_converted.file} | Failed: {c_converted.error}")
+                    d_received[n_chunk] = lc_received
+
+            while n_next_yield in d_received:
+                yield from d_received.pop( n_next_yield )
+                n_next_yield += 1
+    finally:
+        #the consumer may stop early: blocks of the chunks done but not received are freed
+        l_executor[0].shutdown( wait=True, cancel_futures=True )
+        for c_future in d_futures:
+            if not c_future.cancelled() and c_future.exception() is None:
+                for c_shared in c_future.result():
+                    _discard( c_shared )
+
+    logging.info(f"Converted {n_done -n_failed}/{len(ils_files)} replays in {perf_counter() -n_start:.2f}s | Failed: {n_failed}")
+    return
@@ -0,0 +1,116 @@
+##  @package sparse_storage
+#   Sparse storage of the Perception and Action matricies of whole games
+#   Most cells of the WIDTH_MAX *HEIGHT_MAX frame are zero: a 12x12 map leaves 86% of the frame as padding, and an Action channel
+#   holds a handful of orders. A stacked (T, C, X, Y) array is stored as the flat index of its nonzero cells and their values, in
+#   the dtype of the array. Loading scatters the values into a zeroed, possibly preallocated, dense buffer
+#
+#   File: uncompressed numpy .npz, no pickle. For each sparse array "name": name.index (uint32), name.values, name.shape
+#   Dense arrays (e.g. the status vectors) are stored as they are under their name
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import zipfile
+from typing import NamedTuple
+
+import numpy as np
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   SPARSE ARRAY
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class SparseArray(NamedTuple):
+    """nonzero cells of a dense array. COO with the coordinates flattened in C order"""
+    shape: tuple
+    index: np.ndarray
+    """uint32 flat index of the nonzero cells, ascending"""
+    values: np.ndarray
+    """values of the nonzero cells, dtype of the dense array"""
+
+def sparse_encode( ian_dense : np.ndarray ) -> SparseArray:
+    """Sparse form of a dense array
+    Args:
+        ian_dense (np.ndarray): e.g. (T, 8, WIDTH_MAX, HEIGHT_MAX) Perception.mats of every turn
+    Returns:
+        SparseArray: | None if the array has too many cells for a uint32 index
+    """
+    if ian_dense.size > np.iinfo( np.uint32 ).max:
+        logging.error(f"Array is too large for a sparse index: {ian_dense.shape}")
+        return None
+    an_flat = ian_dense.reshape( -1 )
+    an_index = np.flatnonzero( an_flat )
+    return SparseArray( tuple(ian_dense.shape), an_index.astype( np.uint32 ), an_flat[an_index] )
+
+def sparse_densify( ic_sparse : SparseArray, ian_out : np.ndarray = None ) -> np.ndarray:
+    """Dense form of a sparse array
+    Args:
+        ic_sparse (SparseArray): sparse array
+        ian_out (np.ndarray): preallocated C contiguous destination with the shape and dtype of the sparse array. It is zeroed | None: allocated
+    Returns:
+        np.ndarray: dense array | None if the destination does not match
+    """
+    if ian_out is None:
+        ian_out = np.zeros( ic_sparse.shape, dtype=ic_sparse.values.dtype )
+    elif ian_out.shape != tuple(ic_sparse.shape) or ian_out.dtype != ic_sparse.values.dtype:
+        logging.error(f"Destination does not match | Expected: {tuple(ic_sparse.shape)} {ic_sparse.values.dtype} | Destination: {ian_out.shape} {ian_out.dtype}")
+        return None
+    elif not ian_out.flags.c_contiguous:
+        logging.error(f"Destination must be C contiguous")
+        return None
+    else:
+        ian_out.fill( 0 )
+    ian_out.reshape( -1 )[ic_sparse.index] = ic_sparse.values
+    return ian_out
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Save/Load
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def save_sparse( is_file_name : str, id_arrays : dict ) -> bool:
+    """save named arrays to file. SparseArray are stored sparse, np.ndarray are stored dense
+    Args:
+        is_file_name (str): destination file name. numpy adds .npz if missing
+        id_arrays (dict): name -> SparseArray | np.ndarray
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    d_file = dict()
+    for s_name, c_array in id_arrays.items():
+        if isinstance( c_array, SparseArray ):
+            d_file[f"{s_name}.index"] = c_array.index
+            d_file[f"{s_name}.values"] = c_array.values
+            d_file[f"{s_name}.shape"] = np.array( c_array.shape, dtype=np.int64 )
+        else:
+            d_file[s_name] = c_array
+
+    try:
+        np.savez( is_file_name, **d_file )
+    except OSError as problem:
+        logging.critical(f"Sparse: {problem}")
+        return True
+
+    return False
+
+def load_sparse( is_file_name : str ) -> dict:
+    """load named arrays saved by save_sparse
+    Args:
+        is_file_name (str): source file name
+    Returns:
+        dict: name -> SparseArray | np.ndarray. None on failure
+    """
+    d_arrays = dict()
+    try:
+        with np.load( is_file_name, allow_pickle=False ) as c_file:
+            for s_key in c_file.files:
+                s_name, _, s_part = s_key.rpartition( "." )
+                if s_part == "index":
+                    d_arrays[s_name] = SparseArray( tuple( c_file[f"{s_name}.shape"].tolist() ), c_file[s_key], c_file[f"{s_name}.values"] )
+                elif s_part not in ("values", "shape"):
+                    d_arrays[s_key] = c_file[s_key]
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as problem:
+        logging.critical(f"Sparse: {problem}")
+        return None
+
+    return d_arrays
@@ -1,120 +1,570 @@
-import logging
-
-#import game constant and make them available to the program
-from lux.constants import Constants
-INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
-
-from lux.game_map import GameMap
-from lux.game_objects import Player
-from lux.game_objects import Unit
-from lux.game_objects import City
-
-class Game:
-
-    #----------------    Overloads    ---------------
-
-    ## Stringfy class for print method
-    def __str__(self) -> str:
-        return f"Game | Turn: {self.turn} | Map Size: {self.map_width}*{self.map_height} | Unit P0: {len(self.players[0].units)} | Unit P1: {len(self.players[1].units)} |"
-
-    def _initialize(self, messages):
-        """
-        initialize state
-        """
-        self.id = int(messages[0])
-        self.turn = -1
-        """turn index"""
-        # get some other necessary initial input
-        mapInfo = messages[1].split(" ")
-        self.map_width = int(mapInfo[0])
-        self.map_height = int(mapInfo[1])
-        self.map = GameMap(self.map_width, self.map_height)
-        self.players = [Player(0), Player(1)]
-
-    def _end_turn(self):
-        print("D_FINISH")
-
-    def _reset_player_states(self):
-        self.players[0].units = []
-        self.players[0].cities = {}
-        self.players[0].city_tile_count = 0
-        self.players[1].units = []
-        self.players[1].cities = {}
-        self.players[1].city_tile_count = 0
-
-    def _update(self, messages: str() ):
-        """process observations into a game state
-        Args:
-            messages ([type]): [description]
-        """
-        self.map = GameMap(self.map_width, self.map_height)
-        self.turn += 1
-        self._reset_player_states()
-
-        for update in messages:
-            if update == INPUT_CONSTANTS.DONE:
-                break
-            strs = update.split(" ")
-            input_identifier = strs[0]
-            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
-                team = int(strs[1])
-                self.players[team].research_points = int(strs[2])
-            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
-                r_type = strs[1]
-                x = int(strs[2])
-                y = int(strs[3])
-                amt = int(float(strs[4]))
-                self.map._setResource(r_type, x, y, amt)
-            elif input_identifier == INPUT_CONSTANTS.UNITS:
-                #Add unit to game state
-                unittype = int(strs[1])
-                team = int(strs[2])
-                unitid = strs[3]
-                x = int(strs[4])
-                y = int(strs[5])
-                cooldown = float(strs[6])
-                wood = int(strs[7])
-                coal = int(strs[8])
-                uranium = int(strs[9])
-                #
-                self.players[team].units.append(Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium))
-
-            elif input_identifier == INPUT_CONSTANTS.CITY:
-                team = int(strs[1])
-                cityid = strs[2]
-                fuel = float(strs[3])
-                lightupkeep = float(strs[4])
-                self.players[team].cities[cityid] = City(team, cityid, fuel, lightupkeep)
-            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
-                team = int(strs[1])
-                cityid = strs[2]
-                x = int(strs[3])
-                y = int(strs[4])
-                cooldown = float(strs[5])
-                city = self.players[team].cities[cityid]
-                citytile = city._add_city_tile(x, y, cooldown)
-                self.map.get_cell(x, y).citytile = citytile
-                self.players[team].city_tile_count += 1;
-            elif input_identifier == INPUT_CONSTANTS.ROADS:
-                x = int(strs[1])
-                y = int(strs[2])
-                road = float(strs[3])
-                self.map.get_cell(x, y).road = road
-
-    def _set_player_id( self, in_player_id : int ) -> bool:
-        """Tells the game state whichplayer is being controlled by the agent
-        Args:
-            in_player_id (number): ID of the palyer the agent is controlling
-        Returns:
-            bool: False: success | True: fails because ID is out of range
-        """
-        if ((in_player_id < 0) or (in_player_id > 1)):
-            logging.critical(f"Invalid player ID: {in_player_id}")
-            return True
-
-        self.id = in_player_id
-        """ID of the player the agent is controlling"""
-        self.opponent_id = (in_player_id+1)%2
-        """ID of the player the opponent is controlling"""
-
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+#import game constant and make them available to the program
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+from lux.game_map import GameMap
+from lux.game_map import GameMapArray
+from lux.game_map import RESOURCE_TYPE_CODES
+from lux.game_map import id_to_number
+from lux.game_objects import Player
+from lux.game_objects import Unit
+from lux.game_objects import City
+from lux.game_objects import CityTile
+from lux.game_updates import parse_updates
+from lux.game_updates import RECORD_DTYPES
+from lux.game_diff import GameDiff
+from lux.game_diff import diff_records
+
+class GameSnapshot(NamedTuple):
+    """Immutable state of a Game at a given turn. Returned by Game.snapshot, applied by Game.restore
+    The state is stored as the read only record arrays of lux.game_updates, one per identifier.
+    Record arrays that did not change since the previous snapshot of the same game are shared with it.
+    """
+    id: int
+    """ID of the player the agent is controlling"""
+    opponent_id: int
+    """ID of the player the opponent is controlling"""
+    turn: int
+    """turn index"""
+    map_width: int
+    map_height: int
+    records: dict
+    """identifier -> read only record array"""
+    unit_id_count: int = 0
+    """last unit id given by the engine. 0: unknown"""
+    city_id_count: int = 0
+    """last city id given by the engine. 0: unknown"""
+
+class Game:
+
+    #----------------    Overloads    ---------------
+
+    ## Stringfy class for print method
+    def __str__(self) -> str:
+        return f"Game | Turn: {self.turn} | Map Size: {self.map_width}*{self.map_height} | Unit P0: {len(self.players[0].units)} | Unit P1: {len(self.players[1].units)} |"
+
+    def _initialize(self, messages, ix_incremental : bool = False, ix_array_map : bool = False):
+        """
+        initialize state
+        Args:
+            messages: first observation updates. player id and map size
+            ix_incremental (bool): False: rebuild the map and all entities every turn | True: keep map and entities alive and patch them in place
+            ix_array_map (bool): False: GameMap made of Cell objects | True: GameMapArray backed by numpy grids
+        """
+        self.id = int(messages[0])
+        self.turn = -1
+        """turn index"""
+        self.unit_id_count = 0
+        """last unit id given by the engine. 0: unknown"""
+        self.city_id_count = 0
+        """last city id given by the engine. 0: unknown"""
+        # get some other necessary initial input
+        mapInfo = messages[1].split(" ")
+        self.map_width = int(mapInfo[0])
+        self.map_height = int(mapInfo[1])
+        self.x_array_map = ix_array_map
+        """True: the map is a GameMapArray"""
+        self.map = GameMapArray(self.map_width, self.map_height) if ix_array_map else GameMap(self.map_width, self.map_height)
+        self.players = [Player(0), Player(1)]
+        self.x_incremental = ix_incremental
+        """True: _update patches the previous state in place instead of rebuilding it"""
+        self.__init_incremental()
+
+    def __init_incremental(self):
+        """Initialize the bookkeeping used by the incremental update
+        Entities alive in the previous turn are indexed so they can be patched, entities that disappear are parked in a pool to be recycled
+        """
+        #alive entities of the previous turn. also the spatial index of the current turn
+        self._d_units = dict()
+        """unit id -> Unit"""
+        self._d_units_at = dict()
+        """(x, y) -> list(Unit). units stacked inside a citytile share the same list"""
+        self._d_citytiles = dict()
+        """(x, y) -> CityTile"""
+        self._set_resource_cells = set()
+        """(x, y) of the cells with a Resource"""
+        self._set_road_cells = set()
+        """(x, y) of the cells with a road"""
+        #pools of dead entities, ready to be recycled
+        self._lc_unit_pool = list()
+        self._lc_city_pool = list()
+        self._lc_citytile_pool = list()
+
+    def _end_turn(self):
+        print("D_FINISH")
+
+    def _reset_player_states(self):
+        self.players[0].units = []
+        self.players[0].cities = {}
+        self.players[0].city_tile_count = 0
+        self.players[1].units = []
+        self.players[1].cities = {}
+        self.players[1].city_tile_count = 0
+
+    def _update(self, messages: str() ):
+        """process observations into a game state
+        Args:
+            messages ([type]): [description]
+        """
+        #game states from older pickles have no update mode
+        if getattr(self, "x_array_map", False):
+            self._update_records(messages)
+            return
+        #the records of the previous turn do not describe this turn
+        self.records = None
+        if getattr(self, "x_incremental", False):
+            self._update_incremental(messages)
+            return
+
+        self.map = GameMap(self.map_width, self.map_height)
+        self.turn += 1
+        self._reset_player_states()
+        self._d_units = dict()
+        self._d_units_at = dict()
+        self._d_citytiles = dict()
+
+        for update in messages:
+            if update == INPUT_CONSTANTS.DONE:
+                break
+            strs = update.split(" ")
+            input_identifier = strs[0]
+            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
+                team = int(strs[1])
+                self.players[team].research_points = int(strs[2])
+            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
+                r_type = strs[1]
+                x = int(strs[2])
+                y = int(strs[3])
+                amt = int(float(strs[4]))
+                self.map._setResource(r_type, x, y, amt)
+            elif input_identifier == INPUT_CONSTANTS.UNITS:
+                #Add unit to game state
+                unittype = int(strs[1])
+                team = int(strs[2])
+                unitid = strs[3]
+                x = int(strs[4])
+                y = int(strs[5])
+                cooldown = float(strs[6])
+                wood = int(strs[7])
+                coal = int(strs[8])
+                uranium = int(strs[9])
+                #
+                unit = Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium)
+                self.players[team].units.append(unit)
+                self._d_units[unitid] = unit
+                self._d_units_at.setdefault((x, y), []).append(unit)
+
+            elif input_identifier == INPUT_CONSTANTS.CITY:
+                team = int(strs[1])
+                cityid = strs[2]
+                fuel = float(strs[3])
+                lightupkeep = float(strs[4])
+                self.players[team].cities[cityid] = City(team, cityid, fuel, lightupkeep)
+            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
+                team = int(strs[1])
+                cityid = strs[2]
+                x = int(strs[3])
+                y = int(strs[4])
+                cooldown = float(strs[5])
+                city = self.players[team].cities[cityid]
+                citytile = city._add_city_tile(x, y, cooldown)
+                self.map.get_cell(x, y).citytile = citytile
+                self._d_citytiles[(x, y)] = citytile
+                self.players[team].city_tile_count += 1;
+            elif input_identifier == INPUT_CONSTANTS.ROADS:
+                x = int(strs[1])
+                y = int(strs[2])
+                road = float(strs[3])
+                self.map.get_cell(x, y).road = road
+
+    def _update_incremental(self, messages: str() ):
+        """process observations into the existing game state
+        The map and the Unit, City, CityTile, Resource objects are kept alive between turns and patched in place.
+        Entities that are not in the observations anymore are removed and parked in a pool, new entities are recycled from the pool.
+        Args:
+            messages ([type]): [description]
+        """
+        self.turn += 1
+
+        #entities alive last turn. whatever is left in them after parsing has disappeared
+        d_units_old = self._d_units
+        d_citytiles_old = self._d_citytiles
+        set_resource_cells_old = self._set_resource_cells
+        set_road_cells_old = self._set_road_cells
+        ld_cities_old = [ self.players[0].cities, self.players[1].cities ]
+        #entities alive this turn
+        d_units = dict()
+        d_units_at = dict()
+        d_citytiles = dict()
+        set_resource_cells = set()
+        set_road_cells = set()
+        for c_player in self.players:
+            c_player.units.clear()
+            c_player.cities = dict()
+            c_player.city_tile_count = 0
+
+        for update in messages:
+            if update == INPUT_CONSTANTS.DONE:
+                break
+            strs = update.split(" ")
+            input_identifier = strs[0]
+            if input_identifier == INPUT_CONSTANTS.RESEARCH_POINTS:
+                team = int(strs[1])
+                self.players[team].research_points = int(strs[2])
+            elif input_identifier == INPUT_CONSTANTS.RESOURCES:
+                r_type = strs[1]
+                x = int(strs[2])
+                y = int(strs[3])
+                amt = int(float(strs[4]))
+                set_resource_cells_old.discard((x, y))
+                self.map._setResource(r_type, x, y, amt)
+                set_resource_cells.add((x, y))
+            elif input_identifier == INPUT_CONSTANTS.UNITS:
+                unittype = int(strs[1])
+                team = int(strs[2])
+                unitid = strs[3]
+                x = int(strs[4])
+                y = int(strs[5])
+                cooldown = float(strs[6])
+                wood = int(strs[7])
+                coal = int(strs[8])
+                uranium = int(strs[9])
+                #patch the unit if alive last turn, otherwise recycle one from the pool
+                unit = d_units_old.pop(unitid, None)
+                if unit is None and self._lc_unit_pool:
+                    unit = self._lc_unit_pool.pop()
+                if unit is None:
+                    unit = Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium)
+                else:
+                    unit._recycle(team, unittype, unitid, x, y, cooldown, wood, coal, uranium)
+                d_units[unitid] = unit
+                d_units_at.setdefault((x, y), []).append(unit)
+                self.players[team].units.append(unit)
+            elif input_identifier == INPUT_CONSTANTS.CITY:
+                team = int(strs[1])
+                cityid = strs[2]
+                fuel = float(strs[3])
+                lightupkeep = float(strs[4])
+                city = ld_cities_old[team].pop(cityid, None)
+                if city is None and self._lc_city_pool:
+                    city = self._lc_city_pool.pop()
+                if city is None:
+                    city = City(team, cityid, fuel, lightupkeep)
+                else:
+                    city._recycle(team, cityid, fuel, lightupkeep)
+                self.players[team].cities[cityid] = city
+            elif input_identifier == INPUT_CONSTANTS.CITY_TILES:
+                team = int(strs[1])
+                cityid = strs[2]
+                x = int(strs[3])
+                y = int(strs[4])
+                cooldown = float(strs[5])
+                citytile = d_citytiles_old.pop((x, y), None)
+                if citytile is None and self._lc_citytile_pool:
+                    citytile = self._lc_citytile_pool.pop()
+                if citytile is None:
+                    citytile = CityTile(team, cityid, x, y, cooldown)
+                else:
+                    citytile._recycle(team, cityid, x, y, cooldown)
+                self.players[team].cities[cityid]._attach_city_tile(citytile)
+                self.map._setCitytile(x, y, citytile)
+                d_citytiles[(x, y)] = citytile
+                self.players[team].city_tile_count += 1
+            elif input_identifier == INPUT_CONSTANTS.ROADS:
+                x = int(strs[1])
+                y = int(strs[2])
+                road = float(strs[3])
+                set_road_cells_old.discard((x, y))
+                self.map._setRoad(x, y, road)
+                set_road_cells.add((x, y))
+
+        #clear what disappeared since last turn and park the objects in the pools
+        for (x, y) in set_resource_cells_old:
+            self.map._clearResource(x, y)
+        for (x, y) in set_road_cells_old:
+            self.map._setRoad(x, y, 0)
+        for (x, y), citytile in d_citytiles_old.items():
+            self.map._setCitytile(x, y, None)
+            self._lc_citytile_pool.append(citytile)
+        for d_cities in ld_cities_old:
+            self._lc_city_pool.extend(d_cities.values())
+        self._lc_unit_pool.extend(d_units_old.values())
+
+        self._d_units = d_units
+        self._d_units_at = d_units_at
+        self._d_citytiles = d_citytiles
+        self._set_resource_cells = set_resource_cells
+        self._set_road_cells = set_road_cells
+
+    def _update_records(self, messages: str() ):
+        """process observations into a game state through the bulk parser lux.game_updates.parse_updates
+        Args:
+            messages ([type]): [description]
+        """
+        self.turn += 1
+        self._apply_records( parse_updates(messages) )
+
+    def _apply_records(self, id_records : dict):
+        """fill the game state from the record arrays of a turn
+        The map grids and the unit table are fed with the records directly.
+        Unit, City and CityTile objects are patched like the incremental update, or built again if the game is not incremental.
+        Args:
+            id_records (dict): identifier -> record array. returned by lux.game_updates.parse_updates
+        """
+        #without the incremental mode nothing survives from the previous turn
+        if not self.x_incremental:
+            self.__init_incremental()
+
+        self.records = id_records
+        """record arrays of the turn. identifier -> record array"""
+        self.unit_table = id_records[INPUT_CONSTANTS.UNITS]
+        """record array of the units of both players. lux.game_updates.UNITS_DTYPE"""
+        self.map._from_records(id_records)
+        #cells set by the records, for the string incremental update
+        an_resources = id_records[INPUT_CONSTANTS.RESOURCES]
+        self._set_resource_cells = set( zip( an_resources["x"].tolist(), an_resources["y"].tolist() ) )
+        an_roads = id_records[INPUT_CONSTANTS.ROADS]
+        self._set_road_cells = set( zip( an_roads["x"].tolist(), an_roads["y"].tolist() ) )
+
+        for team, points in id_records[INPUT_CONSTANTS.RESEARCH_POINTS].tolist():
+            self.players[team].research_points = points
+
+        d_units_old = self._d_units
+        d_citytiles_old = self._d_citytiles
+        ld_cities_old = [ self.players[0].cities, self.players[1].cities ]
+        d_units = dict()
+        d_units_at = dict()
+        d_citytiles = dict()
+        for c_player in self.players:
+            c_player.units.clear()
+            c_player.cities = dict()
+            c_player.city_tile_count = 0
+
+        for unittype, team, n_id, x, y, cooldown, wood, coal, uranium in id_records[INPUT_CONSTANTS.UNITS].tolist():
+            unitid = f"u_{n_id}"
+            unit = d_units_old.pop(unitid, None)
+            if unit is None and self._lc_unit_pool:
+                unit = self._lc_unit_pool.pop()
+            if unit is None:
+                unit = Unit(team, unittype, unitid, x, y, cooldown, wood, coal, uranium)
+            else:
+                unit._recycle(team, unittype, unitid, x, y, cooldown, wood, coal, uranium)
+            d_units[unitid] = unit
+            d_units_at.setdefault((x, y), []).append(unit)
+            self.players[team].units.append(unit)
+
+        for team, n_id, fuel, lightupkeep in id_records[INPUT_CONSTANTS.CITY].tolist():
+            cityid = f"c_{n_id}"
+            city = ld_cities_old[team].pop(cityid, None)
+            if city is None and self._lc_city_pool:
+                city = self._lc_city_pool.pop()
+            if city is None:
+                city = City(team, cityid, fuel, lightupkeep)
+            else:
+                city._recycle(team, cityid, fuel, lightupkeep)
+            self.players[team].cities[cityid] = city
+
+        for team, n_city_id, x, y, cooldown in id_records[INPUT_CONSTANTS.CITY_TILES].tolist():
+            cityid = f"c_{n_city_id}"
+            citytile = d_citytiles_old.pop((x, y), None)
+            if citytile is None and self._lc_citytile_pool:
+                citytile = self._lc_citytile_pool.pop()
+            if citytile is None:
+                citytile = CityTile(team, cityid, x, y, cooldown)
+            else:
+                citytile._recycle(team, cityid, x, y, cooldown)
+            self.players[team].cities[cityid]._attach_city_tile(citytile)
+            #grids are already filled, only the object is attached
+            self.map._attachCitytile(x, y, citytile)
+            d_citytiles[(x, y)] = citytile
+            self.players[team].city_tile_count += 1
+
+        #park what disappeared since last turn in the pools
+        self._lc_citytile_pool.extend(d_citytiles_old.values())
+        for d_cities in ld_cities_old:
+            self._lc_city_pool.extend(d_cities.values())
+        self._lc_unit_pool.extend(d_units_old.values())
+
+        self._d_units = d_units
+        self._d_units_at = d_units_at
+        self._d_citytiles = d_citytiles
+
+    def _to_records(self) -> dict:
+        """record arrays describing the current game state
+        The records of the turn are used if the game was filled from them, otherwise they are built from the map and the players
+        Returns:
+            dict: identifier -> record array
+        """
+        if getattr(self, "records", None) is not None:
+            return self.records
+
+        dlt_rows = { s_identifier : list() for s_identifier in RECORD_DTYPES }
+        for c_player in self.players:
+            dlt_rows[INPUT_CONSTANTS.RESEARCH_POINTS].append( (c_player.team, c_player.research_points) )
+            for c_unit in c_player.units:
+                dlt_rows[INPUT_CONSTANTS.UNITS].append( (c_unit.type, c_unit.team, id_to_number(c_unit.id), c_unit.pos.x, c_unit.pos.y, c_unit.cooldown, c_unit.cargo.wood, c_unit.cargo.coal, c_unit.cargo.uranium) )
+            for c_city in c_player.cities.values():
+                dlt_rows[INPUT_CONSTANTS.CITY].append( (c_city.team, id_to_number(c_city.cityid), c_city.fuel, c_city.light_upkeep) )
+                for c_citytile in c_city.citytiles:
+                    dlt_rows[INPUT_CONSTANTS.CITY_TILES].append( (c_citytile.team, id_to_number(c_citytile.cityid), c_citytile.pos.x, c_citytile.pos.y, c_citytile.cooldown) )
+        #map content, in the order of the observations. x then y
+        for x in range(self.map_width):
+            for y in range(self.map_height):
+                c_cell = self.map.get_cell(x, y)
+                if c_cell.resource is not None:
+                    dlt_rows[INPUT_CONSTANTS.RESOURCES].append( (RESOURCE_TYPE_CODES[c_cell.resource.type], x, y, c_cell.resource.amount) )
+                if c_cell.road != 0:
+                    dlt_rows[INPUT_CONSTANTS.ROADS].append( (x, y, c_cell.road) )
+
+        return { s_identifier : np.array( lt_rows, dtype=RECORD_DTYPES[s_identifier] ) for s_identifier, lt_rows in dlt_rows.items() }
+
+    def snapshot(self) -> GameSnapshot:
+        """Take an immutable snapshot of the game state
+        Record arrays equal to the ones of the previous snapshot are shared with it, so a list of snapshots only stores what changed
+        Returns:
+            GameSnapshot: state of the game at this turn
+        """
+        c_previous = getattr(self, "_c_last_snapshot", None)
+        d_records = dict()
+        for s_identifier, an_records in self._to_records().items():
+            if c_previous is not None and np.array_equal( c_previous.records[s_identifier], an_records ):
+                #unchanged. share the previous array
+                d_records[s_identifier] = c_previous.records[s_identifier]
+            else:
+                an_records.flags.writeable = False
+                d_records[s_identifier] = an_records
+        c_snapshot = GameSnapshot( self.id, getattr(self, "opponent_id", (self.id+1)%2), self.turn, self.map_width, self.map_height, d_records, getattr(self, "unit_id_count", 0), getattr(self, "city_id_count", 0) )
+        self._c_last_snapshot = c_snapshot
+        return c_snapshot
+
+    def diff(self, ic_previous) -> GameDiff:
+        """Structured change set from a previous state of the game to this one
+        Units spawned, moved, died and cargo changes, resource depletion, new and lost citytiles, roads and research.
+        lux.game_diff.patch_snapshot applies the change set to the previous snapshot to get this state back.
+        Args:
+            ic_previous (Game | GameSnapshot): state of the game on an earlier turn, usually the previous turn
+        Returns:
+            GameDiff: changes from ic_previous to this game state
+        """
+        d_previous = ic_previous.records if isinstance(ic_previous, GameSnapshot) else ic_previous._to_records()
+        c_diff = diff_records( d_previous, self._to_records(), ic_previous.turn, self.turn )
+        return c_diff._replace( unit_id_count = getattr(self, "unit_id_count", 0), city_id_count = getattr(self, "city_id_count", 0) )
+
+    def restore(self, ic_snapshot : GameSnapshot):
+        """Set the game to the state of a snapshot
+        Works on a Game that was never initialized, in that case the map is a GameMap and the update is incremental.
+        A game of the same map size keeps its map backend and recycles its entities.
+        Args:
+            ic_snapshot (GameSnapshot): state to restore
+        """
+        if getattr(self, "map", None) is None or self.map_width != ic_snapshot.map_width or self.map_height != ic_snapshot.map_height:
+            self.map_width = ic_snapshot.map_width
+            self.map_height = ic_snapshot.map_height
+            self.x_array_map = getattr(self, "x_array_map", False)
+            self.map = GameMapArray(self.map_width, self.map_height) if self.x_array_map else GameMap(self.map_width, self.map_height)
+            self.players = [Player(0), Player(1)]
+            self.x_incremental = getattr(self, "x_incremental", True)
+            self.__init_incremental()
+        self.id = ic_snapshot.id
+        self.opponent_id = ic_snapshot.opponent_id
+        self.turn = ic_snapshot.turn
+        self.unit_id_count = ic_snapshot.unit_id_count
+        self.city_id_count = ic_snapshot.city_id_count
+        self._apply_records( ic_snapshot.records )
+
+    def __index_players(self):
+        """Build the spatial index from the players. Game states from older pickles have no index"""
+        self._d_units = dict()
+        self._d_units_at = dict()
+        self._d_citytiles = dict()
+        for c_player in self.players:
+            for c_unit in c_player.units:
+                self._d_units[c_unit.id] = c_unit
+                self._d_units_at.setdefault((c_unit.pos.x, c_unit.pos.y), []).append(c_unit)
+            for c_city in c_player.cities.values():
+                for c_citytile in c_city.citytiles:
+                    self._d_citytiles[(c_citytile.pos.x, c_citytile.pos.y)] = c_citytile
+
+    def get_unit(self, unitid : str) -> Unit:
+        """O(1) search of a unit of either player by id
+        Args:
+            unitid (str): unique id of the unit. e.g. u_12
+        Returns:
+            Unit: the unit | None if no unit has that id this turn
+        """
+        if getattr(self, "_d_units_at", None) is None:
+            self.__index_players()
+        return self._d_units.get(unitid)
+
+    def get_units_at(self, x : int, y : int) -> list:
+        """O(1) search of the units of either player on a tile
+        Args:
+            x (int): coordinate of the tile
+            y (int): coordinate of the tile
+        Returns:
+            list(Unit): units on the tile, in observation order. More than one when units are stacked inside a citytile. Empty if none
+        """
+        if getattr(self, "_d_units_at", None) is None:
+            self.__index_players()
+        return self._d_units_at.get((x, y), [])
+
+    def get_citytile_at(self, x : int, y : int) -> CityTile:
+        """O(1) search of the citytile of either player on a tile
+        Args:
+            x (int): coordinate of the tile
+            y (int): coordinate of the tile
+        Returns:
+            CityTile: the citytile | None if the tile has no citytile
+        """
+        if getattr(self, "_d_units_at", None) is None:
+            self.__index_players()
+        return self._d_citytiles.get((x, y))
+
+    def get_units_by_position(self) -> dict:
+        """Spatial index of the units of this turn. Do not modify, it is rebuilt by the next update
+        Returns:
+            dict: (x, y) -> list(Unit) for every occupied tile
+        """
+        if getattr(self, "_d_units_at", None) is None:
+            self.__index_players()
+        return self._d_units_at
+
+    def _set_player_id( self, in_player_id : int ) -> bool:
+        """Tells the game state whichplayer is being controlled by the agent
+        Args:
+            in_player_id (number): ID of the palyer the agent is controlling
+        Returns:
+            bool: False: success | True: fails because ID is out of range
+        """
+        if ((in_player_id < 0) or (in_player_id > 1)):
+            logging.critical(f"Invalid player ID: {in_player_id}")
+            return True
+
+        self.id = in_player_id
+        """ID of the player the agent is controlling"""
+        self.opponent_id = (in_player_id+1)%2
+        """ID of the player the opponent is controlling"""
+
+        return False
+
+    def _set_id_counts( self, in_unit_id_count : int, in_city_id_count : int ) -> bool:
+        """Tells the game state the id counters of the engine, sent with the observation and not in the updates
+        Args:
+            in_unit_id_count (int): observation globalUnitIDCount. last unit id given by the engine
+            in_city_id_count (int): observation globalCityIDCount. last city id given by the engine
+        Returns:
+            bool: False: success | True: fails because a counter is negative
+        """
+        if ((in_unit_id_count < 0) or (in_city_id_count < 0)):
+            logging.critical(f"Invalid id counters: unit {in_unit_id_count} | city {in_city_id_count}")
+            return True
+
+        self.unit_id_count = int(in_unit_id_count)
+        self.city_id_count = int(in_city_id_count)
+
         return False
\ No newline at end of file
@@ -0,0 +1,251 @@
+##  @package game_diff
+#   Turn to turn change set of a game state
+#   Two game states are compared record array by record array (lux.game_updates). Each record is matched to the record
+#   with the same key in the other state, e.g. units by id and resources by position
+#   The change set can be applied to the earlier state to get the later one back, so a replay can be stored as its first turn
+#   followed by small deltas
+#
+#   e.g. unit u_3 moves from (4, 5) to (4, 6), wood at (7, 7) is depleted
+#   GameDiff.records["u"] = RecordDiff( added=[], removed=[], changed=[(0, 0, 3, 4, 6, 2.0, 0, 0, 0)], previous=[(0, 0, 3, 4, 5, 0.0, 0, 0, 0)], order=None )
+#   GameDiff.records["r"] = RecordDiff( added=[], removed=[(1, 7, 7, 20)], changed=[], previous=[], order=None )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+from typing import NamedTuple
+
+import numpy as np
+
+#import game constant and make them available to the program
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+from lux.game_updates import RECORD_DTYPES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   KEYS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#fields that identify a record between two turns. unit and city ids are unique across teams
+RECORD_KEYS = {
+    INPUT_CONSTANTS.RESEARCH_POINTS : ("team",),
+    INPUT_CONSTANTS.RESOURCES : ("x", "y"),
+    INPUT_CONSTANTS.UNITS : ("id",),
+    INPUT_CONSTANTS.CITY : ("id",),
+    INPUT_CONSTANTS.CITY_TILES : ("x", "y"),
+    INPUT_CONSTANTS.ROADS : ("x", "y"),
+}
+
+def _keys( is_identifier : str, ian_records : np.ndarray ) -> np.ndarray:
+    """one int64 key per record. position keys are packed as x<<16 | y
+    Returns:
+        np.ndarray: int64 keys, same order as the records
+    """
+    ls_fields = RECORD_KEYS[is_identifier]
+    an_keys = ian_records[ls_fields[0]].astype( np.int64 )
+    for s_field in ls_fields[1:]:
+        an_keys = (an_keys << 16) | ian_records[s_field].astype( np.int64 )
+    return an_keys
+
+def _match( ian_keys : np.ndarray, ian_targets : np.ndarray ) -> np.ndarray:
+    """index in ian_keys of each target key. all targets must be in ian_keys
+    Returns:
+        np.ndarray: indexes, one per target
+    """
+    an_sorter = np.argsort( ian_keys, kind="stable" )
+    return an_sorter[ np.searchsorted( ian_keys, ian_targets, sorter=an_sorter ) ]
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CHANGE SET
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class RecordDiff(NamedTuple):
+    """Changes of the record array of one identifier between two turns"""
+    added: np.ndarray
+    """records of the later turn whose key is not in the earlier turn"""
+    removed: np.ndarray
+    """records of the earlier turn whose key is not in the later turn"""
+    changed: np.ndarray
+    """records of the later turn whose key is in both turns with different values"""
+    previous: np.ndarray
+    """records of the earlier turn matching changed, same order | None in a compact change set"""
+    order: np.ndarray
+    """None if patching yields the records of the later turn in order | index array that puts the patched records in order"""
+
+class GameDiff(NamedTuple):
+    """Structured change set between two turns of a game. Returned by Game.diff, applied by patch_records and patch_snapshot"""
+    previous_turn: int
+    turn: int
+    records: dict
+    """identifier -> RecordDiff"""
+    unit_id_count: int = 0
+    """last unit id given by the engine on the later turn. 0: unknown"""
+    city_id_count: int = 0
+    """last city id given by the engine on the later turn. 0: unknown"""
+
+    def _moved( self, is_identifier : str, its_fields : tuple ) -> tuple:
+        """changed records where any of the fields differs from the earlier turn
+        Returns:
+            tuple(np.ndarray, np.ndarray): records of the earlier turn, records of the later turn
+        """
+        c_diff = self.records[is_identifier]
+        if c_diff.previous is None:
+            logging.error(f"Compact change set has no earlier records: {is_identifier}")
+            return c_diff.changed[:0], c_diff.changed[:0]
+        ax_mask = np.zeros( len(c_diff.changed), dtype=bool )
+        for s_field in its_fields:
+            ax_mask |= c_diff.changed[s_field] != c_diff.previous[s_field]
+        return c_diff.previous[ax_mask], c_diff.changed[ax_mask]
+
+    @property
+    def units_spawned(self) -> np.ndarray:
+        """records of the units built this turn"""
+        return self.records[INPUT_CONSTANTS.UNITS].added
+
+    @property
+    def units_died(self) -> np.ndarray:
+        """records of the units lost this turn, as they were on the earlier turn"""
+        return self.records[INPUT_CONSTANTS.UNITS].removed
+
+    @property
+    def units_moved(self) -> tuple:
+        """(records before, records after) of the units that changed position"""
+        return self._moved( INPUT_CONSTANTS.UNITS, ("x", "y") )
+
+    @property
+    def units_cargo(self) -> tuple:
+        """(records before, records after) of the units whose cargo changed"""
+        return self._moved( INPUT_CONSTANTS.UNITS, ("wood", "coal", "uranium") )
+
+    @property
+    def resources_depleted(self) -> np.ndarray:
+        """records of the resource cells emptied this turn, as they were on the earlier turn"""
+        return self.records[INPUT_CONSTANTS.RESOURCES].removed
+
+    @property
+    def resources_changed(self) -> tuple:
+        """(records before, records after) of the resource cells whose amount changed. collection and regrowth"""
+        return self._moved( INPUT_CONSTANTS.RESOURCES, ("amount",) )
+
+    @property
+    def citytiles_new(self) -> np.ndarray:
+        """records of the citytiles built this turn"""
+        return self.records[INPUT_CONSTANTS.CITY_TILES].added
+
+    @property
+    def citytiles_lost(self) -> np.ndarray:
+        """records of the citytiles lost this turn, as they were on the earlier turn"""
+        return self.records[INPUT_CONSTANTS.CITY_TILES].removed
+
+    @property
+    def roads(self) -> RecordDiff:
+        """changes of the road levels. built, pillaged, removed with a city"""
+        return self.records[INPUT_CONSTANTS.ROADS]
+
+    @property
+    def research(self) -> tuple:
+        """(records before, records after) of the teams whose research points changed"""
+        return self._moved( INPUT_CONSTANTS.RESEARCH_POINTS, ("points",) )
+
+    def compact(self) -> 'GameDiff':
+        """Change set for storage, without the earlier version of the changed records. About half the size, still enough to patch
+        Returns:
+            GameDiff: same change set with RecordDiff.previous set to None
+        """
+        return self._replace( records = { s_identifier : c_diff._replace( previous = None ) for s_identifier, c_diff in self.records.items() } )
+
+    def summary(self) -> str:
+        """Returns: str: one line count of the changes, for logging"""
+        return (
+            f"Diff {self.previous_turn}->{self.turn} | Units +{len(self.units_spawned)} -{len(self.units_died)} moved {len(self.units_moved[1])} cargo {len(self.units_cargo[1])} | "
+            f"Resources depleted {len(self.resources_depleted)} changed {len(self.resources_changed[1])} | "
+            f"Citytiles +{len(self.citytiles_new)} -{len(self.citytiles_lost)} | Roads {len(self.roads.added) +len(self.roads.removed) +len(self.roads.changed)} | "
+            f"Research {len(self.research[1])}"
+        )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   DIFF/PATCH
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def _patch_record( is_identifier : str, ian_records : np.ndarray, ic_diff : RecordDiff ) -> np.ndarray:
+    """apply the changes of one identifier. records that survive keep their place, added records are appended, then order is applied
+    Returns:
+        np.ndarray: record array of the later turn
+    """
+    if ic_diff.order is None and len(ic_diff.added) == 0 and len(ic_diff.removed) == 0 and len(ic_diff.changed) == 0:
+        return ian_records
+    an_keys = _keys( is_identifier, ian_records )
+    an_patched = ian_records[ ~np.isin( an_keys, _keys( is_identifier, ic_diff.removed ) ) ]
+    if len(ic_diff.changed) > 0:
+        an_patched = an_patched.copy()
+        an_patched[ _match( _keys( is_identifier, an_patched ), _keys( is_identifier, ic_diff.changed ) ) ] = ic_diff.changed
+    if len(ic_diff.added) > 0:
+        an_patched = np.concatenate( (an_patched, ic_diff.added) )
+    if ic_diff.order is not None:
+        an_patched = an_patched[ic_diff.order]
+    return an_patched
+
+def _diff_record( is_identifier : str, ian_previous : np.ndarray, ian_current : np.ndarray ) -> RecordDiff:
+    """compare the record arrays of one identifier
+    Returns:
+        RecordDiff: changes from ian_previous to ian_current
+    """
+    an_keys_previous = _keys( is_identifier, ian_previous )
+    an_keys_current = _keys( is_identifier, ian_current )
+    ax_kept = np.isin( an_keys_current, an_keys_previous )
+    an_kept = ian_current[ax_kept]
+    an_kept_previous = ian_previous[ _match( an_keys_previous, an_keys_current[ax_kept] ) ]
+    ax_changed = an_kept != an_kept_previous
+    c_diff = RecordDiff(
+        added = ian_current[~ax_kept],
+        removed = ian_previous[ ~np.isin( an_keys_previous, an_keys_current ) ],
+        changed = an_kept[ax_changed],
+        previous = an_kept_previous[ax_changed],
+        order = None,
+    )
+    #the engine does not always keep the order of the records. e.g. cities of a merge. store the permutation only when needed
+    an_keys_patched = _keys( is_identifier, _patch_record( is_identifier, ian_previous, c_diff ) )
+    if not np.array_equal( an_keys_patched, an_keys_current ):
+        c_diff = c_diff._replace( order = _match( an_keys_patched, an_keys_current ).astype( np.int32 ) )
+    return c_diff
+
+def diff_records( id_previous : dict, id_current : dict, in_previous_turn : int = -1, in_turn : int = -1 ) -> GameDiff:
+    """Compare the record arrays of two turns
+    Args:
+        id_previous (dict): identifier -> record array of the earlier turn
+        id_current (dict): identifier -> record array of the later turn
+        in_previous_turn (int): turn of id_previous, stored in the change set
+        in_turn (int): turn of id_current, stored in the change set
+    Returns:
+        GameDiff: changes from id_previous to id_current
+    """
+    return GameDiff( in_previous_turn, in_turn, { s_identifier : _diff_record( s_identifier, id_previous[s_identifier], id_current[s_identifier] ) for s_identifier in RECORD_DTYPES } )
+
+def patch_records( id_records : dict, ic_diff : GameDiff ) -> dict:
+    """Apply a change set to the record arrays of the earlier turn
+    Args:
+        id_records (dict): identifier -> record array of the earlier turn
+        ic_diff (GameDiff): changes returned by diff_records or Game.diff
+    Returns:
+        dict: identifier -> record array of the later turn, equal to the records the change set was computed from
+    """
+    return { s_identifier : _patch_record( s_identifier, id_records[s_identifier], ic_diff.records[s_identifier] ) for s_identifier in RECORD_DTYPES }
+
+def patch_snapshot( ic_snapshot, ic_diff : GameDiff ):
+    """Apply a change set to a snapshot of the earlier turn
+    e.g. rebuild a replay stored as its first snapshot and one change set per turn
+    Args:
+        ic_snapshot (GameSnapshot): state of the earlier turn
+        ic_diff (GameDiff): changes returned by Game.diff
+    Returns:
+        GameSnapshot: state of the later turn
+    """
+    d_records = patch_records( ic_snapshot.records, ic_diff )
+    for s_identifier, an_records in d_records.items():
+        #unchanged records are still shared with the earlier snapshot
+        if an_records is not ic_snapshot.records[s_identifier]:
+            an_records.flags.writeable = False
+    #the counters only grow, unknown ones keep the earlier value
+    return ic_snapshot._replace( turn = ic_diff.turn, records = d_records, unit_id_count = max( ic_snapshot.unit_id_count, ic_diff.unit_id_count ), city_id_count = max( ic_snapshot.city_id_count, ic_diff.city_id_count ) )
@@ -1,153 +1,464 @@
-import math
-from typing import List
-#import game constant and make them available to the program
-from lux.constants import Constants
-DIRECTIONS = Constants.DIRECTIONS
-RESOURCE_TYPES = Constants.RESOURCE_TYPES
-
-class Position:
-    """Position on the map. tuple (x,y) width height"""
-    def __init__(self, x, y):
-        self.x = x
-        """coordinate"""
-        self.y = y
-        """coordinate"""
-
-    def __sub__(self, pos ) -> int:
-        """overloads LHS-RHS to return the manhattan distance between two Positions"""
-        return abs(pos.x - self.x) + abs(pos.y - self.y)
-
-    def distance_to(self, pos):
-        """
-        Returns Manhattan (L1/grid) distance to pos
-        """
-        return self - pos
-
-    def is_adjacent(self, pos):
-        """returns True when two positions are adjacent"""
-        return (self - pos) <= 1
-
-    def __eq__(self, pos) -> bool:
-        return self.x == pos.x and self.y == pos.y
-
-    def equals(self, pos):
-        return self == pos
-
-    def translate(self, direction, units) -> 'Position':
-        if direction == DIRECTIONS.NORTH:
-            return Position(self.x, self.y - units)
-        elif direction == DIRECTIONS.EAST:
-            return Position(self.x + units, self.y)
-        elif direction == DIRECTIONS.SOUTH:
-            return Position(self.x, self.y + units)
-        elif direction == DIRECTIONS.WEST:
-            return Position(self.x - units, self.y)
-        elif direction == DIRECTIONS.CENTER:
-            return Position(self.x, self.y)
-
-    def direction_to(self, target_pos: 'Position') -> DIRECTIONS:
-        """Return closest position to target_pos from this position"""
-        check_dirs = [
-            DIRECTIONS.NORTH,
-            DIRECTIONS.EAST,
-            DIRECTIONS.SOUTH,
-            DIRECTIONS.WEST,
-        ]
-        closest_dist = self.distance_to(target_pos)
-        closest_dir = DIRECTIONS.CENTER
-        for direction in check_dirs:
-            newpos = self.translate(direction, 1)
-            dist = target_pos.distance_to(newpos)
-            if dist < closest_dist:
-                closest_dir = direction
-                closest_dist = dist
-        return closest_dir
-
-    def __str__(self) -> str:
-        return f"({self.x}, {self.y})"
-
-class Resource:
-	"""Enumerates the type and amount of a resource"""
-
-	def __init__(self, r_type: str, amount: int):
-		self.type = r_type
-		"""type of the resource"""
-		self.amount = amount
-		"""amount of the resource"""
-
-	def is_type( self, is_type : str ) -> bool:
-		return self.type == is_type
-
-	def __str__(self) -> str:
-		return f"Resource | {self.type} | {self.amount}"
-
-class Cell:
-    """Enumerates the content of a single square in the map"""
-    def __init__(self, x, y):
-        self.pos = Position(x, y)
-        """Coordinates of the square in the map"""
-        self.resource: Resource = None
-        """Resources on the square, if any"""
-        self.citytile = None
-        """Citytile on the square, if any"""
-        self.road = 0
-        """Road level of the tile"""
-
-    def has_resource(self):
-        return self.resource is not None and self.resource.amount > 0
-
-    def __str__(self) -> str:
-        #print position
-        s_tmp = f"Cell {self.pos} |"
-        #print resources, if any
-        if (self.resource != None):
-            s_tmp += f"{self.resource} |"
-        #print city if any
-        if (self.citytile != None):
-            s_tmp += f"{self.citytile} |"
-        s_tmp += f"Road: {self.road} |"
-        return s_tmp
-
-class GameMap:
-    """Map stats. size, and list of cells"""
-
-    def __init__(self, width, height):
-        self.height = height
-        """Height of the map in squares. Y dimension"""
-        self.width = width
-        """Width of the map in squares. X dimension"""
-        self.map: List[List[Cell]] = [None] * height
-        """List of list of cells that make up the map"""
-        #Fill the list of cells
-        for y in range(0, self.height):
-            self.map[y] = [None] * width
-            for x in range(0, self.width):
-                self.map[y][x] = Cell(x, y)
-
-    def get_cell_by_pos( self, pos : Position ) -> Cell:
-        """Return the cell at a given position in the map
-        Args:
-            pos: tuple with .x and .y coordinate of the cell
-        Returns:
-            Cell: map square with all its content
-        """
-        return self.map[pos.y][pos.x]
-
-    def get_cell(self, x, y) -> Cell:
-        """Return the cell at a given position in the map
-        Args:
-            x: coordinate of the cell
-            y: coordinate of the cell
-        Returns:
-            Cell: map square with all its content
-        """
-        return self.map[y][x]
-
-    def _setResource(self, r_type, x, y, amount):
-        """
-        do not use this function, this is for internal tracking of state
-        """
-        cell = self.get_cell(x, y)
-        cell.resource = Resource(r_type, amount)
-
-
+import math
+from typing import List
+
+import numpy as np
+
+#import game constant and make them available to the program
+from lux.constants import Constants
+from lux.constants import GAME_CONSTANTS
+DIRECTIONS = Constants.DIRECTIONS
+RESOURCE_TYPES = Constants.RESOURCE_TYPES
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+class Slotted:
+    """Pickle support for classes with __slots__
+    Accepts the state of slotted objects and the __dict__ state of game states pickled before the classes had __slots__
+    """
+    __slots__ = ()
+
+    def __getstate__(self) -> dict:
+        return { s_slot : getattr(self, s_slot) for c_class in type(self).__mro__ for s_slot in getattr(c_class, "__slots__", ()) if hasattr(self, s_slot) }
+
+    def __setstate__(self, id_state):
+        #default protocol state of slotted objects is (dict, slots dict)
+        if isinstance(id_state, tuple):
+            d_state = dict()
+            for d_part in id_state:
+                if d_part:
+                    d_state.update(d_part)
+            id_state = d_state
+        for s_slot, value in id_state.items():
+            setattr(self, s_slot, value)
+
+class Position(Slotted):
+    """Position on the map. tuple (x,y) width height
+    Positions inside the largest map are interned, see get_position. Interned positions are shared and must not be modified.
+    """
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        """coordinate"""
+        self.y = y
+        """coordinate"""
+
+    def __sub__(self, pos ) -> int:
+        """overloads LHS-RHS to return the manhattan distance between two Positions"""
+        return abs(pos.x - self.x) + abs(pos.y - self.y)
+
+    def distance_to(self, pos):
+        """
+        Returns Manhattan (L1/grid) distance to pos
+        """
+        return self - pos
+
+    def is_adjacent(self, pos):
+        """returns True when two positions are adjacent"""
+        return (self - pos) <= 1
+
+    def __eq__(self, pos) -> bool:
+        return self.x == pos.x and self.y == pos.y
+
+    def equals(self, pos):
+        return self == pos
+
+    def translate(self, direction, units) -> 'Position':
+        if direction == DIRECTIONS.NORTH:
+            return get_position(self.x, self.y - units)
+        elif direction == DIRECTIONS.EAST:
+            return get_position(self.x + units, self.y)
+        elif direction == DIRECTIONS.SOUTH:
+            return get_position(self.x, self.y + units)
+        elif direction == DIRECTIONS.WEST:
+            return get_position(self.x - units, self.y)
+        elif direction == DIRECTIONS.CENTER:
+            return get_position(self.x, self.y)
+
+    def direction_to(self, target_pos: 'Position') -> DIRECTIONS:
+        """Return closest position to target_pos from this position"""
+        closest_dist = self.distance_to(target_pos)
+        closest_dir = DIRECTIONS.CENTER
+        #same order as translate. NORTH, EAST, SOUTH, WEST. distances are computed without building the neighbour positions
+        for direction, n_dx, n_dy in _CHECK_DIRS:
+            dist = abs(target_pos.x - self.x - n_dx) + abs(target_pos.y - self.y - n_dy)
+            if dist < closest_dist:
+                closest_dir = direction
+                closest_dist = dist
+        return closest_dir
+
+    def __deepcopy__(self, memo) -> 'Position':
+        #interned positions are shared by every copy
+        if get_position(self.x, self.y) is self:
+            return self
+        return Position(self.x, self.y)
+
+    def __str__(self) -> str:
+        return f"({self.x}, {self.y})"
+
+#directions checked by Position.direction_to, with their displacement
+_CHECK_DIRS = (
+    (DIRECTIONS.NORTH, 0, -1),
+    (DIRECTIONS.EAST, 1, 0),
+    (DIRECTIONS.SOUTH, 0, 1),
+    (DIRECTIONS.WEST, -1, 0),
+)
+
+#interned positions of the largest map. [x][y]
+_POSITIONS = [ [ Position(x, y) for y in range(GAME_CONSTANTS["MAP"]["HEIGHT_MAX"]) ] for x in range(GAME_CONSTANTS["MAP"]["WIDTH_MAX"]) ]
+
+def get_position( x, y ) -> Position:
+    """Return the shared Position for coordinates inside the largest map, a new Position otherwise
+    Args:
+        x: coordinate
+        y: coordinate
+    Returns:
+        Position: interned position. must not be modified
+    """
+    if 0 <= x < GAME_CONSTANTS["MAP"]["WIDTH_MAX"] and 0 <= y < GAME_CONSTANTS["MAP"]["HEIGHT_MAX"]:
+        return _POSITIONS[x][y]
+    return Position(x, y)
+
+class Resource(Slotted):
+	"""Enumerates the type and amount of a resource"""
+	__slots__ = ("type", "amount")
+
+	def __init__(self, r_type: str, amount: int):
+		self.type = r_type
+		"""type of the resource"""
+		self.amount = amount
+		"""amount of the resource"""
+
+	def is_type( self, is_type : str ) -> bool:
+		return self.type == is_type
+
+	def __str__(self) -> str:
+		return f"Resource | {self.type} | {self.amount}"
+
+class Cell(Slotted):
+    """Enumerates the content of a single square in the map"""
+    __slots__ = ("pos", "resource", "citytile", "road")
+
+    def __init__(self, x, y):
+        self.pos = get_position(x, y)
+        """Coordinates of the square in the map"""
+        self.resource: Resource = None
+        """Resources on the square, if any"""
+        self.citytile = None
+        """Citytile on the square, if any"""
+        self.road = 0
+        """Road level of the tile"""
+
+    def has_resource(self):
+        return self.resource is not None and self.resource.amount > 0
+
+    def __str__(self) -> str:
+        #print position
+        s_tmp = f"Cell {self.pos} |"
+        #print resources, if any
+        if (self.resource != None):
+            s_tmp += f"{self.resource} |"
+        #print city if any
+        if (self.citytile != None):
+            s_tmp += f"{self.citytile} |"
+        s_tmp += f"Road: {self.road} |"
+        return s_tmp
+
+class GameMap:
+    """Map stats. size, and list of cells"""
+
+    def __init__(self, width, height):
+        self.height = height
+        """Height of the map in squares. Y dimension"""
+        self.width = width
+        """Width of the map in squares. X dimension"""
+        self.map: List[List[Cell]] = [None] * height
+        """List of list of cells that make up the map"""
+        #Fill the list of cells
+        for y in range(0, self.height):
+            self.map[y] = [None] * width
+            for x in range(0, self.width):
+                self.map[y][x] = Cell(x, y)
+
+    def get_cell_by_pos( self, pos : Position ) -> Cell:
+        """Return the cell at a given position in the map
+        Args:
+            pos: tuple with .x and .y coordinate of the cell
+        Returns:
+            Cell: map square with all its content
+        """
+        return self.map[pos.y][pos.x]
+
+    def get_cell(self, x, y) -> Cell:
+        """Return the cell at a given position in the map
+        Args:
+            x: coordinate of the cell
+            y: coordinate of the cell
+        Returns:
+            Cell: map square with all its content
+        """
+        return self.map[y][x]
+
+    def _setResource(self, r_type, x, y, amount):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        cell = self.get_cell(x, y)
+        #patch the resource already on the cell, if any
+        if cell.resource is not None:
+            cell.resource.type = r_type
+            cell.resource.amount = amount
+        else:
+            cell.resource = Resource(r_type, amount)
+
+    def _clearResource(self, x, y):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.get_cell(x, y).resource = None
+
+    def _setRoad(self, x, y, road):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.get_cell(x, y).road = road
+
+    def _setCitytile(self, x, y, citytile):
+        """
+        do not use this function, this is for internal tracking of state. None removes the citytile
+        """
+        self.get_cell(x, y).citytile = citytile
+
+    def _attachCitytile(self, x, y, citytile):
+        """
+        do not use this function, this is for internal tracking of state. attach a citytile object after _from_records
+        """
+        self.get_cell(x, y).citytile = citytile
+
+    def _from_records(self, id_records : dict):
+        """
+        do not use this function, this is for internal tracking of state
+        fill the cells from the record arrays of lux.game_updates.parse_updates. citytiles objects are attached by the caller
+        """
+        for row in self.map:
+            for cell in row:
+                cell.resource = None
+                cell.citytile = None
+                cell.road = 0
+        for n_type, x, y, amount in id_records[INPUT_CONSTANTS.RESOURCES].tolist():
+            self._setResource(RESOURCE_TYPE_NAMES[n_type], x, y, amount)
+        for x, y, road in id_records[INPUT_CONSTANTS.ROADS].tolist():
+            self.map[y][x].road = road
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   ARRAY BACKED MAP
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Alternate GameMap backend. The content of the map is stored in preallocated numpy grids indexed [y, x] like GameMap.map
+#   Cells are not stored, get_cell returns a lightweight view on the grids so that callers of GameMap keep working
+#   Whole map queries can work on the grids directly
+
+#code of the resource type stored in GameMapArray.resource_type. 0 means no resource
+RESOURCE_TYPE_CODES = {
+    RESOURCE_TYPES.WOOD : 1,
+    RESOURCE_TYPES.COAL : 2,
+    RESOURCE_TYPES.URANIUM : 3,
+}
+#resource type from the code stored in GameMapArray.resource_type
+RESOURCE_TYPE_NAMES = ( None, RESOURCE_TYPES.WOOD, RESOURCE_TYPES.COAL, RESOURCE_TYPES.URANIUM )
+
+def id_to_number( is_id : str ) -> int:
+    """numeric part of a unit or city id. e.g. u_12 -> 12 | c_3 -> 3"""
+    return int(is_id[2:])
+
+class ResourceView:
+    """Resource of a GameMapArray cell. Reads and writes go to the grids"""
+    __slots__ = ("_map", "_x", "_y")
+
+    def __init__(self, ic_map : 'GameMapArray', x, y):
+        self._map = ic_map
+        self._x = x
+        self._y = y
+
+    @property
+    def type(self) -> str:
+        """type of the resource"""
+        return RESOURCE_TYPE_NAMES[self._map.resource_type[self._y, self._x]]
+
+    @type.setter
+    def type(self, r_type : str):
+        self._map.resource_type[self._y, self._x] = RESOURCE_TYPE_CODES[r_type]
+
+    @property
+    def amount(self) -> int:
+        """amount of the resource"""
+        return int(self._map.resource_amount[self._y, self._x])
+
+    @amount.setter
+    def amount(self, amount : int):
+        self._map.resource_amount[self._y, self._x] = amount
+
+    def is_type( self, is_type : str ) -> bool:
+        return self.type == is_type
+
+    def __str__(self) -> str:
+        return f"Resource | {self.type} | {self.amount}"
+
+class CellView:
+    """Cell of a GameMapArray. Same interface as Cell, reads and writes go to the grids"""
+    __slots__ = ("_map", "pos")
+
+    def __init__(self, ic_map : 'GameMapArray', x, y):
+        self._map = ic_map
+        self.pos = get_position(x, y)
+        """Coordinates of the square in the map"""
+
+    @property
+    def resource(self) -> ResourceView:
+        """Resources on the square, if any"""
+        if self._map.resource_type[self.pos.y, self.pos.x] == 0:
+            return None
+        return ResourceView(self._map, self.pos.x, self.pos.y)
+
+    @resource.setter
+    def resource(self, ic_resource : Resource):
+        if ic_resource is None:
+            self._map._clearResource(self.pos.x, self.pos.y)
+        else:
+            self._map._setResource(ic_resource.type, self.pos.x, self.pos.y, ic_resource.amount)
+
+    @property
+    def citytile(self):
+        """Citytile on the square, if any"""
+        return self._map.citytiles.get((self.pos.x, self.pos.y))
+
+    @citytile.setter
+    def citytile(self, ic_citytile):
+        self._map._setCitytile(self.pos.x, self.pos.y, ic_citytile)
+
+    @property
+    def road(self) -> float:
+        """Road level of the tile"""
+        return float(self._map.road[self.pos.y, self.pos.x])
+
+    @road.setter
+    def road(self, road : float):
+        self._map.road[self.pos.y, self.pos.x] = road
+
+    def has_resource(self):
+        return self._map.resource_type[self.pos.y, self.pos.x] != 0 and self._map.resource_amount[self.pos.y, self.pos.x] > 0
+
+    def __str__(self) -> str:
+        #print position
+        s_tmp = f"Cell {self.pos} |"
+        #print resources, if any
+        if (self.resource != None):
+            s_tmp += f"{self.resource} |"
+        #print city if any
+        if (self.citytile != None):
+            s_tmp += f"{self.citytile} |"
+        s_tmp += f"Road: {self.road} |"
+        return s_tmp
+
+class GameMapArray:
+    """Map stats. size, and structure of arrays with the content of the cells"""
+
+    def __init__(self, width, height):
+        self.height = height
+        """Height of the map in squares. Y dimension"""
+        self.width = width
+        """Width of the map in squares. X dimension"""
+        self.resource_type = np.zeros( (height, width), dtype=np.int8 )
+        """code of the resource on the square. RESOURCE_TYPE_CODES. 0 means no resource"""
+        self.resource_amount = np.zeros( (height, width), dtype=np.int32 )
+        """amount of resource on the square"""
+        self.road = np.zeros( (height, width), dtype=np.float32 )
+        """road level of the square"""
+        self.citytile_team = np.full( (height, width), -1, dtype=np.int8 )
+        """team owning the citytile on the square. -1 means no citytile"""
+        self.citytile_id = np.full( (height, width), -1, dtype=np.int32 )
+        """numeric id of the city owning the citytile on the square. c_3 -> 3. -1 means no citytile"""
+        self.citytiles = dict()
+        """(x, y) -> CityTile. backs the citytile attribute of the cell views"""
+
+    def _reset(self):
+        """empty the map without reallocating the grids"""
+        self.resource_type.fill(0)
+        self.resource_amount.fill(0)
+        self.road.fill(0)
+        self.citytile_team.fill(-1)
+        self.citytile_id.fill(-1)
+        self.citytiles.clear()
+
+    def _from_records(self, id_records : dict):
+        """
+        do not use this function, this is for internal tracking of state
+        fill the grids from the record arrays of lux.game_updates.parse_updates. citytiles objects are attached by the caller
+        """
+        self._reset()
+        an_resources = id_records[INPUT_CONSTANTS.RESOURCES]
+        self.resource_type[an_resources["y"], an_resources["x"]] = an_resources["type"]
+        self.resource_amount[an_resources["y"], an_resources["x"]] = an_resources["amount"]
+        an_roads = id_records[INPUT_CONSTANTS.ROADS]
+        self.road[an_roads["y"], an_roads["x"]] = an_roads["road"]
+        an_citytiles = id_records[INPUT_CONSTANTS.CITY_TILES]
+        self.citytile_team[an_citytiles["y"], an_citytiles["x"]] = an_citytiles["team"]
+        self.citytile_id[an_citytiles["y"], an_citytiles["x"]] = an_citytiles["city_id"]
+
+    def get_cell_by_pos( self, pos : Position ) -> CellView:
+        """Return a view on the cell at a given position in the map
+        Args:
+            pos: tuple with .x and .y coordinate of the cell
+        Returns:
+            CellView: map square with all its content
+        """
+        return CellView(self, pos.x, pos.y)
+
+    def get_cell(self, x, y) -> CellView:
+        """Return a view on the cell at a given position in the map
+        Args:
+            x: coordinate of the cell
+            y: coordinate of the cell
+        Returns:
+            CellView: map square with all its content
+        """
+        return CellView(self, x, y)
+
+    def _setResource(self, r_type, x, y, amount):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.resource_type[y, x] = RESOURCE_TYPE_CODES[r_type]
+        self.resource_amount[y, x] = amount
+
+    def _clearResource(self, x, y):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.resource_type[y, x] = 0
+        self.resource_amount[y, x] = 0
+
+    def _setRoad(self, x, y, road):
+        """
+        do not use this function, this is for internal tracking of state
+        """
+        self.road[y, x] = road
+
+    def _setCitytile(self, x, y, citytile):
+        """
+        do not use this function, this is for internal tracking of state. None removes the citytile
+        """
+        if citytile is None:
+            self.citytiles.pop((x, y), None)
+            self.citytile_team[y, x] = -1
+            self.citytile_id[y, x] = -1
+        else:
+            self.citytiles[(x, y)] = citytile
+            self.citytile_team[y, x] = citytile.team
+            self.citytile_id[y, x] = id_to_number(citytile.cityid)
+
+    def _attachCitytile(self, x, y, citytile):
+        """
+        do not use this function, this is for internal tracking of state. attach a citytile object after _from_records filled the grids
+        """
+        self.citytiles[(x, y)] = citytile
+
+
@@ -0,0 +1,619 @@
+##  @package game_simulator
+#   Local forward model of the Lux AI 2021 engine, without node.js
+#   A GameSimulator is filled from a Game (or a GameSnapshot), applies the actions of both players for one turn, and writes
+#   the next state back as record arrays (lux.game_updates), the same way the observations of the engine are applied to a Game
+#   Parameters come from lux/game_constants.json
+#
+#   TURN ORDER
+#   1) actions are validated against the state at the start of the turn. invalid actions are dropped
+#   2) citytile actions, build city, pillage and transfer
+#   3) movement. collisions outside of citytiles cancel the moves, recursively
+#   4) resource collection uranium -> coal -> wood, shared evenly among the workers on and around a resource tile, one worker per tile
+#   5) units on a citytile of their team deposit their cargo as fuel
+#   6) night. cities and units outside of cities burn fuel or are destroyed
+#   7) depleted resources are removed, wood regrows
+#   8) carts develop roads, cooldowns are reduced
+#
+#   e.g.
+#   c_simulator = GameSimulator()
+#   c_simulator.from_game( c_game )
+#   c_simulator.step( [["r 1 4", "m u_1 e"], ["bw 10 3"]] )
+#   c_game.restore( c_simulator.snapshot() )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import math
+
+import numpy as np
+
+#import game constant and make them available to the program
+from lux.constants import GAME_CONSTANTS
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+UNIT_TYPES = Constants.UNIT_TYPES
+
+from lux.game import Game
+from lux.game import GameSnapshot
+from lux.game_map import RESOURCE_TYPE_CODES
+from lux.game_map import id_to_number
+from lux.game_updates import RECORD_DTYPES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   PARAMETERS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+PARAMETERS = GAME_CONSTANTS["PARAMETERS"]
+ACTIONS = GAME_CONSTANTS["ACTION"]
+DIRECTIONS = GAME_CONSTANTS["DIRECTIONS"]
+
+#resource codes of lux.game_map.RESOURCE_TYPE_CODES in mining order, with the parameters indexed by code
+_N_WOOD = RESOURCE_TYPE_CODES[Constants.RESOURCE_TYPES.WOOD]
+_N_COAL = RESOURCE_TYPE_CODES[Constants.RESOURCE_TYPES.COAL]
+_N_URANIUM = RESOURCE_TYPE_CODES[Constants.RESOURCE_TYPES.URANIUM]
+_LN_MINING_ORDER = (_N_URANIUM, _N_COAL, _N_WOOD)
+_DN_COLLECTION_RATE = { n_code : PARAMETERS["WORKER_COLLECTION_RATE"][s_type.upper()] for s_type, n_code in RESOURCE_TYPE_CODES.items() }
+_DN_RESEARCH_REQUIREMENT = { n_code : PARAMETERS["RESEARCH_REQUIREMENTS"][s_type.upper()] for s_type, n_code in RESOURCE_TYPE_CODES.items() }
+#fuel per resource, in cargo order wood, coal, uranium
+_TN_FUEL_RATE = tuple( PARAMETERS["RESOURCE_TO_FUEL_RATE"][s_type] for s_type in ("WOOD", "COAL", "URANIUM") )
+
+#per unit type. UNIT_TYPES.WORKER=0 | UNIT_TYPES.CART=1
+_TN_UNIT_CAPACITY = ( PARAMETERS["RESOURCE_CAPACITY"]["WORKER"], PARAMETERS["RESOURCE_CAPACITY"]["CART"] )
+_TN_UNIT_COOLDOWN = ( PARAMETERS["UNIT_ACTION_COOLDOWN"]["WORKER"], PARAMETERS["UNIT_ACTION_COOLDOWN"]["CART"] )
+_TN_UNIT_UPKEEP = ( PARAMETERS["LIGHT_UPKEEP"]["WORKER"], PARAMETERS["LIGHT_UPKEEP"]["CART"] )
+
+#direction -> (dx, dy)
+_D_DIRECTION_OFFSET = {
+    DIRECTIONS["NORTH"] : (0, -1),
+    DIRECTIONS["EAST"] : (1, 0),
+    DIRECTIONS["SOUTH"] : (0, 1),
+    DIRECTIONS["WEST"] : (-1, 0),
+    DIRECTIONS["CENTER"] : (0, 0),
+}
+#adjacent tiles in engine order, N E S W
+_LT_ADJACENT = ( (0, -1), (1, 0), (0, 1), (-1, 0) )
+#cargo fields of a unit row by resource code
+_D_CARGO_FIELD = { _N_WOOD : 5, _N_COAL : 6, _N_URANIUM : 7 }
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   SIMULATOR
+#--------------------------------------------------------------------------------------------------------------------------------
+
+class GameSimulator():
+    """Forward model of a Lux AI 2021 game
+    Units are rows [type, team, x, y, cooldown, wood, coal, uranium] indexed by numeric id, cities are rows [team, fuel, list((x, y))]
+    indexed by numeric id, citytiles are rows [team, city id, cooldown] indexed by position. The map is held in numpy grids [y, x]
+    """
+
+    #----------------    Constructor    ----------------
+
+    def __init__( self ):
+        """Empty simulator. Fill it with from_game or from_snapshot"""
+        self.n_width = 0
+        self.n_height = 0
+        self.turn = -1
+        self.id = 0
+        self.opponent_id = 1
+
+        return
+
+    #----------------    Private Members    ----------------
+
+    def __init_vars( self, in_width : int, in_height : int ) -> bool:
+        """Initialize an empty map of the given size
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.n_width = int(in_width)
+        self.n_height = int(in_height)
+        #map grids [y, x]
+        self.an_resource_type = np.zeros( (self.n_height, self.n_width), dtype=np.int8 )
+        self.an_resource_amount = np.zeros( (self.n_height, self.n_width), dtype=np.int64 )
+        self.an_road = np.zeros( (self.n_height, self.n_width), dtype=np.float64 )
+        #entities
+        self.d_units = dict()
+        """unit id -> [type, team, x, y, cooldown, wood, coal, uranium]"""
+        self.d_cities = dict()
+        """city id -> [team, fuel, list((x, y))]"""
+        self.d_citytiles = dict()
+        """(x, y) -> [team, city id, cooldown]"""
+        self.ln_research_points = [0, 0]
+        #last ids given by the engine. new units and cities take the next one
+        self.n_unit_id = 0
+        self.n_city_id = 0
+
+        return False
+
+    def __can_act( self, in_cooldown : float ) -> bool:
+        return in_cooldown < 1
+
+    def __cargo_space( self, il_unit : list ) -> int:
+        return _TN_UNIT_CAPACITY[il_unit[0]] -il_unit[5] -il_unit[6] -il_unit[7]
+
+    def __unit_cooldown( self, il_unit : list ) -> float:
+        """cooldown added by an action. doubled at night"""
+        return _TN_UNIT_COOLDOWN[il_unit[0]] * (2 if self.is_night() else 1)
+
+    def __own_unit( self, in_team : int, is_unit : str ) -> list:
+        """Returns: list: row of the unit if it exists, belongs to the team and can act | None"""
+        l_unit = self.d_units.get( id_to_number( is_unit ) )
+        if l_unit is None or l_unit[1] != in_team or not self.__can_act( l_unit[4] ):
+            return None
+        return l_unit
+
+    def __own_citytile( self, in_team : int, in_x : int, in_y : int ) -> list:
+        """Returns: list: row of the citytile if it exists, belongs to the team and can act | None"""
+        l_citytile = self.d_citytiles.get( (in_x, in_y) )
+        if l_citytile is None or l_citytile[0] != in_team or not self.__can_act( l_citytile[2] ):
+            return None
+        return l_citytile
+
+    def __in_map( self, in_x : int, in_y : int ) -> bool:
+        return 0 <= in_x < self.n_width and 0 <= in_y < self.n_height
+
+    def __light_upkeep( self, il_city : list ) -> int:
+        """light upkeep of a city. every citytile costs CITY minus the adjacency bonus of its neighbours of the same team"""
+        n_upkeep = 0
+        for n_x, n_y in il_city[2]:
+            n_upkeep += PARAMETERS["LIGHT_UPKEEP"]["CITY"]
+            for n_dx, n_dy in _LT_ADJACENT:
+                l_neighbour = self.d_citytiles.get( (n_x +n_dx, n_y +n_dy) )
+                if l_neighbour is not None and l_neighbour[0] == il_city[0]:
+                    n_upkeep -= PARAMETERS["CITY_ADJACENCY_BONUS"]
+        return n_upkeep
+
+    #----------------    Protected Members    ----------------
+
+    def _parse_actions( self, in_team : int, ils_actions : list, id_actions : dict, iset_acted : set, ian_spawns : list ) -> bool:
+        """Validate the actions of a player against the state at the start of the turn and sort them by kind
+        Invalid actions are dropped like the engine does. A unit or citytile only acts once per turn
+        Args:
+            in_team (int): player emitting the actions
+            ils_actions (list(str)): actions of the player. e.g. ["r 14 8", "m u_1 w"]
+            id_actions (dict): action header -> list of validated actions, filled
+            iset_acted (set): ids of units and positions of citytiles that already acted this turn, filled
+            ian_spawns (list): units that each player can still spawn this turn, updated
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        for s_action in ils_actions or list():
+            ls_tokens = s_action.split(" ")
+            s_header = ls_tokens[0]
+            try:
+                #Citytile Research "r x y" | Build Worker "bw x y" | Build Cart "bc x y"
+                if s_header in (ACTIONS["CITYTILE"]["RESEARCH"], ACTIONS["CITYTILE"]["BUILD_WORKER"], ACTIONS["CITYTILE"]["BUILD_CART"]):
+                    t_pos = ( int(ls_tokens[1]), int(ls_tokens[2]) )
+                    l_citytile = self.__own_citytile( in_team, *t_pos )
+                    if l_citytile is None or t_pos in iset_acted:
+                        logging.debug(f"Invalid citytile action: {s_action}")
+                        continue
+                    if s_header != ACTIONS["CITYTILE"]["RESEARCH"]:
+                        #units are capped by the number of citytiles
+                        if ian_spawns[in_team] <= 0:
+                            logging.debug(f"Unit cap reached: {s_action}")
+                            continue
+                        ian_spawns[in_team] -= 1
+                    iset_acted.add( t_pos )
+                    id_actions[s_header].append( (in_team, t_pos, l_citytile) )
+
+                #Unit Move "m u_1 n"
+                elif s_header == ACTIONS["UNIT"]["MOVE"]:
+                    l_unit = self.__own_unit( in_team, ls_tokens[1] )
+                    t_offset = _D_DIRECTION_OFFSET.get( ls_tokens[2] )
+                    if l_unit is None or t_offset is None or ls_tokens[1] in iset_acted:
+                        logging.debug(f"Invalid move: {s_action}")
+                        continue
+                    iset_acted.add( ls_tokens[1] )
+                    #staying in place is a valid action that does nothing
+                    if t_offset == (0, 0):
+                        continue
+                    t_destination = ( l_unit[2] +t_offset[0], l_unit[3] +t_offset[1] )
+                    l_citytile = self.d_citytiles.get( t_destination )
+                    if not self.__in_map( *t_destination ) or (l_citytile is not None and l_citytile[0] != in_team):
+                        logging.debug(f"Invalid move destination: {s_action}")
+                        continue
+                    id_actions[s_header].append( (l_unit, t_destination) )
+
+                #Unit Build City "bcity u_1"
+                elif s_header == ACTIONS["UNIT"]["BUILD_CITY"]:
+                    l_unit = self.__own_unit( in_team, ls_tokens[1] )
+                    if l_unit is None or ls_tokens[1] in iset_acted or l_unit[0] != UNIT_TYPES.WORKER:
+                        logging.debug(f"Invalid build city: {s_action}")
+                        continue
+                    t_pos = ( l_unit[2], l_unit[3] )
+                    if l_unit[5] +l_unit[6] +l_unit[7] < PARAMETERS["CITY_BUILD_COST"] or t_pos in self.d_citytiles or self.an_resource_type[t_pos[1], t_pos[0]] != 0:
+                        logging.debug(f"Can't build city: {s_action}")
+                        continue
+                    iset_acted.add( ls_tokens[1] )
+                    id_actions[s_header].append( (l_unit,) )
+
+                #Unit Pillage "p u_1"
+                elif s_header == ACTIONS["UNIT"]["PILLAGE_ROAD"]:
+                    l_unit = self.__own_unit( in_team, ls_tokens[1] )
+                    if l_unit is None or ls_tokens[1] in iset_acted or l_unit[0] != UNIT_TYPES.WORKER or (l_unit[2], l_unit[3]) in self.d_citytiles:
+                        logging.debug(f"Invalid pillage: {s_action}")
+                        continue
+                    iset_acted.add( ls_tokens[1] )
+                    id_actions[s_header].append( (l_unit,) )
+
+                #Unit Transfer "t u_1 u_2 wood 10"
+                elif s_header == ACTIONS["UNIT"]["TRANSFER_RESOURCE"]:
+                    l_unit = self.__own_unit( in_team, ls_tokens[1] )
+                    l_destination = self.d_units.get( id_to_number( ls_tokens[2] ) )
+                    n_code = RESOURCE_TYPE_CODES.get( ls_tokens[3] )
+                    if l_unit is None or l_destination is None or l_destination[1] != in_team or n_code is None or ls_tokens[1] in iset_acted:
+                        logging.debug(f"Invalid transfer: {s_action}")
+                        continue
+                    if abs(l_unit[2] -l_destination[2]) +abs(l_unit[3] -l_destination[3]) != 1:
+                        logging.debug(f"Transfer to a unit that is not adjacent: {s_action}")
+                        continue
+                    iset_acted.add( ls_tokens[1] )
+                    id_actions[s_header].append( (l_unit, l_destination, n_code, int(ls_tokens[4])) )
+
+                elif s_header != "":
+                    logging.debug(f"Unknown header: {s_header}")
+
+            except (IndexError, ValueError):
+                logging.debug(f"Malformed action: {s_action}")
+
+        return False
+
+    def _spawn_unit( self, in_type : int, in_team : int, in_x : int, in_y : int ) -> bool:
+        self.n_unit_id += 1
+        self.d_units[self.n_unit_id] = [ in_type, in_team, in_x, in_y, 0.0, 0, 0, 0 ]
+        return False
+
+    def _spawn_citytile( self, in_team : int, in_x : int, in_y : int ) -> bool:
+        """Build a citytile. It joins the city of the first adjacent citytile of the team, other adjacent cities are merged into it
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        ln_cities = list()
+        for n_dx, n_dy in _LT_ADJACENT:
+            l_neighbour = self.d_citytiles.get( (in_x +n_dx, in_y +n_dy) )
+            if l_neighbour is not None and l_neighbour[0] == in_team and l_neighbour[1] not in ln_cities:
+                ln_cities.append( l_neighbour[1] )
+
+        if len(ln_cities) == 0:
+            self.n_city_id += 1
+            n_city = self.n_city_id
+            self.d_cities[n_city] = [ in_team, 0.0, list() ]
+        else:
+            n_city = ln_cities[0]
+        l_city = self.d_cities[n_city]
+        self.d_citytiles[(in_x, in_y)] = [ in_team, n_city, 0.0 ]
+        l_city[2].append( (in_x, in_y) )
+        #merge the other adjacent cities
+        for n_merged in ln_cities[1:]:
+            l_merged = self.d_cities.pop( n_merged )
+            for t_pos in l_merged[2]:
+                self.d_citytiles[t_pos][1] = n_city
+            l_city[2].extend( l_merged[2] )
+            l_city[1] += l_merged[1]
+        self.an_road[in_y, in_x] = PARAMETERS["MAX_ROAD"]
+
+        return False
+
+    def _destroy_city( self, in_city : int ) -> bool:
+        l_city = self.d_cities.pop( in_city )
+        for n_x, n_y in l_city[2]:
+            del self.d_citytiles[(n_x, n_y)]
+            self.an_road[n_y, n_x] = PARAMETERS["MIN_ROAD"]
+        return False
+
+    def _move_units( self, ilt_moves : list, iset_citytiles : set ) -> bool:
+        """Resolve and apply the moves of both players
+        Units can stack on a citytile of their team. Anywhere else two units moving on the same tile both stay, and a unit moving on
+        a tile occupied by a unit that stays also stays. Staying units can block other moves in turn, until nothing changes
+        Args:
+            ilt_moves (list): (unit row, destination) of the validated moves
+            iset_citytiles (set): positions of the citytiles at the start of the turn. citytiles built this turn don't allow stacking
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        d_destinations = dict()
+        for l_unit, t_destination in ilt_moves:
+            d_destinations.setdefault( t_destination, list() ).append( l_unit )
+        d_moving = dict()
+        for t_destination, ll_units in d_destinations.items():
+            if t_destination in iset_citytiles or len(ll_units) == 1:
+                for l_unit in ll_units:
+                    d_moving[id(l_unit)] = (l_unit, t_destination)
+
+        x_changed = True
+        while x_changed:
+            x_changed = False
+            set_occupied = { (l_unit[2], l_unit[3]) for l_unit in self.d_units.values() if id(l_unit) not in d_moving }
+            for n_key, (l_unit, t_destination) in list( d_moving.items() ):
+                if t_destination not in iset_citytiles and t_destination in set_occupied:
+                    del d_moving[n_key]
+                    x_changed = True
+
+        for l_unit, t_destination in d_moving.values():
+            l_unit[2], l_unit[3] = t_destination
+            l_unit[4] += self.__unit_cooldown( l_unit )
+
+        return False
+
+    def _collect_resources( self ) -> bool:
+        """Workers collect from the resource tiles they stand on or are adjacent to, one resource type at a time
+        A worker asks each of its tiles for an even part of its cargo space, up to the collection rate. A tile that can't feed all
+        the requests splits its amount evenly, smallest requests first, and is emptied: shares are floored and the remainder is lost.
+        What exceeds the cargo space of a worker is lost. Workers stacked on a citytile with the same request collect once
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        for n_code in _LN_MINING_ORDER:
+            n_rate = _DN_COLLECTION_RATE[n_code]
+            n_field = _D_CARGO_FIELD[n_code]
+            lx_researched = [ n_points >= _DN_RESEARCH_REQUIREMENT[n_code] for n_points in self.ln_research_points ]
+
+            #requests of each worker to its tiles
+            d_requests = dict()
+            set_positions = set()
+            for l_unit in self.d_units.values():
+                if l_unit[0] != UNIT_TYPES.WORKER or not lx_researched[l_unit[1]]:
+                    continue
+                lt_tiles = list()
+                for n_dx, n_dy in ( (0, 0), ) +_LT_ADJACENT:
+                    n_x = l_unit[2] +n_dx
+                    n_y = l_unit[3] +n_dy
+                    if self.__in_map( n_x, n_y ) and self.an_resource_type[n_y, n_x] == n_code and self.an_resource_amount[n_y, n_x] > 0:
+                        lt_tiles.append( (n_x, n_y) )
+                if len(lt_tiles) == 0:
+                    continue
+                n_request = min( n_rate, -(-self.__cargo_space( l_unit ) // len(lt_tiles)) )
+                #stacked workers asking the same amount collect once
+                if n_request > 0:
+                    if (l_unit[2], l_unit[3], n_request) in set_positions:
+                        continue
+                    set_positions.add( (l_unit[2], l_unit[3], n_request) )
+                for t_tile in lt_tiles:
+                    d_requests.setdefault( t_tile, list() ).append( (l_unit, n_request) )
+
+            #each tile grants its requests
+            for (n_x, n_y), lt_requests in d_requests.items():
+                n_amount = int( self.an_resource_amount[n_y, n_x] )
+                if sum( n_request for _, n_request in lt_requests ) > n_amount:
+                    #even split, smallest requests first
+                    lt_requests.sort( key=lambda t_request: t_request[1] )
+                    f_left = float(n_amount)
+                    for n_index, (l_unit, n_request) in enumerate( lt_requests ):
+                        f_share = min( n_request, f_left /(len(lt_requests) -n_index) )
+                        lt_requests[n_index] = (l_unit, math.floor( f_share ))
+                        f_left -= f_share
+                    n_taken = n_amount
+                else:
+                    n_taken = sum( n_request for _, n_request in lt_requests )
+                for l_unit, n_granted in lt_requests:
+                    l_unit[n_field] += min( n_granted, self.__cargo_space( l_unit ) )
+                self.an_resource_amount[n_y, n_x] = n_amount -n_taken
+
+        return False
+
+    def _deposit_resources( self ) -> bool:
+        """Units on a citytile of their team turn all their cargo into fuel for the city"""
+        for l_unit in self.d_units.values():
+            l_citytile = self.d_citytiles.get( (l_unit[2], l_unit[3]) )
+            if l_citytile is None or l_citytile[0] != l_unit[1]:
+                continue
+            self.d_cities[l_citytile[1]][1] += l_unit[5] *_TN_FUEL_RATE[0] +l_unit[6] *_TN_FUEL_RATE[1] +l_unit[7] *_TN_FUEL_RATE[2]
+            l_unit[5] = l_unit[6] = l_unit[7] = 0
+        return False
+
+    def _night( self ) -> bool:
+        """Cities burn their light upkeep or are destroyed. Units outside of cities burn cargo, wood first, or are destroyed"""
+        for n_city, l_city in list( self.d_cities.items() ):
+            n_upkeep = self.__light_upkeep( l_city )
+            if l_city[1] < n_upkeep:
+                self._destroy_city( n_city )
+            else:
+                l_city[1] -= n_upkeep
+
+        for n_unit, l_unit in list( self.d_units.items() ):
+            if (l_unit[2], l_unit[3]) in self.d_citytiles:
+                continue
+            n_fuel = _TN_UNIT_UPKEEP[l_unit[0]]
+            for n_field, n_rate in zip( (5, 6, 7), _TN_FUEL_RATE ):
+                n_used = min( l_unit[n_field], math.ceil( n_fuel /n_rate ) ) if n_fuel > 0 else 0
+                n_fuel -= n_used *n_rate
+                l_unit[n_field] -= n_used
+            if n_fuel > 0:
+                del self.d_units[n_unit]
+
+        return False
+
+    def _end_turn( self ) -> bool:
+        """Remove depleted resources, regrow wood, develop roads and reduce cooldowns"""
+        ax_depleted = (self.an_resource_type != 0) & (self.an_resource_amount <= 0)
+        self.an_resource_type[ax_depleted] = 0
+        self.an_resource_amount[ax_depleted] = 0
+        ax_wood = (self.an_resource_type == _N_WOOD) & (self.an_resource_amount < PARAMETERS["MAX_WOOD_AMOUNT"])
+        self.an_resource_amount[ax_wood] = np.ceil( np.minimum( self.an_resource_amount[ax_wood] *PARAMETERS["WOOD_GROWTH_RATE"], PARAMETERS["MAX_WOOD_AMOUNT"] ) )
+
+        for l_unit in self.d_units.values():
+            if l_unit[0] == UNIT_TYPES.CART and (l_unit[2], l_unit[3]) not in self.d_citytiles:
+                self.an_road[l_unit[3], l_unit[2]] = min( self.an_road[l_unit[3], l_unit[2]] +PARAMETERS["CART_ROAD_DEVELOPMENT_RATE"], PARAMETERS["MAX_ROAD"] )
+        #units cooldown is further reduced by the road they stand on. citytiles only by one
+        for l_unit in self.d_units.values():
+            l_unit[4] = max( l_unit[4] -1 -float(self.an_road[l_unit[3], l_unit[2]]), 0.0 )
+        for l_citytile in self.d_citytiles.values():
+            l_citytile[2] = max( l_citytile[2] -1, 0.0 )
+
+        return False
+
+    #----------------    Public Members    ----------------
+
+    def from_snapshot( self, ic_snapshot : GameSnapshot ) -> bool:
+        """Fill the simulator with a game state
+        The engine id counters come with the snapshot. Unknown ones (0, e.g. replays of older engines) restart from the highest id alive
+        Args:
+            ic_snapshot (GameSnapshot): state to simulate from
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        self.__init_vars( ic_snapshot.map_width, ic_snapshot.map_height )
+        self.turn = ic_snapshot.turn
+        self.id = ic_snapshot.id
+        self.opponent_id = ic_snapshot.opponent_id
+        d_records = ic_snapshot.records
+
+        for n_team, n_points in d_records[INPUT_CONSTANTS.RESEARCH_POINTS].tolist():
+            self.ln_research_points[n_team] = n_points
+        an_resources = d_records[INPUT_CONSTANTS.RESOURCES]
+        self.an_resource_type[an_resources["y"], an_resources["x"]] = an_resources["type"]
+        self.an_resource_amount[an_resources["y"], an_resources["x"]] = an_resources["amount"]
+        an_roads = d_records[INPUT_CONSTANTS.ROADS]
+        self.an_road[an_roads["y"], an_roads["x"]] = an_roads["road"]
+        for n_type, n_team, n_id, n_x, n_y, n_cooldown, n_wood, n_coal, n_uranium in d_records[INPUT_CONSTANTS.UNITS].tolist():
+            self.d_units[n_id] = [ n_type, n_team, n_x, n_y, n_cooldown, n_wood, n_coal, n_uranium ]
+        for n_team, n_id, n_fuel, _ in d_records[INPUT_CONSTANTS.CITY].tolist():
+            self.d_cities[n_id] = [ n_team, n_fuel, list() ]
+        for n_team, n_city, n_x, n_y, n_cooldown in d_records[INPUT_CONSTANTS.CITY_TILES].tolist():
+            self.d_citytiles[(n_x, n_y)] = [ n_team, n_city, n_cooldown ]
+            self.d_cities[n_city][2].append( (n_x, n_y) )
+        self.n_unit_id = max( ic_snapshot.unit_id_count, max( self.d_units, default=0 ) )
+        self.n_city_id = max( ic_snapshot.city_id_count, max( self.d_cities, default=0 ) )
+
+        return False
+
+    def from_game( self, ic_game : Game ) -> bool:
+        """Fill the simulator with the state of a Game
+        Args:
+            ic_game (Game): state to simulate from
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        return self.from_snapshot( ic_game.snapshot() )
+
+    def is_night( self ) -> bool:
+        """Returns: bool: True if the turn being simulated is at night"""
+        n_cycle = PARAMETERS["DAY_LENGTH"] +PARAMETERS["NIGHT_LENGTH"]
+        return self.turn % n_cycle >= PARAMETERS["DAY_LENGTH"]
+
+    def is_done( self ) -> bool:
+        """Returns: bool: True if the game is over. last turn reached, or a player has neither units nor citytiles"""
+        if self.turn >= PARAMETERS["MAX_DAYS"] -1:
+            return True
+        for n_team in range(2):
+            if not any( l_unit[1] == n_team for l_unit in self.d_units.values() ) and not any( l_citytile[0] == n_team for l_citytile in self.d_citytiles.values() ):
+                return True
+        return False
+
+    def step( self, ills_actions : list ) -> bool:
+        """Apply one turn of actions of both players
+        Args:
+            ills_actions (list(list(str))): actions of player 0 and player 1. e.g. [["r 1 4", "m u_1 e"], ["bw 10 3"]]
+        Returns:
+            bool: False=OK | True=FAIL
+        """
+        if self.n_width == 0:
+            logging.error(f"Simulator is empty")
+            return True
+
+        #validate against the state at the start of the turn
+        d_actions = { s_header : list() for s_header in list( ACTIONS["CITYTILE"].values() ) +list( ACTIONS["UNIT"].values() ) }
+        set_acted = set()
+        an_spawns = [ 0, 0 ]
+        for l_citytile in self.d_citytiles.values():
+            an_spawns[l_citytile[0]] += 1
+        for l_unit in self.d_units.values():
+            an_spawns[l_unit[1]] -= 1
+        for n_team, ls_actions in enumerate( ills_actions ):
+            self._parse_actions( n_team, ls_actions, d_actions, set_acted, an_spawns )
+
+        set_citytiles = set( self.d_citytiles )
+
+        #citytile actions
+        for n_team, (n_x, n_y), l_citytile in d_actions[ACTIONS["CITYTILE"]["RESEARCH"]]:
+            self.ln_research_points[n_team] += 1
+            l_citytile[2] += PARAMETERS["CITY_ACTION_COOLDOWN"]
+        for s_header, n_type in ( (ACTIONS["CITYTILE"]["BUILD_WORKER"], UNIT_TYPES.WORKER), (ACTIONS["CITYTILE"]["BUILD_CART"], UNIT_TYPES.CART) ):
+            for n_team, (n_x, n_y), l_citytile in d_actions[s_header]:
+                self._spawn_unit( n_type, n_team, n_x, n_y )
+                l_citytile[2] += PARAMETERS["CITY_ACTION_COOLDOWN"]
+        #unit actions other than move
+        for l_unit, in d_actions[ACTIONS["UNIT"]["BUILD_CITY"]]:
+            self._spawn_citytile( l_unit[1], l_unit[2], l_unit[3] )
+            l_unit[5] = l_unit[6] = l_unit[7] = 0
+            l_unit[4] += self.__unit_cooldown( l_unit )
+        for l_unit, in d_actions[ACTIONS["UNIT"]["PILLAGE_ROAD"]]:
+            self.an_road[l_unit[3], l_unit[2]] = max( self.an_road[l_unit[3], l_unit[2]] -PARAMETERS["PILLAGE_RATE"], PARAMETERS["MIN_ROAD"] )
+            l_unit[4] += self.__unit_cooldown( l_unit )
+        for l_unit, l_destination, n_code, n_amount in d_actions[ACTIONS["UNIT"]["TRANSFER_RESOURCE"]]:
+            n_field = _D_CARGO_FIELD[n_code]
+            n_amount = max( 0, min( n_amount, l_unit[n_field], self.__cargo_space( l_destination ) ) )
+            l_unit[n_field] -= n_amount
+            l_destination[n_field] += n_amount
+            l_unit[4] += self.__unit_cooldown( l_unit )
+        self._move_units( d_actions[ACTIONS["UNIT"]["MOVE"]], set_citytiles )
+
+        self._collect_resources()
+        self._deposit_resources()
+        if self.is_night():
+            self._night()
+        self._end_turn()
+        self.turn += 1
+
+        return False
+
+    def to_records( self ) -> dict:
+        """record arrays of the current state, in the order of the engine observations
+        Returns:
+            dict: identifier -> record array
+        """
+        d_records = dict()
+        d_records[INPUT_CONSTANTS.RESEARCH_POINTS] = np.array( list( enumerate( self.ln_research_points ) ), dtype=RECORD_DTYPES[INPUT_CONSTANTS.RESEARCH_POINTS] )
+        #resources x then y
+        an_x, an_y = np.nonzero( self.an_resource_type.T )
+        an_resources = np.zeros( len(an_x), dtype=RECORD_DTYPES[INPUT_CONSTANTS.RESOURCES] )
+        an_resources["type"] = self.an_resource_type[an_y, an_x]
+        an_resources["x"] = an_x
+        an_resources["y"] = an_y
+        an_resources["amount"] = self.an_resource_amount[an_y, an_x]
+        d_records[INPUT_CONSTANTS.RESOURCES] = an_resources
+        #units by team then id
+        an_units = np.array(
+            [ (l_unit[0], l_unit[1], n_id, l_unit[2], l_unit[3], l_unit[4], l_unit[5], l_unit[6], l_unit[7]) for n_id, l_unit in self.d_units.items() ],
+            dtype=RECORD_DTYPES[INPUT_CONSTANTS.UNITS] ).reshape(-1)
+        d_records[INPUT_CONSTANTS.UNITS] = np.sort( an_units, order=("team", "id") )
+        #cities and their citytiles in creation order
+        d_records[INPUT_CONSTANTS.CITY] = np.array(
+            [ (l_city[0], n_id, l_city[1], self.__light_upkeep( l_city )) for n_id, l_city in self.d_cities.items() ],
+            dtype=RECORD_DTYPES[INPUT_CONSTANTS.CITY] ).reshape(-1)
+        d_records[INPUT_CONSTANTS.CITY_TILES] = np.array(
+            [ (l_city[0], n_id, n_x, n_y, self.d_citytiles[(n_x, n_y)][2]) for n_id, l_city in self.d_cities.items() for n_x, n_y in l_city[2] ],
+            dtype=RECORD_DTYPES[INPUT_CONSTANTS.CITY_TILES] ).reshape(-1)
+        #roads y then x
+        an_y, an_x = np.nonzero( self.an_road )
+        an_roads = np.zeros( len(an_x), dtype=RECORD_DTYPES[INPUT_CONSTANTS.ROADS] )
+        an_roads["x"] = an_x
+        an_roads["y"] = an_y
+        an_roads["road"] = self.an_road[an_y, an_x]
+        d_records[INPUT_CONSTANTS.ROADS] = an_roads
+
+        return d_records
+
+    def snapshot( self ) -> GameSnapshot:
+        """Returns: GameSnapshot: current state, to be restored in a Game"""
+        return GameSnapshot( self.id, self.opponent_id, self.turn, self.n_width, self.n_height, self.to_records(), self.n_unit_id, self.n_city_id )
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   HELPERS
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def simulate_turn( ic_game : Game, ills_actions : list ) -> bool:
+    """Advance a Game by one turn in place
+    Args:
+        ic_game (Game): state of the game, updated to the next turn
+        ills_actions (list(list(str))): actions of player 0 and player 1
+    Returns:
+        bool: False=OK | True=FAIL
+    """
+    c_simulator = GameSimulator()
+    if c_simulator.from_game( ic_game ) or c_simulator.step( ills_actions ):
+        return True
+    ic_game.restore( c_simulator.snapshot() )
+    return False
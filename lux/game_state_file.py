@@ -0,0 +1,211 @@
+##  @package game_state_file
+#   Versioned binary file format for Game() states
+#   A file holds one game state as a fixed size header followed by the record arrays of lux.game_updates in RECORD_DTYPES order
+#   Files are loaded through a memory map, record arrays are read only views on the mapped file with no copy
+#
+#   LAYOUT (little endian)
+#   [0, 64)     HEADER_DTYPE. magic, version, player ids, turn, map size, number of records of each identifier, engine id counters
+#   [64, ...)   record arrays, each one starting on a multiple of 8 bytes
+#
+#   VERSIONS
+#   1   first version
+#   2   engine id counters. the header of version 1 is zero padded, its files load with unknown counters
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import logging
+import os
+import pickle
+
+import numpy as np
+
+from lux.game import Game
+from lux.game import GameSnapshot
+from lux.game_updates import RECORD_DTYPES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   FORMAT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+GAME_STATE_FILE_MAGIC = b"LUXG"
+GAME_STATE_FILE_VERSION = 2
+#versions that can be loaded
+_LN_LOADABLE_VERSIONS = [ 1, 2 ]
+#extension of the game state files
+GAME_STATE_FILE_EXTENSION = ".lux"
+
+#identifiers of the record arrays, in file order
+_LS_IDENTIFIERS = list( RECORD_DTYPES )
+#record layouts on file
+_LC_FILE_DTYPES = [ RECORD_DTYPES[s_identifier].newbyteorder("<") for s_identifier in _LS_IDENTIFIERS ]
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("reserved", "<u2"),
+    ("id", "<i4"),
+    ("opponent_id", "<i4"),
+    ("turn", "<i4"),
+    ("map_width", "<i4"),
+    ("map_height", "<i4"),
+    ("counts", "<u4", (len(_LS_IDENTIFIERS),)),
+    ("unit_id_count", "<u4"),
+    ("city_id_count", "<u4"),
+])
+#record arrays start after a padded header
+_N_HEADER_SIZE = 64
+#alignment of each record array
+_N_ALIGNMENT = 8
+
+def _align( in_offset : int ) -> int:
+    return (in_offset +_N_ALIGNMENT -1) // _N_ALIGNMENT * _N_ALIGNMENT
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   SAVE/LOAD
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def save_game_snapshot( ic_snapshot : GameSnapshot, is_file_name : str ) -> bool:
+    """save a game state snapshot to file
+    Args:
+        ic_snapshot (GameSnapshot): state to be saved
+        is_file_name (str): destination file name
+    Returns:
+        bool: false: success | true: fail
+    """
+    an_header = np.zeros( 1, dtype=HEADER_DTYPE )
+    an_header["magic"] = GAME_STATE_FILE_MAGIC
+    an_header["version"] = GAME_STATE_FILE_VERSION
+    an_header["id"] = ic_snapshot.id
+    an_header["opponent_id"] = ic_snapshot.opponent_id
+    an_header["turn"] = ic_snapshot.turn
+    an_header["map_width"] = ic_snapshot.map_width
+    an_header["map_height"] = ic_snapshot.map_height
+    an_header["counts"] = [ len(ic_snapshot.records[s_identifier]) for s_identifier in _LS_IDENTIFIERS ]
+    an_header["unit_id_count"] = ic_snapshot.unit_id_count
+    an_header["city_id_count"] = ic_snapshot.city_id_count
+
+    try:
+        with open(is_file_name, "wb") as opened_file:
+            opened_file.write( an_header.tobytes().ljust( _N_HEADER_SIZE, b"\0" ) )
+            for s_identifier, c_dtype in zip( _LS_IDENTIFIERS, _LC_FILE_DTYPES ):
+                y_records = ic_snapshot.records[s_identifier].astype( c_dtype, copy=False ).tobytes()
+                opened_file.write( y_records.ljust( _align(len(y_records)), b"\0" ) )
+
+    except OSError as problem:
+        logging.critical(f"Game state file: {problem}")
+        return True
+
+    return False
+
+def save_game_state( ic_game : Game, is_file_name : str ) -> bool:
+    """save a game state to file
+    Args:
+        ic_game (Game): game state to be saved
+        is_file_name (str): destination file name
+    Returns:
+        bool: false: success | true: fail
+    """
+    return save_game_snapshot( ic_game.snapshot(), is_file_name )
+
+def load_game_snapshot( is_file_name : str ) -> GameSnapshot:
+    """load a game state snapshot from file
+    The file is memory mapped, the record arrays of the snapshot are read only views on the file
+    Args:
+        is_file_name (str): source file name
+    Returns:
+        GameSnapshot: loaded game state | None if the file can't be read or has an unknown version
+    """
+    try:
+        ay_file = np.memmap( is_file_name, dtype=np.uint8, mode="r" )
+    except (OSError, ValueError) as problem:
+        logging.critical(f"Game state file: {problem}")
+        return None
+
+    if len(ay_file) < _N_HEADER_SIZE:
+        logging.critical(f"Game state file too short: {is_file_name}")
+        return None
+    c_header = np.frombuffer( ay_file, dtype=HEADER_DTYPE, count=1 )[0]
+    if c_header["magic"] != GAME_STATE_FILE_MAGIC:
+        logging.critical(f"Not a game state file: {is_file_name}")
+        return None
+    if c_header["version"] not in _LN_LOADABLE_VERSIONS:
+        logging.critical(f"Unsupported game state file version: {c_header['version']} | supported: {_LN_LOADABLE_VERSIONS} | {is_file_name}")
+        return None
+
+    d_records = dict()
+    n_offset = _N_HEADER_SIZE
+    for s_identifier, c_dtype, n_count in zip( _LS_IDENTIFIERS, _LC_FILE_DTYPES, c_header["counts"].tolist() ):
+        #a truncated or corrupt file holds fewer records than its header counts
+        if n_offset +n_count *c_dtype.itemsize > len(ay_file):
+            logging.critical(f"Game state file truncated: {is_file_name} | {s_identifier}: {n_count} records at offset {n_offset} | file size: {len(ay_file)}")
+            return None
+        d_records[s_identifier] = np.frombuffer( ay_file, dtype=c_dtype, count=n_count, offset=n_offset )
+        n_offset += _align( n_count *c_dtype.itemsize )
+
+    return GameSnapshot( int(c_header["id"]), int(c_header["opponent_id"]), int(c_header["turn"]), int(c_header["map_width"]), int(c_header["map_height"]), d_records, int(c_header["unit_id_count"]), int(c_header["city_id_count"]) )
+
+def load_game_state( is_file_name : str ) -> Game:
+    """load a game state from file
+    Args:
+        is_file_name (str): source file name
+    Returns:
+        Game: loaded game state | None if the file can't be loaded
+    """
+    c_snapshot = load_game_snapshot( is_file_name )
+    if c_snapshot is None:
+        return None
+    c_game = Game()
+    c_game.restore( c_snapshot )
+    return c_game
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   CONVERTER
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def convert_pickle_game_state( is_pickle_name : str, is_file_name : str ) -> bool:
+    """convert a pickled Game() into a game state file
+    Args:
+        is_pickle_name (str): source pickle. e.g. saved_game_states/backup_100.bin
+        is_file_name (str): destination game state file
+    Returns:
+        bool: false: success | true: fail
+    """
+    try:
+        with open(is_pickle_name, "rb") as opened_file:
+            c_game = pickle.load( opened_file )
+    except (OSError, pickle.UnpicklingError) as problem:
+        logging.critical(f"Pickle: {problem}")
+        return True
+
+    return save_game_state( c_game, is_file_name )
+
+def convert_pickle_folder( is_folder : str, is_extension : str = ".bin" ) -> bool:
+    """convert all pickled Game() of a folder into game state files with the same name
+    e.g. backup_100.bin -> backup_100.lux
+    Args:
+        is_folder (str): folder with the pickles
+        is_extension (str): extension of the pickles
+    Returns:
+        bool: false: success | true: at least one conversion failed
+    """
+    x_fail = False
+    for s_file in sorted( os.listdir( is_folder ) ):
+        s_name, s_extension = os.path.splitext( s_file )
+        if s_extension != is_extension:
+            continue
+        s_destination = os.path.join( is_folder, s_name +GAME_STATE_FILE_EXTENSION )
+        x_result = convert_pickle_game_state( os.path.join( is_folder, s_file ), s_destination )
+        logging.info(f"{s_file} -> {s_destination} | {'FAIL' if x_result else 'OK'}")
+        x_fail |= x_result
+    return x_fail
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   MAIN
+#--------------------------------------------------------------------------------------------------------------------------------
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+    logging.basicConfig( level=logging.INFO, format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s' )
+    convert_pickle_folder( "saved_game_states" )
@@ -0,0 +1,146 @@
+##  @package game_updates
+#   Bulk parser for the observation updates
+#   The update strings of a turn are grouped by identifier in a single pass, then each group is decoded into a typed numpy record array
+#   The record arrays feed GameMapArray and the unit table of Game directly, without going through per-line string conversions
+#
+#   e.g.
+#   ["rp 0 10", "r wood 0 3 800", "u 0 0 u_1 12 12 2 84 0 0", "ccd 12 12 6", "D_DONE"]
+#   {
+#       "rp" :  [(0, 10)],
+#       "r" :   [(1, 0, 3, 800)],
+#       "u" :   [(0, 0, 1, 12, 12, 2.0, 84, 0, 0)],
+#       "c" :   [],
+#       "ct" :  [],
+#       "ccd" : [(12, 12, 6.0)],
+#   }
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   IMPORT
+#--------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+#import game constant and make them available to the program
+from lux.constants import Constants
+INPUT_CONSTANTS = Constants.INPUT_CONSTANTS
+
+from lux.game_map import RESOURCE_TYPE_CODES
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   RECORDS
+#--------------------------------------------------------------------------------------------------------------------------------
+#   Unit and city ids are stored by their numeric part. u_12 -> 12 | c_3 -> 3
+#   Resource types are stored by their code in lux.game_map.RESOURCE_TYPE_CODES
+
+RESEARCH_POINTS_DTYPE = np.dtype([ ("team", np.int8), ("points", np.int32) ])
+"""rp team points"""
+RESOURCES_DTYPE = np.dtype([ ("type", np.int8), ("x", np.int16), ("y", np.int16), ("amount", np.int32) ])
+"""r type x y amount"""
+UNITS_DTYPE = np.dtype([ ("type", np.int8), ("team", np.int8), ("id", np.int32), ("x", np.int16), ("y", np.int16), ("cooldown", np.float64), ("wood", np.int32), ("coal", np.int32), ("uranium", np.int32) ])
+"""u type team id x y cooldown wood coal uranium"""
+CITIES_DTYPE = np.dtype([ ("team", np.int8), ("id", np.int32), ("fuel", np.float64), ("light_upkeep", np.float64) ])
+"""c team id fuel light_upkeep"""
+CITYTILES_DTYPE = np.dtype([ ("team", np.int8), ("city_id", np.int32), ("x", np.int16), ("y", np.int16), ("cooldown", np.float64) ])
+"""ct team city_id x y cooldown"""
+ROADS_DTYPE = np.dtype([ ("x", np.int16), ("y", np.int16), ("road", np.float64) ])
+"""ccd x y road"""
+
+#record layout of each identifier
+RECORD_DTYPES = {
+    INPUT_CONSTANTS.RESEARCH_POINTS : RESEARCH_POINTS_DTYPE,
+    INPUT_CONSTANTS.RESOURCES : RESOURCES_DTYPE,
+    INPUT_CONSTANTS.UNITS : UNITS_DTYPE,
+    INPUT_CONSTANTS.CITY : CITIES_DTYPE,
+    INPUT_CONSTANTS.CITY_TILES : CITYTILES_DTYPE,
+    INPUT_CONSTANTS.ROADS : ROADS_DTYPE,
+}
+
+#string tokens replaced by numbers before decoding a group. resource names become their code, ids lose their prefix
+_TOKEN_REPLACEMENTS = {
+    INPUT_CONSTANTS.RESOURCES : tuple( (s_type, str(n_code)) for s_type, n_code in RESOURCE_TYPE_CODES.items() ),
+    INPUT_CONSTANTS.UNITS : ( ("u_", ""), ),
+    INPUT_CONSTANTS.CITY : ( ("c_", ""), ),
+    INPUT_CONSTANTS.CITY_TILES : ( ("c_", ""), ),
+}
+
+#--------------------------------------------------------------------------------------------------------------------------------
+#   PARSER
+#--------------------------------------------------------------------------------------------------------------------------------
+
+def empty_records() -> dict:
+    """Returns: dict: one empty record array per identifier"""
+    return { s_identifier : np.zeros( 0, dtype=c_dtype ) for s_identifier, c_dtype in RECORD_DTYPES.items() }
+
+def _decode_group( is_identifier : str, is_fields : str, in_lines : int ) -> np.ndarray:
+    """decode all the lines of one identifier into a record array
+    Args:
+        is_identifier (str): identifier of the lines. e.g. "u"
+        is_fields (str): lines stripped of the identifier and joined by spaces. e.g. "0 0 u_1 12 12 2 84 0 0 0 1 u_2 3 3 0 0 0 0"
+        in_lines (int): number of lines joined in is_fields
+    Returns:
+        np.ndarray: record array with RECORD_DTYPES[is_identifier] layout
+    """
+    c_dtype = RECORD_DTYPES[is_identifier]
+    an_records = np.zeros( in_lines, dtype=c_dtype )
+    if in_lines == 0:
+        return an_records
+    for s_token, s_number in _TOKEN_REPLACEMENTS.get( is_identifier, () ):
+        is_fields = is_fields.replace( s_token, s_number )
+    #decode all numbers at once, one row per line. int(float()) truncation like Game._update
+    an_fields = np.fromstring( is_fields, dtype=np.float64, sep=" " ).reshape( in_lines, len(c_dtype.names) )
+    for n_column, s_name in enumerate( c_dtype.names ):
+        an_records[s_name] = an_fields[:, n_column]
+    return an_records
+
+def _group_lines( ils_updates : list ) -> dict:
+    """group the lines by identifier one line at a time. used when the identifiers are not in contiguous blocks
+    Returns:
+        dict: identifier -> (fields joined by spaces, number of lines)
+    """
+    dls_groups = { s_identifier : list() for s_identifier in RECORD_DTYPES }
+    for s_update in ils_updates:
+        s_identifier, _, s_fields = s_update.partition(" ")
+        ls_group = dls_groups.get( s_identifier )
+        if ls_group is not None:
+            ls_group.append( s_fields )
+    return { s_identifier : ( " ".join(ls_fields), len(ls_fields) ) for s_identifier, ls_fields in dls_groups.items() }
+
+def _group_blocks( ils_updates : list ) -> dict:
+    """group the lines by identifier with string searches on the whole turn
+    The engine emits the lines of each identifier in one contiguous block, so each group is a slice of the joined text.
+    Returns:
+        dict: identifier -> (fields joined by spaces, number of lines) | None if an identifier is not in a contiguous block
+    """
+    s_text = "\n" + "\n".join( ils_updates )
+    dtn_groups = dict()
+    for s_identifier in RECORD_DTYPES:
+        s_key = "\n" + s_identifier + " "
+        n_first = s_text.find( s_key )
+        if n_first < 0:
+            dtn_groups[s_identifier] = ( "", 0 )
+            continue
+        n_end = s_text.find( "\n", s_text.rfind( s_key ) +1 )
+        s_block = s_text[n_first:] if n_end < 0 else s_text[n_first:n_end]
+        n_lines = s_block.count( "\n" )
+        #another line is interleaved in the block
+        if s_block.count( s_key ) != n_lines:
+            return None
+        dtn_groups[s_identifier] = ( s_block.replace( s_key, " " ), n_lines )
+    return dtn_groups
+
+def parse_updates( ils_updates : list ) -> dict:
+    """Group the observation updates of a turn by identifier and decode each group into a record array
+    Lines after INPUT_CONSTANTS.DONE and lines with an unknown identifier are ignored
+    Args:
+        ils_updates (list(str)): observation["updates"] of a turn
+    Returns:
+        dict: identifier -> record array. e.g. { "u" : np.ndarray(UNITS_DTYPE) }
+    """
+    if INPUT_CONSTANTS.DONE in ils_updates:
+        ils_updates = ils_updates[:ils_updates.index( INPUT_CONSTANTS.DONE )]
+    #one pass over the joined text per identifier, falling back to one pass over the lines
+    dtn_groups = _group_blocks( ils_updates )
+    if dtn_groups is None:
+        dtn_groups = _group_lines( ils_updates )
+    #decode each group in one go
+    return { s_identifier : _decode_group( s_identifier, s_fields, n_lines ) for s_identifier, (s_fields, n_lines) in dtn_groups.items() }
@@ -1,30 +1,49 @@
-import logging
-
-from big_no_brainer.perception import Perception
-from big_no_brainer.perception import load_perceptions
-from big_no_brainer.perception import gify_list_perception
-
-def preception_to_gif( is_filename : str() ):
-
-    filename_pkl = f"{is_filename}.pkl"
-    print(f"loading {filename_pkl}")
-
-    lc_perception = load_perceptions( filename_pkl )
-    print(f"loaded {len(lc_perception)} perceptions for {filename_pkl}")
-
-    filename_gif = f"{is_filename}.gif"
-    gify_list_perception( lc_perception, filename_gif, 10 )
-
-    return
-
-#   if interpreter has the intent of executing this file
-if __name__ == "__main__":
-
-    logging.basicConfig(
-        #level of debug to show
-        level=logging.DEBUG,
-        #header of the debug message
-        format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s',
-    )
-
-    preception_to_gif("citytile_agent0")
+import logging
+
+from big_no_brainer.perception_store import PerceptionStore
+from big_no_brainer.replay import Replay
+from big_no_brainer.replay import mats_to_gif
+
+REPLAY_FOLDER = "replays"
+REPLAY_FILE = "27883823.json"
+STORE_FOLDER = "perception_store"
+
+def replay_to_store( ic_store : PerceptionStore, is_folder : str, is_filename : str, in_player : int = 0 ) -> bool:
+    """append the Perception and Action of a replay.json to a store"""
+    c_replay = Replay( ic_store.c_dtype_policy )
+    if c_replay.json_load( is_folder, is_filename ):
+        return True
+    lc_perceptions, lc_action_p0, lc_action_p1 = c_replay.json_to_perception_action()
+    return ic_store.append_perceptions( is_filename, lc_perceptions, lc_action_p0 if in_player == 0 else lc_action_p1, in_player )
+
+def preception_to_gif( is_folder : str, in_game, in_max_frames : int = -1 ):
+
+    #opening maps the files, only the frames drawn are read from disk
+    c_store = PerceptionStore( is_folder )
+    print(f"opened {c_store}")
+
+    c_game = c_store.game( in_game )
+    if c_game is None:
+        return
+    print(f"drawing {len(c_game.mats)} perceptions of {c_game.game}")
+
+    filename_gif = f"{c_game.game}.gif"
+    mats_to_gif( c_game.mats, filename_gif, 10, in_max_frames )
+
+    return
+
+#   if interpreter has the intent of executing this file
+if __name__ == "__main__":
+
+    logging.basicConfig(
+        #level of debug to show
+        level=logging.DEBUG,
+        #header of the debug message
+        format='[%(asctime)s] %(module)s:%(lineno)d %(levelname)s> %(message)s',
+    )
+
+    c_store = PerceptionStore( STORE_FOLDER )
+    if c_store.game_index( REPLAY_FILE ) is None:
+        replay_to_store( c_store, REPLAY_FOLDER, REPLAY_FILE )
+
+    preception_to_gif( STORE_FOLDER, REPLAY_FILE, 20 )